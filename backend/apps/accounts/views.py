@@ -16,6 +16,7 @@ from .serializers import (
     ParentStudentRelationshipSerializer
 )
 from apps.core.permissions import IsTeacher, IsStudent, IsParent
+from apps.schools.services.scope_service import UserScopeService
 
 
 class RegisterView(generics.CreateAPIView):
@@ -84,7 +85,7 @@ class StudentProfileViewSet(viewsets.ModelViewSet):
             return StudentProfile.objects.all()
         elif user.role == 'parent':
             # Parents can view their children
-            student_ids = user.children_relationships.values_list('student_id', flat=True)
+            student_ids = UserScopeService.for_request(self.request).children_ids
             return StudentProfile.objects.filter(user_id__in=student_ids)
         return StudentProfile.objects.all()
 
@@ -14,7 +14,7 @@ from django.db.models import Avg
 from .models import Quiz, Question, QuizAttempt
 from .serializers import QuizSerializer, QuestionSerializer, QuizAttemptSerializer
 from apps.core.permissions import IsTeacher, IsStudent
-from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 
 
 class QuizViewSet(viewsets.ModelViewSet):
@@ -35,9 +35,7 @@ class QuizViewSet(viewsets.ModelViewSet):
         if user.role == 'teacher':
             return Quiz.objects.filter(teacher=user, is_deleted=False)
         elif user.role == 'student':
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user, is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             return Quiz.objects.filter(
                 classroom_id__in=enrolled_classrooms,
                 is_published=True,
@@ -126,10 +124,7 @@ class QuestionViewSet(viewsets.ModelViewSet):
             return Question.objects.filter(quiz__teacher=user, is_deleted=False)
         elif user.role == 'student':
             # Students can see questions from published quizzes in enrolled classrooms
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             return Question.objects.filter(
                 quiz__classroom_id__in=enrolled_classrooms,
                 quiz__is_published=True,
@@ -3,6 +3,7 @@ Admin configuration for assignments app
 """
 
 from django.contrib import admin
+from apps.core.pagination import EstimatedCountPaginator
 from .models import (
     Assignment,
     AssignmentQuestion,
@@ -229,6 +230,9 @@ class GradingAuditLogAdmin(admin.ModelAdmin):
     list_filter = ['action', 'timestamp']
     search_fields = ['grade__submission__student__email', 'performed_by__email']
     readonly_fields = ['id', 'timestamp']
+    list_select_related = ['grade__submission__student', 'performed_by']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def has_add_permission(self, request):
         return False  # Audit logs should only be created programmatically
@@ -33,6 +33,7 @@ from .serializers import (
 from .services import ai_assignment_service
 from apps.core.permissions import IsTeacher, IsStudent, IsAdmin
 from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 from apps.lectures.models import Lecture
 
 import logging
@@ -58,9 +59,7 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         if user.role == 'teacher':
             return Assignment.objects.filter(created_by=user)
         elif user.role == 'student':
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user, is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             return Assignment.objects.filter(
                 classroom_id__in=enrolled_classrooms,
                 is_published=True
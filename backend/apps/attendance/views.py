@@ -17,6 +17,7 @@ from .serializers import (
 )
 from apps.core.permissions import IsTeacher
 from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 
 
 class AttendanceSessionViewSet(viewsets.ModelViewSet):
@@ -91,7 +92,7 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
         elif user.role == 'student':
             return AttendanceRecord.objects.filter(student=user)
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return AttendanceRecord.objects.filter(student_id__in=children)
         elif user.role == 'admin':
             return AttendanceRecord.objects.all()
@@ -116,7 +117,7 @@ class AttendanceStatisticsViewSet(viewsets.ReadOnlyModelViewSet):
         elif user.role == 'student':
             return AttendanceStatistics.objects.filter(student=user)
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return AttendanceStatistics.objects.filter(student_id__in=children)
         elif user.role == 'admin':
             return AttendanceStatistics.objects.all()
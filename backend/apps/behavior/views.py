@@ -18,6 +18,7 @@ from .serializers import (
 )
 from apps.core.permissions import IsTeacher
 from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 
 
 class BehaviorIncidentViewSet(viewsets.ModelViewSet):
@@ -63,7 +64,7 @@ class BehaviorIncidentViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see their children's incidents
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return BehaviorIncident.objects.filter(
                 student_id__in=children,
                 is_deleted=False
@@ -245,7 +246,7 @@ class BehaviorNoteViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see their children's notes (if visible)
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return BehaviorNote.objects.filter(
                 student_id__in=children,
                 visible_to_parent=True,
@@ -301,7 +302,7 @@ class BehaviorStatisticsViewSet(viewsets.ReadOnlyModelViewSet):
         
         elif user.role == 'parent':
             # Parents see their children's stats
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return BehaviorStatistics.objects.filter(
                 student_id__in=children
             ).select_related('student', 'classroom')
@@ -3,7 +3,10 @@ Admin configuration for communication app
 """
 
 from django.contrib import admin
-from .models import Conversation, Message, MessageAttachment, MessageRead, Announcement, AnnouncementRead
+from .models import (
+    Conversation, ConversationReadState, Message, MessageAttachment,
+    Announcement, AnnouncementRead
+)
 
 
 @admin.register(Conversation)
@@ -35,12 +38,11 @@ class MessageAttachmentAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'file_type', 'file_size']
 
 
-@admin.register(MessageRead)
-class MessageReadAdmin(admin.ModelAdmin):
-    list_display = ['user', 'message', 'read_at']
-    list_filter = ['read_at']
+@admin.register(ConversationReadState)
+class ConversationReadStateAdmin(admin.ModelAdmin):
+    list_display = ['user', 'conversation', 'last_read_at', 'unread_count']
     search_fields = ['user__email']
-    readonly_fields = ['created_at', 'read_at']
+    readonly_fields = ['created_at', 'updated_at']
 
 
 @admin.register(Announcement)
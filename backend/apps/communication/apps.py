@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CommunicationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.communication'
+
+    def ready(self):
+        import apps.communication.signals
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def seed_read_states(apps, schema_editor):
+    """Create a read state per participant with the current unread count"""
+    Conversation = apps.get_model('communication', 'Conversation')
+    Message = apps.get_model('communication', 'Message')
+    MessageRead = apps.get_model('communication', 'MessageRead')
+    ConversationReadState = apps.get_model('communication', 'ConversationReadState')
+
+    messages = Message.objects.filter(is_deleted=False)
+    totals = dict(
+        messages.values('conversation_id').annotate(n=models.Count('id')).values_list('conversation_id', 'n')
+    )
+    sent = {
+        (row['conversation_id'], row['sender_id']): row['n']
+        for row in messages.values('conversation_id', 'sender_id').annotate(n=models.Count('id'))
+    }
+    read = {
+        (row['message__conversation_id'], row['user_id']): row['n']
+        for row in MessageRead.objects.filter(
+            message__is_deleted=False
+        ).exclude(
+            user_id=models.F('message__sender_id')
+        ).values('message__conversation_id', 'user_id').annotate(n=models.Count('id'))
+    }
+
+    batch = []
+    memberships = Conversation.participants.through.objects.values_list('conversation_id', 'user_id')
+    for conversation_id, user_id in memberships.iterator():
+        key = (conversation_id, user_id)
+        unread = totals.get(conversation_id, 0) - sent.get(key, 0) - read.get(key, 0)
+        batch.append(ConversationReadState(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            unread_count=max(0, unread)
+        ))
+        if len(batch) >= 1000:
+            ConversationReadState.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ConversationReadState.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('communication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationReadState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_states', to='communication.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_read_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conversation Read State',
+                'verbose_name_plural': 'Conversation Read States',
+                'unique_together': {('conversation', 'user')},
+            },
+        ),
+        migrations.RunPython(seed_read_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:00
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def compact_message_reads(apps, schema_editor):
+    """
+    Fold MessageRead rows into one watermark per (conversation, participant):
+    the newest message each participant had read. Unread counts are
+    recomputed against the new watermarks.
+    """
+    Message = apps.get_model('communication', 'Message')
+    MessageRead = apps.get_model('communication', 'MessageRead')
+    ConversationReadState = apps.get_model('communication', 'ConversationReadState')
+
+    marks = defaultdict(dict)
+    rows = MessageRead.objects.exclude(
+        user_id=models.F('message__sender_id')
+    ).values('message__conversation_id', 'user_id').annotate(
+        last_read_at=models.Max('message__created_at')
+    ).order_by()
+    for row in rows.iterator():
+        marks[row['message__conversation_id']][row['user_id']] = row['last_read_at']
+
+    batch = []
+    for conversation_id, watermarks in marks.items():
+        messages = list(Message.objects.filter(
+            conversation_id=conversation_id,
+            is_deleted=False
+        ).values_list('created_at', 'sender_id'))
+
+        states = ConversationReadState.objects.filter(
+            conversation_id=conversation_id,
+            user_id__in=watermarks.keys()
+        )
+        for state in states:
+            state.last_read_at = watermarks[state.user_id]
+            state.unread_count = sum(
+                1 for created_at, sender_id in messages
+                if sender_id != state.user_id and created_at > state.last_read_at
+            )
+            batch.append(state)
+
+        if len(batch) >= 1000:
+            ConversationReadState.objects.bulk_update(batch, ['last_read_at', 'unread_count'])
+            batch = []
+    ConversationReadState.objects.bulk_update(batch, ['last_read_at', 'unread_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0002_conversationreadstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationreadstate',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, help_text='Read watermark: created_at of the last message read', null=True),
+        ),
+        migrations.RunPython(compact_message_reads, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='MessageRead',
+        ),
+    ]
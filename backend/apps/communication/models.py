@@ -88,22 +88,26 @@ class MessageAttachment(TimeStampedModel):
         return f"{self.file_name} - {self.message}"
 
 
-class MessageRead(TimeStampedModel):
-    """Track who has read which messages"""
-    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='message_reads')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='read_messages')
-    read_at = models.DateTimeField(auto_now_add=True)
+class ConversationReadState(TimeStampedModel):
+    """
+    Per-participant read state for a conversation.
+    Messages created at or before last_read_at count as read, so read receipts
+    are derived by comparison instead of stored per message. unread_count is
+    kept in step on send/read so inbox listings never count messages.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='read_states')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_read_states')
+    
+    last_read_at = models.DateTimeField(null=True, blank=True, help_text='Read watermark: created_at of the last message read')
+    unread_count = models.PositiveIntegerField(default=0)
     
     class Meta:
-        unique_together = ['message', 'user']
-        verbose_name = 'Message Read'
-        verbose_name_plural = 'Message Reads'
-        indexes = [
-            models.Index(fields=['message', 'user']),
-        ]
+        unique_together = ['conversation', 'user']
+        verbose_name = 'Conversation Read State'
+        verbose_name_plural = 'Conversation Read States'
     
     def __str__(self):
-        return f"{self.user.get_full_name()} read message at {self.read_at}"
+        return f"{self.user.get_full_name()} - {self.unread_count} unread"
 
 
 class Announcement(TimeStampedModel, SoftDeleteModel):
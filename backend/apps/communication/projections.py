@@ -0,0 +1,99 @@
+"""
+Read-only projections for communication app
+"""
+
+from collections import defaultdict
+
+from apps.accounts.models import User
+from apps.core.projections import Projection, full_name
+from .models import Announcement, AnnouncementRead, Message, MessageAttachment
+from .serializers import MessageAttachmentSerializer
+from .services.inbox_service import InboxService
+
+
+class MessageProjection(Projection):
+    """Message list rows, as MessageSerializer renders them"""
+    model = Message
+    related = ('sender__first_name', 'sender__last_name', 'conversation__title')
+    method_fields = (
+        'sender_name', 'conversation_title', 'attachments',
+        'is_read_by_current_user', 'read_by_count'
+    )
+
+    def prepare(self, rows):
+        """Load watermarks, untitled conversation names and attachments for the page"""
+        conversation_ids = {row['conversation'] for row in rows}
+        self.watermarks = InboxService.watermarks_by_conversation(conversation_ids)
+
+        # Untitled conversations are named after their first three participants
+        untitled = {row['conversation'] for row in rows if not row['conversation__title']}
+        self.participant_names = defaultdict(list)
+        if untitled:
+            for conversation_id, first_name, last_name in User.objects.filter(
+                conversations__in=untitled
+            ).values_list('conversations', 'first_name', 'last_name'):
+                self.participant_names[conversation_id].append(full_name(first_name, last_name))
+
+        self.attachments = defaultdict(list)
+        attachments = MessageAttachment.objects.filter(message_id__in=[row['id'] for row in rows])
+        for attachment in MessageAttachmentSerializer(attachments, many=True, context=self.context).data:
+            self.attachments[attachment['message']].append(attachment)
+
+        request = self.context.get('request')
+        self.user_id = request.user.pk if request and request.user.is_authenticated else None
+
+    def get_sender_name(self, row):
+        return full_name(row['sender__first_name'], row['sender__last_name'])
+
+    def get_conversation_title(self, row):
+        return row['conversation__title'] or ', '.join(self.participant_names[row['conversation']][:3])
+
+    def get_attachments(self, row):
+        return self.attachments[row['id']]
+
+    def get_is_read_by_current_user(self, row):
+        if self.user_id is None:
+            return False
+        return InboxService.is_read(
+            row['sender'], row['created_at'], self.user_id, self.watermarks[row['conversation']]
+        )
+
+    def get_read_by_count(self, row):
+        return InboxService.read_by_count(row['sender'], row['created_at'], self.watermarks[row['conversation']])
+
+
+class AnnouncementProjection(Projection):
+    """Announcement list rows, as AnnouncementSerializer renders them"""
+    model = Announcement
+    related = (
+        'sent_by__first_name', 'sent_by__last_name',
+        'classroom__subject__name', 'classroom__grade', 'classroom__section'
+    )
+    method_fields = ('sent_by_name', 'classroom_name', 'is_read_by_current_user', 'read_percentage')
+
+    def prepare(self, rows):
+        """Load which announcements on the page the user has read"""
+        self.read_ids = set()
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            self.read_ids = set(AnnouncementRead.objects.filter(
+                announcement_id__in=[row['id'] for row in rows],
+                user=request.user,
+                read_at__isnull=False
+            ).values_list('announcement_id', flat=True))
+
+    def get_sent_by_name(self, row):
+        return full_name(row['sent_by__first_name'], row['sent_by__last_name'])
+
+    def get_classroom_name(self, row):
+        if row['classroom'] is None:
+            return None
+        return f"{row['classroom__subject__name']} - Grade {row['classroom__grade']}{row['classroom__section']}"
+
+    def get_is_read_by_current_user(self, row):
+        return row['id'] in self.read_ids
+
+    def get_read_percentage(self, row):
+        if row['total_recipients'] == 0:
+            return 0
+        return round((row['read_count'] / row['total_recipients']) * 100, 2)
@@ -4,11 +4,17 @@ Serializers for communication app
 
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Conversation, Message, MessageAttachment, MessageRead, Announcement, AnnouncementRead
+from .models import Conversation, Message, MessageAttachment, Announcement, AnnouncementRead
+from .services.inbox_service import InboxService
 
 
 class ConversationSerializer(serializers.ModelSerializer):
-    """Serializer for conversations"""
+    """
+    Serializer for conversations
+
+    Reads unread counts and last-message previews from the annotations
+    added by InboxService.annotate() when present.
+    """
     participant_names = serializers.SerializerMethodField()
     participants_info = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
@@ -34,18 +40,26 @@ class ConversationSerializer(serializers.ModelSerializer):
         ]
     
     def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_total'):
+            return obj.unread_total
+        
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return 0
         
-        # Count messages user hasn't read
-        return obj.messages.exclude(
-            sender=request.user
-        ).exclude(
-            message_reads__user=request.user
-        ).count()
+        return InboxService.unread_count(obj, request.user)
     
     def get_last_message_preview(self, obj):
+        if hasattr(obj, 'last_message_created_at'):
+            if obj.last_message_created_at is None:
+                return None
+            sender_name = f"{obj.last_message_sender_first_name} {obj.last_message_sender_last_name}"
+            return {
+                'sender': sender_name.strip(),
+                'text': obj.last_message_text,
+                'timestamp': obj.last_message_created_at
+            }
+        
         last_message = obj.messages.filter(is_deleted=False).last()
         if not last_message:
             return None
@@ -75,7 +89,12 @@ class MessageAttachmentSerializer(serializers.ModelSerializer):
 
 
 class MessageSerializer(serializers.ModelSerializer):
-    """Serializer for messages"""
+    """
+    Serializer for messages
+
+    Read receipts are derived from participants' read watermarks, loaded
+    once per conversation and shared through the serializer context.
+    """
     sender_name = serializers.CharField(source='sender.get_full_name', read_only=True)
     conversation_title = serializers.CharField(source='conversation.__str__', read_only=True)
     attachments = MessageAttachmentSerializer(many=True, read_only=True)
@@ -92,14 +111,19 @@ class MessageSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        # Sender always "read" their own message
-        if obj.sender == request.user:
-            return True
-        
-        return MessageRead.objects.filter(message=obj, user=request.user).exists()
+        return InboxService.is_read(
+            obj.sender_id, obj.created_at, request.user.pk, self._watermarks(obj.conversation_id)
+        )
     
     def get_read_by_count(self, obj):
-        return obj.message_reads.count()
+        return InboxService.read_by_count(obj.sender_id, obj.created_at, self._watermarks(obj.conversation_id))
+    
+    def _watermarks(self, conversation_id):
+        """{user_id: last_read_at} for the conversation, cached for the request"""
+        cache = self.context.setdefault('read_watermarks', {})
+        if conversation_id not in cache:
+            cache[conversation_id] = InboxService.watermarks(conversation_id)
+        return cache[conversation_id]
     
     def validate(self, data):
         # Must have message text or attachment
@@ -122,7 +146,7 @@ class MessageSerializer(serializers.ModelSerializer):
 class AnnouncementSerializer(serializers.ModelSerializer):
     """Serializer for announcements"""
     sent_by_name = serializers.CharField(source='sent_by.get_full_name', read_only=True)
-    classroom_name = serializers.CharField(source='classroom.__str__', read_only=True)
+    classroom_name = serializers.CharField(source='classroom', read_only=True)
     is_read_by_current_user = serializers.SerializerMethodField()
     read_percentage = serializers.SerializerMethodField()
     
@@ -166,16 +190,6 @@ class AnnouncementSerializer(serializers.ModelSerializer):
         return data
 
 
-class MessageReadSerializer(serializers.ModelSerializer):
-    """Serializer for message read receipts"""
-    user_name = serializers.CharField(source='user.get_full_name', read_only=True)
-    
-    class Meta:
-        model = MessageRead
-        fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'user', 'read_at']
-
-
 class AnnouncementReadSerializer(serializers.ModelSerializer):
     """Serializer for announcement read receipts"""
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
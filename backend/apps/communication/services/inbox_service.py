@@ -0,0 +1,261 @@
+"""
+Inbox Service
+
+Builds the conversation list from one annotated queryset and keeps the
+per-participant read state (ConversationReadState) in step as messages are
+sent and read. Listing an inbox costs a fixed number of queries however
+many conversations it holds.
+
+Read receipts are watermarks: a participant has read every message created
+at or before their last_read_at, so read/unread and read-by counts are
+derived by comparison rather than stored per message.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from django.db.models import Count, F, OuterRef, Prefetch, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+from apps.accounts.models import User
+from apps.core.realtime import RealtimeService
+from ..models import Conversation, ConversationReadState, Message
+
+
+class InboxService:
+    """Service for inbox listings and unread counters"""
+
+    PREVIEW_LENGTH = 100
+
+    @classmethod
+    def annotate(cls, queryset: QuerySet, user) -> QuerySet:
+        """
+        Annotate conversations with the user's unread count and the last
+        message preview, and prefetch participants
+        """
+        state = ConversationReadState.objects.filter(
+            conversation=OuterRef('pk'),
+            user=user
+        )
+        last_message = Message.objects.filter(
+            conversation=OuterRef('pk'),
+            is_deleted=False
+        ).order_by('-created_at')
+
+        return queryset.annotate(
+            unread_total=Coalesce(Subquery(state.values('unread_count')[:1]), Value(0)),
+            last_message_text=Subquery(
+                last_message.annotate(
+                    preview=Substr('message_text', 1, cls.PREVIEW_LENGTH)
+                ).values('preview')[:1]
+            ),
+            last_message_created_at=Subquery(last_message.values('created_at')[:1]),
+            last_message_sender_first_name=Subquery(last_message.values('sender__first_name')[:1]),
+            last_message_sender_last_name=Subquery(last_message.values('sender__last_name')[:1]),
+        ).prefetch_related(
+            Prefetch(
+                'participants',
+                queryset=User.objects.only('id', 'first_name', 'last_name', 'role', 'email')
+            )
+        )
+
+    @classmethod
+    def unread_count(cls, conversation, user) -> int:
+        """Unread count for a conversation (or id) that was not loaded through annotate()"""
+        return ConversationReadState.objects.filter(
+            conversation_id=getattr(conversation, 'pk', conversation),
+            user=user
+        ).values_list('unread_count', flat=True).first() or 0
+
+    @classmethod
+    def add_participants(cls, conversation_ids: Iterable, user_ids: Iterable) -> None:
+        """Create read states for new participants (they start with nothing unread)"""
+        ConversationReadState.objects.bulk_create(
+            [
+                ConversationReadState(conversation_id=conversation_id, user_id=user_id)
+                for conversation_id in conversation_ids
+                for user_id in user_ids
+            ],
+            ignore_conflicts=True
+        )
+
+    @classmethod
+    def remove_participants(cls, conversation_ids: Iterable, user_ids: Iterable = None) -> None:
+        """Drop read states for participants leaving (all of them if user_ids is None)"""
+        states = ConversationReadState.objects.filter(conversation_id__in=conversation_ids)
+        if user_ids is not None:
+            states = states.filter(user_id__in=user_ids)
+        states.delete()
+
+    @classmethod
+    def record_message(cls, message: Message) -> None:
+        """A message was sent: it is unread for everyone but the sender"""
+        ConversationReadState.objects.filter(
+            conversation_id=message.conversation_id
+        ).exclude(
+            user_id=message.sender_id
+        ).update(unread_count=F('unread_count') + 1)
+
+    @classmethod
+    def push_message(cls, message: Message) -> None:
+        """Push a new message, and the unread bump it causes, to the other participants"""
+        recipient_ids = ConversationReadState.objects.filter(
+            conversation_id=message.conversation_id
+        ).exclude(
+            user_id=message.sender_id
+        ).values_list('user_id', flat=True)
+
+        event = {
+            'type': 'message.created',
+            'conversation_id': str(message.conversation_id),
+            'message': {
+                'id': str(message.pk),
+                'sender_id': str(message.sender_id),
+                'sender_name': message.sender.get_full_name(),
+                'message_text': message.message_text[:cls.PREVIEW_LENGTH],
+                'created_at': message.created_at.isoformat(),
+            },
+            'unread_delta': 1,
+        }
+        RealtimeService.send_on_commit((str(user_id), event) for user_id in recipient_ids)
+
+    @staticmethod
+    def _unread_by(message: Message) -> QuerySet:
+        """Read states of the participants who have not read the message"""
+        return ConversationReadState.objects.filter(
+            Q(last_read_at__isnull=True) | Q(last_read_at__lt=message.created_at),
+            conversation_id=message.conversation_id
+        ).exclude(
+            user_id=message.sender_id
+        )
+
+    @classmethod
+    def forget_message(cls, message: Message) -> None:
+        """A message is being deleted: drop it from the counters of those who had not read it"""
+        cls._unread_by(message).filter(unread_count__gt=0).update(unread_count=F('unread_count') - 1)
+
+    @classmethod
+    def restore_message(cls, message: Message) -> None:
+        """A soft-deleted message is back: count it again for those who had not read it"""
+        cls._unread_by(message).update(unread_count=F('unread_count') + 1)
+
+    @classmethod
+    def mark_conversation_read(cls, conversation: Conversation, user) -> int:
+        """
+        Move the user's watermark to the conversation's latest message
+
+        Returns:
+            int: number of messages newly marked
+        """
+        latest = conversation.messages.filter(
+            is_deleted=False
+        ).order_by('-created_at').values_list('created_at', flat=True).first()
+        if latest is None:
+            return 0
+        return cls._advance_watermark(conversation.pk, user, latest)
+
+    @classmethod
+    def mark_message_read(cls, message: Message, user) -> bool:
+        """
+        Mark a message (and everything before it) as read
+
+        Returns:
+            bool: True if the message was unread
+        """
+        if message.sender_id == user.pk:
+            return False
+        return cls._advance_watermark(message.conversation_id, user, message.created_at) > 0
+
+    @classmethod
+    def _advance_watermark(cls, conversation_id, user, read_until: datetime) -> int:
+        """
+        Move the watermark forward (never back) and recount unread messages
+
+        Returns:
+            int: drop in the unread count
+        """
+        state = ConversationReadState.objects.filter(
+            conversation_id=conversation_id,
+            user=user
+        ).filter(
+            Q(last_read_at__isnull=True) | Q(last_read_at__lt=read_until)
+        )
+        before = state.values_list('unread_count', flat=True).first()
+        if before is None:
+            return 0
+
+        # Recount in the same UPDATE so messages sent meanwhile stay unread
+        unread = Message.objects.filter(
+            conversation_id=conversation_id,
+            created_at__gt=read_until,
+            is_deleted=False
+        ).exclude(
+            sender=user
+        ).order_by().values('conversation_id').annotate(n=Count('id')).values('n')
+
+        state.update(
+            last_read_at=read_until,
+            unread_count=Coalesce(Subquery(unread[:1]), Value(0))
+        )
+        after = cls.unread_count(conversation_id, user)
+        marked = max(0, before - after)
+        if marked:
+            # The user's other tabs and devices
+            RealtimeService.send_on_commit([(str(user.pk), {
+                'type': 'conversation.read',
+                'conversation_id': str(conversation_id),
+                'unread_delta': -marked,
+            })])
+        return marked
+
+    @classmethod
+    def unread_messages(cls, queryset: QuerySet, user) -> QuerySet:
+        """Filter messages to those after the user's watermark in their conversation"""
+        watermark = ConversationReadState.objects.filter(
+            conversation=OuterRef('conversation'),
+            user=user
+        ).values('last_read_at')[:1]
+
+        return queryset.exclude(
+            sender=user
+        ).annotate(
+            read_watermark=Subquery(watermark)
+        ).filter(
+            Q(read_watermark__isnull=True) | Q(created_at__gt=F('read_watermark'))
+        )
+
+    @classmethod
+    def watermarks(cls, conversation_id) -> Dict[object, Optional[datetime]]:
+        """{user_id: last_read_at} for every participant of a conversation"""
+        return dict(ConversationReadState.objects.filter(
+            conversation_id=conversation_id
+        ).values_list('user_id', 'last_read_at'))
+
+    @classmethod
+    def watermarks_by_conversation(cls, conversation_ids: Iterable) -> Dict[object, Dict]:
+        """{conversation_id: {user_id: last_read_at}} for several conversations in one query"""
+        watermarks = defaultdict(dict)
+        for conversation_id, user_id, last_read_at in ConversationReadState.objects.filter(
+            conversation_id__in=conversation_ids
+        ).values_list('conversation_id', 'user_id', 'last_read_at'):
+            watermarks[conversation_id][user_id] = last_read_at
+        return watermarks
+
+    @staticmethod
+    def is_read(sender_id, created_at: datetime, user_id, watermarks: Dict) -> bool:
+        """Check a message (by sender and time) against a {user_id: last_read_at} map"""
+        if sender_id == user_id:
+            return True
+        last_read_at = watermarks.get(user_id)
+        return last_read_at is not None and created_at <= last_read_at
+
+    @staticmethod
+    def read_by_count(sender_id, created_at: datetime, watermarks: Dict) -> int:
+        """Number of participants other than the sender whose watermark covers the message"""
+        return sum(
+            1 for user_id, last_read_at in watermarks.items()
+            if user_id != sender_id
+            and last_read_at is not None
+            and created_at <= last_read_at
+        )
@@ -0,0 +1,80 @@
+"""
+Signals for communication app
+"""
+
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .models import Conversation, Message
+from .services.inbox_service import InboxService
+
+
+@receiver(pre_save, sender=Message)
+def remember_previous_deleted(sender, instance, **kwargs):
+    """
+    Note whether the message was soft-deleted before this save
+    """
+    instance._previous_is_deleted = None
+    if not instance._state.adding:
+        instance._previous_is_deleted = Message.objects.filter(
+            pk=instance.pk
+        ).values_list('is_deleted', flat=True).first()
+
+
+@receiver(post_save, sender=Message)
+def count_unread_message(sender, instance, created, **kwargs):
+    """
+    Bump the unread counters of everyone in the conversation but the sender,
+    and push the message to those who are online; soft-deleting or
+    restoring a message takes it out of or puts it back in the counters
+    """
+    if created:
+        if not instance.is_deleted:
+            InboxService.record_message(instance)
+            InboxService.push_message(instance)
+        return
+
+    previous = getattr(instance, '_previous_is_deleted', None)
+    if previous is None or previous == instance.is_deleted:
+        return
+    if instance.is_deleted:
+        InboxService.forget_message(instance)
+    else:
+        InboxService.restore_message(instance)
+
+
+@receiver(pre_delete, sender=Message)
+def uncount_deleted_message(sender, instance, **kwargs):
+    """
+    Take a deleted message out of the counters of those who had not read it
+    (a soft-deleted one already was)
+    """
+    if not instance.is_deleted:
+        InboxService.forget_message(instance)
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def sync_read_states(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep one read state per (conversation, participant)
+    """
+    if action == 'pre_clear':
+        if reverse:
+            # user.conversations.clear()
+            conversation_ids = list(instance.conversations.values_list('pk', flat=True))
+            InboxService.remove_participants(conversation_ids, [instance.pk])
+        else:
+            InboxService.remove_participants([instance.pk])
+        return
+
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if reverse:
+        conversation_ids, user_ids = pk_set, [instance.pk]
+    else:
+        conversation_ids, user_ids = [instance.pk], pk_set
+
+    if action == 'post_add':
+        InboxService.add_participants(conversation_ids, user_ids)
+    else:
+        InboxService.remove_participants(conversation_ids, user_ids)
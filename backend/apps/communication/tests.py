@@ -0,0 +1,181 @@
+import json
+from datetime import timedelta
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.communication.models import (
+    Announcement, AnnouncementRead, Conversation, ConversationReadState, Message, MessageAttachment
+)
+from apps.communication.projections import AnnouncementProjection, MessageProjection
+from apps.communication.serializers import AnnouncementSerializer, MessageSerializer
+from apps.communication.services.inbox_service import InboxService
+from apps.core.renderers import FastJSONRenderer
+from apps.schools.models import AcademicYear, Classroom, School, Subject
+
+User = get_user_model()
+
+
+class ConversationTestMixin:
+    def make_conversation(self):
+        self.sender = User.objects.create_user(email='teacher@example.com', password='password', role='teacher')
+        self.reader = User.objects.create_user(email='parent@example.com', password='password', role='parent')
+        self.skipper = User.objects.create_user(email='other@example.com', password='password', role='parent')
+        self.conversation = Conversation.objects.create(conversation_type='group', title='Class 5A')
+        self.conversation.participants.add(self.sender, self.reader, self.skipper)
+
+    def send(self, text, minutes_ago, sender=None):
+        message = Message.objects.create(
+            conversation=self.conversation, sender=sender or self.sender, message_text=text
+        )
+        Message.objects.filter(pk=message.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        message.refresh_from_db()
+        return message
+
+    def unread(self, user):
+        return InboxService.unread_count(self.conversation, user)
+
+
+class UnreadCounterTests(ConversationTestMixin, TestCase):
+    def setUp(self):
+        self.make_conversation()
+        self.first = self.send('Trip on Friday', 3)
+        self.second = self.send('Bring lunch', 2)
+
+    def test_soft_delete_and_restore(self):
+        InboxService.mark_message_read(self.first, self.reader)
+        self.assertEqual((self.unread(self.reader), self.unread(self.skipper)), (1, 2))
+
+        self.second.soft_delete()
+        self.assertEqual((self.unread(self.reader), self.unread(self.skipper)), (0, 1))
+
+        # Deleting it for good does not count it out twice
+        self.second.delete()
+        self.assertEqual((self.unread(self.reader), self.unread(self.skipper)), (0, 1))
+
+        self.first.soft_delete()
+        self.first.restore()
+        self.assertEqual((self.unread(self.reader), self.unread(self.skipper)), (0, 1))
+        self.assertEqual(self.unread(self.sender), 0)
+
+
+class ProjectionParityTests(ConversationTestMixin, TestCase):
+    """List projections render exactly what the serializers they replace do"""
+
+    def setUp(self):
+        self.make_conversation()
+        request = Request(APIRequestFactory().get('/api/v1/communication/'))
+        request.user = self.reader
+        self.context = {'request': request}
+
+    def assertSameOutput(self, projection_class, serializer_class, queryset):
+        projection = projection_class(self.context)
+        projected = projection.to_representation(projection.queryset(queryset))
+        serialized = serializer_class(queryset, many=True, context=self.context).data
+        renderer = FastJSONRenderer()
+        self.assertEqual(json.loads(renderer.render(projected)), json.loads(renderer.render(serialized)))
+
+    def test_messages(self):
+        first = self.send('Trip on Friday', 3)
+        self.send('Bring lunch', 2)
+        self.send('Thanks', 1, sender=self.reader)
+        MessageAttachment.objects.create(
+            message=first, file='communication/attachments/permission.pdf', file_name='permission.pdf',
+            file_type='application/pdf', file_size=1024, uploaded_by=self.sender
+        )
+        InboxService.mark_message_read(first, self.reader)
+
+        # Untitled conversations are named after their participants
+        untitled = Conversation.objects.create(conversation_type='direct')
+        untitled.participants.add(self.sender, self.reader)
+        Message.objects.create(conversation=untitled, sender=self.sender, message_text='Hello')
+
+        self.assertSameOutput(MessageProjection, MessageSerializer, Message.objects.order_by('-created_at'))
+
+    def test_announcements(self):
+        school = School.objects.create(
+            name='Test School', code='TEST01',
+            city='Test City', state='Test State', pincode='123456',
+            email='school@test.com', principal_name='Principal', established_year=2000
+        )
+        academic_year = AcademicYear.objects.create(
+            school=school, name='2025-2026',
+            start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        classroom = Classroom.objects.create(
+            school=school, academic_year=academic_year, subject=subject,
+            grade=5, section='A', class_code='TESTCLASS01', teacher=self.sender
+        )
+        read = Announcement.objects.create(
+            title='Sports day', content='Wear white.', sent_by=self.sender, target_role='all',
+            classroom=classroom, sent_at=timezone.now(), total_recipients=3, read_count=1
+        )
+        Announcement.objects.create(
+            title='Holiday', content='School is closed.', sent_by=self.sender, target_role='all'
+        )
+        AnnouncementRead.objects.create(announcement=read, user=self.reader, read_at=timezone.now())
+
+        self.assertSameOutput(AnnouncementProjection, AnnouncementSerializer, Announcement.objects.order_by('title'))
+
+
+@override_settings(MIGRATION_MODULES={})
+class ReadWatermarkMigrationTests(ConversationTestMixin, TransactionTestCase):
+    """0003_read_watermarks folds per-message read receipts into watermarks"""
+
+    def setUp(self):
+        migration = import_module('apps.communication.migrations.0003_read_watermarks')
+        self.compact = migration.compact_message_reads
+
+        # The models as the migration's RunPython step sees them
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        state = loader.project_state(('communication', '0002_conversationreadstate'))
+        add_watermark = migration.Migration.operations[0]
+        add_watermark.state_forwards('communication', state)
+        self.apps = state.apps
+        self.MessageRead = self.apps.get_model('communication', 'MessageRead')
+        with connection.schema_editor() as editor:
+            editor.create_model(self.MessageRead)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(self.MessageRead)
+
+    def test_compaction_of_mixed_reads(self):
+        self.make_conversation()
+        messages = [self.send(f'Message {index}', minutes_ago=10 - index) for index in range(4)]
+        reply = self.send('Thanks', minutes_ago=5, sender=self.reader)
+        deleted = self.send('Wrong class', minutes_ago=1)
+        deleted.soft_delete()
+
+        def read(user, message):
+            self.MessageRead.objects.create(message_id=message.pk, user_id=user.pk)
+
+        # Reader read the first two; skipper only opened the third; the
+        # sender's receipt for the reply is the only one they have
+        read(self.reader, messages[0])
+        read(self.reader, messages[1])
+        read(self.skipper, messages[2])
+        read(self.sender, reply)
+        # A receipt for one's own message is ignored
+        read(self.reader, reply)
+
+        with connection.schema_editor() as editor:
+            self.compact(self.apps, editor)
+
+        states = {
+            state.user_id: state
+            for state in ConversationReadState.objects.filter(conversation=self.conversation)
+        }
+        self.assertEqual(states[self.reader.pk].last_read_at, messages[1].created_at)
+        self.assertEqual(states[self.reader.pk].unread_count, 2)
+        self.assertEqual(states[self.skipper.pk].last_read_at, messages[2].created_at)
+        self.assertEqual(states[self.skipper.pk].unread_count, 2)
+        self.assertEqual(states[self.sender.pk].last_read_at, reply.created_at)
+        self.assertEqual(states[self.sender.pk].unread_count, 0)
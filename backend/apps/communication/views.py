@@ -11,13 +11,18 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from django.utils import timezone
 from django.db.models import Count, Q
 
-from .models import Conversation, Message, Announcement, MessageRead, AnnouncementRead
+from .models import Conversation, Message, Announcement, AnnouncementRead
 from .serializers import (
     ConversationSerializer, MessageSerializer, AnnouncementSerializer,
-    MessageReadSerializer, AnnouncementReadSerializer
+    AnnouncementReadSerializer
 )
+from .projections import AnnouncementProjection, MessageProjection
+from .services.inbox_service import InboxService
 from apps.core.permissions import IsTeacher
+from apps.core.pagination import FeedCursorPagination
+from apps.core.viewsets import ProjectionListMixin
 from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 
 
 class ConversationViewSet(viewsets.ModelViewSet):
@@ -35,10 +40,12 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Conversation.objects.none()
         
-        return Conversation.objects.filter(
+        # Filtering on a single participant cannot duplicate rows
+        conversations = Conversation.objects.filter(
             participants=user,
             is_deleted=False
-        ).prefetch_related('participants').distinct()
+        )
+        return InboxService.annotate(conversations, user)
     
     def perform_create(self, serializer):
         """Create conversation and add participants"""
@@ -101,41 +108,28 @@ class ConversationViewSet(viewsets.ModelViewSet):
     def mark_read(self, request, pk=None):
         """Mark all messages in conversation as read"""
         conversation = self.get_object()
+        marked = InboxService.mark_conversation_read(conversation, request.user)
         
-        # Get unread messages
-        unread_messages = conversation.messages.exclude(
-            sender=request.user
-        ).exclude(
-            message_reads__user=request.user
-        ).filter(is_deleted=False)
-        
-        # Create read receipts
-        MessageRead.objects.bulk_create([
-            MessageRead(message=msg, user=request.user)
-            for msg in unread_messages
-        ], ignore_conflicts=True)
-        
-        return Response({'message': f'Marked {unread_messages.count()} messages as read'})
+        return Response({'message': f'Marked {marked} messages as read'})
     
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get conversations with unread messages"""
-        conversations = self.get_queryset().filter(
-            messages__message_reads__isnull=True
-        ).exclude(
-            messages__sender=request.user
-        ).distinct()
+        conversations = self.get_queryset().filter(unread_total__gt=0)
         
         serializer = self.get_serializer(conversations, many=True)
         return Response(serializer.data)
 
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(ProjectionListMixin, viewsets.ModelViewSet):
     """ViewSet for managing messages"""
     serializer_class = MessageSerializer
+    projection_class = MessageProjection
+    pagination_class = FeedCursorPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['conversation', 'sender']
+    ordering_fields = ['created_at']
     ordering = ['created_at']
     
     def get_queryset(self):
@@ -167,11 +161,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         
         # Mark as read if not sender
-        if instance.sender != request.user:
-            MessageRead.objects.get_or_create(
-                message=instance,
-                user=request.user
-            )
+        InboxService.mark_message_read(instance, request.user)
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -184,29 +174,23 @@ class MessageViewSet(viewsets.ModelViewSet):
         if message.sender == request.user:
             return Response({'message': 'Cannot mark own message as read'})
         
-        MessageRead.objects.get_or_create(
-            message=message,
-            user=request.user
-        )
+        InboxService.mark_message_read(message, request.user)
         
         return Response({'message': 'Message marked as read'})
     
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get all unread messages for current user"""
-        unread = self.get_queryset().exclude(
-            sender=request.user
-        ).exclude(
-            message_reads__user=request.user
-        )
+        unread = InboxService.unread_messages(self.get_queryset(), request.user)
         
         serializer = self.get_serializer(unread, many=True)
         return Response(serializer.data)
 
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(ProjectionListMixin, viewsets.ModelViewSet):
     """ViewSet for managing announcements"""
     serializer_class = AnnouncementSerializer
+    projection_class = AnnouncementProjection
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['target_role', 'classroom', 'priority', 'is_draft']
@@ -229,9 +213,7 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'student':
             # Students see announcements targeted to them
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user, is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return Announcement.objects.filter(
                 Q(target_role='student') | Q(target_role='all'),
@@ -244,10 +226,7 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see announcements targeted to parents
-            children = user.children_relationships.values_list('student_id', flat=True)
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student_id__in=children, is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return Announcement.objects.filter(
                 Q(target_role='parent') | Q(target_role='all'),
@@ -0,0 +1,217 @@
+"""
+Two-tier read-through cache for serialized published content
+
+Tier 1 is a bounded LRU in each process, tier 2 the shared Django cache
+(Redis in production). Entries are keyed by content type, object id and
+the object's VersionStamps stamp, so publishing, unpublishing or editing
+an object makes its old entries unreachable in every process at once.
+
+Misses are recomputed single-flight: the first request takes a short lock
+in the shared tier and builds the entry; concurrent requests for the same
+entry wait for it instead of all hitting the database.
+"""
+
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.core.versioning import VersionStamps
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded in-process cache"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class ContentCache:
+    """Service for reading published content through both cache tiers"""
+    LOCK_TIMEOUT = 30
+    WAIT_INTERVAL = 0.05
+    WAIT_ATTEMPTS = 20
+    STATS_FLUSH_EVERY = 100
+    EVENTS = ('local_hits', 'shared_hits', 'misses', 'waits')
+
+    _local = LocalLRU(getattr(settings, 'CONTENT_CACHE_LOCAL_ENTRIES', 2048))
+    _stats = Counter()
+    _stats_lock = threading.Lock()
+
+    @classmethod
+    def get_many(cls, content_type: str, model, pks: Iterable,
+                 build: Callable[[list], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Cached entries for objects of one content type
+
+        Args:
+            content_type: cache namespace, also the metrics label
+            model: model whose VersionStamps object stamps version the entries
+            pks: object ids
+            build: called with the ids that missed both tiers; returns
+                {str(pk): entry} for those it could load
+
+        Returns:
+            dict: str(pk) -> entry, for every id that exists
+        """
+        pks = [str(pk) for pk in pks]
+        if not pks:
+            return {}
+
+        stamps = VersionStamps.get_many(VersionStamps.object_key(model, pk) for pk in pks)
+        keys = {pk: f'content:{content_type}:{pk}:{stamp}' for pk, stamp in zip(pks, stamps)}
+
+        found = cls._local.get_many(keys.values())
+        cls._count(content_type, 'local_hits', len(found))
+
+        missing = [key for key in keys.values() if key not in found]
+        if missing:
+            shared = cls._shared().get_many(missing)
+            cls._count(content_type, 'shared_hits', len(shared))
+            cls._local.set_many(shared)
+            found.update(shared)
+
+        missing = {pk: key for pk, key in keys.items() if key not in found}
+        if missing:
+            built = cls._build_single_flight(content_type, missing, build)
+            found.update(built)
+
+        return {pk: found[key] for pk, key in keys.items() if key in found}
+
+    @classmethod
+    def _build_single_flight(cls, content_type, missing: Dict[str, str], build) -> Dict[str, Any]:
+        """Build missing entries, or wait for another request already building them"""
+        shared = cls._shared()
+        token = uuid.uuid4().hex
+        owned = {pk: key for pk, key in missing.items() if shared.add(f'{key}:lock', token, cls.LOCK_TIMEOUT)}
+        waiting = {pk: key for pk, key in missing.items() if pk not in owned}
+
+        found = {}
+        try:
+            if owned:
+                cls._count(content_type, 'misses', len(owned))
+                entries = build(list(owned))
+                found = {owned[pk]: entry for pk, entry in entries.items() if pk in owned}
+                cls._store(found)
+
+            if waiting:
+                cls._count(content_type, 'waits', len(waiting))
+                found.update(cls._wait_for(waiting.values()))
+                late = {pk: key for pk, key in waiting.items() if key not in found}
+                if late:
+                    # The other builder is slow or gone; build without the lock
+                    cls._count(content_type, 'misses', len(late))
+                    entries = build(list(late))
+                    built = {late[pk]: entry for pk, entry in entries.items() if pk in late}
+                    cls._store(built)
+                    found.update(built)
+        finally:
+            for key in owned.values():
+                if shared.get(f'{key}:lock') == token:
+                    shared.delete(f'{key}:lock')
+        return found
+
+    @classmethod
+    def _wait_for(cls, keys) -> Dict[str, Any]:
+        keys = list(keys)
+        found = {}
+        for _ in range(cls.WAIT_ATTEMPTS):
+            time.sleep(cls.WAIT_INTERVAL)
+            found.update(cls._shared().get_many([key for key in keys if key not in found]))
+            if len(found) == len(keys):
+                break
+        cls._local.set_many(found)
+        return found
+
+    @classmethod
+    def _store(cls, entries: Dict[str, Any]) -> None:
+        if entries:
+            cls._shared().set_many(entries, getattr(settings, 'CONTENT_CACHE_TIMEOUT', 60 * 60 * 24))
+            cls._local.set_many(entries)
+
+    @staticmethod
+    def _shared():
+        return caches[getattr(settings, 'CONTENT_CACHE_ALIAS', 'default')]
+
+    # Metrics are counted per process and added to shared counters in
+    # batches, so reading a hot entry costs no extra cache round trip
+
+    @classmethod
+    def _count(cls, content_type: str, event: str, amount: int = 1) -> None:
+        if not amount:
+            return
+        with cls._stats_lock:
+            cls._stats[(content_type, event)] += amount
+            if sum(cls._stats.values()) < cls.STATS_FLUSH_EVERY:
+                return
+            pending, cls._stats = cls._stats, Counter()
+        cls._flush(pending)
+
+    @classmethod
+    def flush_stats(cls) -> None:
+        """Push this process's pending counts to the shared counters"""
+        with cls._stats_lock:
+            pending, cls._stats = cls._stats, Counter()
+        cls._flush(pending)
+
+    @classmethod
+    def _flush(cls, pending: Counter) -> None:
+        shared = cls._shared()
+        content_types = set(shared.get('content_cache:stats:types') or ())
+        for (content_type, event), amount in pending.items():
+            key = f'content_cache:stats:{content_type}:{event}'
+            shared.add(key, 0, None)
+            shared.incr(key, amount)
+            content_types.add(content_type)
+        shared.set('content_cache:stats:types', sorted(content_types), None)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, int]]:
+        """Shared hit/miss counters per content type"""
+        cls.flush_stats()
+        shared = cls._shared()
+        result = {}
+        for content_type in shared.get('content_cache:stats:types') or ():
+            counts = shared.get_many([f'content_cache:stats:{content_type}:{event}' for event in cls.EVENTS])
+            result[content_type] = {
+                event: counts.get(f'content_cache:stats:{content_type}:{event}', 0)
+                for event in cls.EVENTS
+            }
+        return result
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        """Zero the shared counters"""
+        shared = cls._shared()
+        with cls._stats_lock:
+            cls._stats = Counter()
+        for content_type in shared.get('content_cache:stats:types') or ():
+            shared.delete_many([f'content_cache:stats:{content_type}:{event}' for event in cls.EVENTS])
+        shared.delete('content_cache:stats:types')
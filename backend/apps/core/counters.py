@@ -0,0 +1,206 @@
+"""
+Deferred counters for hot view/download/play counts
+
+Requests add to a pending delta instead of updating the row, and a flush
+applies all pending deltas with one UPDATE ... SET x = x + delta per
+object. Deltas live in a Redis hash when the default cache is Redis, so
+every process shares one buffer that the periodic flush_counters task
+drains; otherwise each process keeps its own buffer, flushed at most every
+FLUSH_INTERVAL seconds and when the process exits.
+
+A per-process flush is never run inside the request that triggers it: it
+is queued with transaction.on_commit, so it runs after the request's
+transaction commits, and is dropped (leaving the buffer untouched for the
+next flush) if that transaction rolls back.
+
+update() sends no signals, so a flush bumps the VersionStamps of the
+objects it changed itself; cached payloads and ETags then pick up the
+new counts.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from apps.core.versioning import VersionStamps
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str, str]  # (model label, field, pk)
+
+
+class _LocalBuffer:
+    """Per-process pending deltas"""
+
+    def __init__(self):
+        self._deltas = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, key: Key, amount: int) -> None:
+        with self._lock:
+            self._deltas[key] += amount
+
+    def get_many(self, keys: Iterable[Key]) -> Dict[Key, int]:
+        with self._lock:
+            return {key: self._deltas[key] for key in keys if key in self._deltas}
+
+    def drain(self) -> Dict[Key, int]:
+        with self._lock:
+            deltas, self._deltas = dict(self._deltas), defaultdict(int)
+        return deltas
+
+    def restore(self, deltas: Dict[Key, int]) -> None:
+        for key, amount in deltas.items():
+            self.add(key, amount)
+
+
+class _RedisBuffer:
+    """Pending deltas shared by every process, in one Redis hash"""
+    HASH = 'premium_edu:counters:pending'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def _field(key: Key) -> str:
+        return '|'.join(key)
+
+    def add(self, key: Key, amount: int) -> None:
+        self.connection.hincrby(self.HASH, self._field(key), amount)
+
+    def get_many(self, keys: Iterable[Key]) -> Dict[Key, int]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.connection.hmget(self.HASH, [self._field(key) for key in keys])
+        return {key: int(value) for key, value in zip(keys, values) if value is not None}
+
+    def drain(self) -> Dict[Key, int]:
+        # Renaming is atomic: increments after this point start a new hash
+        from redis.exceptions import ResponseError
+
+        draining = f'{self.HASH}:flushing:{uuid.uuid4().hex}'
+        try:
+            self.connection.rename(self.HASH, draining)
+        except ResponseError:
+            # Nothing pending (RENAME fails on a missing key)
+            return {}
+        raw = self.connection.hgetall(draining)
+        self.connection.delete(draining)
+        deltas = {}
+        for field, value in raw.items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            deltas[tuple(field.split('|', 2))] = int(value)
+        return deltas
+
+    def restore(self, deltas: Dict[Key, int]) -> None:
+        pipe = self.connection.pipeline()
+        for key, amount in deltas.items():
+            pipe.hincrby(self.HASH, self._field(key), amount)
+        pipe.execute()
+
+
+class DeferredCounter:
+    """Service for buffered counter increments"""
+    FLUSH_INTERVAL = 10  # seconds, for per-process buffers
+
+    _buffer = None
+    _last_flush = time.monotonic()
+
+    @classmethod
+    def incr(cls, model, pk, field: str, amount: int = 1) -> None:
+        """Add to a counter column of one object"""
+        buffer = cls._get_buffer()
+        buffer.add((model._meta.label, field, str(pk)), amount)
+        if isinstance(buffer, _LocalBuffer) and time.monotonic() - cls._last_flush >= cls.FLUSH_INTERVAL:
+            # Not due again until this flush has had its chance to run
+            cls._last_flush = time.monotonic()
+            transaction.on_commit(cls.flush_quietly)
+
+    @classmethod
+    def pending(cls, model, field: str, pks: Iterable) -> Dict[str, int]:
+        """Deltas not yet written to the database, by str(pk)"""
+        label = model._meta.label
+        found = cls._get_buffer().get_many((label, field, str(pk)) for pk in pks)
+        return {pk: amount for (_, _, pk), amount in found.items()}
+
+    @classmethod
+    def current(cls, instance, field: str) -> int:
+        """Counter value of a loaded instance including pending deltas"""
+        delta = cls.pending(type(instance), field, [instance.pk]).get(str(instance.pk), 0)
+        return getattr(instance, field) + delta
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Write pending deltas to the database
+
+        Returns:
+            int: number of rows updated
+        """
+        cls._last_flush = time.monotonic()
+        buffer = cls._get_buffer()
+        deltas = buffer.drain()
+        if not deltas:
+            return 0
+
+        # One UPDATE per object, covering all its counters
+        by_object = defaultdict(dict)
+        for (label, field, pk), amount in deltas.items():
+            if amount:
+                by_object[(label, pk)][field] = amount
+
+        try:
+            with transaction.atomic():
+                # Stable order, so concurrent flushers lock rows the same way
+                for (label, pk), fields in sorted(by_object.items()):
+                    model = apps.get_model(label)
+                    model._base_manager.filter(pk=pk).update(**{
+                        field: F(field) + amount for field, amount in fields.items()
+                    })
+        except Exception:
+            buffer.restore(deltas)
+            logger.exception('[COUNTERS] Flush failed; %d deltas kept for the next flush', len(deltas))
+            raise
+
+        changed = defaultdict(list)
+        for label, pk in by_object:
+            changed[label].append(pk)
+        for label, pks in changed.items():
+            VersionStamps.bump_objects(apps.get_model(label), pks)
+        return len(by_object)
+
+    @classmethod
+    def flush_quietly(cls) -> None:
+        """flush() for shutdown and on_commit hooks: failures are logged, not raised"""
+        try:
+            cls.flush()
+        except Exception:
+            pass
+
+    @classmethod
+    def _get_buffer(cls):
+        if cls._buffer is None:
+            cls._buffer = cls._make_buffer()
+        return cls._buffer
+
+    @staticmethod
+    def _make_buffer():
+        backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+        if backend.startswith('django_redis.'):
+            from django_redis import get_redis_connection
+            return _RedisBuffer(get_redis_connection('default'))
+
+        # Write what this process still holds when it exits
+        atexit.register(DeferredCounter.flush_quietly)
+        return _LocalBuffer()
@@ -0,0 +1,121 @@
+"""
+Management command to benchmark list rendering: serializer vs projection
+"""
+
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.accounts.models import User
+from apps.communication.models import Announcement, Conversation, Message
+from apps.communication.projections import AnnouncementProjection, MessageProjection
+from apps.communication.serializers import AnnouncementSerializer, MessageSerializer
+from apps.core.renderers import FastJSONRenderer
+from apps.notifications.models import Notification
+from apps.notifications.projections import NotificationProjection
+from apps.notifications.serializers import NotificationSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare CPU per 1,000 rows of ModelSerializer + JSONRenderer against Projection + FastJSONRenderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+
+        # Everything is created inside a transaction that is rolled back
+        with transaction.atomic():
+            user, teacher = self._create_rows(rows)
+            request = Request(RequestFactory().get('/'))
+            request.user = user
+            context = {'request': request}
+
+            endpoints = [
+                ('notifications', Notification.objects.filter(recipient=user),
+                 NotificationSerializer, NotificationProjection),
+                ('messages', Message.objects.filter(sender__in=[user, teacher]).select_related('sender', 'conversation'),
+                 MessageSerializer, MessageProjection),
+                ('announcements', Announcement.objects.filter(sent_by=teacher),
+                 AnnouncementSerializer, AnnouncementProjection),
+            ]
+
+            self.stdout.write(
+                f"{'endpoint':<14} {'mode':<11} {'cpu ms/1k':>10} {'wall ms/1k':>11} {'bytes':>9}"
+            )
+            for name, queryset, serializer_class, projection_class in endpoints:
+                before = self._measure(options['repeat'], rows, lambda: JSONRenderer().render(
+                    serializer_class(queryset.all(), many=True, context=dict(context)).data
+                ))
+                after = self._measure(options['repeat'], rows, lambda: FastJSONRenderer().render(
+                    self._project(projection_class, queryset.all(), dict(context))
+                ))
+                self._report(name, 'serializer', before)
+                self._report(name, 'projection', after)
+                self.stdout.write(f"{'':<14} {'speedup':<11} {before[0] / max(after[0], 1e-9):>9.1f}x")
+
+            transaction.set_rollback(True)
+
+    def _create_rows(self, rows):
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            email=f'bench-student-{tag}@example.com', password=None,
+            role='student', first_name='Bench', last_name='Student'
+        )
+        teacher = User.objects.create_user(
+            email=f'bench-teacher-{tag}@example.com', password=None,
+            role='teacher', first_name='Bench', last_name='Teacher'
+        )
+        conversation = Conversation.objects.create(created_by=teacher)
+        conversation.participants.set([user, teacher])
+
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=user, notification_type='system', priority='normal',
+                title=f'Notification {i}', message='Benchmark notification body ' * 4
+            )
+            for i in range(rows)
+        ])
+        Message.objects.bulk_create([
+            Message(
+                conversation=conversation, sender=teacher if i % 2 else user,
+                message_text='Benchmark message body ' * 4
+            )
+            for i in range(rows)
+        ])
+        Announcement.objects.bulk_create([
+            Announcement(
+                title=f'Announcement {i}', content='Benchmark announcement body ' * 8,
+                sent_by=teacher, target_role='all', total_recipients=30, read_count=i % 30
+            )
+            for i in range(rows)
+        ])
+        return user, teacher
+
+    @staticmethod
+    def _project(projection_class, queryset, context):
+        projection = projection_class(context=context)
+        return projection.to_representation(projection.queryset(queryset))
+
+    @staticmethod
+    def _measure(repeat, rows, render):
+        cpu, wall = [], []
+        size = 0
+        for _ in range(repeat):
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            size = len(render())
+            cpu.append((time.process_time() - cpu_started) * 1000 * 1000 / rows)
+            wall.append((time.perf_counter() - wall_started) * 1000 * 1000 / rows)
+        return statistics.median(cpu), statistics.median(wall), size
+
+    def _report(self, name, mode, result):
+        cpu, wall, size = result
+        self.stdout.write(f"{name:<14} {mode:<11} {cpu:>10.1f} {wall:>11.1f} {size:>9}")
@@ -0,0 +1,36 @@
+"""
+Management command to report published content cache hit rates
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.core.content_cache import ContentCache
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counts of the published content cache per content type'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing')
+
+    def handle(self, *args, **options):
+        stats = ContentCache.stats()
+        if not stats:
+            self.stdout.write('No content cache activity recorded')
+            return
+
+        self.stdout.write(
+            f"{'content type':<24} {'local':>8} {'shared':>8} {'misses':>8} {'waits':>8} {'hit rate':>9}"
+        )
+        for content_type, counts in sorted(stats.items()):
+            hits = counts['local_hits'] + counts['shared_hits']
+            total = hits + counts['misses']
+            rate = hits / total * 100 if total else 0.0
+            self.stdout.write(
+                f"{content_type:<24} {counts['local_hits']:>8} {counts['shared_hits']:>8} "
+                f"{counts['misses']:>8} {counts['waits']:>8} {rate:>8.1f}%"
+            )
+
+        if options['reset']:
+            ContentCache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,15 @@
+"""
+Management command to write buffered counter increments to the database
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.core.counters import DeferredCounter
+
+
+class Command(BaseCommand):
+    help = 'Flush pending view/download/play count increments'
+
+    def handle(self, *args, **options):
+        updated = DeferredCounter.flush()
+        self.stdout.write(self.style.SUCCESS(f'Flushed counters for {updated} objects'))
@@ -0,0 +1,117 @@
+"""
+Read-only projections for hot list endpoints
+
+A projection declares the payload of a list endpoint against the model
+instead of the serializer. It is compiled once per class into a values()
+lookup list and a per-field conversion plan, so each row is built from a
+plain dict with no model instances, field objects or per-field dispatch.
+Output matches the ModelSerializer it stands in for.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from rest_framework import serializers
+
+
+def full_name(first_name: str, last_name: str) -> str:
+    """Same as User.get_full_name() on raw column values"""
+    return f'{first_name} {last_name}'.strip()
+
+
+class Projection:
+    """
+    Base class for read-only projections
+
+    Subclasses declare:
+        model: the model being listed
+        fields: concrete field names, or '__all__' (like ModelSerializer)
+        exclude: field names to leave out of '__all__'
+        related: lookups across relations (e.g. 'sender__first_name') read
+            for get_<name> methods; not part of the output
+        method_fields: names filled by get_<name>(row) methods
+
+    prepare(rows) runs once per page before rows are built, for loads that
+    would otherwise happen per row.
+    """
+    model = None
+    fields = '__all__'
+    exclude = ()
+    related: Tuple[str, ...] = ()
+    method_fields: Tuple[str, ...] = ()
+
+    _compiled = None
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    @classmethod
+    def compile(cls):
+        """Build (lookups, plan) once per projection class"""
+        if cls.__dict__.get('_compiled') is None:
+            if cls.model is None:
+                raise ImproperlyConfigured(f'{cls.__name__} must declare a model')
+
+            if cls.fields == '__all__':
+                model_fields = [
+                    field for field in cls.model._meta.concrete_fields
+                    if field.name not in cls.exclude
+                ]
+            else:
+                model_fields = [cls.model._meta.get_field(name) for name in cls.fields]
+
+            plan = [(field.name, cls._converter(field)) for field in model_fields]
+            lookups = [name for name, _ in plan] + list(cls.related)
+            getters = [getattr(cls, f'get_{name}') for name in cls.method_fields]
+            cls._compiled = (lookups, plan, list(zip(cls.method_fields, getters)))
+        return cls._compiled
+
+    @staticmethod
+    def _converter(field):
+        """
+        Representation function for a model field, or None where the raw
+        column value is already what the serializer would output
+        """
+        if isinstance(field, models.DateTimeField):
+            return serializers.DateTimeField().to_representation
+        if isinstance(field, models.DateField):
+            return serializers.DateField().to_representation
+        if isinstance(field, models.TimeField):
+            return serializers.TimeField().to_representation
+        if isinstance(field, models.DecimalField):
+            return serializers.DecimalField(
+                max_digits=field.max_digits,
+                decimal_places=field.decimal_places
+            ).to_representation
+        if isinstance(field, models.FileField):
+            raise ImproperlyConfigured(
+                f'{field.model.__name__}.{field.name}: file fields need request-aware URLs; '
+                'exclude them and add a method field'
+            )
+        return None
+
+    def queryset(self, queryset):
+        """Narrow a queryset to the projection's columns"""
+        lookups, _, _ = self.compile()
+        return queryset.values(*lookups)
+
+    def prepare(self, rows: List[Dict[str, Any]]) -> None:
+        """Hook for page-level loads"""
+
+    def to_representation(self, rows) -> List[Dict[str, Any]]:
+        """Build the output dicts for a page of values() rows"""
+        _, plan, methods = self.compile()
+        rows = list(rows)
+        self.prepare(rows)
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, convert in plan:
+                value = row[name]
+                item[name] = convert(value) if convert is not None and value is not None else value
+            for name, getter in methods:
+                item[name] = getter(self, row)
+            data.append(item)
+        return data
@@ -0,0 +1,132 @@
+"""
+Real-time push over WebSockets
+
+Every connected socket joins its user's channel-layer group. Server code
+pushes events to users with RealtimeService; the user's consumers relay
+them to the browser as JSON. PresenceRegistry counts each user's open
+sockets in the cache, so pushes to users with nothing connected are
+skipped before they reach the channel layer.
+
+Channels is optional at import time: without it (or without
+CHANNEL_LAYERS) pushes are dropped and clients fall back to polling.
+"""
+
+import logging
+from typing import Dict, Iterable, Set, Tuple
+
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceRegistry:
+    """Service counting open sockets per user"""
+    TTL = 90  # seconds; clients ping every 30s, which refreshes it
+
+    _cache = None
+
+    @classmethod
+    def _backend(cls):
+        # django.core.cache.cache is per async context, so every socket would
+        # open its own cache connection; one shared backend is thread-safe
+        if cls._cache is None:
+            cls._cache = caches.create_connection('default')
+        return cls._cache
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f'presence:{user_id}'
+
+    @classmethod
+    def connect(cls, user_id) -> None:
+        cache, key = cls._backend(), cls._key(user_id)
+        cache.add(key, 0, cls.TTL)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, 1, cls.TTL)
+        cache.touch(key, cls.TTL)
+
+    @classmethod
+    def disconnect(cls, user_id) -> None:
+        cache, key = cls._backend(), cls._key(user_id)
+        try:
+            if cache.decr(key) <= 0:
+                cache.delete(key)
+        except ValueError:
+            pass
+
+    @classmethod
+    def heartbeat(cls, user_id) -> None:
+        if not cls._backend().touch(cls._key(user_id), cls.TTL):
+            cls.connect(user_id)
+
+    @classmethod
+    def online(cls, user_ids: Iterable) -> Set:
+        """The subset of user_ids with at least one open socket"""
+        keys = {cls._key(user_id): user_id for user_id in user_ids}
+        found = cls._backend().get_many(list(keys))
+        return {keys[key] for key, count in found.items() if count and count > 0}
+
+
+class RealtimeService:
+    """Service for pushing events to connected users"""
+
+    @staticmethod
+    def group_name(user_id) -> str:
+        return f'user.{user_id}'
+
+    @classmethod
+    def send(cls, events: Iterable[Tuple[object, Dict]]) -> int:
+        """
+        Push (user_id, payload) events to users that are online
+
+        Payloads must be JSON (and msgpack) serialisable. Returns the
+        number of events handed to the channel layer.
+        """
+        events = list(events)
+        if not events:
+            return 0
+
+        try:
+            from asgiref.sync import async_to_sync
+            from channels.layers import get_channel_layer
+        except ImportError:
+            return 0
+        layer = get_channel_layer()
+        if layer is None:
+            return 0
+
+        online = PresenceRegistry.online({user_id for user_id, _ in events})
+        deliverable = [(user_id, payload) for user_id, payload in events if user_id in online]
+        if not deliverable:
+            return 0
+
+        async def group_send_all():
+            for user_id, payload in deliverable:
+                await layer.group_send(
+                    cls.group_name(user_id),
+                    {'type': 'realtime.event', 'payload': payload}
+                )
+
+        try:
+            async_to_sync(group_send_all)()
+        except Exception:
+            # Pushes are best effort; clients resync on reconnect
+            logger.exception('[REALTIME] Push of %d events failed', len(deliverable))
+            return 0
+        return len(deliverable)
+
+    @classmethod
+    def push(cls, user_ids: Iterable, payload: Dict) -> int:
+        """Push the same payload to several users"""
+        return cls.send((user_id, payload) for user_id in user_ids)
+
+    @classmethod
+    def send_on_commit(cls, events: Iterable[Tuple[object, Dict]]) -> None:
+        """send() once the current transaction commits, so clients never see rows that roll back"""
+        events = list(events)
+        if events:
+            transaction.on_commit(lambda: cls.send(events))
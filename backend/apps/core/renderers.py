@@ -0,0 +1,38 @@
+"""
+Renderer classes
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson is optional - fall back to the stdlib encoder when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson
+
+    Produces the same output as DRF's JSONRenderer (compact, UTF-8, 'Z' for
+    UTC datetimes) several times faster. Indented output, as requested by
+    the browsable API or ?indent=, goes through the stdlib renderer.
+    """
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=self.options)
+
+        # Escape the line and paragraph separators like DRF does, so the
+        # output is also valid JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
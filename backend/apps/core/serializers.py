@@ -0,0 +1,65 @@
+"""
+Reusable serializer mixins
+"""
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def query_param_set(request, name):
+    """Comma-separated query parameter as a set, or None when absent"""
+    if request is None or name not in request.query_params:
+        return None
+    return {part.strip() for part in request.query_params[name].split(',') if part.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Let read requests choose the fields they get back
+
+    ?fields=title,status   only these fields (id is always included)
+    ?expand=teacher_detail with ?fields=, also include these fields
+    ?omit=teacher_detail   every field but these
+
+    Fields in Meta.deferred_fields (large text) are left out unless asked
+    for by name; every other field, nested objects included, is returned by
+    default. Writes always use the full field set. Viewsets using
+    SparseFieldsViewMixin also skip loading the text columns the response
+    leaves out.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._is_root():
+            return fields
+
+        requested = query_param_set(request, 'fields')
+        expand = query_param_set(request, 'expand') or set()
+        omit = query_param_set(request, 'omit') or set()
+        optional = set(getattr(self.Meta, 'deferred_fields', ()))
+
+        for name in list(fields):
+            if name == 'id':
+                keep = True
+            elif requested is not None:
+                keep = name in requested or name in expand
+            else:
+                keep = name not in omit and (name not in optional or name in expand)
+            if not keep:
+                del fields[name]
+        return fields
+
+    def _is_root(self):
+        """Only the top-level serializer (or the child of a top-level many=True) is pruned"""
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def unused_text_columns(self):
+        """Text columns of the model that the response will not include"""
+        used = {field.source.split('.')[0] for field in self.fields.values() if field.source != '*'}
+        return [
+            field.name for field in self.Meta.model._meta.concrete_fields
+            if isinstance(field, models.TextField) and field.name not in used
+        ]
@@ -0,0 +1,17 @@
+"""
+Celery tasks for core app
+"""
+
+from celery import shared_task
+
+from apps.core.counters import DeferredCounter
+
+
+@shared_task(ignore_result=True)
+def flush_counters():
+    """
+    Write buffered view/download/play counts to the database
+
+    Scheduled every few seconds by CELERY_BEAT_SCHEDULE
+    """
+    return DeferredCounter.flush()
@@ -0,0 +1,170 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.core.counters import DeferredCounter, _LocalBuffer
+from apps.core.versioning import VersionStamps
+from apps.lectures.models import Lecture
+from apps.lectures.serializers import LectureListSerializer, LectureSerializer
+from apps.notes.models import LectureNote
+from apps.schools.models import AcademicYear, Classroom, School, Subject
+
+User = get_user_model()
+
+
+class LectureTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', password='password', role='teacher'
+        )
+        school = School.objects.create(
+            name='Test School', code='TEST01',
+            city='Test City', state='Test State', pincode='123456',
+            email='school@test.com', principal_name='Principal', established_year=2000
+        )
+        academic_year = AcademicYear.objects.create(
+            school=school, name='2025-2026',
+            start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        self.classroom = classroom = Classroom.objects.create(
+            school=school, academic_year=academic_year, subject=subject,
+            grade=5, section='A', class_code='TESTCLASS01', teacher=self.teacher
+        )
+        self.lecture = Lecture.objects.create(title='Test Lecture', teacher=self.teacher, classroom=classroom)
+        self.other = Lecture.objects.create(title='Other Lecture', teacher=self.teacher, classroom=classroom)
+
+
+class DeferredCounterTests(LectureTestCase):
+    def setUp(self):
+        super().setUp()
+        # A fresh per-process buffer whose flush is already due
+        self._saved = DeferredCounter._buffer, DeferredCounter._last_flush
+        DeferredCounter._buffer = _LocalBuffer()
+        DeferredCounter._last_flush = 0
+
+    def tearDown(self):
+        DeferredCounter._buffer, DeferredCounter._last_flush = self._saved
+
+    def view_count(self, lecture):
+        return Lecture.objects.values_list('view_count', flat=True).get(pk=lecture.pk)
+
+    def test_flush_waits_for_commit(self):
+        DeferredCounter.incr(Lecture, self.other.pk, 'view_count', 2)
+        DeferredCounter._last_flush = 0
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                DeferredCounter.incr(Lecture, self.lecture.pk, 'view_count')
+                # Nothing is written inside the request's transaction
+                self.assertEqual(self.view_count(self.lecture), 0)
+        self.assertEqual(callbacks[0], DeferredCounter.flush_quietly)
+        self.assertEqual(self.view_count(self.lecture), 1)
+        self.assertEqual(self.view_count(self.other), 2)
+
+    def test_rollback_keeps_pending_counts(self):
+        DeferredCounter.incr(Lecture, self.other.pk, 'view_count', 2)
+        DeferredCounter._last_flush = 0
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    DeferredCounter.incr(Lecture, self.lecture.pk, 'view_count')
+                    raise RuntimeError('request failed')
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(
+            DeferredCounter.pending(Lecture, 'view_count', [self.lecture.pk, self.other.pk]),
+            {str(self.lecture.pk): 1, str(self.other.pk): 2}
+        )
+
+        self.assertEqual(DeferredCounter.flush(), 2)
+        self.assertEqual(self.view_count(self.lecture), 1)
+        self.assertEqual(self.view_count(self.other), 2)
+
+    def test_flush_bumps_version_stamps(self):
+        keys = [
+            VersionStamps.object_key(Lecture, self.lecture.pk),
+            VersionStamps.collection_key('lectures:classroom', self.lecture.classroom_id),
+            VersionStamps.collection_key('lectures:teacher', self.teacher.pk),
+        ]
+        before = VersionStamps.get_many(keys)
+        DeferredCounter._buffer.add((Lecture._meta.label, 'view_count', str(self.lecture.pk)), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            DeferredCounter.flush()
+        after = VersionStamps.get_many(keys)
+        self.assertTrue(all(old != new for old, new in zip(before, after)))
+        self.assertEqual(self.view_count(self.lecture), 3)
+
+
+class SparseFieldsTests(LectureTestCase):
+    def fields(self, serializer_class, query=''):
+        request = Request(APIRequestFactory().get(f'/lectures/{query}'))
+        return set(serializer_class(self.lecture, context={'request': request}).data)
+
+    def all_fields(self, serializer_class):
+        return set(serializer_class(self.lecture).data)
+
+    def test_nested_objects_are_returned_by_default(self):
+        fields = self.fields(LectureSerializer)
+        self.assertTrue({'classroom_detail', 'teacher_detail'} <= fields)
+        self.assertEqual(fields, self.all_fields(LectureSerializer))
+
+    def test_omit_and_fields(self):
+        fields = self.fields(LectureSerializer, '?omit=classroom_detail,teacher_detail,id')
+        self.assertEqual(fields, self.all_fields(LectureSerializer) - {'classroom_detail', 'teacher_detail'})
+        self.assertEqual(
+            self.fields(LectureSerializer, '?fields=title&expand=teacher_detail'),
+            {'id', 'title', 'teacher_detail'}
+        )
+
+    def test_deferred_text_only_when_named(self):
+        self.assertNotIn('transcript', self.fields(LectureListSerializer))
+        self.assertIn('transcript', self.fields(LectureListSerializer, '?fields=transcript'))
+
+
+class ConditionalGetTests(LectureTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def get(self, lecture_id, **headers):
+        return self.client.get(f'/api/v1/lectures/lectures/{lecture_id}/', headers=headers)
+
+    def test_matching_etag_is_not_modified_until_the_lecture_changes(self):
+        response = self.get(self.lecture.pk)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.get(self.lecture.pk, if_none_match=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lecture.title = 'Renamed'
+            self.lecture.save()
+        response = self.get(self.lecture.pk, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_wildcard_does_not_skip_the_lookup(self):
+        self.assertEqual(self.get(uuid.uuid4(), if_none_match='*').status_code, 404)
+        self.assertEqual(self.get(self.lecture.pk, if_none_match='*').status_code, 200)
+
+
+class VersionSignalTests(LectureTestCase):
+    def selects_from(self, table, queries):
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and table in q['sql']]
+
+    def test_create_reads_no_previous_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            lecture = Lecture.objects.create(title='New Lecture', teacher=self.teacher, classroom=self.classroom)
+        self.assertEqual(self.selects_from('"lectures_lecture"', queries), [])
+
+        with CaptureQueriesContext(connection) as queries:
+            LectureNote.objects.create(
+                lecture=lecture, classroom=self.classroom, teacher=self.teacher, title='New Note', content='Notes'
+            )
+        self.assertEqual(self.selects_from('"notes_lecturenote"', queries), [])
@@ -112,3 +112,24 @@ def get_date_range(period='week'):
         end = now
     
     return start, end
+
+
+def time_ago(moment, now=None):
+    """
+    Human-readable age of a datetime (e.g. "5 minutes ago")
+    """
+    diff = (now or timezone.now()) - moment
+    
+    if diff < timedelta(minutes=1):
+        return 'Just now'
+    elif diff < timedelta(hours=1):
+        minutes = int(diff.total_seconds() / 60)
+        return f'{minutes} minute{"s" if minutes != 1 else ""} ago'
+    elif diff < timedelta(days=1):
+        hours = int(diff.total_seconds() / 3600)
+        return f'{hours} hour{"s" if hours != 1 else ""} ago'
+    elif diff < timedelta(days=7):
+        days = diff.days
+        return f'{days} day{"s" if days != 1 else ""} ago'
+    else:
+        return moment.strftime('%b %d, %Y')
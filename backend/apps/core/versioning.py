@@ -0,0 +1,94 @@
+"""
+Version stamps for conditional requests
+
+A stamp is a random token kept in the cache for one object (a lecture) or
+one collection (the lectures of a classroom). Save signals replace the
+stamps covering whatever changed, so a response's ETag can be derived
+from its stamps alone and checked before any query or serializer runs.
+
+Writes that send no signals (counter flushes with update(), dropped
+partitions) bump stamps themselves. Models register the function that
+lists an instance's stamps with VersionStamps.register, so such writers
+can bump them by pk with bump_objects.
+"""
+
+import uuid
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+class VersionStamps:
+    """Service for reading and bumping version stamps"""
+    TIMEOUT = 60 * 60 * 24 * 7  # 7 days
+
+    # model -> (fields the keys function reads, keys function)
+    _registry: Dict[type, tuple] = {}
+
+    @classmethod
+    def register(cls, model, fields: Sequence[str] = ()):
+        """
+        Decorator registering the stamp keys function of model
+
+        fields are the columns the function reads besides the pk, so
+        bump_objects can load just those.
+        """
+        def decorator(keys: Callable):
+            cls._registry[model] = (tuple(fields), keys)
+            return keys
+        return decorator
+
+    @staticmethod
+    def object_key(model, pk) -> str:
+        """Stamp key of a single object"""
+        return f'{model._meta.label_lower}:{pk}'
+
+    @staticmethod
+    def collection_key(name: str, owner_id) -> str:
+        """Stamp key of a collection, e.g. ('lectures:classroom', classroom_id)"""
+        return f'{name}:{owner_id}'
+
+    @classmethod
+    def get_many(cls, keys: Iterable[str]) -> List[str]:
+        """Current stamps for keys, issuing fresh ones where none exist"""
+        keys = list(keys)
+        cache_keys = [cls._cache_key(key) for key in keys]
+        found = cache.get_many(cache_keys)
+        missing = [cache_key for cache_key in cache_keys if cache_key not in found]
+        if missing:
+            # Random rather than counted, so an evicted stamp can never be
+            # re-issued and match an ETag a client still holds
+            for cache_key in missing:
+                cache.add(cache_key, uuid.uuid4().hex, cls.TIMEOUT)
+            found.update(cache.get_many(missing))
+        return [found.get(cache_key, '') for cache_key in cache_keys]
+
+    @classmethod
+    def bump(cls, keys: Iterable[str]) -> None:
+        """Replace the stamps for keys"""
+        stamps: Dict[str, str] = {cls._cache_key(key): uuid.uuid4().hex for key in set(keys) if key}
+        if stamps:
+            cache.set_many(stamps, cls.TIMEOUT)
+
+    @classmethod
+    def bump_on_commit(cls, keys: Iterable[str]) -> None:
+        """Bump once the current transaction commits, so no reader sees the new stamp with old data"""
+        keys = list(keys)
+        transaction.on_commit(lambda: cls.bump(keys))
+
+    @classmethod
+    def bump_objects(cls, model, pks: Iterable) -> None:
+        """Bump the stamps of objects changed without signals; unregistered models have none"""
+        if model not in cls._registry:
+            return
+        pks = list(pks)
+        if not pks:
+            return
+        fields, keys = cls._registry[model]
+        instances = model._base_manager.filter(pk__in=pks).only(model._meta.pk.name, *fields)
+        cls.bump_on_commit([key for instance in instances for key in keys(instance)])
+
+    @staticmethod
+    def _cache_key(key: str) -> str:
+        return f'version_stamp:{key}'
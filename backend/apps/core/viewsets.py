@@ -0,0 +1,238 @@
+"""
+Reusable viewset mixins
+"""
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from apps.core.content_cache import ContentCache
+from apps.core.versioning import VersionStamps
+from apps.schools.services.scope_service import UserScopeService
+
+
+class PrefetchContextMixin:
+    """
+    Load per-object serializer data for a whole page in one go
+
+    Viewsets implement prefetch_context(objects), returning a dict that is
+    merged into the serializer context whenever instances are serialized.
+    Serializer method fields read from it instead of querying per object.
+    """
+
+    def prefetch_context(self, objects) -> dict:
+        return {}
+
+    def get_serializer(self, *args, **kwargs):
+        if args and args[0] is not None and 'context' not in kwargs:
+            instance = args[0]
+            objects = list(instance) if kwargs.get('many') else [instance]
+            context = self.get_serializer_context()
+            context.update(self.prefetch_context(objects))
+            kwargs['context'] = context
+            if kwargs.get('many'):
+                # Serialize the evaluated list so the queryset is not run twice
+                args = (objects, *args[1:])
+        return super().get_serializer(*args, **kwargs)
+
+
+class ProjectionListMixin:
+    """
+    Serve list() from a read-only Projection instead of the serializer
+
+    Filtering, ordering and pagination run as usual on the queryset, which
+    is then narrowed to the projection's values() columns.
+    """
+    projection_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.projection_class is None:
+            return super().list(request, *args, **kwargs)
+
+        projection = self.projection_class(context=self.get_serializer_context())
+        queryset = projection.queryset(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.to_representation(page))
+        return Response(projection.to_representation(queryset))
+
+
+class SparseFieldsViewMixin:
+    """
+    Defer the text columns a SparseFieldsMixin serializer will not output,
+    so large text is only read from the database when a response needs it
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        serializer = self.get_serializer()
+        if hasattr(serializer, 'unused_text_columns') and queryset.model is serializer.Meta.model:
+            unused = serializer.unused_text_columns()
+            if unused:
+                queryset = queryset.defer(*unused)
+        return queryset
+
+
+class _NotModified(Exception):
+    def __init__(self, etag):
+        self.etag = etag
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET/HEAD with 304 Not Modified while nothing the response
+    depends on has changed
+
+    Viewsets implement etag_keys(), returning the VersionStamps keys the
+    current action's response depends on, or None to opt out. The ETag
+    hashes those stamps with the user, their scope stamp and the full URL,
+    and is checked right after authentication, before the queryset or
+    serializer runs.
+    """
+
+    def etag_keys(self):
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+            return
+
+        keys = self.etag_keys()
+        if keys is None:
+            return
+
+        self.etag = self.compute_etag(keys)
+        # No "*": it would answer 304 before the object is looked up or
+        # its permissions checked
+        if self.etag in parse_etags(request.headers.get('If-None-Match', '')):
+            raise _NotModified(self.etag)
+
+    def compute_etag(self, keys) -> str:
+        user = self.request.user
+        parts = [
+            str(user.pk),
+            UserScopeService.version(user.pk),
+            self.request.get_full_path(),
+            self.request.accepted_media_type or '',
+            *VersionStamps.get_many(keys),
+        ]
+        return quote_etag(hashlib.sha1('\n'.join(parts).encode()).hexdigest())
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=self._etag_headers(exc.etag))
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code == status.HTTP_200_OK:
+            for name, value in self._etag_headers(self.etag).items():
+                response[name] = value
+        return response
+
+    @staticmethod
+    def _etag_headers(etag) -> dict:
+        # Browsers keep the body and revalidate it on every request
+        return {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+
+class PublishedContentCacheMixin:
+    """
+    Serve published content to students from ContentCache
+
+    The cached entry is the serializer output for the object, built once
+    for everyone. Fields named in personal_fields differ per student (own
+    bookmarks, best scores) and are recomputed on every request against
+    unsaved stand-in instances, so they must only need the object's id.
+    Students only ever receive entries for classrooms in their scope.
+
+    Viewsets set content_cache_model and may override
+    content_cache_classroom_id(obj) (None means visible to everyone).
+    """
+    content_cache_model = None
+    personal_fields = ()
+
+    def use_content_cache(self) -> bool:
+        # Sparse responses have a different shape; skip them
+        query_params = set(self.request.query_params)
+        return (
+            self.request.user.is_authenticated
+            and self.request.user.role == 'student'
+            and self.action in ('list', 'retrieve')
+            and not query_params & {'fields', 'expand', 'omit'}
+        )
+
+    def content_cache_classroom_id(self, obj):
+        return obj.classroom_id
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_content_cache():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values_list('pk', flat=True)
+        page = self.paginate_queryset(queryset)
+        pks = [str(pk) for pk in (page if page is not None else queryset)]
+        data = self._content_data(pks)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_content_cache():
+            return super().retrieve(request, *args, **kwargs)
+
+        try:
+            pk = self.content_cache_model._meta.pk.to_python(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except (ValidationError, ValueError):
+            # Malformed id: let the normal path answer 404
+            return super().retrieve(request, *args, **kwargs)
+
+        data = self._content_data([str(pk)])
+        if not data:
+            # Unknown or out of scope: let the normal path answer 404
+            return super().retrieve(request, *args, **kwargs)
+        return Response(data[0])
+
+    def _content_data(self, pks):
+        content_type = f'{self.content_cache_model._meta.model_name}:{self.action}'
+        entries = ContentCache.get_many(content_type, self.content_cache_model, pks, self._build_content)
+        classroom_ids = set(UserScopeService.for_request(self.request).classroom_ids)
+
+        visible = [
+            pk for pk in pks
+            if pk in entries and (entries[pk]['classroom_id'] is None or entries[pk]['classroom_id'] in classroom_ids)
+        ]
+        data = [dict(entries[pk]['data']) for pk in visible]
+        if self.personal_fields and data:
+            for item, personal in zip(data, self._personal_data(visible)):
+                item.update(personal)
+        return data
+
+    def _build_content(self, pks):
+        """Serialize objects that missed the cache, from the viewset's own queryset"""
+        objects = list(self.get_queryset().filter(pk__in=pks))
+        serializer = self.get_serializer(objects, many=True)
+        return {
+            str(obj.pk): {'classroom_id': self.content_cache_classroom_id(obj), 'data': item}
+            for obj, item in zip(objects, serializer.data)
+        }
+
+    def _personal_data(self, pks):
+        pk_field = self.content_cache_model._meta.pk
+        stand_ins = [self.content_cache_model(pk=pk_field.to_python(pk)) for pk in pks]
+        serializer = self.get_serializer(stand_ins, many=True)
+        fields = serializer.child.fields
+        for name in list(fields):
+            if name not in self.personal_fields:
+                del fields[name]
+        return serializer.data
@@ -0,0 +1,38 @@
+"""
+JWT authentication for WebSocket connections
+
+Browsers cannot set headers on a WebSocket handshake, so the access token
+is passed as ?token=. Because the credential is explicit rather than a
+cookie, a page on another origin cannot open an authenticated socket on
+the user's behalf.
+"""
+
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token: str):
+    """The active user an access token belongs to, or AnonymousUser"""
+    authentication = JWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Populate scope['user'] from the ?token= access token"""
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        token = (query.get('token') or [None])[0]
+        scope = dict(scope, user=await get_user_for_token(token) if token else AnonymousUser())
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class FlashcardsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.flashcards'
+    verbose_name = 'Flashcards'
+
+    def ready(self):
+        import apps.flashcards.signals
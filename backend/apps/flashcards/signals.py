@@ -0,0 +1,33 @@
+"""
+Signals for flashcards app
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.versioning import VersionStamps
+from .models import Flashcard, FlashcardSet
+
+
+@VersionStamps.register(FlashcardSet)
+def flashcard_set_version_keys(instance):
+    """A flashcard set's own stamp"""
+    return [VersionStamps.object_key(FlashcardSet, instance.pk)]
+
+
+@receiver(post_save, sender=FlashcardSet)
+@receiver(post_delete, sender=FlashcardSet)
+def bump_flashcard_set_versions(sender, instance, **kwargs):
+    """
+    A flashcard set was edited, published or unpublished
+    """
+    VersionStamps.bump_on_commit(flashcard_set_version_keys(instance))
+
+
+@receiver(post_save, sender=Flashcard)
+@receiver(post_delete, sender=Flashcard)
+def bump_flashcard_versions(sender, instance, **kwargs):
+    """
+    A card changed: the set it belongs to is stale
+    """
+    VersionStamps.bump_on_commit([VersionStamps.object_key(FlashcardSet, instance.flashcard_set_id)])
@@ -20,10 +20,12 @@ from .serializers import (
     StudentFlashcardProgressSerializer
 )
 from apps.core.permissions import IsTeacher, IsStudent
-from apps.schools.models import ClassroomEnrollment
+from apps.core.counters import DeferredCounter
+from apps.core.viewsets import PublishedContentCacheMixin
+from apps.schools.services.scope_service import UserScopeService
 
 
-class FlashcardSetViewSet(viewsets.ModelViewSet):
+class FlashcardSetViewSet(PublishedContentCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing flashcard sets
     
@@ -37,6 +39,7 @@ class FlashcardSetViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'lecture__title']
     ordering_fields = ['created_at', 'published_at', 'title', 'view_count']
     ordering = ['-created_at']
+    content_cache_model = FlashcardSet
     
     def get_queryset(self):
         """Filter flashcard sets based on user role"""
@@ -50,10 +53,7 @@ class FlashcardSetViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'student':
             # Students see published flashcard sets from enrolled classrooms
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return FlashcardSet.objects.filter(
                 classroom_id__in=enrolled_classrooms,
@@ -69,15 +69,7 @@ class FlashcardSetViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """Override list to add error handling"""
         try:
-            queryset = self.filter_queryset(self.get_queryset())
-            
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
+            return super().list(request, *args, **kwargs)
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -156,8 +148,7 @@ class FlashcardSetViewSet(viewsets.ModelViewSet):
         view.save()
         
         # Increment study count on flashcard set
-        flashcard_set.study_count += 1
-        flashcard_set.save(update_fields=['study_count'])
+        DeferredCounter.incr(FlashcardSet, flashcard_set.pk, 'study_count')
         
         return Response({
             'message': 'Study session tracked',
@@ -221,10 +212,7 @@ class FlashcardViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'student':
             # Students see flashcards from published sets in enrolled classrooms
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return Flashcard.objects.filter(
                 flashcard_set__classroom_id__in=enrolled_classrooms,
@@ -10,3 +10,6 @@ class GamesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.games'
     verbose_name = 'Educational Games'
+
+    def ready(self):
+        import apps.games.signals
@@ -0,0 +1,97 @@
+"""
+Management command to benchmark crossword grid generation
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from apps.games.services.crossword_generator import (
+    CrosswordGrid, find_best_grid, DEFAULT_STARTS, DEFAULT_TIME_BUDGET, MIN_PLACEMENT_RATIO
+)
+
+
+VOCABULARY = [
+    'ATOM', 'CELL', 'ENERGY', 'FORCE', 'GRAVITY', 'MOTION', 'FRICTION', 'ORBIT',
+    'PLANET', 'GALAXY', 'NEBULA', 'COMET', 'ASTEROID', 'ECLIPSE', 'SOLAR', 'LUNAR',
+    'PHOTON', 'ELECTRON', 'PROTON', 'NEUTRON', 'MOLECULE', 'ELEMENT', 'COMPOUND',
+    'MIXTURE', 'SOLUTION', 'ACID', 'BASE', 'SALT', 'OXYGEN', 'CARBON', 'HYDROGEN',
+    'NITROGEN', 'HELIUM', 'METAL', 'MAGNET', 'CIRCUIT', 'CURRENT', 'VOLTAGE',
+    'RESISTOR', 'BATTERY', 'LENS', 'MIRROR', 'PRISM', 'SPECTRUM', 'WAVE', 'SOUND',
+    'ECHO', 'PITCH', 'DENSITY', 'VOLUME', 'MASS', 'WEIGHT', 'PRESSURE', 'HEAT',
+    'FUSION', 'FISSION', 'NUCLEUS', 'GENE', 'PROTEIN', 'ENZYME', 'TISSUE', 'ORGAN',
+    'SPECIES', 'HABITAT', 'CLIMATE', 'WEATHER', 'CLOUD', 'RAIN', 'GLACIER', 'RIVER',
+    'DELTA', 'CANYON', 'VOLCANO', 'MAGMA', 'CRUST', 'MANTLE', 'FOSSIL', 'MINERAL',
+    'CRYSTAL', 'EROSION', 'TIDE', 'OCEAN', 'PLANKTON', 'ALGAE', 'FUNGUS', 'SPORE',
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure crossword placement rate and latency for word lists of 10-60 words'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='10,20,30,40,50,60',
+            help='Comma-separated word-list sizes',
+        )
+        parser.add_argument('--runs', type=int, default=20, help='Word lists per size')
+        parser.add_argument('--grid-size', type=int, default=15)
+        parser.add_argument('--starts', type=int, default=DEFAULT_STARTS)
+        parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        self.stdout.write(
+            f"{'words':>5} {'mode':>7} {'placed':>8} {'rejected':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8}"
+        )
+
+        for size in sizes:
+            word_lists = [
+                [{'word': word, 'clue': word.lower()} for word in rng.sample(VOCABULARY, min(size, len(VOCABULARY)))]
+                for _ in range(options['runs'])
+            ]
+
+            self._report(size, 'single', word_lists, lambda words, seed: self._single(words, options, seed))
+            self._report(size, 'multi', word_lists, lambda words, seed: find_best_grid(
+                words,
+                grid_size=options['grid_size'],
+                starts=options['starts'],
+                time_budget=options['time_budget'],
+                workers=options['workers'],
+                seed=seed
+            ))
+
+    def _single(self, words, options, seed):
+        """One deterministic longest-first pass (the pre-multi-start behaviour)"""
+        grid = CrosswordGrid(words, options['grid_size'], seed=seed)
+        grid.place_all()
+        return grid
+
+    def _report(self, size, mode, word_lists, build):
+        latencies = []
+        rates = []
+        failed = 0
+
+        for seed, words in enumerate(word_lists):
+            started = time.perf_counter()
+            grid = build(words, seed)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            rate = len(grid.placed_words) / len(words)
+            rates.append(rate)
+            if rate < MIN_PLACEMENT_RATIO:
+                failed += 1
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{size:>5} {mode:>7} {statistics.mean(rates):>7.0%} {failed:>8} "
+            f"{statistics.median(latencies):>8.1f} {p95:>8.1f}"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_alter_lecturegame_average_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameattempt',
+            name='variant',
+            field=models.JSONField(blank=True, default=dict, help_text='Sampled question bank indices and option order (answer key, never sent to clients)'),
+        ),
+    ]
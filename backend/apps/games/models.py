@@ -223,6 +223,11 @@ class GameAttempt(TimeStampedModel):
         default=dict,
         help_text='Advanced performance metrics'
     )
+    variant = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Sampled question bank indices and option order (answer key, never sent to clients)'
+    )
     
     # Gamification Integration
     xp_earned = models.PositiveIntegerField(default=0)
@@ -6,6 +6,7 @@ from typing import Dict, Any
 from rest_framework import serializers
 from django.utils import timezone
 from .models import GameTemplate, LectureGame, GameAttempt, GameLeaderboard
+from .services.scoring_service import ScoringService
 from apps.accounts.models import User
 from apps.lectures.models import Lecture
 
@@ -62,6 +63,10 @@ class GameGenerationRequestSerializer(serializers.Serializer):
         default=False,
         help_text='Automatically publish after generation'
     )
+    variant_pool = serializers.BooleanField(
+        default=False,
+        help_text='Generate an oversized question bank and serve each attempt a shuffled subset'
+    )
     
     def validate_lecture_id(self, value):
         """Validate lecture exists"""
@@ -98,6 +103,19 @@ class GameAnalyticsSerializer(serializers.Serializer):
     completion_rate = serializers.FloatField()
 
 
+def _best_attempt(game: LectureGame, student: User, context: Dict[str, Any]):
+    """
+    Student's best completed attempt at a game (annotated with total_attempts)
+
+    Reads context['best_attempts'] when the view prefetched it for the page,
+    and queries otherwise.
+    """
+    best_attempts = context.get('best_attempts')
+    if best_attempts is None:
+        best_attempts = ScoringService.best_attempts(student, [game.pk])
+    return best_attempts.get(game.pk)
+
+
 class LectureGameListSerializer(serializers.ModelSerializer):
     """Serializer for listing games"""
     
@@ -140,13 +158,9 @@ class LectureGameListSerializer(serializers.ModelSerializer):
         if request.user.role != 'student':
             return None
         
-        attempts = GameAttempt.objects.filter(
-            lecture_game=obj,
-            student=request.user,
-            is_completed=True
-        ).order_by('-final_score')
+        best_attempt = _best_attempt(obj, request.user, self.context)
         
-        if not attempts.exists():
+        if not best_attempt:
             return {
                 'played': False,
                 'best_score': 0,
@@ -155,13 +169,11 @@ class LectureGameListSerializer(serializers.ModelSerializer):
                 'last_played': None
             }
         
-        best_attempt = attempts.first()
-        
         return {
             'played': True,
             'best_score': best_attempt.final_score,
             'best_rank': best_attempt.rank_achieved,
-            'total_attempts': attempts.count(),
+            'total_attempts': best_attempt.total_attempts,
             'last_played': best_attempt.completed_at
         }
     
@@ -205,10 +217,13 @@ class LectureGameDetailSerializer(serializers.ModelSerializer):
     
     def get_lecture(self, obj: LectureGame) -> Dict[str, Any]:
         """Get lecture info"""
+        preview = getattr(obj, 'lecture_transcript_preview', None)
+        if preview is None:
+            preview = obj.lecture.transcript[:200]
         return {
             'id': obj.lecture.id,
             'title': obj.lecture.title,
-            'transcript_preview': obj.lecture.transcript[:200] if obj.lecture.transcript else ''
+            'transcript_preview': preview
         }
     
     def get_game_config(self, obj: LectureGame) -> Dict[str, Any]:
@@ -234,11 +249,7 @@ class LectureGameDetailSerializer(serializers.ModelSerializer):
         if request.user.role != 'student':
             return None
         
-        best_attempt = GameAttempt.objects.filter(
-            lecture_game=obj,
-            student=request.user,
-            is_completed=True
-        ).order_by('-final_score').first()
+        best_attempt = _best_attempt(obj, request.user, self.context)
         
         if not best_attempt:
             return None
@@ -1,5 +1,7 @@
-
 import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 import logging
@@ -7,6 +9,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Cell occupancy flags (stored per cell in CrosswordGrid.dirs)
+ACROSS = 1
+DOWN = 2
+DIRECTION_NAMES = {ACROSS: 'across', DOWN: 'down'}
+
+# Multi-start search defaults
+DEFAULT_STARTS = 8
+DEFAULT_TIME_BUDGET = 0.5  # seconds
+MIN_PLACEMENT_RATIO = 0.6
+
+
 @dataclass
 class Word:
     """Represents a word to be placed in the crossword"""
@@ -16,354 +29,346 @@ class Word:
     row: int = -1
     col: int = -1
     number: int = 0
-    
+    codes: bytes = b''  # Letter codes used on the grid
+
     def __len__(self):
         return len(self.text)
 
 
-@dataclass
-class Cell:
-    """Represents a single cell in the crossword grid"""
-    letter: str = ''  # Empty string means blocked cell
-    number: int = 0   # Clue number (if word starts here)
-    is_blocked: bool = False
-
-
 class CrosswordGrid:
     """
     Generates a valid crossword puzzle grid using a constraint-based algorithm.
-    
+
     Algorithm:
-    1. Sort words by length (longest first)
+    1. Sort words by length (longest first, optionally jittered per start)
     2. Place first word in center
     3. For each remaining word:
-       a. Find all possible placements (intersecting with existing words)
-       b. Score each placement (prefer more intersections, central location)
+       a. Look up grid cells holding each of its letters (letter index)
+       b. Check each crossing placement in one pass that also counts intersections
        c. Place word at best-scored position
-    4. Validate grid connectivity
+    4. Retry words that failed once other words have been placed
+
+    The grid is a flat bytearray (one byte per cell, 0 = empty) with a
+    parallel bytearray of ACROSS/DOWN occupancy flags.
     """
-    
-    def __init__(self, words_data: List[Dict], grid_size: int = 15):
+
+    def __init__(self, words_data: List[Dict], grid_size: int = 15,
+                 seed: Optional[int] = None, shuffle: bool = False):
         """
         Initialize crossword generator
-        
+
         Args:
             words_data: List of {word: str, clue: str} dicts
             grid_size: Size of square grid (default 15x15)
+            seed: Seed for randomized word order and tie-breaking
+            shuffle: Jitter the longest-first order (used by multi-start search)
         """
         self.grid_size = grid_size
-        self.grid = [[Cell(is_blocked=True) for _ in range(grid_size)] 
-                     for _ in range(grid_size)]
-        
+        self.random = random.Random(seed)
+        self.jitter = 1.0 if shuffle else 0.0
+
         # Convert to Word objects and sort by length (longest first)
         self.words = [
             Word(text=w['word'].upper(), clue=w['clue'], direction='')
             for w in words_data
         ]
-        self.words.sort(key=lambda w: len(w.text), reverse=True)
-        
+        self.words.sort(
+            key=lambda w: len(w.text) + self.random.random() * 2 * self.jitter,
+            reverse=True
+        )
+
+        # Letters are mapped to small codes so any alphabet fits in a byte
+        self.alphabet: Dict[str, int] = {}
+        for word in self.words:
+            word.codes = self._encode(word.text)
+
+        size = grid_size * grid_size
+        self.cells = bytearray(size)
+        self.dirs = bytearray(size)
+        self.letter_index: Dict[int, List[int]] = defaultdict(list)
+
         self.placed_words: List[Word] = []
+        self.intersections = 0
         self.word_number = 1
-    
+
+    def _encode(self, text: str) -> bytes:
+        codes = bytearray()
+        for letter in text:
+            code = self.alphabet.get(letter)
+            if code is None:
+                code = self.alphabet[letter] = len(self.alphabet) + 1
+            codes.append(code)
+        return bytes(codes)
+
     def generate(self) -> Optional[Dict]:
         """
         Generate the crossword grid.
-        
+
         Returns:
             Dict with grid layout and word placements, or None if failed
         """
         try:
-            if not self.words:
+            if not self.place_all():
                 return None
 
-            # Place first word horizontally in center
-            first_word = self.words[0]
-            center_row = self.grid_size // 2
-            center_col = max(0, (self.grid_size - len(first_word.text)) // 2)
-            
-            self._place_word(first_word, center_row, center_col, 'across')
-            
-            # Try to place remaining words
-            for word in self.words[1:]:
-                if not self._place_word_with_intersections(word):
-                    # logger.warning(f"Could not place word: {word.text}")
-                    # Continue anyway - partial crossword is ok
-                    pass
-            
             # Validate minimum connectivity or count
             # Use stricter validation for higher quality
-            if len(self.placed_words) < len(self.words) * 0.6:  # At least 60% placed
+            if len(self.placed_words) < len(self.words) * MIN_PLACEMENT_RATIO:
                 logger.error(f"Grid generation failed: too few words placed ({len(self.placed_words)}/{len(self.words)})")
                 return None
-            
+
             return self._export_grid()
-            
+
         except Exception as e:
             logger.error(f"Crossword generation error: {e}")
             return None
-    
+
+    def place_all(self) -> int:
+        """
+        Place as many words as possible
+
+        Returns:
+            Number of words placed
+        """
+        if not self.words:
+            return 0
+
+        # Place first word horizontally in center
+        first_word = self.words[0]
+        center_row = self.grid_size // 2
+        center_col = max(0, (self.grid_size - len(first_word.text)) // 2)
+
+        if not self._place_word(first_word, center_row, center_col, 'across'):
+            return 0
+
+        # Words that fail may fit once later words open new crossings,
+        # so keep retrying until a full pass places nothing
+        pending = self.words[1:]
+        while pending:
+            deferred = [w for w in pending if not self._place_word_with_intersections(w)]
+            if len(deferred) == len(pending):
+                break
+            pending = deferred
+
+        return len(self.placed_words)
+
+    def quality(self) -> Tuple[int, int, int]:
+        """Density score for comparing grids: (words placed, intersections, -bounding area)"""
+        if not self.placed_words:
+            return (0, 0, 0)
+        min_row, max_row, min_col, max_col = self._get_bounds()
+        area = (max_row - min_row + 1) * (max_col - min_col + 1)
+        return (len(self.placed_words), self.intersections, -area)
+
     def _place_word(self, word: Word, row: int, col: int, direction: str) -> bool:
         """
         Place a word on the grid at specified position.
-        
+
         Args:
             word: Word object to place
             row: Starting row
             col: Starting column
             direction: 'across' or 'down'
-        
+
         Returns:
             True if placed successfully
         """
+        flag = ACROSS if direction == 'across' else DOWN
+        codes = word.codes
+
         # Validate placement
-        if not self._is_valid_placement(word.text, row, col, direction):
+        crossings = self._check_placement(codes, row, col, flag)
+        if crossings < 0:
             return False
-        
+
         # Place word
         word.row = row
         word.col = col
         word.direction = direction
         word.number = self.word_number
         self.word_number += 1
-        
+
         # Update grid
-        for i, letter in enumerate(word.text):
-            if direction == 'across':
-                cell = self.grid[row][col + i]
-                cell.letter = letter
-                cell.is_blocked = False
-                if i == 0:
-                    cell.number = word.number
-            else:  # down
-                cell = self.grid[row + i][col]
-                cell.letter = letter
-                cell.is_blocked = False
-                if i == 0:
-                    cell.number = word.number
-        
+        step = 1 if flag == ACROSS else self.grid_size
+        pos = row * self.grid_size + col
+        for code in codes:
+            if not self.cells[pos]:
+                self.cells[pos] = code
+                self.letter_index[code].append(pos)
+            self.dirs[pos] |= flag
+            pos += step
+
+        self.intersections += crossings
         self.placed_words.append(word)
         return True
-    
+
     def _is_valid_placement(self, text: str, row: int, col: int, direction: str) -> bool:
         """Check if word can be legally placed at position"""
-        # Check boundaries
-        if direction == 'across':
-            if col + len(text) > self.grid_size:
-                return False
-        else:  # down
-            if row + len(text) > self.grid_size:
-                return False
-        
-        # Check each cell
-        for i, letter in enumerate(text):
-            r = row + (i if direction == 'down' else 0)
-            c = col + (i if direction == 'across' else 0)
-            
-            cell = self.grid[r][c]
-            
-            # If cell has letter, must match
-            if cell.letter:
-                if cell.letter != letter:
-                    return False
-            else:
-                # Check perpendicular conflicts
-                if not self._check_perpendicular_space(r, c, direction):
-                    return False
-        
-        # Check surrounding cells (head and tail) to ensure words don't run into each other
-        if direction == 'across':
-            # Check left of start
-            if col > 0 and self.grid[row][col - 1].letter:
-                return False
-            # Check right of end
-            if col + len(text) < self.grid_size and self.grid[row][col + len(text)].letter:
-                return False
-        else: # down
-            # Check above start
-            if row > 0 and self.grid[row - 1][col].letter:
-                return False
-            # Check below end
-            if row + len(text) < self.grid_size and self.grid[row + len(text)][col].letter:
-                return False
+        flag = ACROSS if direction == 'across' else DOWN
+        return self._check_placement(self._encode(text), row, col, flag) >= 0
 
-        return True
-    
-    def _check_perpendicular_space(self, row: int, col: int, direction: str) -> bool:
+    def _check_placement(self, codes: bytes, row: int, col: int, flag: int) -> int:
         """
-        Ensure no perpendicular words conflict.
-        If we are placing a letter in an empty cell, we must ensure we aren't creating 
-        unintended 2-letter words with adjacent cells.
+        Check a placement in a single pass over the word's cells
+
+        Returns:
+            Number of intersections with placed words, or -1 if illegal
         """
-        if direction == 'across':
-            # Check above and below
-            # If there is a letter above OR below, it implies we are forming a new down word.
-            # But since we are placing a NEW word, these neighbors must be empty unless 
-            # we are crossing an existing word (which is handled by cell.letter check).
-            # So if cell is empty, neighbors perpendicular must be empty.
-            if row > 0 and self.grid[row - 1][col].letter:
-                return False
-            if row < self.grid_size - 1 and self.grid[row + 1][col].letter:
-                return False
+        n = self.grid_size
+        length = len(codes)
+        cells = self.cells
+
+        if row < 0 or col < 0 or row >= n or col >= n:
+            return -1
+
+        pos = row * n + col
+        if flag == ACROSS:
+            if col + length > n:
+                return -1
+            # Words must not run into each other at the head or tail
+            if col > 0 and cells[pos - 1]:
+                return -1
+            if col + length < n and cells[pos + length]:
+                return -1
+            step, side = 1, n
+            has_before, has_after = row > 0, row < n - 1
         else:  # down
-            # Check left and right
-            if col > 0 and self.grid[row][col - 1].letter:
-                return False
-            if col < self.grid_size - 1 and self.grid[row][col + 1].letter:
-                return False
-        
-        return True
-    
+            if row + length > n:
+                return -1
+            if row > 0 and cells[pos - n]:
+                return -1
+            if row + length < n and cells[pos + length * n]:
+                return -1
+            step, side = n, 1
+            has_before, has_after = col > 0, col < n - 1
+
+        crossings = 0
+        dirs = self.dirs
+        for code in codes:
+            existing = cells[pos]
+            if existing:
+                # Must match, and may only cross a perpendicular word
+                if existing != code or dirs[pos] & flag:
+                    return -1
+                crossings += 1
+            else:
+                # An empty cell must not touch a letter sideways, or it would
+                # create an unintended 2-letter word
+                if has_before and cells[pos - side]:
+                    return -1
+                if has_after and cells[pos + side]:
+                    return -1
+            pos += step
+
+        return crossings
+
     def _place_word_with_intersections(self, word: Word) -> bool:
         """
         Find best placement for word that intersects existing words.
+
+        Candidates come from the letter index, so only cells holding one of
+        the word's letters are visited.
         """
-        possible_placements = []
-        
-        # Try both directions
-        for direction in ['across', 'down']:
-            # For each placed word
-            for placed_word in self.placed_words:
-                # Find intersection points
-                intersections = self._find_intersections(word.text, placed_word)
-                
-                for word_idx, placed_idx in intersections:
-                    # Calculate grid position
-                    if direction == 'across' and placed_word.direction == 'down':
-                        # New word crosses existing DOWN word
-                        row = placed_word.row + placed_idx
-                        col = placed_word.col - word_idx
-                    elif direction == 'down' and placed_word.direction == 'across':
-                        # New word crosses existing ACROSS word
-                        row = placed_word.row - word_idx
-                        col = placed_word.col + placed_idx
-                    else:
-                        continue  # Can't intersect parallel words (simplification)
-                    
-                    # Validate and score
-                    # Ensure position is within grid boundaries before checking validity
-                    if 0 <= row < self.grid_size and 0 <= col < self.grid_size:
-                        if self._is_valid_placement(word.text, row, col, direction):
-                            score = self._score_placement(word.text, row, col, direction)
-                            possible_placements.append((score, row, col, direction))
-        
-        # Sort by score and try best placements
-        possible_placements.sort(reverse=True)
-        
-        for score, row, col, direction in possible_placements[:20]:  # Try top 20
-            if self._place_word(word, row, col, direction):
-                return True
-        
-        return False
-    
-    def _find_intersections(self, word1: str, word2: Word) -> List[Tuple[int, int]]:
-        """Find all possible intersection points between two words"""
-        intersections = []
-        for i, letter1 in enumerate(word1):
-            for j, letter2 in enumerate(word2.text):
-                if letter1 == letter2:
-                    intersections.append((i, j))
-        return intersections
-    
-    def _score_placement(self, text: str, row: int, col: int, direction: str) -> float:
+        n = self.grid_size
+        codes = word.codes
+        length = len(codes)
+        center = n // 2
+
+        best = None
+        best_score = None
+        seen = set()
+
+        for i, code in enumerate(codes):
+            for pos in self.letter_index.get(code, ()):
+                occupied = self.dirs[pos]
+                r, c = divmod(pos, n)
+                if occupied == ACROSS:
+                    flag, row, col = DOWN, r - i, c
+                elif occupied == DOWN:
+                    flag, row, col = ACROSS, r, c - i
+                else:
+                    continue  # Cell already crossed both ways
+
+                key = (row, col, flag)
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                crossings = self._check_placement(codes, row, col, flag)
+                if crossings <= 0:
+                    continue
+
+                score = self._score_placement(length, row, col, flag, crossings, center)
+                if best_score is None or score > best_score:
+                    best_score = score
+                    best = (row, col, flag)
+
+        if best is None:
+            return False
+
+        row, col, flag = best
+        return self._place_word(word, row, col, DIRECTION_NAMES[flag])
+
+    def _score_placement(self, length: int, row: int, col: int, flag: int,
+                         crossings: int, center: int) -> float:
         """
         Score a potential word placement.
         Higher score = better placement.
         """
-        score = 0.0
-        
-        # Count intersections
-        intersections = 0
-        for i in range(len(text)):
-            r = row + (i if direction == 'down' else 0)
-            c = col + (i if direction == 'across' else 0)
-            if self.grid[r][c].letter:
-                intersections += 1
-        
-        score += intersections * 10  # Major factor
-        
+        score = crossings * 10.0  # Major factor
+
         # Centrality bonus
-        center = self.grid_size // 2
-        if direction == 'across':
-            word_center_row = row
-            word_center_col = col + len(text) / 2
+        if flag == ACROSS:
+            distance = abs(row - center) + abs(col + length / 2 - center)
         else:
-            word_center_row = row + len(text) / 2
-            word_center_col = col
-            
-        distance = abs(word_center_row - center) + abs(word_center_col - center)
+            distance = abs(row + length / 2 - center) + abs(col - center)
         score -= distance * 0.5
-        
+
+        # Random tie-breaking for multi-start search
+        if self.jitter:
+            score += self.random.random() * self.jitter
+
         return score
-    
+
     def _export_grid(self) -> Dict:
         """Export grid to JSON-serializable format"""
-        # Compact grid (remove excess empty rows/cols)
+        # Crop to the visible area (plus padding)
         min_row, max_row, min_col, max_col = self._get_bounds()
-        
-        # Adjust grid size if needed or keep original? 
-        # For simplicity, returning the visible bounding box with some padding would be nice, 
-        # but maintaining the fixed grid size is easier for UI initially.
-        # Let's crop to visible area to save space and make it look better.
-        
+
         height = max_row - min_row + 1
         width = max_col - min_col + 1
-        
+
+        # Re-number words in standard crossword order: sort starting
+        # cells top-left to bottom-right and number them sequentially
+        sorted_starts = sorted({(w.row, w.col) for w in self.placed_words})
+        start_map = {pos: i + 1 for i, pos in enumerate(sorted_starts)}
+
+        for w in self.placed_words:
+            w.number = start_map[(w.row, w.col)]
+
+        letters = {code: letter for letter, code in self.alphabet.items()}
+        n = self.grid_size
+
         compact_grid = []
         for r in range(min_row, max_row + 1):
             row_data = []
             for c in range(min_col, max_col + 1):
-                cell = self.grid[r][c]
+                code = self.cells[r * n + c]
                 row_data.append({
-                    'letter': cell.letter if not cell.is_blocked else None,
-                    'number': cell.number if cell.number > 0 else None,
-                    'is_blocked': cell.is_blocked
+                    'letter': letters[code] if code else None,
+                    'number': start_map.get((r, c)),
+                    'is_blocked': not code
                 })
             compact_grid.append(row_data)
-        
-        # Separate across and down clues
-        across_words = [w for w in self.placed_words if w.direction == 'across']
-        down_words = [w for w in self.placed_words if w.direction == 'down']
-        
-        # Re-number words based on top-left to bottom-right order
-        # This is standard crossword numbering: 
-        # Sort all starting cells by (row, col). Assign numbers sequentially.
-        
-        # Gather all starting positions
-        starts = {} # (r, c) -> number
-        
-        # We need to preserve the numbers assigned during generation OR reassign them?
-        # Usually reassigning is better for "1, 2, 3..." clean look.
-        # But 'placed_words' already have numbers. Let's just use them but they might be unordered.
-        # Let's re-number for professional polish.
-        
-        # 1. Find all cells that start a word
-        starting_cells = set()
-        for w in self.placed_words:
-            starting_cells.add((w.row, w.col))
-        
-        # 2. Sort by row, then col
-        sorted_starts = sorted(list(starting_cells), key=lambda x: (x[0], x[1]))
-        
-        # 3. Assign numbers
-        start_map = {pos: i+1 for i, pos in enumerate(sorted_starts)}
-        
-        # 4. Update words
-        for w in self.placed_words:
-            w.number = start_map[(w.row, w.col)]
-        
-        # 5. Sort lists
-        across_words.sort(key=lambda w: w.number)
-        down_words.sort(key=lambda w: w.number)
-        
-        # 6. Update grid numbers
-        for r_idx, row_data in enumerate(compact_grid):
-            for c_idx, cell_data in enumerate(row_data):
-                abs_r = min_row + r_idx
-                abs_c = min_col + c_idx
-                if (abs_r, abs_c) in start_map:
-                    cell_data['number'] = start_map[(abs_r, abs_c)]
-                else:
-                    cell_data['number'] = None # Clear old numbers
+
+        across_words = sorted(
+            (w for w in self.placed_words if w.direction == 'across'),
+            key=lambda w: w.number
+        )
+        down_words = sorted(
+            (w for w in self.placed_words if w.direction == 'down'),
+            key=lambda w: w.number
+        )
 
         return {
             'grid': compact_grid,
@@ -395,12 +400,12 @@ class CrosswordGrid:
             ],
             'total_words': len(self.placed_words)
         }
-    
+
     def _get_bounds(self) -> Tuple[int, int, int, int]:
         """Get the bounding box of placed words"""
         min_row, max_row = self.grid_size, 0
         min_col, max_col = self.grid_size, 0
-        
+
         for word in self.placed_words:
             if word.direction == 'across':
                 min_row = min(min_row, word.row)
@@ -412,26 +417,106 @@ class CrosswordGrid:
                 max_row = max(max_row, word.row + len(word.text) - 1)
                 min_col = min(min_col, word.col)
                 max_col = max(max_col, word.col)
-        
+
         # Add padding
         min_row = max(0, min_row - 1)
         max_row = min(self.grid_size - 1, max_row + 1)
         min_col = max(0, min_col - 1)
         max_col = min(self.grid_size - 1, max_col + 1)
-        
+
         return min_row, max_row, min_col, max_col
 
 
-def generate_crossword_grid(words_data: List[Dict], grid_size: int = 15) -> Optional[Dict]:
+def _run_start(words_data: List[Dict], grid_size: int, seed: Optional[int], shuffle: bool):
+    """Build one candidate grid (top-level so it can run in a worker process)"""
+    grid = CrosswordGrid(words_data, grid_size, seed=seed, shuffle=shuffle)
+    grid.place_all()
+    return grid.quality(), grid
+
+
+def find_best_grid(
+    words_data: List[Dict],
+    grid_size: int = 15,
+    starts: int = DEFAULT_STARTS,
+    time_budget: float = DEFAULT_TIME_BUDGET,
+    workers: int = 1,
+    seed: Optional[int] = None
+) -> Optional[CrosswordGrid]:
+    """
+    Run several randomized starts and keep the densest grid
+
+    Grids are ranked by words placed, then intersections, then smallest
+    area. The first start always uses the plain longest-first order, and
+    starts stop being launched once the time budget is spent.
+
+    Args:
+        words_data: List of {word: str, clue: str}
+        grid_size: Grid dimensions
+        starts: Number of randomized starts to try
+        time_budget: Seconds to spend before settling for the best grid so far
+        workers: Worker processes for the starts (1 = run in-process)
+        seed: Base seed for reproducible output
+
+    Returns:
+        Best CrosswordGrid, or None if there were no words
+    """
+    if not words_data:
+        return None
+
+    base_seed = seed if seed is not None else random.randrange(2 ** 31)
+    results = []
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_run_start, words_data, grid_size, base_seed + k, k > 0)
+                for k in range(starts)
+            ]
+            wait(futures, timeout=time_budget)
+            # Starts not yet running are dropped; leaving the block waits for
+            # the running ones, so no worker process outlives this call
+            for future in futures:
+                future.cancel()
+        results = [future.result() for future in futures if not future.cancelled()]
+
+    if not results:
+        deadline = time.perf_counter() + time_budget
+        for k in range(starts):
+            results.append(_run_start(words_data, grid_size, base_seed + k, k > 0))
+            if time.perf_counter() >= deadline:
+                break
+
+    return max(results, key=lambda result: result[0])[1]
+
+
+def generate_crossword_grid(
+    words_data: List[Dict],
+    grid_size: int = 15,
+    **search_options
+) -> Optional[Dict]:
     """
     Main function to generate crossword puzzle.
-    
+
     Args:
         words_data: List of {word: str, clue: str}
         grid_size: Grid dimensions
-    
+        **search_options: starts, time_budget, workers, seed (see find_best_grid)
+
     Returns:
         Grid data dict or None if failed
     """
-    generator = CrosswordGrid(words_data, grid_size)
-    return generator.generate()
+    try:
+        best = find_best_grid(words_data, grid_size, **search_options)
+        if best is None:
+            return None
+
+        placed = len(best.placed_words)
+        if placed < len(best.words) * MIN_PLACEMENT_RATIO:
+            logger.error(f"Grid generation failed: too few words placed ({placed}/{len(best.words)})")
+            return None
+
+        return best._export_grid()
+
+    except Exception as e:
+        logger.error(f"Crossword generation error: {e}")
+        return None
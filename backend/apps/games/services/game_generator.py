@@ -25,6 +25,7 @@ class GameGeneratorService:
     VALID_DIFFICULTIES = ['EASY', 'MEDIUM', 'HARD']
     MIN_QUESTIONS = 5
     MAX_QUESTIONS = 20
+    MAX_POOL_QUESTIONS = 40
     MIN_TRANSCRIPT_LENGTH = 100
     
     # Pricing (approximate, update based on actual Gemini pricing)
@@ -40,7 +41,8 @@ class GameGeneratorService:
         self,
         lecture: Lecture,
         difficulty: str = 'MEDIUM',
-        question_count: int = 10
+        question_count: int = 10,
+        pool_size: int = 0
     ) -> Dict[str, Any]:
         """
         Generate Fall Drop game content from lecture transcript
@@ -49,6 +51,8 @@ class GameGeneratorService:
             lecture: Lecture object with transcript
             difficulty: EASY, MEDIUM, or HARD
             question_count: Number of questions (5-20)
+            pool_size: Size of the question bank to generate for variant
+                pools (0 = exactly question_count)
         
         Returns:
             dict: {
@@ -64,6 +68,7 @@ class GameGeneratorService:
             self._validate_lecture(lecture)
             self._validate_difficulty(difficulty)
             self._validate_question_count(question_count)
+            question_count = self._bank_size(question_count, pool_size)
             
             # Build prompt
             prompt = self._build_quick_drop_prompt(
@@ -83,7 +88,7 @@ class GameGeneratorService:
                 'temperature': 0.7,
                 'top_p': 0.95,
                 'top_k': 40,
-                'max_output_tokens': 4096,
+                'max_output_tokens': self._max_output_tokens(question_count),
                 'response_mime_type': 'application/json',
             }
             
@@ -164,7 +169,8 @@ class GameGeneratorService:
         self,
         lecture: Lecture,
         difficulty: str = 'MEDIUM',
-        question_count: int = 15
+        question_count: int = 15,
+        pool_size: int = 0
     ) -> Dict[str, Any]:
         """
         Generate Hot Potato game content (Speed/Reaction)
@@ -174,6 +180,7 @@ class GameGeneratorService:
             self._validate_lecture(lecture)
             self._validate_difficulty(difficulty)
             self._validate_question_count(question_count)
+            question_count = self._bank_size(question_count, pool_size)
             
             # Build prompt
             prompt = self._build_hot_potato_prompt(
@@ -193,7 +200,7 @@ class GameGeneratorService:
                 'temperature': 0.7,
                 'top_p': 0.95,
                 'top_k': 40,
-                'max_output_tokens': 4096,
+                'max_output_tokens': self._max_output_tokens(question_count),
                 'response_mime_type': 'application/json',
             }
             
@@ -275,6 +282,20 @@ class GameGeneratorService:
                 f'Question count must be between {self.MIN_QUESTIONS} and {self.MAX_QUESTIONS}'
             )
     
+    def _bank_size(self, question_count: int, pool_size: int) -> int:
+        """Number of questions to request (larger when building a variant pool)"""
+        if not pool_size:
+            return question_count
+        if pool_size < question_count or pool_size > self.MAX_POOL_QUESTIONS:
+            raise ValidationError(
+                f'Pool size must be between {question_count} and {self.MAX_POOL_QUESTIONS}'
+            )
+        return pool_size
+    
+    def _max_output_tokens(self, question_count: int) -> int:
+        """Output budget for a question set (pools need more than one game's worth)"""
+        return 4096 if question_count <= self.MAX_QUESTIONS else 8192
+    
     def _build_quick_drop_prompt(
         self,
         lecture: Lecture,
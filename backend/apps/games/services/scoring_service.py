@@ -5,9 +5,11 @@ Handles score calculation, XP rewards, and leaderboard updates
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 from decimal import Decimal
 from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 
 from ..models import GameAttempt, GameLeaderboard, LectureGame
@@ -263,6 +265,32 @@ class ScoringService:
                 entry.rank = rank
                 entry.save(update_fields=['rank'])
     
+    @classmethod
+    def best_attempts(cls, student: User, game_ids: Iterable) -> Dict[Any, GameAttempt]:
+        """
+        Get a student's best completed attempt at each game in one query
+        
+        Args:
+            student: Student user
+            game_ids: LectureGame ids
+        
+        Returns:
+            dict: game id -> best GameAttempt, annotated with total_attempts
+            (the student's completed attempts at that game). Games the
+            student has not completed are absent.
+        """
+        by_game = [F('lecture_game_id')]
+        attempts = GameAttempt.objects.filter(
+            student=student,
+            lecture_game_id__in=list(game_ids),
+            is_completed=True
+        ).annotate(
+            total_attempts=Window(Count('id'), partition_by=by_game),
+            position=Window(RowNumber(), partition_by=by_game, order_by=F('final_score').desc()),
+        ).filter(position=1)
+        
+        return {attempt.lecture_game_id: attempt for attempt in attempts}
+    
     @classmethod
     @transaction.atomic
     def update_game_analytics(cls, lecture_game: LectureGame) -> None:
@@ -318,30 +346,21 @@ class ScoringService:
     def award_xp_to_student(cls, attempt: GameAttempt) -> None:
         """Add XP to student profile"""
         try:
-            from apps.gamification.models import StudentXP, XPTransaction
+            from apps.gamification.services.xp_ledger_service import XPLedgerService
             
             xp = attempt.xp_earned
             if xp <= 0:
                 return
-                
-            student_xp, created = StudentXP.objects.get_or_create(student=attempt.student)
-            student_xp.total_xp += xp
-            # Simple level scaling: 1000 XP per level
-            student_xp.current_level = 1 + (student_xp.total_xp // 1000)
-            student_xp.save()
             
-            # Log transaction
-            XPTransaction.objects.create(
+            result = XPLedgerService.award(
                 student=attempt.student,
-                transaction_type='earned',
-                source='game_completed',
                 amount=xp,
-                balance_after=student_xp.total_xp,
+                source='game_completed',
                 description=f"Earned from game: {attempt.lecture_game.title}",
                 reference_type='game_attempt',
                 reference_id=str(attempt.id)
             )
-            logger.info(f"[XP] Awarded {xp} XP to user {attempt.student.id}. Total: {student_xp.total_xp}")
+            logger.info(f"[XP] Awarded {xp} XP to user {attempt.student.id}. Total: {result['student_xp'].total_xp}")
         except Exception as e:
             logger.error(f"[XP] Failed to award XP: {str(e)}")
 
@@ -349,73 +368,78 @@ class ScoringService:
     def check_badge_triggers(cls, attempt: GameAttempt) -> list:
         """
         Check if attempt triggers any badges
+        
+        Owned badges and badge definitions are each loaded in one query,
+        and the games-played count comes from StudentXP.games_completed
+        instead of counting every GameAttempt.
         """
-        earned_badges = []
+        from apps.gamification.models import StudentXP, StudentBadge
+        from apps.gamification.services.achievement_engine import AchievementEngine
+        from apps.gamification.services.xp_ledger_service import XPLedgerService
+        
         student = attempt.student
         
+        student_xp, created = StudentXP.objects.get_or_create(student=student)
+        before = AchievementEngine.snapshot(student_xp)
+        StudentXP.objects.filter(pk=student_xp.pk).update(
+            games_completed=F('games_completed') + 1
+        )
+        student_xp.refresh_from_db(fields=['games_completed', 'total_badges_earned'])
+        
+        triggered = []
+        
         # Perfect Score Badge
         if attempt.is_perfect_score:
-            badge_name = 'Perfect Game Score'
-            if not cls._has_badge(student, badge_name):
-                badge = cls._award_badge(student, badge_name, attempt)
-                if badge:
-                    earned_badges.append(badge)
+            triggered.append('Perfect Game Score')
         
         # Speed Demon Badge (completed in under 60 seconds)
         if attempt.time_taken < 60:
-            badge_name = 'Speed Demon'
-            if not cls._has_badge(student, badge_name):
-                badge = cls._award_badge(student, badge_name, attempt)
-                if badge:
-                    earned_badges.append(badge)
+            triggered.append('Speed Demon')
         
         # Combo Master Badge (10+ combo)
         if attempt.max_combo_achieved >= 10:
-            badge_name = 'Combo Master'
-            if not cls._has_badge(student, badge_name):
-                badge = cls._award_badge(student, badge_name, attempt)
-                if badge:
-                    earned_badges.append(badge)
+            triggered.append('Combo Master')
         
         # First Game Badge
-        total_games = GameAttempt.objects.filter(
-            student=student,
-            is_completed=True
-        ).count()
+        if student_xp.games_completed == 1:
+            triggered.append('First Game Complete')
         
-        if total_games == 1:
-            badge_name = 'First Game Complete'
-            if not cls._has_badge(student, badge_name):
-                badge = cls._award_badge(student, badge_name, attempt)
-                if badge:
-                    earned_badges.append(badge)
+        earned_badges = []
+        if triggered:
+            owned = set(student.earned_badges.filter(
+                badge__name__in=triggered
+            ).values_list('badge__name', flat=True))
+            missing = [name for name in triggered if name not in owned]
+            
+            badges = {b.name: b for b in Badge.objects.filter(name__in=missing)}
+            for name in missing:
+                if name not in badges:
+                    logger.warning(f"[BADGES] Badge '{name}' not found")
+            earned_badges = [badges[name] for name in missing if name in badges]
+            
+            if earned_badges:
+                StudentBadge.objects.bulk_create(
+                    [
+                        StudentBadge(
+                            student=student,
+                            badge=badge,
+                            earned_for='Game achievement',
+                            reference_type='game_attempt',
+                            reference_id=str(attempt.id)
+                        )
+                        for badge in earned_badges
+                    ],
+                    ignore_conflicts=True
+                )
+                StudentXP.objects.filter(pk=student_xp.pk).update(
+                    total_badges_earned=F('total_badges_earned') + len(earned_badges)
+                )
+                student_xp.total_badges_earned += len(earned_badges)
+                logger.info(
+                    f"[BADGES] Awarded {', '.join(b.name for b in earned_badges)} to user {student.id}"
+                )
+        
+        # Games played / badges collected achievements
+        XPLedgerService.check_achievements(student_xp, before)
         
         return earned_badges
-    
-    @classmethod
-    def _has_badge(cls, user: User, badge_name: str) -> bool:
-        """Check if user has a specific badge"""
-        return user.earned_badges.filter(badge__name=badge_name).exists()
-    
-    @classmethod
-    def _award_badge(cls, user: User, badge_name: str, attempt: GameAttempt = None):
-        """Award a badge to user"""
-        try:
-            badge = Badge.objects.get(name=badge_name)
-            from apps.gamification.models import StudentBadge
-            
-            StudentBadge.objects.create(
-                student=user,
-                badge=badge,
-                earned_for='Game achievement',
-                reference_type='game_attempt',
-                reference_id=str(attempt.id) if attempt else ''
-            )
-            logger.info(f"[BADGES] Awarded '{badge.name}' to user {user.id}")
-            return badge
-        except Badge.DoesNotExist:
-            logger.warning(f"[BADGES] Badge '{badge_name}' not found")
-            return None
-        except Exception as e:
-            logger.error(f"[BADGES] Error awarding badge: {str(e)}")
-            return None
@@ -0,0 +1,112 @@
+"""
+Variant Service
+
+Serves per-attempt variants of quiz-style games from a question bank that
+is generated once. Each attempt samples its own subset of the bank and
+shuffles the answer options with a seeded RNG. The sampled bank indices and
+option order (the attempt's answer key) are stored on the GameAttempt and
+never sent to the client, so replays cost no further AI calls.
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+
+from ..models import GameAttempt, LectureGame
+
+
+class VariantService:
+    """Service for sampling and resolving per-attempt question variants"""
+
+    POOL_MULTIPLIER = 2
+    MAX_POOL_QUESTIONS = 40
+
+    # Games whose content is not a list of multiple-choice questions
+    UNPOOLED_GAME_TYPES = ('match_pairs', 'crossword')
+
+    # Hot Potato questions get harder through the round, so keep bank order
+    ORDERED_GAME_TYPES = ('hot_potato',)
+
+    @classmethod
+    def supports(cls, game_type: str) -> bool:
+        """Check whether a game type can be served from a variant pool"""
+        return game_type not in cls.UNPOOLED_GAME_TYPES
+
+    @classmethod
+    def pool_size(cls, question_count: int) -> int:
+        """Size of the question bank to generate for a game of question_count"""
+        return min(question_count * cls.POOL_MULTIPLIER, cls.MAX_POOL_QUESTIONS)
+
+    @classmethod
+    def build_pool(cls, questions: List[Dict[str, Any]], per_attempt: int, game_type: str) -> Dict[str, Any]:
+        """
+        Prepare a generated bank for pooling
+
+        Re-numbers question ids (AI output may repeat them) and returns the
+        pool config stored as game_data['variant_pool'].
+        """
+        for number, question in enumerate(questions, 1):
+            question['id'] = f'q{number}'
+
+        return {
+            'size': len(questions),
+            'per_attempt': min(per_attempt, len(questions)),
+            'shuffle_questions': game_type not in cls.ORDERED_GAME_TYPES,
+        }
+
+    @classmethod
+    def is_pooled(cls, game: LectureGame) -> bool:
+        """Check whether a game serves attempts from a variant pool"""
+        return bool((game.game_data or {}).get('variant_pool'))
+
+    @classmethod
+    def new_variant(cls, game: LectureGame, seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Sample a variant for a new attempt
+
+        Returns:
+            dict: {'seed': int, 'items': [[bank_index, option_order], ...]},
+            or {} for games without a pool
+        """
+        if not cls.is_pooled(game):
+            return {}
+
+        pool = game.game_data['variant_pool']
+        bank = game.game_data.get('questions', [])
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 31)
+
+        rng = random.Random(seed)
+        picked = rng.sample(range(len(bank)), min(pool['per_attempt'], len(bank)))
+        if not pool.get('shuffle_questions', True):
+            picked.sort()
+
+        items = []
+        for index in picked:
+            order = list(range(len(bank[index]['options'])))
+            rng.shuffle(order)
+            items.append([index, order])
+
+        return {'seed': seed, 'items': items}
+
+    @classmethod
+    def questions(cls, game: LectureGame, attempt: GameAttempt) -> List[Dict[str, Any]]:
+        """
+        Questions as served in this attempt
+
+        Options are in the attempt's order and correct_index points into
+        that order. Games without a pool return the stored questions as-is.
+        """
+        bank = (game.game_data or {}).get('questions', [])
+        items = (attempt.variant or {}).get('items')
+        if not items:
+            return bank
+
+        served = []
+        for index, order in items:
+            question = bank[index]
+            served.append({
+                **question,
+                'options': [question['options'][i] for i in order],
+                'correct_index': order.index(question['correct_index']),
+            })
+        return served
@@ -0,0 +1,35 @@
+"""
+Signals for games app
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.versioning import VersionStamps
+from .models import GameLeaderboard, LectureGame
+
+
+@VersionStamps.register(LectureGame)
+def game_version_keys(instance):
+    """A game's own stamp"""
+    return [VersionStamps.object_key(LectureGame, instance.pk)]
+
+
+@receiver(post_save, sender=LectureGame)
+@receiver(post_delete, sender=LectureGame)
+def bump_game_versions(sender, instance, **kwargs):
+    """
+    A game changed
+    """
+    VersionStamps.bump_on_commit(game_version_keys(instance))
+
+
+@receiver(post_save, sender=GameLeaderboard)
+@receiver(post_delete, sender=GameLeaderboard)
+def bump_leaderboard_versions(sender, instance, **kwargs):
+    """
+    A leaderboard entry changed: the game's leaderboard is stale
+    """
+    VersionStamps.bump_on_commit([
+        VersionStamps.collection_key('leaderboard:game', instance.lecture_game_id),
+    ])
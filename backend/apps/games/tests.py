@@ -1,10 +1,20 @@
+import multiprocessing
+from unittest import mock
+
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
 from apps.games.models import GameTemplate, LectureGame, GameAttempt, GameLeaderboard
 from apps.lectures.models import Lecture
-from apps.schools.models import Classroom, School, AcademicYear, Subject
+from apps.schools.models import Classroom, ClassroomEnrollment, School, AcademicYear, Subject
 from apps.games.services.scoring_service import ScoringService
+from apps.games.services.crossword_generator import find_best_grid, generate_crossword_grid
+from apps.games.services.variant_service import VariantService
 
 User = get_user_model()
 
@@ -162,3 +172,165 @@ class GameLogicTests(TestCase):
         self.assertEqual(self.game.total_completions, 1)
         self.assertEqual(self.game.average_score, 1000)
         self.assertEqual(self.game.average_completion_time, 60)
+
+
+    def test_best_attempts_per_game(self):
+        """Best completed attempt per game, with the completed-attempt count"""
+        other_game = LectureGame.objects.create(
+            lecture=self.lecture, template=self.template, generated_by=self.teacher,
+            title='Other Game', difficulty='EASY', question_count=5, game_data={}
+        )
+        for score, completed in ((500, True), (900, True), (2000, False)):
+            GameAttempt.objects.create(
+                student=self.student, lecture_game=self.game,
+                final_score=score, is_completed=completed
+            )
+
+        with self.assertNumQueries(1):
+            best = ScoringService.best_attempts(self.student, [self.game.pk, other_game.pk])
+
+        self.assertEqual(list(best), [self.game.pk])
+        self.assertEqual(best[self.game.pk].final_score, 900)
+        self.assertEqual(best[self.game.pk].total_attempts, 2)
+
+    def test_variant_pool_shuffles_per_attempt(self):
+        """Attempts sample their own subset and option order; the key follows the shuffle"""
+        bank = [
+            {
+                'id': 'dup', 'question': f'Question {i}', 'explanation': '',
+                'options': [f'right {i}', f'wrong {i}a', f'wrong {i}b', f'wrong {i}c'],
+                'correct_index': 0
+            }
+            for i in range(8)
+        ]
+        self.game.game_data = {
+            'questions': bank,
+            'variant_pool': VariantService.build_pool(bank, 4, 'fall_drop')
+        }
+
+        attempt = GameAttempt(student=self.student, lecture_game=self.game)
+        attempt.variant = VariantService.new_variant(self.game, seed=1)
+        served = VariantService.questions(self.game, attempt)
+
+        self.assertEqual(len(served), 4)
+        self.assertEqual(len({q['id'] for q in served}), 4)
+        for question in served:
+            self.assertTrue(question['options'][question['correct_index']].startswith('right'))
+
+        attempt.variant = VariantService.new_variant(self.game, seed=1)
+        self.assertEqual(VariantService.questions(self.game, attempt), served)
+
+        attempt.variant = VariantService.new_variant(self.game, seed=2)
+        self.assertNotEqual(VariantService.questions(self.game, attempt), served)
+
+    def test_leaderboard_not_modified_until_it_changes(self):
+        """Leaderboard polls get 304 until a leaderboard entry is saved"""
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        url = f'/api/v1/games/games/{self.game.pk}/leaderboard/'
+
+        etag = client.get(url)['ETag']
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        attempt = GameAttempt.objects.create(
+            lecture_game=self.game, student=self.student,
+            final_score=300, is_completed=True, completed_at=timezone.now()
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ScoringService.update_leaderboard(attempt)
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_players'], 1)
+
+
+class CrosswordGeneratorTests(TestCase):
+    WORDS = [
+        'PHOTON', 'ELECTRON', 'PROTON', 'NEUTRON', 'MOLECULE', 'ELEMENT',
+        'OXYGEN', 'CARBON', 'HELIUM', 'NUCLEUS', 'ENERGY', 'ORBIT',
+    ]
+
+    def test_answers_read_back_from_grid(self):
+        """Every exported clue spells its answer in the grid, and seeded runs repeat"""
+        words = [{'word': word, 'clue': word.lower()} for word in self.WORDS]
+        result = generate_crossword_grid(words, grid_size=15, seed=7)
+
+        self.assertIsNotNone(result)
+        self.assertEqual(result, generate_crossword_grid(words, grid_size=15, seed=7))
+
+        grid = result['grid']
+        for clue in result['across_clues']:
+            letters = [grid[clue['row']][clue['col'] + i]['letter'] for i in range(clue['length'])]
+            self.assertEqual(''.join(letters), clue['answer'])
+        for clue in result['down_clues']:
+            letters = [grid[clue['row'] + i][clue['col']]['letter'] for i in range(clue['length'])]
+            self.assertEqual(''.join(letters), clue['answer'])
+
+        placed = len(result['across_clues']) + len(result['down_clues'])
+        self.assertEqual(placed, result['total_words'])
+        self.assertGreaterEqual(placed, len(words) * 0.6)
+
+    def test_parallel_starts_match_in_process_search(self):
+        """Worker processes find the same grid as in-process starts and are gone afterwards"""
+        words = [{'word': word, 'clue': word.lower()} for word in self.WORDS]
+        serial = find_best_grid(words, grid_size=15, starts=4, time_budget=60, seed=11)
+        parallel = find_best_grid(words, grid_size=15, starts=4, time_budget=60, workers=2, seed=11)
+
+        self.assertEqual(parallel._export_grid(), serial._export_grid())
+        self.assertEqual(multiprocessing.active_children(), [])
+
+
+class GameListTests(TestCase):
+    URL = '/api/v1/games/games/'
+
+    def setUp(self):
+        teacher = User.objects.create_user(
+            email='teacher@example.com', password='password', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='password', role='student'
+        )
+        school = School.objects.create(
+            name='Test School', code='TEST01',
+            city='Test City', state='Test State', pincode='123456',
+            email='school@test.com', principal_name='Principal', established_year=2000
+        )
+        academic_year = AcademicYear.objects.create(
+            school=school, name='2025-2026',
+            start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        classroom = Classroom.objects.create(
+            school=school, academic_year=academic_year, subject=subject,
+            grade=5, section='A', class_code='TESTCLASS01', teacher=teacher
+        )
+        ClassroomEnrollment.objects.create(classroom=classroom, student=self.student)
+        lecture = Lecture.objects.create(title='Test Lecture', teacher=teacher, classroom=classroom)
+        template = GameTemplate.objects.create(code='fall_drop', name='Fall Drop', game_type='REACTION')
+
+        for number, difficulty in enumerate(['EASY', 'MEDIUM', 'HARD']):
+            game = LectureGame.objects.create(
+                lecture=lecture, template=template, classroom=classroom, generated_by=teacher,
+                title=f'Game {number}', difficulty=difficulty, question_count=5,
+                game_data={'questions': []}, is_published=True
+            )
+            GameAttempt.objects.create(
+                student=self.student, lecture_game=game, final_score=100 * number,
+                is_completed=True, completed_at=timezone.now()
+            )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def list_queries(self, page_size):
+        """Queries of one list page holding page_size games, with nothing cached"""
+        cache.clear()
+        with mock.patch.object(PageNumberPagination, 'page_size', page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(queries)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.assertEqual(self.list_queries(3), self.list_queries(1))
@@ -12,6 +12,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter, SearchFilter
 from django.utils import timezone
 from django.db.models import Q, Prefetch
+from django.db.models.functions import Substr
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 
@@ -37,8 +38,12 @@ from .permissions import (
 )
 from .services.game_generator import GameGeneratorService
 from .services.scoring_service import ScoringService
+from .services.variant_service import VariantService
+from apps.core.counters import DeferredCounter
+from apps.core.versioning import VersionStamps
+from apps.core.viewsets import ConditionalGetMixin, PrefetchContextMixin, PublishedContentCacheMixin
 from apps.lectures.models import Lecture
-from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +59,7 @@ class GameTemplateViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['name']
 
 
-class LectureGameViewSet(viewsets.ModelViewSet):
+class LectureGameViewSet(ConditionalGetMixin, PublishedContentCacheMixin, PrefetchContextMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing lecture games
     
@@ -67,6 +72,8 @@ class LectureGameViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'lecture__title']
     ordering_fields = ['created_at', 'published_at', 'total_plays', 'average_score']
     ordering = ['-created_at']
+    content_cache_model = LectureGame
+    personal_fields = ('student_stats', 'personal_best', 'leaderboard_preview')
     
     def get_queryset(self):
         """Filter games based on user role"""
@@ -74,41 +81,67 @@ class LectureGameViewSet(viewsets.ModelViewSet):
         
         if user.role == 'teacher':
             # Teachers see all games they created
-            return LectureGame.objects.filter(
+            return self._defer_lecture_text(LectureGame.objects.filter(
                 generated_by=user,
                 is_deleted=False
             ).select_related(
                 'lecture',
                 'template',
-                'classroom',
+                'classroom__subject',
                 'generated_by'
-            )
+            ))
         
         elif user.role == 'student':
             # Students see published games from enrolled classrooms
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
-            return LectureGame.objects.filter(
+            return self._defer_lecture_text(LectureGame.objects.filter(
                 Q(classroom_id__in=enrolled_classrooms) | Q(classroom__isnull=True),
                 is_published=True,
                 is_deleted=False
             ).select_related(
                 'lecture',
                 'template',
-                'classroom'
-            )
+                'classroom__subject'
+            ))
         
         return LectureGame.objects.none()
     
+    @staticmethod
+    def _defer_lecture_text(queryset):
+        """
+        Skip the joined lecture's transcript and description; the detail view
+        only shows the first 200 characters, computed in the database
+        """
+        return queryset.defer('lecture__transcript', 'lecture__description').annotate(
+            lecture_transcript_preview=Substr('lecture__transcript', 1, 200)
+        )
+    
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action == 'retrieve':
             return LectureGameDetailSerializer
         return LectureGameListSerializer
     
+    def etag_keys(self):
+        """Version stamps behind the leaderboard"""
+        if self.action != 'leaderboard':
+            return None
+        game_id = self.kwargs['pk']
+        return [
+            VersionStamps.object_key(LectureGame, game_id),
+            VersionStamps.collection_key('leaderboard:game', game_id),
+        ]
+    
+    def prefetch_context(self, games):
+        """Load the student's best attempt at every game on the page"""
+        user = self.request.user
+        if user.role != 'student':
+            return {}
+        return {
+            'best_attempts': ScoringService.best_attempts(user, [game.pk for game in games])
+        }
+    
     @action(detail=False, methods=['post'], permission_classes=[CanGenerateGames])
     def generate(self, request):
         """
@@ -132,6 +165,8 @@ class LectureGameViewSet(viewsets.ModelViewSet):
         question_count = data['question_count']
         force_regenerate = data['force_regenerate']
         auto_publish = data['auto_publish']
+        variant_pool = data['variant_pool'] and VariantService.supports(game_type)
+        pool_size = VariantService.pool_size(question_count) if variant_pool else 0
         
         try:
             # Get lecture and template
@@ -161,7 +196,8 @@ class LectureGameViewSet(viewsets.ModelViewSet):
                 result = generator.generate_hot_potato_game(
                     lecture=lecture,
                     difficulty=difficulty,
-                    question_count=question_count
+                    question_count=question_count,
+                    pool_size=pool_size
                 )
                 
                 game_config = {
@@ -211,7 +247,8 @@ class LectureGameViewSet(viewsets.ModelViewSet):
                 result = generator.generate_quick_drop_game(
                     lecture=lecture,
                     difficulty=difficulty,
-                    question_count=question_count
+                    question_count=question_count,
+                    pool_size=pool_size
                 )
                 
                 game_config = {
@@ -244,6 +281,20 @@ class LectureGameViewSet(viewsets.ModelViewSet):
             else:
                 question_count_val = len(game_content)
             
+            game_data = {
+                'version': '1.0',
+                'game_config': game_config,
+                content_key: game_content,
+                'metadata': result.get('metadata', {})
+            }
+            
+            # Variant pools store the whole bank; each attempt plays a subset
+            if variant_pool:
+                game_data['variant_pool'] = VariantService.build_pool(
+                    game_content, question_count, game_type
+                )
+                question_count_val = game_data['variant_pool']['per_attempt']
+            
             # Create game record
             with transaction.atomic():
                 game = LectureGame.objects.create(
@@ -253,12 +304,7 @@ class LectureGameViewSet(viewsets.ModelViewSet):
                     title=f"{lecture.title} - {template.name}",
                     difficulty=difficulty,
                     question_count=question_count_val,
-                    game_data={
-                        'version': '1.0',
-                        'game_config': game_config,
-                        content_key: game_content,
-                        'metadata': result.get('metadata', {})
-                    },
+                    game_data=game_data,
                     generated_by=request.user,
                     ai_generation_cost=result.get('cost', {}).get('total_cost', 0),
                     prompt_tokens=result.get('cost', {}).get('input_tokens', 0),
@@ -346,15 +392,20 @@ class LectureGameViewSet(viewsets.ModelViewSet):
             attempt.max_combo_achieved = 0
             attempt.detailed_results = {'answers': []}
             attempt.started_at = timezone.now() # Restart timer
+            attempt.variant = VariantService.new_variant(game)
             attempt.save()
         else:
             # Create new attempt
+            variant = VariantService.new_variant(game)
+            
             # Determine count for score calculation
             if game.template.code == 'crossword':
                 grid_data = game.game_data.get('grid_data', {})
                 content_count = grid_data.get('total_words', 20)
             elif game.template.code == 'match_pairs':
                 content_count = len(game.game_data.get('pairs', []))
+            elif variant:
+                content_count = len(variant['items'])
             else:
                 content_count = len(game.game_data.get('questions', []))
             
@@ -362,12 +413,12 @@ class LectureGameViewSet(viewsets.ModelViewSet):
                 student=request.user,
                 lecture_game=game,
                 max_possible_score=content_count * 100, # Approx base score
-                lives_remaining=game.game_data.get('game_config', {}).get('lives', 3)
+                lives_remaining=game.game_data.get('game_config', {}).get('lives', 3),
+                variant=variant
             )
             
             # Increment play count
-            game.total_plays += 1
-            game.save(update_fields=['total_plays'])
+            DeferredCounter.incr(LectureGame, game.pk, 'total_plays')
         
         # Prepare content based on game type
         response_data = {
@@ -406,7 +457,7 @@ class LectureGameViewSet(viewsets.ModelViewSet):
             # Standard Quiz/Game
             content = []
             if 'questions' in game.game_data:
-                for q in game.game_data['questions']:
+                for q in VariantService.questions(game, attempt):
                     content.append({
                         'id': q['id'],
                         'question': q['question'],
@@ -531,10 +582,10 @@ class GameAttemptViewSet(viewsets.ReadOnlyModelViewSet):
         selected_index = data['selected_index']
         time_taken = data['time_taken']
         
-        # Find question in game data
-        game_data = attempt.lecture_game.game_data
+        # Find question as served in this attempt
+        questions = VariantService.questions(attempt.lecture_game, attempt)
         question = next(
-            (q for q in game_data['questions'] if q['id'] == question_id),
+            (q for q in questions if q['id'] == question_id),
             None
         )
         
@@ -588,7 +639,7 @@ class GameAttemptViewSet(viewsets.ReadOnlyModelViewSet):
         # Check if game is over
         game_over = (
             attempt.lives_remaining <= 0 or
-            attempt.questions_answered >= len(game_data['questions'])
+            attempt.questions_answered >= len(questions)
         )
         
         if game_over:
@@ -767,12 +818,12 @@ class GameAttemptViewSet(viewsets.ReadOnlyModelViewSet):
             pass
         
         # Get question feedback
-        game_data = attempt.lecture_game.game_data
+        questions = VariantService.questions(attempt.lecture_game, attempt)
         question_feedback = []
         
         for answer in attempt.detailed_results.get('answers', []):
             question = next(
-                (q for q in game_data['questions'] if q['id'] == answer['question_id']),
+                (q for q in questions if q['id'] == answer['question_id']),
                 None
             )
             
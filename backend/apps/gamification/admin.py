@@ -4,7 +4,7 @@ Admin configuration for gamification app
 
 from django.contrib import admin
 from .models import (
-    StudentXP, XPTransaction, Badge, StudentBadge,
+    StudentXP, XPTransaction, XPDailyRollup, Badge, StudentBadge,
     Leaderboard, LeaderboardEntry, Achievement, StudentAchievement
 )
 
@@ -31,6 +31,14 @@ class XPTransactionAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
 
 
+@admin.register(XPDailyRollup)
+class XPDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['student', 'date', 'xp_earned', 'transaction_count']
+    list_filter = ['date']
+    search_fields = ['student__first_name', 'student__last_name']
+    readonly_fields = ['created_at', 'updated_at']
+
+
 @admin.register(Badge)
 class BadgeAdmin(admin.ModelAdmin):
     list_display = [
@@ -0,0 +1,3 @@
+"""
+Commands package for gamification app
+"""
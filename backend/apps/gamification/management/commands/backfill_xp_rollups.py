@@ -0,0 +1,46 @@
+"""
+Management command to build daily XP rollups from the XPTransaction ledger
+"""
+
+from django.core.management.base import BaseCommand
+from apps.gamification.models import XPDailyRollup
+from apps.gamification.services.xp_rollup_service import XPRollupService
+
+
+class Command(BaseCommand):
+    help = 'Build per-student daily XP buckets from the existing XP ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=XPRollupService.BACKFILL_BATCH_SIZE,
+            help='Number of buckets streamed and written per batch',
+        )
+        parser.add_argument(
+            '--student',
+            action='append',
+            dest='students',
+            help='Only rebuild buckets for this student id (repeatable)',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Delete existing buckets before rebuilding',
+        )
+
+    def handle(self, *args, **options):
+        student_ids = options['students']
+
+        if options['reset']:
+            rollups = XPDailyRollup.objects.all()
+            if student_ids:
+                rollups = rollups.filter(student_id__in=student_ids)
+            deleted, _ = rollups.delete()
+            self.stdout.write(self.style.WARNING(f'Deleted {deleted} existing bucket(s).'))
+
+        result = XPRollupService.rebuild(
+            batch_size=options['batch_size'],
+            student_ids=student_ids
+        )
+        self.stdout.write(self.style.SUCCESS(f"Built {result['buckets']} daily XP bucket(s)."))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('gamification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='XPDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('xp_earned', models.IntegerField(default=0, help_text='Net XP for the day (penalties included)')),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='xp_daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'XP Daily Rollup',
+                'verbose_name_plural': 'XP Daily Rollups',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'student'], name='gamificatio_date_880718_idx')],
+                'unique_together': {('student', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:48
+
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def assign_bits(apps, schema_editor):
+    """
+    Give existing achievements a bit, seed bitmaps from unlocked rows and
+    games_completed from completed attempts
+    """
+    Achievement = apps.get_model('gamification', 'Achievement')
+    StudentAchievement = apps.get_model('gamification', 'StudentAchievement')
+    StudentXP = apps.get_model('gamification', 'StudentXP')
+    GameAttempt = apps.get_model('games', 'GameAttempt')
+
+    bits = {}
+    for index, achievement in enumerate(Achievement.objects.order_by('created_at', 'id')):
+        achievement.bit_index = index
+        achievement.save(update_fields=['bit_index'])
+        bits[achievement.id] = index
+
+    unlocked = defaultdict(int)
+    rows = StudentAchievement.objects.values_list('student_id', 'achievement_id')
+    for student_id, achievement_id in rows.iterator():
+        unlocked[student_id] |= 1 << bits[achievement_id]
+
+    for student_id, mask in unlocked.items():
+        StudentXP.objects.filter(student_id=student_id).update(
+            achievement_bitmap=mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+        )
+
+    completed = dict(
+        GameAttempt.objects.filter(is_completed=True)
+        .values('student_id').annotate(total=Count('id')).values_list('student_id', 'total')
+    )
+    existing = set(StudentXP.objects.filter(student_id__in=completed).values_list('student_id', flat=True))
+    for student_id in existing:
+        StudentXP.objects.filter(student_id=student_id).update(games_completed=completed[student_id])
+    StudentXP.objects.bulk_create([
+        StudentXP(student_id=student_id, games_completed=total)
+        for student_id, total in completed.items() if student_id not in existing
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0002_xpdailyrollup'),
+        ('games', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='bit_index',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='studentxp',
+            name='achievement_bitmap',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='studentxp',
+            name='games_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='achievement',
+            name='requirement_type',
+            field=models.CharField(choices=[('xp_milestone', 'XP Milestone'), ('level_reached', 'Level Reached'), ('badges_collected', 'Badges Collected'), ('streak_milestone', 'Streak Milestone'), ('perfect_scores', 'Perfect Scores'), ('games_played', 'Games Played'), ('custom', 'Custom')], max_length=30),
+        ),
+        migrations.RunPython(assign_bits, migrations.RunPython.noop),
+    ]
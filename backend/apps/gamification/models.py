@@ -26,6 +26,10 @@ class StudentXP(TimeStampedModel):
     # Statistics
     total_badges_earned = models.PositiveIntegerField(default=0)
     total_achievements = models.PositiveIntegerField(default=0)
+    games_completed = models.PositiveIntegerField(default=0)
+    
+    # Unlocked achievements, one bit per Achievement.bit_index
+    achievement_bitmap = models.BinaryField(default=b'', editable=False)
     
     class Meta:
         verbose_name = 'Student XP'
@@ -89,6 +93,30 @@ class XPTransaction(TimeStampedModel):
         return f"{self.student.get_full_name()} - {self.amount} XP ({self.source})"
 
 
+class XPDailyRollup(TimeStampedModel):
+    """
+    XP earned per student per day, kept in step with XPTransaction.
+    Time-windowed leaderboards sum these buckets instead of scanning the ledger.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_daily_rollups')
+    date = models.DateField()
+
+    xp_earned = models.IntegerField(default=0, help_text='Net XP for the day (penalties included)')
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['student', 'date']
+        verbose_name = 'XP Daily Rollup'
+        verbose_name_plural = 'XP Daily Rollups'
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'student']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.get_full_name()} - {self.date} ({self.xp_earned} XP)"
+
+
 class Badge(TimeStampedModel):
     """Badge definitions"""
     CATEGORY_CHOICES = [
@@ -252,11 +280,15 @@ class Achievement(TimeStampedModel):
             ('badges_collected', 'Badges Collected'),
             ('streak_milestone', 'Streak Milestone'),
             ('perfect_scores', 'Perfect Scores'),
+            ('games_played', 'Games Played'),
             ('custom', 'Custom'),
         ]
     )
     requirement_value = models.PositiveIntegerField()
     
+    # Position in StudentXP.achievement_bitmap (assigned on first save)
+    bit_index = models.PositiveIntegerField(unique=True, null=True, blank=True, editable=False)
+    
     # Rewards
     xp_reward = models.PositiveIntegerField(default=100)
     badge_reward = models.ForeignKey(Badge, on_delete=models.SET_NULL, null=True, blank=True)
@@ -274,6 +306,12 @@ class Achievement(TimeStampedModel):
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        if self.bit_index is None:
+            last = Achievement.objects.aggregate(models.Max('bit_index'))['bit_index__max']
+            self.bit_index = 0 if last is None else last + 1
+        super().save(*args, **kwargs)
 
 
 class StudentAchievement(TimeStampedModel):
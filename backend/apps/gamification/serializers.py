@@ -7,6 +7,7 @@ from .models import (
     StudentXP, XPTransaction, Badge, StudentBadge,
     Leaderboard, LeaderboardEntry, Achievement, StudentAchievement
 )
+from .services.xp_ledger_service import xp_for_next_level
 
 
 class StudentXPSerializer(serializers.ModelSerializer):
@@ -17,24 +18,24 @@ class StudentXPSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = StudentXP
-        fields = '__all__'
+        exclude = ['achievement_bitmap']
         read_only_fields = [
             'id', 'created_at', 'updated_at', 'student',
             'total_xp', 'current_level', 'xp_to_next_level',
-            'longest_streak', 'total_badges_earned', 'total_achievements'
+            'longest_streak', 'total_badges_earned', 'total_achievements',
+            'games_completed'
         ]
     
     def get_progress_to_next_level(self, obj):
         # Calculate XP earned in current level
-        xp_for_current_level = 100 * obj.current_level  # Simple formula
-        xp_in_current_level = obj.total_xp - (100 * (obj.current_level - 1) * obj.current_level // 2)
-        return xp_in_current_level
+        return obj.total_xp - xp_for_next_level(obj.current_level - 1)
     
     def get_level_progress_percentage(self, obj):
         progress = self.get_progress_to_next_level(obj)
-        if obj.xp_to_next_level == 0:
+        level_span = xp_for_next_level(obj.current_level) - xp_for_next_level(obj.current_level - 1)
+        if level_span <= 0:
             return 100
-        return round((progress / obj.xp_to_next_level) * 100, 2)
+        return round((progress / level_span) * 100, 2)
 
 
 class XPTransactionSerializer(serializers.ModelSerializer):
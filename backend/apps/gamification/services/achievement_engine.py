@@ -0,0 +1,247 @@
+"""
+Achievement Engine
+
+Evaluates achievement rules against metric deltas instead of scanning
+every active Achievement on each XP award.
+
+Rules are indexed by trigger metric and sorted by threshold, so an award
+that moves total XP from 480 to 530 only looks at rules whose threshold
+lies in (480, 530]. Unlocked achievements are tracked as a bitmap on
+StudentXP, and everything crossed by one delta is unlocked in bulk.
+"""
+
+import logging
+from bisect import bisect_right
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from ..models import Achievement, StudentAchievement, StudentBadge, StudentXP
+
+logger = logging.getLogger(__name__)
+
+
+Rule = namedtuple('Rule', ['threshold', 'achievement_id', 'bit', 'name', 'xp_reward', 'badge_id'])
+
+
+def has_bit(bitmap: bytes, bit: int) -> bool:
+    """Check whether a bit is set in a little-endian bitmap"""
+    byte = bit // 8
+    return byte < len(bitmap) and bool(bitmap[byte] & (1 << (bit % 8)))
+
+
+def set_bits(bitmap: bytes, bits) -> bytes:
+    """Return a copy of the bitmap with the given bits set"""
+    mask = int.from_bytes(bytes(bitmap or b''), 'little')
+    for bit in bits:
+        mask |= 1 << bit
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+class AchievementEngine:
+    """Service for rule-indexed achievement unlocking"""
+
+    # Achievement.requirement_type -> metric key
+    METRICS = {
+        'xp_milestone': 'xp',
+        'level_reached': 'level',
+        'badges_collected': 'badges',
+        'streak_milestone': 'streak',
+        'games_played': 'games_played',
+    }
+
+    VERSION_CACHE_KEY = 'gamification:achievement_rules:version'
+
+    _index = None
+    _index_version = None
+
+    @classmethod
+    def snapshot(cls, student_xp: StudentXP) -> Dict[str, int]:
+        """Read the trigger metrics off a StudentXP row"""
+        return {
+            'xp': student_xp.total_xp,
+            'level': student_xp.current_level,
+            'badges': student_xp.total_badges_earned,
+            'streak': student_xp.longest_streak,
+            'games_played': student_xp.games_completed,
+        }
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Drop the rule index in every process (called when achievements change)"""
+        cls._index = None
+        try:
+            cache.incr(cls.VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_CACHE_KEY, 1, None)
+
+    @classmethod
+    def rule_index(cls) -> Dict[str, tuple]:
+        """
+        Get the rule index, rebuilding it if achievements changed
+
+        Returns:
+            dict: metric -> (sorted thresholds, rules in the same order)
+        """
+        version = cache.get(cls.VERSION_CACHE_KEY, 0)
+        if cls._index is not None and cls._index_version == version:
+            return cls._index
+
+        rules: Dict[str, List[Rule]] = {metric: [] for metric in cls.METRICS.values()}
+        achievements = Achievement.objects.filter(
+            is_active=True,
+            requirement_type__in=cls.METRICS.keys()
+        ).values_list(
+            'id', 'requirement_type', 'requirement_value',
+            'bit_index', 'name', 'xp_reward', 'badge_reward_id'
+        )
+        for pk, requirement_type, value, bit, name, xp_reward, badge_id in achievements:
+            rules[cls.METRICS[requirement_type]].append(
+                Rule(value, pk, bit, name, xp_reward, badge_id)
+            )
+
+        index = {}
+        for metric, metric_rules in rules.items():
+            metric_rules.sort(key=lambda rule: rule.threshold)
+            index[metric] = ([rule.threshold for rule in metric_rules], metric_rules)
+
+        cls._index = index
+        cls._index_version = version
+        return index
+
+    @classmethod
+    def crossed_rules(cls, before: Optional[Dict[str, int]], after: Dict[str, int], bitmap: bytes = b'') -> List[Rule]:
+        """
+        Find rules whose threshold was crossed going from `before` to `after`
+
+        Pure in-memory lookup; pass before=None to evaluate every rule
+        the student currently satisfies.
+        """
+        crossed = []
+        for metric, (thresholds, rules) in cls.rule_index().items():
+            low = before.get(metric, 0) if before else -1
+            high = after.get(metric, 0)
+            if high <= low:
+                continue
+            start = bisect_right(thresholds, low)
+            end = bisect_right(thresholds, high)
+            crossed.extend(
+                rule for rule in rules[start:end]
+                if not has_bit(bitmap, rule.bit)
+            )
+        return crossed
+
+    @classmethod
+    @transaction.atomic
+    def evaluate(cls, student_xp: StudentXP, before: Optional[Dict[str, int]] = None) -> Dict:
+        """
+        Unlock every achievement crossed since `before`
+
+        Args:
+            student_xp: StudentXP with up-to-date metrics
+            before: Metric snapshot taken before the change, None for a full sweep
+
+        Returns:
+            dict: {
+                'unlocked': list of Rule,
+                'xp_reward': int (total XP owed for the unlocks; not applied here)
+            }
+        """
+        bitmap = bytes(student_xp.achievement_bitmap or b'')
+        student_id = student_xp.student_id
+        unlocked: List[Rule] = []
+        badge_ids = set()
+
+        # Badge rewards raise the 'badges' metric, which can cross further
+        # rules, so keep going until a pass unlocks nothing new
+        rules = cls.crossed_rules(before, cls.snapshot(student_xp), bitmap)
+        while rules:
+            before = cls.snapshot(student_xp)
+            unlocked.extend(rules)
+            bitmap = set_bits(bitmap, [rule.bit for rule in rules])
+            student_xp.total_achievements += len(rules)
+
+            rule_badges = {rule.badge_id for rule in rules if rule.badge_id} - badge_ids
+            if rule_badges:
+                owned = set(StudentBadge.objects.filter(
+                    student_id=student_id,
+                    badge_id__in=rule_badges
+                ).values_list('badge_id', flat=True))
+                new_badges = rule_badges - owned
+                badge_ids |= new_badges
+                student_xp.total_badges_earned += len(new_badges)
+
+            rules = cls.crossed_rules(before, cls.snapshot(student_xp), bitmap)
+
+        if not unlocked:
+            return {'unlocked': [], 'xp_reward': 0}
+
+        StudentAchievement.objects.bulk_create(
+            [StudentAchievement(student_id=student_id, achievement_id=rule.achievement_id) for rule in unlocked],
+            ignore_conflicts=True
+        )
+        if badge_ids:
+            StudentBadge.objects.bulk_create(
+                [
+                    StudentBadge(
+                        student_id=student_id,
+                        badge_id=badge_id,
+                        earned_for='Achievement unlocked',
+                        reference_type='achievement'
+                    )
+                    for badge_id in badge_ids
+                ],
+                ignore_conflicts=True
+            )
+
+        student_xp.achievement_bitmap = bitmap
+        StudentXP.objects.filter(pk=student_xp.pk).update(
+            achievement_bitmap=bitmap,
+            total_achievements=F('total_achievements') + len(unlocked),
+            total_badges_earned=F('total_badges_earned') + len(badge_ids)
+        )
+
+        logger.info(
+            f"[ACHIEVEMENTS] Unlocked {len(unlocked)} for user {student_id}: "
+            f"{', '.join(rule.name for rule in unlocked)}"
+        )
+
+        return {
+            'unlocked': unlocked,
+            'xp_reward': sum(rule.xp_reward for rule in unlocked),
+        }
+
+    @classmethod
+    def evaluate_and_reward(cls, student_xp: StudentXP, before: Optional[Dict[str, int]], award_xp) -> List[Rule]:
+        """
+        Unlock crossed achievements and pay their XP rewards
+
+        Rewards can cross further XP/level rules, so they are paid in a loop
+        rather than by re-entering the caller's award path recursively.
+
+        Args:
+            student_xp: StudentXP with up-to-date metrics
+            before: Metric snapshot taken before the change
+            award_xp: callable(amount, description) that credits XP and
+                updates student_xp in place
+
+        Returns:
+            list of Rule: every achievement unlocked
+        """
+        unlocked = []
+        result = cls.evaluate(student_xp, before)
+
+        while result['unlocked']:
+            unlocked.extend(result['unlocked'])
+            if not result['xp_reward']:
+                break
+
+            before = cls.snapshot(student_xp)
+            names = ', '.join(rule.name for rule in result['unlocked'])
+            award_xp(result['xp_reward'], f'Achievement unlocked: {names}'[:255])
+            result = cls.evaluate(student_xp, before)
+
+        return unlocked
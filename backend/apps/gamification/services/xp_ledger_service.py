@@ -0,0 +1,237 @@
+"""
+XP Ledger Service
+
+Single write path for XP. Awards are applied to StudentXP with one
+UPDATE built from F-expressions (total, level and streak all derived
+in SQL), so concurrent awards for the same student never lose updates
+and no read-modify-write cycle holds the row. Every award appends an
+XPTransaction row to the ledger.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from ..models import StudentXP, XPTransaction
+from .achievement_engine import AchievementEngine
+from .xp_rollup_service import XPRollupService
+
+logger = logging.getLogger(__name__)
+
+
+XP_PER_LEVEL = 100
+
+
+def level_for_xp(total_xp: int) -> int:
+    """Level reached with the given lifetime XP"""
+    return max(0, total_xp) // XP_PER_LEVEL + 1
+
+
+def xp_for_next_level(level: int) -> int:
+    """Lifetime XP needed to move past the given level"""
+    return XP_PER_LEVEL * level
+
+
+def next_streak(last_activity_date: Optional[date], current_streak: int, today: date) -> int:
+    """Streak after activity on `today`"""
+    if last_activity_date == today:
+        return max(current_streak, 1)
+    if last_activity_date == today - timedelta(days=1):
+        return current_streak + 1
+    return 1
+
+
+class XPLedgerService:
+    """Service for appending XP transactions and applying them atomically"""
+
+    @classmethod
+    def award(cls, student, amount: int, source: str, description: str,
+              awarded_by=None, transaction_type: str = 'earned',
+              reference_type: str = '', reference_id: str = '',
+              check_achievements: bool = True) -> Dict:
+        """
+        Award XP to one student
+
+        Returns:
+            dict: {
+                'student_xp': StudentXP (fresh),
+                'transaction': XPTransaction,
+                'leveled_up': bool,
+                'achievements': list of unlocked achievement rules
+            }
+        """
+        student_id = getattr(student, 'pk', student)
+
+        with transaction.atomic():
+            before = cls._apply({student_id: amount})[student_id]
+            student_xp = StudentXP.objects.get(student_id=student_id)
+
+            txn = XPTransaction.objects.create(
+                student_id=student_id,
+                transaction_type=transaction_type,
+                source=source,
+                amount=amount,
+                balance_after=student_xp.total_xp,
+                description=description,
+                reference_type=reference_type,
+                reference_id=reference_id,
+                awarded_by=awarded_by
+            )
+
+            achievements = []
+            if check_achievements:
+                achievements = cls.check_achievements(student_xp, before)
+
+        return {
+            'student_xp': student_xp,
+            'transaction': txn,
+            'leveled_up': student_xp.current_level > before['level'],
+            'achievements': achievements,
+        }
+
+    @classmethod
+    def award_many(cls, awards: Iterable[Dict], check_achievements: bool = True) -> List[XPTransaction]:
+        """
+        Award XP to many students in a constant number of queries
+
+        Args:
+            awards: iterable of dicts with 'student_id', 'amount', 'source',
+                'description' and optionally 'transaction_type',
+                'reference_type', 'reference_id', 'awarded_by'
+            check_achievements: Evaluate achievements for students whose
+                metrics crossed a rule threshold
+
+        Returns:
+            list of XPTransaction
+        """
+        awards = list(awards)
+        if not awards:
+            return []
+
+        deltas: Dict = defaultdict(int)
+        for award in awards:
+            deltas[award['student_id']] += award['amount']
+
+        with transaction.atomic():
+            before = cls._apply(deltas)
+            balances = dict(StudentXP.objects.filter(
+                student_id__in=deltas.keys()
+            ).values_list('student_id', 'total_xp'))
+
+            # Walk each student's awards forward from the pre-award balance
+            running = {
+                student_id: balances[student_id] - delta
+                for student_id, delta in deltas.items()
+            }
+            transactions = []
+            for award in awards:
+                student_id = award['student_id']
+                running[student_id] = max(0, running[student_id] + award['amount'])
+                transactions.append(XPTransaction(
+                    student_id=student_id,
+                    transaction_type=award.get('transaction_type', 'earned'),
+                    source=award['source'],
+                    amount=award['amount'],
+                    balance_after=running[student_id],
+                    description=award['description'],
+                    reference_type=award.get('reference_type', ''),
+                    reference_id=award.get('reference_id', ''),
+                    awarded_by=award.get('awarded_by')
+                ))
+
+            # bulk_create skips post_save, so feed the rollups directly
+            XPTransaction.objects.bulk_create(transactions)
+            XPRollupService.record_transactions(transactions)
+
+            if check_achievements:
+                cls._evaluate_many(before)
+
+        logger.info(f"[XP] Batch awarded XP to {len(deltas)} students ({len(transactions)} transactions)")
+        return transactions
+
+    @classmethod
+    def _apply(cls, deltas: Dict) -> Dict[object, Dict[str, int]]:
+        """
+        Apply XP deltas to StudentXP rows in a single UPDATE
+
+        Returns the achievement metric snapshot of each row before the update.
+        """
+        StudentXP.objects.bulk_create(
+            [StudentXP(student_id=student_id) for student_id in deltas],
+            ignore_conflicts=True
+        )
+
+        rows = StudentXP.objects.filter(student_id__in=deltas.keys())
+        before = {row.student_id: AchievementEngine.snapshot(row) for row in rows}
+
+        today = timezone.localdate()
+        streak = Case(
+            When(last_activity_date=today, then=Greatest(F('current_streak'), Value(1))),
+            When(last_activity_date=today - timedelta(days=1), then=F('current_streak') + 1),
+            default=Value(1),
+            output_field=IntegerField()
+        )
+
+        if len(deltas) == 1:
+            (delta,) = deltas.values()
+            new_total = Greatest(F('total_xp') + Value(delta), Value(0))
+        else:
+            new_total = Case(
+                *[
+                    When(student_id=student_id, then=Greatest(F('total_xp') + Value(delta), Value(0)))
+                    for student_id, delta in deltas.items()
+                ],
+                default=F('total_xp'),
+                output_field=IntegerField()
+            )
+        new_level = new_total / Value(XP_PER_LEVEL) + Value(1)
+
+        rows.update(
+            total_xp=new_total,
+            current_level=new_level,
+            xp_to_next_level=new_level * Value(XP_PER_LEVEL),
+            current_streak=streak,
+            longest_streak=Greatest(F('longest_streak'), streak),
+            last_activity_date=today,
+            updated_at=timezone.now()
+        )
+        return before
+
+    @classmethod
+    def check_achievements(cls, student_xp: StudentXP, before: Optional[Dict[str, int]]) -> list:
+        """Unlock achievements crossed since `before`, crediting rewards through the ledger"""
+        return AchievementEngine.evaluate_and_reward(
+            student_xp,
+            before,
+            lambda amount, description: cls._award_reward(student_xp, amount, description)
+        )
+
+    @classmethod
+    def _award_reward(cls, student_xp: StudentXP, amount: int, description: str) -> None:
+        """Credit an achievement reward and refresh the in-memory row"""
+        cls._apply({student_xp.student_id: amount})
+        student_xp.refresh_from_db()
+        XPTransaction.objects.create(
+            student_id=student_xp.student_id,
+            transaction_type='bonus',
+            source='manual',
+            amount=amount,
+            balance_after=student_xp.total_xp,
+            description=description
+        )
+
+    @classmethod
+    def _evaluate_many(cls, before: Dict[object, Dict[str, int]]) -> None:
+        """Run the achievement engine only for students who crossed a threshold"""
+        rows = StudentXP.objects.filter(student_id__in=before.keys())
+        for student_xp in rows:
+            after = AchievementEngine.snapshot(student_xp)
+            bitmap = bytes(student_xp.achievement_bitmap or b'')
+            if AchievementEngine.crossed_rules(before[student_xp.student_id], after, bitmap):
+                cls.check_achievements(student_xp, before[student_xp.student_id])
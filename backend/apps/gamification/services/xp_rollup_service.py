@@ -0,0 +1,185 @@
+"""
+XP Rollup Service
+
+Maintains per-student daily XP buckets so time-windowed leaderboards
+can be computed as a range-sum over at most ~31 rows per student
+instead of scanning the XPTransaction ledger.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core.utils import get_date_range
+from ..models import XPDailyRollup, XPTransaction
+
+logger = logging.getLogger(__name__)
+
+
+class XPRollupService:
+    """Service for maintaining and querying daily XP rollups"""
+
+    # Leaderboard.time_period -> core.utils.get_date_range period
+    PERIOD_RANGES = {
+        'daily': 'today',
+        'weekly': 'week',
+        'monthly': 'month',
+    }
+
+    BACKFILL_BATCH_SIZE = 2000
+
+    @classmethod
+    def record(cls, student_id, amount: int, when=None, count: int = 1) -> None:
+        """
+        Add an XP delta to the student's bucket for the day of ``when``
+
+        Uses a single UPDATE ... SET xp_earned = xp_earned + delta and only
+        falls back to an INSERT the first time a bucket is touched.
+        """
+        day = timezone.localdate(when) if when else timezone.localdate()
+        cls._record_day(student_id, day, amount, count)
+
+    @classmethod
+    def record_transactions(cls, transactions: Iterable[XPTransaction]) -> None:
+        """
+        Apply a batch of ledger rows, one bucket write per (student, day)
+
+        Used for rows written with bulk_create, which skips post_save.
+        """
+        deltas: Dict[Tuple, list] = defaultdict(lambda: [0, 0])
+        for txn in transactions:
+            day = timezone.localdate(txn.created_at) if txn.created_at else timezone.localdate()
+            bucket = deltas[(txn.student_id, day)]
+            bucket[0] += txn.amount
+            bucket[1] += 1
+
+        for (student_id, day), (amount, count) in deltas.items():
+            cls._record_day(student_id, day, amount, count)
+
+    @classmethod
+    def _record_day(cls, student_id, day: date, amount: int, count: int) -> None:
+        if cls._increment(student_id, day, amount, count):
+            return
+        try:
+            with transaction.atomic():
+                XPDailyRollup.objects.create(
+                    student_id=student_id,
+                    date=day,
+                    xp_earned=amount,
+                    transaction_count=count
+                )
+        except IntegrityError:
+            cls._increment(student_id, day, amount, count)
+
+    @classmethod
+    def _increment(cls, student_id, day: date, amount: int, count: int) -> bool:
+        updated = XPDailyRollup.objects.filter(
+            student_id=student_id,
+            date=day
+        ).update(
+            xp_earned=F('xp_earned') + amount,
+            transaction_count=F('transaction_count') + count,
+            updated_at=timezone.now()
+        )
+        return updated > 0
+
+    @classmethod
+    def period_bounds(cls, time_period: str) -> Optional[Tuple[date, date]]:
+        """
+        Get the (start, end) dates covered by a leaderboard time period
+
+        Returns None for 'all_time'.
+        """
+        period = cls.PERIOD_RANGES.get(time_period)
+        if not period:
+            return None
+
+        start, end = get_date_range(period)
+        return timezone.localdate(start), timezone.localdate(end)
+
+    @classmethod
+    def period_scores(cls, time_period: str, student_ids=None, limit: Optional[int] = None):
+        """
+        Sum XP per student over a leaderboard time period
+
+        Args:
+            time_period: Leaderboard.time_period value ('daily', 'weekly', 'monthly')
+            student_ids: Optional iterable/queryset of student ids to restrict to
+            limit: Optional top-N cut-off
+
+        Returns:
+            QuerySet of {'student_id', 'score'} ordered by score descending
+        """
+        bounds = cls.period_bounds(time_period)
+        if bounds is None:
+            raise ValueError(f"'{time_period}' is not a windowed time period")
+
+        start, end = bounds
+        rollups = XPDailyRollup.objects.filter(date__gte=start, date__lte=end)
+        if student_ids is not None:
+            rollups = rollups.filter(student_id__in=student_ids)
+
+        scores = rollups.values('student_id').annotate(
+            score=Sum('xp_earned')
+        ).order_by('-score', 'student_id')
+
+        if limit:
+            scores = scores[:limit]
+        return scores
+
+    @classmethod
+    def rebuild(cls, batch_size: int = None, student_ids=None) -> Dict[str, int]:
+        """
+        Rebuild buckets from the XPTransaction ledger
+
+        The ledger is aggregated per (student, day) by the database and
+        streamed back in batches, so memory stays bounded by batch_size.
+        Existing buckets are overwritten, making the rebuild idempotent.
+        """
+        batch_size = batch_size or cls.BACKFILL_BATCH_SIZE
+
+        ledger = XPTransaction.objects.all()
+        if student_ids is not None:
+            ledger = ledger.filter(student_id__in=student_ids)
+
+        rows = ledger.annotate(
+            day=TruncDate('created_at')
+        ).values('student_id', 'day').annotate(
+            total=Sum('amount'),
+            count=Count('id')
+        ).order_by('student_id', 'day')
+
+        buckets = 0
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(XPDailyRollup(
+                student_id=row['student_id'],
+                date=row['day'],
+                xp_earned=row['total'] or 0,
+                transaction_count=row['count']
+            ))
+            if len(batch) >= batch_size:
+                buckets += cls._flush(batch)
+                batch = []
+
+        if batch:
+            buckets += cls._flush(batch)
+
+        logger.info(f"[XP ROLLUP] Rebuilt {buckets} daily buckets")
+        return {'buckets': buckets}
+
+    @classmethod
+    def _flush(cls, batch) -> int:
+        XPDailyRollup.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['student', 'date'],
+            update_fields=['xp_earned', 'transaction_count', 'updated_at']
+        )
+        return len(batch)
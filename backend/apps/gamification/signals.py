@@ -0,0 +1,27 @@
+"""
+Signals for gamification app
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import XPTransaction, Achievement
+from .services.xp_rollup_service import XPRollupService
+from .services.achievement_engine import AchievementEngine
+
+
+@receiver(post_save, sender=XPTransaction)
+def update_xp_rollup(sender, instance, created, **kwargs):
+    """
+    Keep the student's daily XP bucket in step with the ledger
+    """
+    if created:
+        XPRollupService.record(instance.student_id, instance.amount, when=instance.created_at)
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def invalidate_achievement_rules(sender, instance, **kwargs):
+    """
+    Rebuild the achievement rule index after any definition change
+    """
+    AchievementEngine.invalidate()
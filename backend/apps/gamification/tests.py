@@ -0,0 +1,223 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from urllib.parse import urlsplit
+from rest_framework.test import APIClient
+from apps.gamification.models import (
+    XPTransaction, XPDailyRollup, StudentXP, Badge, Achievement, StudentAchievement
+)
+from apps.gamification.services.xp_rollup_service import XPRollupService
+from apps.gamification.services.achievement_engine import AchievementEngine, has_bit
+from apps.gamification.services.xp_ledger_service import (
+    XPLedgerService, level_for_xp, next_streak, xp_for_next_level
+)
+from apps.gamification.views import StudentXPViewSet
+
+User = get_user_model()
+
+
+class XPRollupTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email='student@example.com', password='password', role='student'
+        )
+        self.student2 = User.objects.create_user(
+            email='student2@example.com', password='password', role='student'
+        )
+
+    def _log_xp(self, student, amount):
+        return XPTransaction.objects.create(
+            student=student,
+            transaction_type='earned',
+            source='manual',
+            amount=amount,
+            balance_after=max(0, amount),
+            description='Test award'
+        )
+
+    def test_ledger_writes_update_daily_bucket(self):
+        """Each transaction is folded into the student's bucket for the day"""
+        self._log_xp(self.student, 50)
+        self._log_xp(self.student, 25)
+
+        bucket = XPDailyRollup.objects.get(student=self.student, date=timezone.localdate())
+        self.assertEqual(bucket.xp_earned, 75)
+        self.assertEqual(bucket.transaction_count, 2)
+
+    def test_period_scores_rank_by_window_sum(self):
+        """Weekly scores are range-sums over buckets"""
+        self._log_xp(self.student, 40)
+        self._log_xp(self.student2, 90)
+
+        scores = list(XPRollupService.period_scores('weekly'))
+        self.assertEqual(scores[0]['student_id'], self.student2.id)
+        self.assertEqual(scores[0]['score'], 90)
+        self.assertEqual(scores[1]['score'], 40)
+
+    def test_rebuild_matches_incremental_buckets(self):
+        """Backfill from the ledger reproduces the incrementally kept buckets"""
+        self._log_xp(self.student, 30)
+        self._log_xp(self.student, -10)
+        XPDailyRollup.objects.all().delete()
+
+        result = XPRollupService.rebuild(batch_size=1)
+
+        self.assertEqual(result['buckets'], 1)
+        bucket = XPDailyRollup.objects.get(student=self.student)
+        self.assertEqual(bucket.xp_earned, 20)
+        self.assertEqual(bucket.transaction_count, 2)
+
+
+class AchievementEngineTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email='student@example.com', password='password', role='student'
+        )
+        self.badge = Badge.objects.create(
+            name='Collector', description='Badge reward', category='special',
+            requirement_description='Unlock an achievement'
+        )
+        self.first_steps = Achievement.objects.create(
+            name='First Steps', description='Earn 100 XP',
+            requirement_type='xp_milestone', requirement_value=100,
+            xp_reward=50, badge_reward=self.badge
+        )
+        self.rising = Achievement.objects.create(
+            name='Rising', description='Earn 150 XP',
+            requirement_type='xp_milestone', requirement_value=150,
+            xp_reward=0
+        )
+        self.collector = Achievement.objects.create(
+            name='Collector', description='Collect a badge',
+            requirement_type='badges_collected', requirement_value=1,
+            xp_reward=0
+        )
+        # The rule index outlives the test transaction
+        self.addCleanup(AchievementEngine.invalidate)
+
+    def test_bit_indexes_are_assigned(self):
+        self.assertEqual(
+            [self.first_steps.bit_index, self.rising.bit_index, self.collector.bit_index],
+            [0, 1, 2]
+        )
+
+    def test_only_crossed_thresholds_are_evaluated(self):
+        rules = AchievementEngine.crossed_rules({'xp': 90}, {'xp': 120})
+        self.assertEqual([rule.achievement_id for rule in rules], [self.first_steps.id])
+
+        rules = AchievementEngine.crossed_rules({'xp': 120}, {'xp': 130})
+        self.assertEqual(rules, [])
+
+    def test_rewards_chain_without_recursion(self):
+        """XP and badge rewards unlock follow-on achievements in one pass"""
+        StudentXPViewSet().add_xp(
+            student=self.student, amount=100, source='manual', description='Test'
+        )
+
+        student_xp = StudentXP.objects.get(student=self.student)
+        unlocked = set(StudentAchievement.objects.filter(
+            student=self.student
+        ).values_list('achievement__name', flat=True))
+
+        self.assertEqual(unlocked, {'First Steps', 'Rising', 'Collector'})
+        self.assertEqual(student_xp.total_xp, 150)
+        self.assertEqual(student_xp.total_achievements, 3)
+        self.assertEqual(student_xp.total_badges_earned, 1)
+        self.assertTrue(has_bit(bytes(student_xp.achievement_bitmap), self.collector.bit_index))
+
+        # Already-unlocked achievements are skipped via the bitmap
+        result = AchievementEngine.evaluate(student_xp)
+        self.assertEqual(result['unlocked'], [])
+
+
+class XPLedgerTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email='student@example.com', password='password', role='student'
+        )
+        self.student2 = User.objects.create_user(
+            email='student2@example.com', password='password', role='student'
+        )
+
+    def test_level_and_streak_functions(self):
+        today = timezone.localdate()
+        self.assertEqual(level_for_xp(0), 1)
+        self.assertEqual(level_for_xp(250), 3)
+        self.assertEqual(next_streak(None, 0, today), 1)
+        self.assertEqual(next_streak(today - timedelta(days=1), 4, today), 5)
+        self.assertEqual(next_streak(today - timedelta(days=3), 4, today), 1)
+        self.assertEqual(next_streak(today, 4, today), 4)
+
+    def test_award_applies_deltas_in_sql(self):
+        XPLedgerService.award(self.student, 120, source='manual', description='First')
+        result = XPLedgerService.award(self.student, 90, source='manual', description='Second')
+
+        student_xp = result['student_xp']
+        self.assertEqual(student_xp.total_xp, 210)
+        self.assertEqual(student_xp.current_level, level_for_xp(210))
+        self.assertEqual(student_xp.xp_to_next_level, xp_for_next_level(student_xp.current_level))
+        self.assertEqual(student_xp.current_streak, 1)
+        self.assertEqual(result['transaction'].balance_after, 210)
+
+    def test_stale_instance_does_not_lose_updates(self):
+        """Two writers holding the same pre-award row both land"""
+        XPLedgerService.award(self.student, 10, source='manual', description='Seed')
+        stale = StudentXP.objects.get(student=self.student)
+
+        XPLedgerService.award(self.student, 30, source='manual', description='Game')
+        XPLedgerService.award(stale.student, 40, source='manual', description='Teacher')
+
+        self.assertEqual(StudentXP.objects.get(student=self.student).total_xp, 80)
+
+    def test_award_many_batches_students(self):
+        transactions = XPLedgerService.award_many([
+            {'student_id': self.student.id, 'amount': 50, 'source': 'attendance', 'description': 'Present'},
+            {'student_id': self.student2.id, 'amount': 70, 'source': 'attendance', 'description': 'Present'},
+            {'student_id': self.student.id, 'amount': 25, 'source': 'behavior', 'description': 'Helpful'},
+        ])
+
+        self.assertEqual([t.balance_after for t in transactions], [50, 70, 75])
+        self.assertEqual(StudentXP.objects.get(student=self.student).total_xp, 75)
+        self.assertEqual(StudentXP.objects.get(student=self.student2).total_xp, 70)
+        bucket = XPDailyRollup.objects.get(student=self.student)
+        self.assertEqual(bucket.xp_earned, 75)
+        self.assertEqual(bucket.transaction_count, 2)
+
+
+class XPFeedPaginationTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email='feed@example.com', password='password', role='student'
+        )
+        same_moment = timezone.now()
+        for amount in range(1, 26):
+            transaction = XPTransaction.objects.create(
+                student=self.student, transaction_type='earned', source='quiz_completed',
+                amount=amount, balance_after=amount
+            )
+            # Ten rows share each timestamp
+            XPTransaction.objects.filter(pk=transaction.pk).update(
+                created_at=same_moment - timedelta(seconds=amount // 10)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def walk(self, query):
+        seen, url = [], f'/api/v1/gamification/transactions/?page_size=4{query}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [item['amount'] for item in response.data['results']]
+            url = response.data['next'] and urlsplit(response.data['next'])._replace(scheme='', netloc='').geturl()
+        return seen
+
+    def test_pages_cover_tied_timestamps_once(self):
+        seen = self.walk('')
+        self.assertCountEqual(seen, range(1, 26))
+        self.assertEqual(len(seen), 25)
+
+    def test_ordering_limited_to_the_cursor_field(self):
+        self.assertCountEqual(self.walk('&ordering=created_at'), range(1, 26))
+        # Not a keyset field: ignored, the default order is kept
+        self.assertEqual(self.walk('&ordering=amount'), self.walk(''))
@@ -10,7 +10,6 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
-from datetime import date
 
 from .models import (
     StudentXP, XPTransaction, Badge, StudentBadge,
@@ -21,7 +20,11 @@ from .serializers import (
     StudentBadgeSerializer, LeaderboardSerializer, LeaderboardEntrySerializer,
     AchievementSerializer, StudentAchievementSerializer
 )
+from .services.xp_rollup_service import XPRollupService
+from .services.xp_ledger_service import XPLedgerService
 from apps.core.permissions import IsTeacher
+from apps.core.pagination import FeedCursorPagination
+from apps.schools.services.scope_service import UserScopeService
 
 
 class StudentXPViewSet(viewsets.ReadOnlyModelViewSet):
@@ -44,7 +47,7 @@ class StudentXPViewSet(viewsets.ReadOnlyModelViewSet):
         
         elif user.role == 'parent':
             # Parents see children's XP
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return StudentXP.objects.filter(student_id__in=children)
         
         elif user.role in ['teacher', 'admin']:
@@ -105,99 +108,32 @@ class StudentXPViewSet(viewsets.ReadOnlyModelViewSet):
     
     def add_xp(self, student, amount, source, description, awarded_by=None):
         """Helper method to add XP to student"""
-        # Get or create StudentXP
-        student_xp, created = StudentXP.objects.get_or_create(student=student)
-        
-        # Add XP
-        student_xp.total_xp += amount
-        
-        # Check for level up
-        while student_xp.total_xp >= student_xp.xp_to_next_level:
-            student_xp.current_level += 1
-            student_xp.xp_to_next_level = 100 * student_xp.current_level  # Simple formula
-        
-        # Update streak
-        today = date.today()
-        if student_xp.last_activity_date:
-            days_diff = (today - student_xp.last_activity_date).days
-            if days_diff == 1:
-                # Consecutive day
-                student_xp.current_streak += 1
-                if student_xp.current_streak > student_xp.longest_streak:
-                    student_xp.longest_streak = student_xp.current_streak
-            elif days_diff > 1:
-                # Streak broken
-                student_xp.current_streak = 1
-        else:
-            student_xp.current_streak = 1
-        
-        student_xp.last_activity_date = today
-        student_xp.save()
-        
-        # Create transaction record
-        transaction = XPTransaction.objects.create(
+        result = XPLedgerService.award(
             student=student,
-            transaction_type='earned',
-            source=source,
             amount=amount,
-            balance_after=student_xp.total_xp,
+            source=source,
             description=description,
             awarded_by=awarded_by
         )
-        
-        # Check for achievements
-        self.check_achievements(student, student_xp)
+        student_xp = result['student_xp']
         
         return {
             'student': student.get_full_name(),
             'amount': amount,
             'new_total': student_xp.total_xp,
             'current_level': student_xp.current_level,
-            'leveled_up': student_xp.current_level > (student_xp.total_xp - amount) // 100 + 1
+            'leveled_up': result['leveled_up']
         }
-    
-    def check_achievements(self, student, student_xp):
-        """Check if student unlocked any achievements"""
-        achievements = Achievement.objects.filter(is_active=True)
-        
-        for achievement in achievements:
-            # Check if already unlocked
-            if StudentAchievement.objects.filter(student=student, achievement=achievement).exists():
-                continue
-            
-            # Check requirements
-            unlocked = False
-            if achievement.requirement_type == 'xp_milestone':
-                unlocked = student_xp.total_xp >= achievement.requirement_value
-            elif achievement.requirement_type == 'level_reached':
-                unlocked = student_xp.current_level >= achievement.requirement_value
-            elif achievement.requirement_type == 'badges_collected':
-                unlocked = student_xp.total_badges_earned >= achievement.requirement_value
-            elif achievement.requirement_type == 'streak_milestone':
-                unlocked = student_xp.longest_streak >= achievement.requirement_value
-            
-            if unlocked:
-                # Unlock achievement
-                StudentAchievement.objects.create(student=student, achievement=achievement)
-                student_xp.total_achievements += 1
-                student_xp.save()
-                
-                # Award XP
-                if achievement.xp_reward > 0:
-                    self.add_xp(
-                        student=student,
-                        amount=achievement.xp_reward,
-                        source='manual',
-                        description=f'Achievement unlocked: {achievement.name}'
-                    )
 
 
 class XPTransactionViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for XP transaction history"""
     serializer_class = XPTransactionSerializer
+    pagination_class = FeedCursorPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['student', 'transaction_type', 'source']
+    ordering_fields = ['created_at']
     ordering = ['-created_at']
     
     def get_queryset(self):
@@ -210,7 +146,7 @@ class XPTransactionViewSet(viewsets.ReadOnlyModelViewSet):
             return XPTransaction.objects.filter(student=user)
         
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return XPTransaction.objects.filter(student_id__in=children)
         
         elif user.role in ['teacher', 'admin']:
@@ -260,7 +196,7 @@ class StudentBadgeViewSet(viewsets.ReadOnlyModelViewSet):
             return StudentBadge.objects.filter(student=user)
         
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return StudentBadge.objects.filter(student_id__in=children)
         
         elif user.role in ['teacher', 'admin']:
@@ -313,27 +249,37 @@ class LeaderboardViewSet(viewsets.ModelViewSet):
         
         # Calculate scores
         entries = []
-        for student in students:
-            score = 0
-            if leaderboard.leaderboard_type == 'xp':
-                try:
-                    score = student.student_xp.total_xp
-                except:
-                    score = 0
-            elif leaderboard.leaderboard_type == 'level':
-                try:
-                    score = student.student_xp.current_level
-                except:
-                    score = 1
-            elif leaderboard.leaderboard_type == 'badges':
-                score = student.earned_badges.count()
-            elif leaderboard.leaderboard_type == 'streak':
-                try:
-                    score = student.student_xp.current_streak
-                except:
-                    score = 0
-            
-            entries.append({'student': student, 'score': score})
+        if leaderboard.leaderboard_type == 'xp' and leaderboard.time_period != 'all_time':
+            # Windowed XP comes from the daily rollups, not the lifetime total
+            scores = XPRollupService.period_scores(
+                leaderboard.time_period,
+                student_ids=students.values('id'),
+                limit=leaderboard.max_entries
+            )
+            for row in scores:
+                entries.append({'student_id': row['student_id'], 'score': max(0, row['score'] or 0)})
+        else:
+            for student in students:
+                score = 0
+                if leaderboard.leaderboard_type == 'xp':
+                    try:
+                        score = student.student_xp.total_xp
+                    except:
+                        score = 0
+                elif leaderboard.leaderboard_type == 'level':
+                    try:
+                        score = student.student_xp.current_level
+                    except:
+                        score = 1
+                elif leaderboard.leaderboard_type == 'badges':
+                    score = student.earned_badges.count()
+                elif leaderboard.leaderboard_type == 'streak':
+                    try:
+                        score = student.student_xp.current_streak
+                    except:
+                        score = 0
+                
+                entries.append({'student_id': student.id, 'score': score})
         
         # Sort by score
         entries.sort(key=lambda x: x['score'], reverse=True)
@@ -344,7 +290,7 @@ class LeaderboardViewSet(viewsets.ModelViewSet):
         for rank, entry in enumerate(entries[:leaderboard.max_entries], start=1):
             LeaderboardEntry.objects.create(
                 leaderboard=leaderboard,
-                student=entry['student'],
+                student_id=entry['student_id'],
                 rank=rank,
                 score=entry['score']
             )
@@ -387,7 +333,7 @@ class StudentAchievementViewSet(viewsets.ReadOnlyModelViewSet):
             return StudentAchievement.objects.filter(student=user)
         
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return StudentAchievement.objects.filter(student_id__in=children)
         
         elif user.role in ['teacher', 'admin']:
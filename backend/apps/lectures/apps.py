@@ -5,3 +5,6 @@ class LecturesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.lectures'
     verbose_name = 'Lectures'
+
+    def ready(self):
+        import apps.lectures.signals
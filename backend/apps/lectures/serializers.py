@@ -3,6 +3,7 @@ Serializers for lectures app
 """
 
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsMixin
 from django.utils import timezone
 from .models import Lecture, LectureBookmark, LectureView, LectureResource
 from apps.accounts.models import User
@@ -37,7 +38,22 @@ class StudentBasicSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class LectureSerializer(serializers.ModelSerializer):
+def _student_completion(lecture, student, context):
+    """
+    Student's completion percentage for a lecture, or None if never watched
+
+    Reads context['lecture_views'] ({lecture_id: completion_percentage}) when
+    the view prefetched it for the page, and queries otherwise.
+    """
+    lecture_views = context.get('lecture_views')
+    if lecture_views is not None:
+        return lecture_views.get(lecture.pk)
+    return LectureView.objects.filter(
+        lecture=lecture, student=student
+    ).values_list('completion_percentage', flat=True).first()
+
+
+class LectureSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Full lecture serializer with all fields
     """
@@ -59,18 +75,15 @@ class LectureSerializer(serializers.ModelSerializer):
         """Get current student's completion percentage"""
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.role == 'student':
-            try:
-                view = LectureView.objects.get(lecture=obj, student=request.user)
-                return view.completion_percentage
-            except LectureView.DoesNotExist:
-                return 0
+            completion = _student_completion(obj, request.user, self.context)
+            return completion if completion is not None else 0
         return None
     
     def get_has_watched(self, obj):
         """Check if current student has started watching"""
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.role == 'student':
-            return LectureView.objects.filter(lecture=obj, student=request.user).exists()
+            return _student_completion(obj, request.user, self.context) is not None
         return None
     
     def validate_scheduled_date(self, value):
@@ -125,31 +138,39 @@ class LectureSerializer(serializers.ModelSerializer):
         return value
 
 
-class LectureListSerializer(serializers.ModelSerializer):
+class LectureListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for lecture list views
+    
+    The transcript is only included when requested with ?fields=
     """
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
     student_completion = serializers.SerializerMethodField()
+    transcript_length = serializers.SerializerMethodField()
     
     class Meta:
         model = Lecture
         fields = [
             'id', 'title', 'chapter', 'topic', 'duration', 'status',
             'is_shared_with_students', 'teacher_name', 'view_count',
-            'student_completion', 'created_at', 'scheduled_date', 'transcript'
+            'student_completion', 'created_at', 'scheduled_date', 'transcript',
+            'transcript_length'
         ]
         read_only_fields = fields
+        deferred_fields = ['transcript']
+    
+    def get_transcript_length(self, obj):
+        """Transcript size in characters (annotated by the list view)"""
+        if hasattr(obj, 'transcript_length'):
+            return obj.transcript_length
+        return len(obj.transcript)
     
     def get_student_completion(self, obj):
         """Get current student's completion percentage"""
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.role == 'student':
-            try:
-                view = LectureView.objects.get(lecture=obj, student=request.user)
-                return view.completion_percentage
-            except LectureView.DoesNotExist:
-                return 0
+            completion = _student_completion(obj, request.user, self.context)
+            return completion if completion is not None else 0
         return None
 
 
@@ -0,0 +1,56 @@
+"""
+Signals for lectures app
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core.versioning import VersionStamps
+from .models import Lecture, LectureView
+
+
+@receiver(pre_save, sender=Lecture)
+def remember_previous_classroom(sender, instance, **kwargs):
+    """
+    Note the lecture's classroom before this save
+    """
+    instance._previous_classroom_id = None
+    if not instance._state.adding:
+        instance._previous_classroom_id = Lecture.objects.filter(
+            pk=instance.pk
+        ).values_list('classroom_id', flat=True).first()
+
+
+@VersionStamps.register(Lecture, fields=['teacher', 'classroom'])
+def lecture_version_keys(instance):
+    """A lecture's own stamp and the lists it appears in"""
+    return [
+        VersionStamps.object_key(Lecture, instance.pk),
+        VersionStamps.collection_key('lectures:teacher', instance.teacher_id),
+        VersionStamps.collection_key('lectures:classroom', instance.classroom_id),
+        VersionStamps.collection_key('lectures:classroom', getattr(instance, '_previous_classroom_id', None)),
+    ]
+
+
+@VersionStamps.register(LectureView, fields=['student'])
+def lecture_view_version_keys(instance):
+    """The watch progress of the view's student"""
+    return [VersionStamps.collection_key('lecture_views:student', instance.student_id)]
+
+
+@receiver(post_save, sender=Lecture)
+@receiver(post_delete, sender=Lecture)
+def bump_lecture_versions(sender, instance, **kwargs):
+    """
+    A lecture changed: its own stamp and the lists it appears in are stale
+    """
+    VersionStamps.bump_on_commit(lecture_version_keys(instance))
+
+
+@receiver(post_save, sender=LectureView)
+@receiver(post_delete, sender=LectureView)
+def bump_lecture_view_versions(sender, instance, **kwargs):
+    """
+    A student's watch progress changed
+    """
+    VersionStamps.bump_on_commit(lecture_view_version_keys(instance))
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from apps.lectures.models import Lecture, LectureView
+from apps.schools.models import AcademicYear, Classroom, ClassroomEnrollment, School, Subject
+
+User = get_user_model()
+
+
+class LectureListTests(TestCase):
+    URL = '/api/v1/lectures/lectures/'
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', password='password', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='password', role='student'
+        )
+        school = School.objects.create(
+            name='Test School', code='TEST01',
+            city='Test City', state='Test State', pincode='123456',
+            email='school@test.com', principal_name='Principal', established_year=2000
+        )
+        academic_year = AcademicYear.objects.create(
+            school=school, name='2025-2026',
+            start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        classroom = Classroom.objects.create(
+            school=school, academic_year=academic_year, subject=subject,
+            grade=5, section='A', class_code='TESTCLASS01', teacher=self.teacher
+        )
+        ClassroomEnrollment.objects.create(classroom=classroom, student=self.student)
+
+        for number in range(4):
+            lecture = Lecture.objects.create(
+                title=f'Lecture {number}', teacher=self.teacher, classroom=classroom,
+                status='completed', is_shared_with_students=True, transcript='Words ' * number
+            )
+            LectureView.objects.create(lecture=lecture, student=self.student, completion_percentage=25 * number)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def list_queries(self, page_size):
+        """Queries of one list page holding page_size lectures, with nothing cached"""
+        cache.clear()
+        with mock.patch.object(PageNumberPagination, 'page_size', page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(queries)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.assertEqual(self.list_queries(4), self.list_queries(1))
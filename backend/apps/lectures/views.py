@@ -10,6 +10,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.utils import timezone
 from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import Length
 from django.db import models
 from django.http import FileResponse
 import logging
@@ -22,10 +23,14 @@ from .serializers import (
     LectureViewSerializer, LectureResourceSerializer
 )
 from apps.core.permissions import IsTeacher, IsStudent
+from apps.core.counters import DeferredCounter
+from apps.core.versioning import VersionStamps
+from apps.core.viewsets import ConditionalGetMixin, PrefetchContextMixin, SparseFieldsViewMixin
 from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 
 
-class LectureViewSet(viewsets.ModelViewSet):
+class LectureViewSet(ConditionalGetMixin, PrefetchContextMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing lectures
     
@@ -57,10 +62,7 @@ class LectureViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'student':
             # Students see shared lectures from enrolled classrooms
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return Lecture.objects.filter(
                 classroom_id__in=enrolled_classrooms,
@@ -71,11 +73,7 @@ class LectureViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see lectures their children can access
-            children = user.children_relationships.values_list('student_id', flat=True)
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student_id__in=children,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return Lecture.objects.filter(
                 classroom_id__in=enrolled_classrooms,
@@ -98,6 +96,50 @@ class LectureViewSet(viewsets.ModelViewSet):
             return LectureListSerializer
         return LectureSerializer
     
+    def filter_queryset(self, queryset):
+        """List pages report the transcript size without loading the transcript"""
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = queryset.annotate(transcript_length=Length('transcript'))
+        return queryset
+    
+    def etag_keys(self):
+        """Version stamps behind list, retrieve and transcript_status"""
+        user = self.request.user
+        if self.action == 'transcript_status':
+            return [VersionStamps.object_key(Lecture, self.kwargs['pk'])]
+        
+        # Students also see their own watch progress
+        progress = []
+        if user.role == 'student':
+            progress = [VersionStamps.collection_key('lecture_views:student', user.pk)]
+        
+        if self.action == 'retrieve':
+            return [VersionStamps.object_key(Lecture, self.kwargs['pk']), *progress]
+        if self.action == 'list':
+            if user.role == 'teacher':
+                return [VersionStamps.collection_key('lectures:teacher', user.pk)]
+            if user.role in ('student', 'parent'):
+                classroom_ids = UserScopeService.for_request(self.request).classroom_ids
+                return [
+                    *(VersionStamps.collection_key('lectures:classroom', classroom_id)
+                      for classroom_id in classroom_ids),
+                    *progress
+                ]
+        return None
+    
+    def prefetch_context(self, lectures):
+        """Load the student's watch progress for every lecture on the page"""
+        user = self.request.user
+        if not user.is_authenticated or user.role != 'student':
+            return {}
+        return {
+            'lecture_views': dict(LectureView.objects.filter(
+                student=user,
+                lecture_id__in=[lecture.pk for lecture in lectures]
+            ).values_list('lecture_id', 'completion_percentage'))
+        }
+    
     def perform_create(self, serializer):
         """
         Auto-set teacher and auto-approve transcript when lecture is created
@@ -267,6 +309,8 @@ class LectureViewSet(viewsets.ModelViewSet):
             student=request.user,
             defaults={'started_at': timezone.now()}
         )
+        if created:
+            DeferredCounter.incr(Lecture, lecture.pk, 'view_count')
         
         serializer = LectureViewSerializer(lecture_view)
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -298,13 +342,14 @@ class LectureViewSet(viewsets.ModelViewSet):
         if completion_percentage is not None:
             lecture_view.completion_percentage = completion_percentage
         
-        # Increment watch time (simple increment, can be improved)
-        lecture_view.watch_time += 1
+        lecture_view.save(update_fields=['last_position', 'completion_percentage', 'updated_at'])
         
-        lecture_view.save()
+        # Increment watch time (simple increment, can be improved)
+        DeferredCounter.incr(LectureView, lecture_view.pk, 'watch_time')
         
-        serializer = LectureViewSerializer(lecture_view)
-        return Response(serializer.data)
+        data = LectureViewSerializer(lecture_view).data
+        data['watch_time'] = DeferredCounter.current(lecture_view, 'watch_time')
+        return Response(data)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsStudent])
     def complete(self, request, pk=None):
@@ -325,7 +370,7 @@ class LectureViewSet(viewsets.ModelViewSet):
         
         lecture_view.completed_at = timezone.now()
         lecture_view.completion_percentage = 100
-        lecture_view.save()
+        lecture_view.save(update_fields=['completed_at', 'completion_percentage', 'updated_at'])
         
         # TODO: Trigger XP reward for completing lecture
         # award_xp(request.user, lecture, 'lecture_completed')
@@ -1554,7 +1599,7 @@ class LectureViewViewSet(viewsets.ReadOnlyModelViewSet):
         
         elif user.role == 'parent':
             # Parents see their children's views
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return LectureView.objects.filter(student_id__in=children).select_related('lecture', 'student')
         
         return LectureView.objects.none()
@@ -1572,7 +1617,7 @@ class LectureViewViewSet(viewsets.ReadOnlyModelViewSet):
             views = LectureView.objects.filter(student=user)
         elif user.role == 'parent':
             # For parents, show summary of all children
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             views = LectureView.objects.filter(student_id__in=children)
         else:
             return Response(
@@ -1629,10 +1674,7 @@ class LectureResourceViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'student':
             # Students see resources for accessible lectures
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return LectureResource.objects.filter(
                 lecture__classroom_id__in=enrolled_classrooms,
@@ -1643,11 +1685,7 @@ class LectureResourceViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see resources their children can access
-            children = user.children_relationships.values_list('student_id', flat=True)
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student_id__in=children,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return LectureResource.objects.filter(
                 lecture__classroom_id__in=enrolled_classrooms,
@@ -1674,8 +1712,7 @@ class LectureResourceViewSet(viewsets.ModelViewSet):
         resource = self.get_object()
         
         # Increment lecture's download count
-        resource.lecture.download_count += 1
-        resource.lecture.save(update_fields=['download_count'])
+        DeferredCounter.incr(Lecture, resource.lecture_id, 'download_count')
         
         # TODO: Track download in analytics
         # log_resource_download(resource, request.user)
@@ -0,0 +1,80 @@
+"""
+Management command to benchmark lecture note PDF rendering
+"""
+
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.notes.models import LectureNote
+from apps.notes.services import pdf_service
+from apps.notes.services.pdf_service import NotePDFService
+from apps.schools.models import Classroom, Subject
+
+
+class Command(BaseCommand):
+    help = 'Render N in-memory notes and report PDFs per second, cold, warm and from stored files (nothing is kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=200)
+        parser.add_argument('--sections', type=int, default=8, help='Headed sections per note')
+
+    def handle(self, *args, **options):
+        notes = [self._note(i, options['sections']) for i in range(options['notes'])]
+
+        def cold(note):
+            # What every request used to pay: fresh styles and markdown converter
+            pdf_service._styles.cache_clear()
+            pdf_service._local.__dict__.clear()
+            return NotePDFService.render(note)
+
+        pdfs = {}
+        self._measure('Render, styles rebuilt per PDF', notes, cold)
+        self._measure('Render, styles built once', notes, lambda note: pdfs.setdefault(note.title, NotePDFService.render(note)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            storage = FileSystemStorage(location=directory)
+            for note in notes:
+                storage.save(NotePDFService.storage_name(NotePDFService.content_hash(note)), ContentFile(pdfs[note.title]))
+            self._measure(
+                'Stored PDF found by content hash',
+                notes,
+                lambda note: storage.exists(NotePDFService.storage_name(NotePDFService.content_hash(note)))
+            )
+
+        sizes = [len(pdf) for pdf in pdfs.values()]
+        self.stdout.write(f'Average PDF size: {sum(sizes) / len(sizes) / 1024:.1f} KiB')
+
+    def _measure(self, label, notes, work):
+        started = time.perf_counter()
+        for note in notes:
+            work(note)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label}: {len(notes) / elapsed:.1f} PDFs/s ({elapsed * 1000 / len(notes):.2f} ms each)'
+        )
+
+    @staticmethod
+    def _note(index, sections):
+        body = []
+        for section in range(sections):
+            body.append(f'## Topic {section + 1}\n')
+            body.append(
+                'Photosynthesis converts light energy into chemical energy stored in glucose. '
+                'Chlorophyll absorbs mostly blue and red light, reflecting green. ' * 3 + '\n'
+            )
+            body.append('\n'.join(f'- Key point {point + 1} for topic {section + 1}' for point in range(4)) + '\n')
+        note = LectureNote(
+            title=f'Benchmark note {index}',
+            summary='A benchmark note with headings, paragraphs and lists.',
+            content='\n'.join(body),
+            classroom=Classroom(subject=Subject(name='Biology')),
+            teacher=User(first_name='Bench', last_name='Mark'),
+        )
+        note.created_at = timezone.now()
+        return note
@@ -2,7 +2,10 @@
 Serializers for notes app
 """
 
+from typing import Any, Dict, Optional
+
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsMixin
 from django.utils import timezone
 from .models import (
     NoteTemplate, LectureNote, StudentNoteBookmark,
@@ -53,7 +56,23 @@ class NoteTemplateSerializer(serializers.ModelSerializer):
         return LectureNote.objects.filter(template=obj, is_deleted=False).count()
 
 
-class LectureNoteSerializer(serializers.ModelSerializer):
+def _is_bookmarked(note: LectureNote, context: Dict[str, Any]) -> Optional[bool]:
+    """
+    Whether the requesting student bookmarked a note (None for other roles)
+
+    Reads context['bookmarked_note_ids'] when the view prefetched it for the
+    page, and queries otherwise.
+    """
+    request = context.get('request')
+    if not (request and request.user.is_authenticated and request.user.role == 'student'):
+        return None
+    bookmarked = context.get('bookmarked_note_ids')
+    if bookmarked is None:
+        return StudentNoteBookmark.objects.filter(note=note, student=request.user).exists()
+    return note.pk in bookmarked
+
+
+class LectureNoteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Full serializer for lecture notes
     """
@@ -71,16 +90,13 @@ class LectureNoteSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id', 'created_at', 'updated_at', 'teacher',
             'view_count', 'download_count', 'bookmark_count',
-            'published_at', 'auto_generated_at', 'pdf_generated_at',
+            'published_at', 'auto_generated_at', 'pdf_file', 'pdf_generated_at',
             'classroom_detail', 'teacher_detail', 'lecture_detail'
         ]
     
     def get_is_bookmarked(self, obj):
         """Check if current student has bookmarked this note"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated and request.user.role == 'student':
-            return StudentNoteBookmark.objects.filter(note=obj, student=request.user).exists()
-        return None
+        return _is_bookmarked(obj, self.context)
     
     def get_student_annotations_count(self, obj):
         """Count of student annotations (for teachers)"""
@@ -112,7 +128,7 @@ class LectureNoteSerializer(serializers.ModelSerializer):
         return data
 
 
-class LectureNoteListSerializer(serializers.ModelSerializer):
+class LectureNoteListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for list views
     """
@@ -130,11 +146,8 @@ class LectureNoteListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
     
     def get_is_bookmarked(self, obj):
-        """Check if current student has bookmarked"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated and request.user.role == 'student':
-            return StudentNoteBookmark.objects.filter(note=obj, student=request.user).exists()
-        return None
+        """Check if current student has bookmarked """
+        return _is_bookmarked(obj, self.context)
 
 
 class StudentNoteBookmarkSerializer(serializers.ModelSerializer):
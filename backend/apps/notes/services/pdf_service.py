@@ -0,0 +1,289 @@
+"""
+Note PDF Service
+
+Renders lecture notes to PDF once and serves the stored file afterwards.
+
+- Paragraph styles are built once per process, and each thread reuses one
+  markdown converter.
+- Files are content addressed: a note's PDF is stored as
+  notes/pdfs/<hash[:2]>/<hash>.pdf, where the hash covers everything the
+  PDF shows. A note is only rendered again when that hash changes.
+- Publishing a note, or saving an already published one, renders it in
+  Celery, so students' downloads find the file waiting.
+- Renders of one hash are single-flight (a short cache lock), files are
+  only ever written under their exact name, and a superseded file is
+  deleted by a delayed task rather than inline, so a download that is
+  still streaming it is not cut off.
+- Downloads are handed to the web server when SENDFILE_HEADER is set
+  (X-Sendfile or X-Accel-Redirect), redirected to the storage URL when the
+  storage is remote, and streamed by Django otherwise.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+import uuid
+from functools import lru_cache
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+from apps.core.versioning import VersionStamps
+from ..models import LectureNote
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def _styles():
+    """Paragraph styles, built once per process"""
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor='#1a1a1a',
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor='#2c3e50',
+            spaceAfter=12,
+            spaceBefore=12,
+            fontName='Helvetica-Bold'
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=styles['BodyText'],
+            fontSize=11,
+            leading=16,
+            alignment=TA_JUSTIFY,
+            spaceAfter=12,
+        ),
+    }
+
+
+def _markdown_to_html(text: str) -> str:
+    """Convert with this thread's markdown converter (converters are not thread-safe)"""
+    converter = getattr(_local, 'markdown', None)
+    if converter is None:
+        import markdown
+
+        converter = _local.markdown = markdown.Markdown()
+    return converter.reset().convert(text)
+
+
+class NotePDFService:
+    """Service for rendering, storing and serving lecture note PDFs"""
+
+    # Bump when the layout changes, so stored PDFs are rendered again
+    RENDER_VERSION = 1
+
+    # Single-flight rendering: other callers wait up to LOCK_WAIT seconds
+    LOCK_TIMEOUT = 120
+    LOCK_WAIT = 30
+    WAIT_INTERVAL = 0.1
+    # Superseded files stay this long, for downloads still streaming them
+    CLEANUP_DELAY = 60 * 60
+
+    @classmethod
+    def _fields(cls, note: LectureNote) -> dict:
+        """Everything the PDF shows"""
+        subject = note.classroom.subject.name if note.classroom and note.classroom.subject else 'N/A'
+        return {
+            'version': cls.RENDER_VERSION,
+            'title': note.title,
+            'subject': subject,
+            'teacher': note.teacher.get_full_name(),
+            'date': note.created_at.strftime('%B %d, %Y'),
+            'auto_generated': note.is_auto_generated,
+            'summary': note.summary,
+            'content': note.content,
+        }
+
+    @classmethod
+    def content_hash(cls, note: LectureNote) -> str:
+        encoded = json.dumps(cls._fields(note), sort_keys=True)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def storage_name(content_hash: str) -> str:
+        return f'notes/pdfs/{content_hash[:2]}/{content_hash}.pdf'
+
+    @classmethod
+    def render(cls, note: LectureNote) -> bytes:
+        from bs4 import BeautifulSoup
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+        fields = cls._fields(note)
+        styles = _styles()
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=18,
+            title=fields['title'],
+        )
+
+        story = [Paragraph(escape(fields['title']), styles['title']), Spacer(1, 0.2 * inch)]
+
+        metadata = (
+            f"<b>Subject:</b> {escape(fields['subject'])}<br/>"
+            f"<b>Teacher:</b> {escape(fields['teacher'])}<br/>"
+            f"<b>Date:</b> {fields['date']}<br/>"
+        )
+        if fields['auto_generated']:
+            metadata += "<b>Generated by:</b> AI<br/>"
+        story += [Paragraph(metadata, styles['body']), Spacer(1, 0.3 * inch)]
+
+        if fields['summary']:
+            story += [
+                Paragraph("<b>Summary</b>", styles['heading']),
+                Paragraph(escape(fields['summary']), styles['body']),
+                Spacer(1, 0.2 * inch),
+            ]
+
+        soup = BeautifulSoup(_markdown_to_html(fields['content']), 'html.parser')
+        for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'ul', 'ol']):
+            if element.name in ['h1', 'h2', 'h3']:
+                story.append(Paragraph(escape(element.get_text()), styles['heading']))
+            elif element.name == 'p':
+                text = element.get_text()
+                if text.strip():
+                    story.append(Paragraph(escape(text), styles['body']))
+            else:
+                for li in element.find_all('li', recursive=False):
+                    story.append(Paragraph(f"• {escape(li.get_text())}", styles['body']))
+
+        doc.build(story)
+        return buffer.getvalue()
+
+    @classmethod
+    def ensure_pdf(cls, note: LectureNote) -> str:
+        """
+        Store the note's current PDF in pdf_file, rendering it only if no
+        file with its content hash exists yet
+
+        Returns:
+            str: storage name of the PDF
+        """
+        content_hash = cls.content_hash(note)
+        name = cls.storage_name(content_hash)
+        storage = note.pdf_file.storage
+        if note.pdf_file.name == name and storage.exists(name):
+            return name
+
+        if not storage.exists(name):
+            cls._store(note, content_hash, name)
+
+        previous = note.pdf_file.name
+        now = timezone.now()
+        # A newer save may have changed the note while this one rendered;
+        # its own render points the note at the newer file
+        updated = LectureNote._base_manager.filter(pk=note.pk).exclude(
+            updated_at__gt=note.updated_at
+        ).update(pdf_file=name, pdf_generated_at=now)
+        if updated:
+            note.pdf_file.name, note.pdf_generated_at = name, now
+            VersionStamps.bump_objects(LectureNote, [note.pk])
+            if previous and previous != name:
+                cls.discard_later(previous)
+        return name
+
+    @classmethod
+    def _store(cls, note: LectureNote, content_hash: str, name: str) -> None:
+        """Render and write the PDF under exactly name, once however many callers race"""
+        storage = note.pdf_file.storage
+        lock, token = f'note_pdf:render:{content_hash}', uuid.uuid4().hex
+        owned = cache.add(lock, token, cls.LOCK_TIMEOUT)
+        if not owned:
+            # Someone else is rendering this exact content; use their file
+            deadline = time.monotonic() + cls.LOCK_WAIT
+            while cache.get(lock) and time.monotonic() < deadline:
+                time.sleep(cls.WAIT_INTERVAL)
+            if storage.exists(name):
+                return
+            owned = cache.add(lock, token, cls.LOCK_TIMEOUT)
+
+        try:
+            if storage.exists(name):
+                return
+            saved = storage.save(name, ContentFile(cls.render(note)))
+            if saved != name:
+                # A writer without the lock stored it first and storage gave
+                # ours another name; the content is identical, keep theirs
+                storage.delete(saved)
+            logger.info(f"[NOTES] Rendered PDF for note {note.pk}")
+        finally:
+            if owned and cache.get(lock) == token:
+                cache.delete(lock)
+
+    @classmethod
+    def discard_later(cls, name: str) -> None:
+        """Delete a superseded PDF after CLEANUP_DELAY, unless a note uses it by then"""
+        from ..tasks import delete_unused_note_pdf
+
+        transaction.on_commit(lambda: delete_unused_note_pdf.apply_async((name,), countdown=cls.CLEANUP_DELAY))
+
+    @staticmethod
+    def delete_if_unused(name: str) -> bool:
+        """Delete a stored PDF that no note points at; notes with identical content share a file"""
+        if LectureNote._base_manager.filter(pdf_file=name).exists():
+            return False
+        LectureNote._meta.get_field('pdf_file').storage.delete(name)
+        logger.info(f"[NOTES] Deleted superseded PDF {name}")
+        return True
+
+    @staticmethod
+    def response(note: LectureNote) -> HttpResponse:
+        """Download response for the stored PDF"""
+        filename = f'{note.title}.pdf'
+        storage = note.pdf_file.storage
+        header = settings.SENDFILE_HEADER
+
+        if header:
+            response = HttpResponse(content_type='application/pdf')
+            if header == 'X-Accel-Redirect':
+                response[header] = quote(f"{settings.SENDFILE_URL_PREFIX.rstrip('/')}/{note.pdf_file.name}")
+            else:
+                response[header] = storage.path(note.pdf_file.name)
+            response['Content-Disposition'] = content_disposition_header(True, filename)
+            return response
+
+        try:
+            storage.path(note.pdf_file.name)
+        except NotImplementedError:
+            # Remote storage (S3) serves the file itself
+            return HttpResponseRedirect(note.pdf_file.url)
+
+        return FileResponse(
+            note.pdf_file.open('rb'),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf'
+        )
@@ -0,0 +1,66 @@
+"""
+Signals for notes app
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core.versioning import VersionStamps
+from .models import LectureNote, StudentNoteBookmark
+
+
+@receiver(pre_save, sender=LectureNote)
+def remember_previous_classroom(sender, instance, **kwargs):
+    """
+    Note the note's classroom before this save
+    """
+    instance._previous_classroom_id = None
+    if not instance._state.adding:
+        instance._previous_classroom_id = LectureNote.objects.filter(
+            pk=instance.pk
+        ).values_list('classroom_id', flat=True).first()
+
+
+@VersionStamps.register(LectureNote, fields=['classroom'])
+def note_version_keys(instance):
+    """A note's own stamp and the lists it appears in"""
+    return [
+        VersionStamps.object_key(LectureNote, instance.pk),
+        VersionStamps.collection_key('lecture_notes:classroom', instance.classroom_id),
+        VersionStamps.collection_key('lecture_notes:classroom', getattr(instance, '_previous_classroom_id', None)),
+    ]
+
+
+@receiver(post_save, sender=LectureNote)
+@receiver(post_delete, sender=LectureNote)
+def bump_note_versions(sender, instance, **kwargs):
+    """
+    A note changed: its own stamp and the lists it appears in are stale
+    """
+    VersionStamps.bump_on_commit(note_version_keys(instance))
+
+
+@receiver(post_save, sender=LectureNote)
+def prerender_published_note(sender, instance, update_fields=None, **kwargs):
+    """
+    Render a published note's PDF in the background; unchanged notes are skipped by their content hash
+    """
+    if not instance.is_published:
+        return
+    if update_fields and set(update_fields) <= {'pdf_file', 'pdf_generated_at'}:
+        return
+
+    from .tasks import render_note_pdf
+    transaction.on_commit(lambda: render_note_pdf.delay(str(instance.pk)))
+
+
+@receiver(post_save, sender=StudentNoteBookmark)
+@receiver(post_delete, sender=StudentNoteBookmark)
+def bump_bookmark_versions(sender, instance, **kwargs):
+    """
+    A student bookmarked or unbookmarked a note
+    """
+    VersionStamps.bump_on_commit([
+        VersionStamps.collection_key('note_bookmarks:student', instance.student_id),
+    ])
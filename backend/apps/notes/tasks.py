@@ -0,0 +1,24 @@
+"""
+Celery tasks for notes app
+"""
+
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def render_note_pdf(note_id):
+    """Store a note's PDF, rendering it only if its content changed since the last one"""
+    from .models import LectureNote
+    from .services.pdf_service import NotePDFService
+
+    note = LectureNote.objects.select_related('classroom__subject', 'teacher').filter(pk=note_id).first()
+    if note is not None:
+        NotePDFService.ensure_pdf(note)
+
+
+@shared_task(ignore_result=True)
+def delete_unused_note_pdf(name):
+    """Delete a superseded note PDF once no note points at it"""
+    from .services.pdf_service import NotePDFService
+
+    NotePDFService.delete_if_unused(name)
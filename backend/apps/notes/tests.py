@@ -0,0 +1,226 @@
+import shutil
+import tempfile
+import threading
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.content_cache import ContentCache
+from apps.core.counters import DeferredCounter, _LocalBuffer
+from apps.lectures.models import Lecture
+from apps.notes.models import LectureNote, StudentNoteBookmark
+from apps.notes.services.pdf_service import NotePDFService
+from apps.schools.models import AcademicYear, Classroom, ClassroomEnrollment, School, Subject
+
+User = get_user_model()
+
+
+class NoteTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', password='password', role='teacher',
+            first_name='Meera', last_name='Iyer'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='password', role='student'
+        )
+        school = School.objects.create(
+            name='Test School', code='TEST01',
+            city='Test City', state='Test State', pincode='123456',
+            email='school@test.com', principal_name='Principal', established_year=2000
+        )
+        academic_year = AcademicYear.objects.create(
+            school=school, name='2025-2026',
+            start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        self.classroom = Classroom.objects.create(
+            school=school, academic_year=academic_year, subject=subject,
+            grade=5, section='A', class_code='TESTCLASS01', teacher=self.teacher
+        )
+        ClassroomEnrollment.objects.create(classroom=self.classroom, student=self.student)
+
+    def note(self, title='Photosynthesis', **fields):
+        fields.setdefault('content', '# Light\n\nPlants turn light into sugar.')
+        fields.setdefault('is_published', True)
+        lecture = Lecture.objects.create(title=title, teacher=self.teacher, classroom=self.classroom)
+        return LectureNote.objects.create(
+            lecture=lecture, classroom=self.classroom, teacher=self.teacher, title=title, **fields
+        )
+
+
+class PublishedNoteCacheTests(NoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.notes = [self.note(f'Note {index}') for index in range(5)]
+        StudentNoteBookmark.objects.create(note=self.notes[1], student=self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def results(self):
+        response = self.client.get('/api/v1/notes/notes/')
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item for item in response.data['results']}
+
+    def test_cached_list_checks_bookmarks_once_per_page(self):
+        self.results()
+        with CaptureQueriesContext(connection) as queries:
+            results = self.results()
+        bookmark_queries = [q for q in queries.captured_queries if 'notes_studentnotebookmark' in q['sql']]
+        self.assertEqual(len(bookmark_queries), 1)
+        self.assertEqual(
+            {note_id for note_id, item in results.items() if item['is_bookmarked']},
+            {str(self.notes[1].pk)}
+        )
+
+    def test_cached_list_shows_flushed_counts(self):
+        saved = DeferredCounter._buffer
+        DeferredCounter._buffer = _LocalBuffer()
+        try:
+            self.assertEqual(self.results()[str(self.notes[0].pk)]['view_count'], 0)
+            DeferredCounter._buffer.add((LectureNote._meta.label, 'view_count', str(self.notes[0].pk)), 4)
+            with self.captureOnCommitCallbacks(execute=True):
+                DeferredCounter.flush()
+            self.assertEqual(self.results()[str(self.notes[0].pk)]['view_count'], 4)
+        finally:
+            DeferredCounter._buffer = saved
+
+
+class PublishedNoteVisibilityTests(NoteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.note_here = self.note('Photosynthesis')
+
+        # A second classroom of the same school, with its own student
+        self.elsewhere = Classroom.objects.create(
+            school=self.classroom.school, academic_year=self.classroom.academic_year,
+            subject=self.classroom.subject, grade=5, section='B', class_code='TESTCLASS02', teacher=self.teacher
+        )
+        self.outsider = User.objects.create_user(email='outsider@example.com', password='password', role='student')
+        ClassroomEnrollment.objects.create(classroom=self.elsewhere, student=self.outsider)
+        lecture = Lecture.objects.create(title='Fractions', teacher=self.teacher, classroom=self.elsewhere)
+        self.note_elsewhere = LectureNote.objects.create(
+            lecture=lecture, classroom=self.elsewhere, teacher=self.teacher,
+            title='Fractions', content='Halves and quarters.', is_published=True
+        )
+
+    def get(self, user, path=''):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(f'/api/v1/notes/notes/{path}')
+
+    def listed(self, user):
+        return {str(item['id']) for item in self.get(user).data['results']}
+
+    def test_entries_stay_within_their_classroom(self):
+        # Both entries are built and cached by students who may see them
+        self.assertEqual(self.get(self.outsider, f'{self.note_elsewhere.pk}/').status_code, 200)
+        self.assertEqual(self.get(self.student, f'{self.note_here.pk}/').status_code, 200)
+
+        self.assertEqual(self.get(self.student, f'{self.note_elsewhere.pk}/').status_code, 404)
+        self.assertEqual(self.listed(self.student), {str(self.note_here.pk)})
+        self.assertEqual(self.listed(self.outsider), {str(self.note_elsewhere.pk)})
+
+    def test_unpublished_note_is_unreachable(self):
+        self.assertEqual(self.get(self.student, f'{self.note_here.pk}/').status_code, 200)
+        self.assertEqual(self.listed(self.student), {str(self.note_here.pk)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note_here.is_published = False
+            self.note_here.save()
+        self.assertEqual(self.get(self.student, f'{self.note_here.pk}/').status_code, 404)
+        self.assertEqual(self.listed(self.student), set())
+
+    def test_malformed_id_is_not_found(self):
+        self.assertEqual(self.get(self.student, 'abc/').status_code, 404)
+        self.assertEqual(self.get(self.teacher, 'abc/').status_code, 404)
+
+
+class ContentCacheSingleFlightTests(TestCase):
+    def test_concurrent_miss_builds_once(self):
+        pk = str(uuid.uuid4())
+        builds, first = [], []
+        building, release = threading.Event(), threading.Event()
+
+        def build(pks):
+            builds.append(pks)
+            building.set()
+            release.wait(5)
+            return {key: {'title': 'Photosynthesis'} for key in pks}
+
+        thread = threading.Thread(
+            target=lambda: first.append(ContentCache.get_many('lecturenote:test', LectureNote, [pk], build))
+        )
+        thread.start()
+        self.assertTrue(building.wait(5))
+        # The second request arrives while the first is still building
+        threading.Timer(0.1, release.set).start()
+        second = ContentCache.get_many('lecturenote:test', LectureNote, [pk], build)
+        thread.join()
+
+        self.assertEqual(builds, [[pk]])
+        self.assertEqual(second, {pk: {'title': 'Photosynthesis'}})
+        self.assertEqual(first, [second])
+
+class NotePDFTests(NoteTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        patcher = mock.patch.object(NotePDFService, 'render', return_value=b'%PDF-1.4 test')
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def published(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            note = self.note(**fields)
+        note.refresh_from_db()
+        return note
+
+    def edit(self, note, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            note.content = content
+            note.save()
+        note.refresh_from_db()
+        return note
+
+    def stored(self, name):
+        return LectureNote._meta.get_field('pdf_file').storage.exists(name)
+
+    def test_publish_renders_once(self):
+        note = self.published()
+        self.assertEqual(note.pdf_file.name, NotePDFService.storage_name(NotePDFService.content_hash(note)))
+        self.assertTrue(self.stored(note.pdf_file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(NotePDFService.ensure_pdf(note), note.pdf_file.name)
+        self.assertEqual(self.render.call_count, 1)
+
+    def test_content_change_renders_again_and_drops_old_file(self):
+        note = self.published()
+        old_name = note.pdf_file.name
+
+        note = self.edit(note, 'Plants also need water.')
+        self.assertNotEqual(note.pdf_file.name, old_name)
+        self.assertTrue(self.stored(note.pdf_file.name))
+        self.assertFalse(self.stored(old_name))
+        self.assertEqual(self.render.call_count, 2)
+
+    def test_shared_file_is_kept(self):
+        note = self.published()
+        twin = self.published()
+        self.assertEqual(twin.pdf_file.name, note.pdf_file.name)
+        self.assertEqual(self.render.call_count, 1)
+
+        old_name = note.pdf_file.name
+        self.edit(note, 'Plants also need water.')
+        self.assertTrue(self.stored(old_name))
@@ -22,7 +22,16 @@ from .serializers import (
     StudentPersonalNoteSerializer
 )
 from apps.core.permissions import IsTeacher, IsStudent
+from apps.core.counters import DeferredCounter
+from apps.core.versioning import VersionStamps
+from apps.core.viewsets import (
+    ConditionalGetMixin, PrefetchContextMixin, PublishedContentCacheMixin, SparseFieldsViewMixin
+)
 from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class NoteTemplateViewSet(viewsets.ModelViewSet):
@@ -59,7 +68,8 @@ class NoteTemplateViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class LectureNoteViewSet(viewsets.ModelViewSet):
+class LectureNoteViewSet(ConditionalGetMixin, PublishedContentCacheMixin, PrefetchContextMixin,
+                         SparseFieldsViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing lecture notes
     
@@ -73,6 +83,8 @@ class LectureNoteViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'content', 'summary']
     ordering_fields = ['created_at', 'updated_at', 'title', 'view_count']
     ordering = ['-created_at']
+    content_cache_model = LectureNote
+    personal_fields = ('is_bookmarked',)
     
     def get_queryset(self):
         """Filter notes based on user role"""
@@ -90,10 +102,7 @@ class LectureNoteViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'student':
             # Students see published notes from enrolled classrooms
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return LectureNote.objects.filter(
                 classroom_id__in=enrolled_classrooms,
@@ -103,11 +112,7 @@ class LectureNoteViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see notes their children can access
-            children = user.children_relationships.values_list('student_id', flat=True)
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student_id__in=children,
-                is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return LectureNote.objects.filter(
                 classroom_id__in=enrolled_classrooms,
@@ -129,6 +134,42 @@ class LectureNoteViewSet(viewsets.ModelViewSet):
             return LectureNoteListSerializer
         return LectureNoteSerializer
     
+    def etag_keys(self):
+        """
+        Version stamps behind published notes as students and parents see
+        them (teacher responses carry annotation counts and are not cached)
+        """
+        user = self.request.user
+        if user.role not in ('student', 'parent'):
+            return None
+        
+        # Students also see their own bookmarks
+        bookmarks = []
+        if user.role == 'student':
+            bookmarks = [VersionStamps.collection_key('note_bookmarks:student', user.pk)]
+        
+        if self.action == 'retrieve':
+            return [VersionStamps.object_key(LectureNote, self.kwargs['pk']), *bookmarks]
+        if self.action == 'list':
+            classroom_ids = UserScopeService.for_request(self.request).classroom_ids
+            return [
+                *(VersionStamps.collection_key('lecture_notes:classroom', classroom_id)
+                  for classroom_id in classroom_ids),
+                *bookmarks
+            ]
+        return None
+    
+    def prefetch_context(self, notes):
+        """Load which notes on the page the student has bookmarked"""
+        user = self.request.user
+        if user.role != 'student':
+            return {}
+        return {
+            'bookmarked_note_ids': set(StudentNoteBookmark.objects.filter(
+                student=user, note_id__in=[note.pk for note in notes]
+            ).values_list('note_id', flat=True))
+        }
+    
     def perform_create(self, serializer):
         """Auto-set teacher to current user"""
         serializer.save(teacher=self.request.user)
@@ -358,8 +399,7 @@ class LectureNoteViewSet(viewsets.ModelViewSet):
         
         # Increment view count
         if created:
-            note.view_count += 1
-            note.save(update_fields=['view_count'])
+            DeferredCounter.incr(LectureNote, note.pk, 'view_count')
         
         serializer = StudentNoteViewSerializer(view)
         return Response(serializer.data)
@@ -367,19 +407,13 @@ class LectureNoteViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
     def generate_pdf(self, request, pk=None):
         """
-        Generate and download PDF from note
+        Download the note as a PDF
         
-        Available to both students and teachers
+        Available to both students and teachers. Published notes are
+        rendered in the background when they change, so this normally
+        serves the stored file; otherwise it is rendered and stored first.
         """
-        from django.http import HttpResponse
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-        from io import BytesIO
-        import markdown
-        from bs4 import BeautifulSoup
+        from .services.pdf_service import NotePDFService
         
         note = self.get_object()
         
@@ -397,116 +431,15 @@ class LectureNoteViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            # Create PDF buffer
-            buffer = BytesIO()
-            
-            # Create PDF document
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18,
-            )
-            
-            # Container for PDF elements
-            story = []
-            
-            # Styles
-            styles = getSampleStyleSheet()
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor='#1a1a1a',
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor='#2c3e50',
-                spaceAfter=12,
-                spaceBefore=12,
-                fontName='Helvetica-Bold'
-            )
-            
-            body_style = ParagraphStyle(
-                'CustomBody',
-                parent=styles['BodyText'],
-                fontSize=11,
-                leading=16,
-                alignment=TA_JUSTIFY,
-                spaceAfter=12,
-            )
-            
-            # Add title
-            story.append(Paragraph(note.title, title_style))
-            story.append(Spacer(1, 0.2*inch))
-            
-            # Add metadata
-            metadata = f"""
-            <b>Subject:</b> {note.classroom.subject.name if note.classroom and note.classroom.subject else 'N/A'}<br/>
-            <b>Teacher:</b> {note.teacher.get_full_name()}<br/>
-            <b>Date:</b> {note.created_at.strftime('%B %d, %Y')}<br/>
-            """
-            if note.is_auto_generated:
-                metadata += "<b>Generated by:</b> AI<br/>"
-            
-            story.append(Paragraph(metadata, body_style))
-            story.append(Spacer(1, 0.3*inch))
-            
-            # Add summary if exists
-            if note.summary:
-                story.append(Paragraph("<b>Summary</b>", heading_style))
-                story.append(Paragraph(note.summary, body_style))
-                story.append(Spacer(1, 0.2*inch))
-            
-            # Convert markdown to HTML
-            html_content = markdown.markdown(note.content)
-            
-            # Parse HTML and convert to PDF elements
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            for element in soup.find_all(['h1', 'h2', 'h3', 'p', 'ul', 'ol', 'li']):
-                if element.name in ['h1', 'h2', 'h3']:
-                    story.append(Paragraph(element.get_text(), heading_style))
-                elif element.name == 'p':
-                    text = element.get_text()
-                    if text.strip():
-                        story.append(Paragraph(text, body_style))
-                elif element.name in ['ul', 'ol']:
-                    for li in element.find_all('li', recursive=False):
-                        bullet_text = f"• {li.get_text()}"
-                        story.append(Paragraph(bullet_text, body_style))
-            
-            # Build PDF
-            doc.build(story)
-            
-            # Get PDF from buffer
-            pdf = buffer.getvalue()
-            buffer.close()
-            
-            # Create response
-            response = HttpResponse(content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{note.title}.pdf"'
-            response.write(pdf)
-            
-            return response
-            
+            NotePDFService.ensure_pdf(note)
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"[NOTES] PDF rendering failed for note {note.pk}")
             return Response(
                 {'error': f'Failed to generate PDF: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        
+        return NotePDFService.response(note)
     
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsTeacher])
     def from_template(self, request):
@@ -0,0 +1,78 @@
+"""
+WebSocket consumers for notifications app
+"""
+
+import time
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db.models import Sum
+
+from apps.core.realtime import PresenceRegistry, RealtimeService
+from .models import Notification
+
+# Presence lives in the cache, so it need not queue behind ORM work on the
+# single database thread
+presence = {
+    name: sync_to_async(getattr(PresenceRegistry, name), thread_sensitive=False)
+    for name in ('connect', 'disconnect', 'heartbeat')
+}
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Per-user event stream: new notifications, new messages and unread
+    counter changes
+
+    On connect the client receives a 'hello' with both unread counts;
+    afterwards it applies the deltas it is pushed instead of polling.
+    Clients send {"type": "ping"} every 30 seconds to stay marked online.
+    """
+    HEARTBEAT_INTERVAL = 20  # seconds between presence refreshes
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.user_id = user.pk
+        self.group_name = RealtimeService.group_name(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await presence['connect'](self.user_id)
+        self.last_heartbeat = time.monotonic()
+
+        counts = await database_sync_to_async(self.unread_counts)()
+        await self.send_json({'type': 'hello', **counts})
+
+    async def disconnect(self, code):
+        if getattr(self, 'group_name', None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await presence['disconnect'](self.user_id)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+            if time.monotonic() - self.last_heartbeat >= self.HEARTBEAT_INTERVAL:
+                self.last_heartbeat = time.monotonic()
+                await presence['heartbeat'](self.user_id)
+
+    async def realtime_event(self, event):
+        """Relay a RealtimeService push"""
+        await self.send_json(event['payload'])
+
+    def unread_counts(self):
+        from apps.communication.models import ConversationReadState
+
+        notifications = Notification.objects.filter(
+            recipient_id=self.user_id,
+            is_read=False,
+            deliver_at__isnull=True
+        ).count()
+        messages = ConversationReadState.objects.filter(
+            user_id=self.user_id,
+            conversation__is_deleted=False
+        ).aggregate(total=Sum('unread_count'))['total'] or 0
+        return {'unread_notifications': notifications, 'unread_messages': messages}
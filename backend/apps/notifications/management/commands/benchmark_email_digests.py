@@ -0,0 +1,82 @@
+"""
+Management command to benchmark draining an email digest backlog
+"""
+
+import time
+import tracemalloc
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.accounts.models import User
+from apps.notifications.models import EmailDigestEntry, Notification
+from apps.notifications.services.digest_service import EmailDigestService
+
+
+class Command(BaseCommand):
+    help = 'Queue N notifications for daily digests and time sending them (nothing is kept or emailed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notifications', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        total, user_count = options['notifications'], options['users']
+
+        # Everything is created inside a transaction that is rolled back
+        with transaction.atomic():
+            started = time.perf_counter()
+            self._create_backlog(total, user_count)
+            self.stdout.write(
+                f'Queued {total} notifications for {user_count} users in {time.perf_counter() - started:.1f}s'
+            )
+
+            # The dummy backend discards messages, so only the pipeline is measured
+            connection = get_connection('django.core.mail.backends.dummy.EmailBackend')
+            tracemalloc.start()
+            started = time.perf_counter()
+            stats = EmailDigestService.send_due('daily', connection=connection)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"Sent {stats['emails']} digests covering {stats['notifications']} notifications "
+                f"in {elapsed:.1f}s ({stats['notifications'] / max(elapsed, 1e-9):.0f} notifications/s)"
+            )
+            self.stdout.write(f'Peak Python memory while sending: {peak / 1024 / 1024:.1f} MiB')
+            self.stdout.write(f'Entries left in queue: {EmailDigestEntry.objects.filter(frequency="daily").count()}')
+
+            transaction.set_rollback(True)
+
+    def _create_backlog(self, total, user_count):
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        batch_size = 5000
+
+        users = [
+            User(email=f'digest-{tag}-{i}@example.com', role='student', password=password)
+            for i in range(user_count)
+        ]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        user_ids = [user.pk for user in users]
+        del users
+
+        for start in range(0, total, batch_size):
+            notifications = [
+                Notification(
+                    recipient_id=user_ids[i % user_count],
+                    notification_type='new_announcement',
+                    title=f'Announcement {i}',
+                    message='Benchmark notification',
+                )
+                for i in range(start, min(start + batch_size, total))
+            ]
+            Notification.objects.bulk_create(notifications)
+            EmailDigestEntry.objects.bulk_create([
+                EmailDigestEntry(user_id=n.recipient_id, notification=n, frequency='daily')
+                for n in notifications
+            ])
@@ -0,0 +1,143 @@
+"""
+Management command to benchmark NotificationBatch fan-out against
+per-recipient create_notification calls
+"""
+
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.accounts.models import User
+from apps.notifications.models import Notification, NotificationBatch, NotificationPreference
+from apps.notifications.services.fanout_service import NotificationFanoutService
+from apps.notifications.views import create_notification
+from apps.schools.models import AcademicYear, Classroom, ClassroomEnrollment, School, Subject
+
+
+class QueryCounter:
+    """connection.execute_wrapper that counts statements"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Fan a batch out to N synthetic students and compare with create_notification per recipient'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100000)
+        parser.add_argument('--baseline-sample', type=int, default=1000,
+                            help='Recipients sent through create_notification for the baseline')
+
+    def handle(self, *args, **options):
+        students = options['students']
+
+        # Everything is created inside a transaction that is rolled back
+        with transaction.atomic():
+            started = time.perf_counter()
+            classroom, teacher, student_ids = self._create_students(students)
+            self.stdout.write(f'Created {students} students in {time.perf_counter() - started:.1f}s')
+
+            sample = User.objects.filter(pk__in=student_ids[:options['baseline_sample']])
+            baseline_seconds, baseline_queries = self._measure(lambda: [
+                create_notification(
+                    recipient=student, notification_type='new_announcement',
+                    title='Baseline', message='Per-recipient notification'
+                )
+                for student in sample
+            ])
+            per_recipient = baseline_seconds / max(len(sample), 1)
+
+            batch = NotificationBatch.objects.create(
+                name='Benchmark', notification_type='new_announcement',
+                title='Fan-out', message='Batch notification',
+                target_role='student', classroom=classroom, created_by=teacher
+            )
+            fanout_seconds, fanout_queries = self._measure(lambda: NotificationFanoutService.send(batch.pk))
+            batch.refresh_from_db()
+            created = Notification.objects.filter(reference_id=str(batch.pk)).count()
+
+            self.stdout.write(f"{'mode':<22} {'recipients':>10} {'seconds':>9} {'queries':>8} {'rows/s':>9}")
+            self.stdout.write(
+                f"{'create_notification':<22} {len(sample):>10} {baseline_seconds:>9.2f} "
+                f"{baseline_queries:>8} {len(sample) / max(baseline_seconds, 1e-9):>9.0f}"
+            )
+            self.stdout.write(
+                f"{'  (extrapolated)':<22} {students:>10} {per_recipient * students:>9.2f} "
+                f"{baseline_queries * students // max(len(sample), 1):>8}"
+            )
+            self.stdout.write(
+                f"{'fan-out':<22} {batch.recipient_count:>10} {fanout_seconds:>9.2f} "
+                f"{fanout_queries:>8} {batch.recipient_count / max(fanout_seconds, 1e-9):>9.0f}"
+            )
+            self.stdout.write(
+                f'Batch: sent={batch.sent_count} skipped={batch.skipped_count} '
+                f'status={batch.status} rows written={created}'
+            )
+            self.stdout.write(
+                f'Speedup: {per_recipient * students / max(fanout_seconds, 1e-9):.1f}x'
+            )
+
+            transaction.set_rollback(True)
+
+    def _create_students(self, count):
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(None)
+
+        school = School.objects.create(
+            name=f'Benchmark School {tag}', code=f'B{tag}', city='City', state='State',
+            pincode='000000', email=f'school-{tag}@example.com',
+            principal_name='Principal', established_year=2000
+        )
+        year = AcademicYear.objects.create(
+            school=school, name=f'Bench {tag}', start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Benchmark', code=f'S{tag}', grade=5)
+        teacher = User.objects.create_user(
+            email=f'bench-teacher-{tag}@example.com', password=None, role='teacher'
+        )
+        classroom = Classroom.objects.create(
+            school=school, academic_year=year, subject=subject, grade=5, section='A',
+            class_code=f'C{tag}', teacher=teacher, max_students=count
+        )
+
+        batch_size = 5000
+        students = [
+            User(email=f'bench-{tag}-{i}@example.com', role='student', password=password)
+            for i in range(count)
+        ]
+        User.objects.bulk_create(students, batch_size=batch_size)
+        ClassroomEnrollment.objects.bulk_create(
+            [ClassroomEnrollment(classroom=classroom, student=student) for student in students],
+            batch_size=batch_size
+        )
+
+        # Some students opted out of announcements or in-app notifications
+        NotificationPreference.objects.bulk_create(
+            [
+                NotificationPreference(
+                    user=student,
+                    notify_announcements=i % 10 != 0,
+                    enable_in_app=i % 20 != 1,
+                )
+                for i, student in enumerate(students) if i % 4 < 2
+            ],
+            batch_size=batch_size
+        )
+        return classroom, teacher, [student.pk for student in students]
+
+    @staticmethod
+    def _measure(run):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+        return elapsed, counter.count
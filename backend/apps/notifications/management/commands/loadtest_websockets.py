@@ -0,0 +1,150 @@
+"""
+Management command to load test the notification WebSocket endpoint
+"""
+
+import asyncio
+import json
+import resource
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import User
+from apps.core.realtime import RealtimeService
+
+
+def percentiles(samples):
+    """p50/p95/p99 in milliseconds"""
+    if not samples:
+        return 'n/a'
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return f'p50 {pick(0.50):.1f}ms  p95 {pick(0.95):.1f}ms  p99 {pick(0.99):.1f}ms  max {ordered[-1] * 1000:.1f}ms'
+
+
+class Client:
+    """One socket: connects, waits for hello, then records pongs and pushes"""
+
+    def __init__(self, url):
+        self.url = url
+        self.socket = None
+        self.connect_time = None
+        self.hello_time = None
+        self.ping_sent = None
+        self.rtts = []
+        self.push_latencies = []
+        self.error = None
+
+    async def run(self, opened, stop):
+        import websockets
+
+        started = time.perf_counter()
+        try:
+            self.socket = await websockets.connect(self.url, open_timeout=60, ping_interval=None, max_queue=None)
+            self.connect_time = time.perf_counter() - started
+            await self.socket.recv()  # hello
+            self.hello_time = time.perf_counter() - started
+        except Exception as exc:
+            self.error = exc
+            opened.release()
+            return
+        opened.release()
+
+        try:
+            while not stop.is_set():
+                message = json.loads(await self.socket.recv())
+                received = time.perf_counter()
+                if message.get('type') == 'pong' and self.ping_sent is not None:
+                    self.rtts.append(received - self.ping_sent)
+                elif message.get('type') == 'loadtest':
+                    self.push_latencies.append(time.time() - message['sent_at'])
+        except Exception:
+            pass
+
+    async def ping(self):
+        self.ping_sent = time.perf_counter()
+        await self.socket.send('{"type": "ping"}')
+
+
+class Command(BaseCommand):
+    help = 'Open N concurrent sockets to the notification stream and measure connect, ping and push latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='ws://127.0.0.1:8000/ws/notifications/')
+        parser.add_argument('--sockets', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=100, help='Distinct users the sockets are spread over')
+        parser.add_argument('--concurrency', type=int, default=200, help='Handshakes in flight at once')
+        parser.add_argument('--ping-rounds', type=int, default=3)
+        parser.add_argument('--push-rounds', type=int, default=0,
+                            help='Pushes sent through the channel layer; needs a layer shared with the server (Redis)')
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)[:options['users']])
+        if not users:
+            raise CommandError('No active users to open sockets for')
+
+        # Every socket is a file descriptor
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < options['sockets'] + 100:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, options['sockets'] + 1000), hard))
+
+        tokens = {user_id: str(AccessToken.for_user(User(pk=user_id))) for user_id in users}
+        asyncio.run(self._run(options, users, tokens))
+
+    async def _run(self, options, users, tokens):
+        clients = [
+            Client(f"{options['url']}?token={tokens[users[i % len(users)]]}")
+            for i in range(options['sockets'])
+        ]
+        opened = asyncio.Semaphore(options['concurrency'])
+        stop = asyncio.Event()
+
+        started = time.perf_counter()
+        tasks = []
+        for client in clients:
+            await opened.acquire()
+            tasks.append(asyncio.create_task(client.run(opened, stop)))
+        # Wait for the last handshakes
+        for _ in range(options['concurrency']):
+            await opened.acquire()
+        ramp = time.perf_counter() - started
+
+        connected = [client for client in clients if client.socket is not None and client.error is None]
+        self.stdout.write(f'Connected {len(connected)}/{len(clients)} sockets in {ramp:.1f}s')
+        errors = [client.error for client in clients if client.error is not None]
+        if errors:
+            self.stdout.write(f'  {len(errors)} failed, first error: {errors[0]!r}')
+        self.stdout.write(f'  handshake  {percentiles([c.connect_time for c in connected])}')
+        self.stdout.write(f'  hello      {percentiles([c.hello_time for c in connected])}')
+
+        for _ in range(options['ping_rounds']):
+            await asyncio.gather(*(client.ping() for client in connected), return_exceptions=True)
+            await asyncio.sleep(5)
+        rtts = [rtt for client in connected for rtt in client.rtts]
+        self.stdout.write(
+            f'Ping round trips: {len(rtts)}/{len(connected) * options["ping_rounds"]}  {percentiles(rtts)}'
+        )
+
+        if options['push_rounds']:
+            for _ in range(options['push_rounds']):
+                await sync_to_async(RealtimeService.push)(
+                    [str(user_id) for user_id in users],
+                    {'type': 'loadtest', 'sent_at': time.time()}
+                )
+                await asyncio.sleep(5)
+            latencies = [latency for client in connected for latency in client.push_latencies]
+            self.stdout.write(
+                f'Pushes delivered: {len(latencies)}/{len(connected) * options["push_rounds"]}  '
+                f'{percentiles(latencies)}'
+            )
+
+        stop.set()
+        await asyncio.gather(*(client.socket.close() for client in connected), return_exceptions=True)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
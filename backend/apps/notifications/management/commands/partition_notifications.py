@@ -0,0 +1,253 @@
+"""
+Management command to convert the notifications table to monthly partitions online
+
+The table stays readable and writable throughout:
+
+1. A partitioned copy (<table>_partitioned) is created with the same
+   columns, indexes and foreign keys, and monthly partitions from the
+   oldest notification to NOTIFICATION_PARTITIONS_AHEAD months ahead.
+2. A trigger mirrors every insert, update and delete on the old table
+   into the copy.
+3. Existing rows are copied over in primary-key batches, one short
+   transaction each. Source rows are read FOR SHARE so a row updated
+   mid-batch is copied in its committed state.
+4. The tables are swapped by renaming them under a brief exclusive lock.
+   The old table is kept as <table>_legacy (without its indexes) until
+   --drop-legacy is passed.
+
+Interrupted runs can be restarted; rows already copied are skipped.
+"""
+
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from apps.notifications.services.partition_service import NotificationPartitionService, month_start
+
+
+class Command(BaseCommand):
+    help = 'Convert the notifications table to monthly partitions without taking it offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+        parser.add_argument('--drop-legacy', action='store_true', help='Drop the old table after the swap')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL')
+
+        self.table = NotificationPartitionService.TABLE
+        self.shadow = f'{self.table}_partitioned'
+        self.legacy = f'{self.table}_legacy'
+        self.trigger = f'{self.table}_mirror'
+        self.quote = connection.ops.quote_name
+
+        if NotificationPartitionService.is_partitioned():
+            created = NotificationPartitionService.ensure_future_partitions()
+            self.stdout.write(f'{self.table} is already partitioned; created {len(created)} partitions')
+            if options['drop_legacy']:
+                self._drop_legacy()
+            return
+
+        self._check_references()
+        self._create_shadow()
+        self._install_trigger()
+        self._backfill(options['batch_size'], options['pause'])
+        self._swap()
+        if options['drop_legacy']:
+            self._drop_legacy()
+
+    def _fetch(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _execute(self, *statements):
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def _check_references(self):
+        """Foreign keys cannot reference a partitioned table by id alone"""
+        references = self._fetch(
+            "SELECT conname, conrelid::regclass::text FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = to_regclass(%s)",
+            [self.table]
+        )
+        if references:
+            listed = ', '.join(f'{name} on {table}' for name, table in references)
+            raise CommandError(f'Drop the foreign keys referencing {self.table} first (run migrate): {listed}')
+
+    def _secondary_indexes(self, table):
+        """(name, definition) of the table's indexes other than its primary key"""
+        return self._fetch(
+            "SELECT idx.relname, pg_get_indexdef(pg_index.indexrelid) FROM pg_index "
+            "JOIN pg_class idx ON idx.oid = pg_index.indexrelid "
+            "WHERE pg_index.indrelid = to_regclass(%s) AND NOT pg_index.indisprimary",
+            [table]
+        )
+
+    def _foreign_keys(self, table):
+        return self._fetch(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE contype = 'f' AND conrelid = to_regclass(%s)",
+            [table]
+        )
+
+    @staticmethod
+    def _shadow_name(name):
+        return f'{name[:55]}_shadow'
+
+    def _create_shadow(self):
+        quote, key = self.quote, NotificationPartitionService.PARTITION_KEY
+        if not NotificationPartitionService.is_partitioned(self.shadow):
+            with transaction.atomic():
+                self._execute(
+                    f"CREATE TABLE {quote(self.shadow)} (LIKE {quote(self.table)} "
+                    f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+                    f"PARTITION BY RANGE ({quote(key)})",
+                    # The partition key has to be part of the primary key
+                    f"ALTER TABLE {quote(self.shadow)} ADD CONSTRAINT {quote(self.shadow + '_pkey')} "
+                    f"PRIMARY KEY (id, {quote(key)})",
+                )
+                for name, definition in self._secondary_indexes(self.table):
+                    if definition.startswith('CREATE UNIQUE'):
+                        raise CommandError(f'Unique index {name} cannot be kept without {key} in it')
+                    definition = re.sub(
+                        r'^CREATE INDEX \S+ ON (?:ONLY )?\S+ ',
+                        f'CREATE INDEX {quote(self._shadow_name(name))} ON {quote(self.shadow)} ',
+                        definition
+                    )
+                    self._execute(definition)
+                for name, definition in self._foreign_keys(self.table):
+                    self._execute(
+                        f"ALTER TABLE {quote(self.shadow)} "
+                        f"ADD CONSTRAINT {quote(self._shadow_name(name))} {definition}"
+                    )
+            self.stdout.write(f'Created {self.shadow}')
+
+        # created_at is indexed and never later than sent_at
+        oldest = self._fetch(f"SELECT MIN(created_at) FROM {quote(self.table)}")[0][0]
+        today = timezone.now().date()
+        created = NotificationPartitionService.create_partitions(
+            month_start(oldest.date() if oldest else today),
+            month_start(today, settings.NOTIFICATION_PARTITIONS_AHEAD),
+            parent=self.shadow
+        )
+        self.stdout.write(f'Created {len(created)} monthly partitions')
+
+    def _install_trigger(self):
+        quote = self.quote
+        key = quote(NotificationPartitionService.PARTITION_KEY)
+        with transaction.atomic():
+            self._execute(
+                f"""
+                CREATE OR REPLACE FUNCTION {quote(self.trigger)}() RETURNS trigger
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        DELETE FROM {quote(self.shadow)} WHERE id = OLD.id AND {key} = OLD.{key};
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        INSERT INTO {quote(self.shadow)} SELECT NEW.* ON CONFLICT DO NOTHING;
+                    END IF;
+                    RETURN NULL;
+                END
+                $$
+                """,
+                f"DROP TRIGGER IF EXISTS {quote(self.trigger)} ON {quote(self.table)}",
+                f"CREATE TRIGGER {quote(self.trigger)} AFTER INSERT OR UPDATE OR DELETE ON {quote(self.table)} "
+                f"FOR EACH ROW EXECUTE FUNCTION {quote(self.trigger)}()",
+            )
+        self.stdout.write('Mirroring writes into the partitioned table')
+
+    def _backfill(self, batch_size, pause):
+        quote = self.quote
+        started = time.perf_counter()
+        copied = batches = 0
+        last_id = None
+        while True:
+            with transaction.atomic():
+                if last_id is None:
+                    ids = self._fetch(f"SELECT id FROM {quote(self.table)} ORDER BY id LIMIT %s", [batch_size])
+                else:
+                    ids = self._fetch(
+                        f"SELECT id FROM {quote(self.table)} WHERE id > %s ORDER BY id LIMIT %s",
+                        [last_id, batch_size]
+                    )
+                if not ids:
+                    break
+                first_id, last_id = ids[0][0], ids[-1][0]
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"INSERT INTO {quote(self.shadow)} "
+                        f"SELECT * FROM {quote(self.table)} WHERE id BETWEEN %s AND %s FOR SHARE "
+                        f"ON CONFLICT DO NOTHING",
+                        [first_id, last_id]
+                    )
+                    copied += cursor.rowcount
+            batches += 1
+            if batches % 20 == 0:
+                self.stdout.write(f'  copied {copied} rows ({time.perf_counter() - started:.0f}s)')
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        self._execute(f"ANALYZE {quote(self.shadow)}")
+        self.stdout.write(f'Copied {copied} rows in {time.perf_counter() - started:.1f}s')
+
+    def _swap(self, attempts=10):
+        """Rename the tables under an exclusive lock, retrying while it is contended"""
+        quote = self.quote
+        for attempt in range(1, attempts + 1):
+            try:
+                with transaction.atomic():
+                    self._execute(
+                        "SET LOCAL lock_timeout = '3s'",
+                        f"LOCK TABLE {quote(self.table)} IN ACCESS EXCLUSIVE MODE",
+                        f"DROP TRIGGER {quote(self.trigger)} ON {quote(self.table)}",
+                        f"DROP FUNCTION {quote(self.trigger)}()",
+                    )
+                    # The old table keeps its rows but hands its index and constraint names over
+                    original_names = {}
+                    for name, _ in self._secondary_indexes(self.table):
+                        self._execute(f"DROP INDEX {quote(name)}")
+                        original_names[self._shadow_name(name)] = name
+                    for name, _ in self._foreign_keys(self.table):
+                        self._execute(f"ALTER TABLE {quote(self.table)} DROP CONSTRAINT {quote(name)}")
+                        original_names[self._shadow_name(name)] = name
+                    self._execute(
+                        f"ALTER TABLE {quote(self.table)} RENAME CONSTRAINT {quote(self.table + '_pkey')} "
+                        f"TO {quote(self.legacy + '_pkey')}",
+                        f"ALTER TABLE {quote(self.table)} RENAME TO {quote(self.legacy)}",
+                        f"ALTER TABLE {quote(self.shadow)} RENAME TO {quote(self.table)}",
+                        f"ALTER TABLE {quote(self.table)} RENAME CONSTRAINT {quote(self.shadow + '_pkey')} "
+                        f"TO {quote(self.table + '_pkey')}",
+                    )
+                    for name, _ in self._secondary_indexes(self.table):
+                        if name in original_names:
+                            self._execute(f"ALTER INDEX {quote(name)} RENAME TO {quote(original_names[name])}")
+                    for name, _ in self._foreign_keys(self.table):
+                        if name in original_names:
+                            self._execute(
+                                f"ALTER TABLE {quote(self.table)} RENAME CONSTRAINT {quote(name)} "
+                                f"TO {quote(original_names[name])}"
+                            )
+            except OperationalError as exc:
+                if 'lock timeout' not in str(exc) or attempt == attempts:
+                    raise
+                self.stdout.write(f'  table busy, retrying swap ({attempt}/{attempts})')
+                time.sleep(1)
+                continue
+            break
+        self.stdout.write(self.style.SUCCESS(f'{self.table} is now partitioned by month'))
+
+    def _drop_legacy(self):
+        self._execute(f"DROP TABLE IF EXISTS {self.quote(self.legacy)}")
+        self.stdout.write(f'Dropped {self.legacy}')
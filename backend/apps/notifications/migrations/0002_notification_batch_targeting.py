@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schools', '0002_alter_classroom_options'),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='action_url',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='classroom',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_batches', to='schools.classroom'),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='last_recipient_id',
+            field=models.CharField(blank=True, help_text='Last recipient processed; a retried send resumes after it', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='priority',
+            field=models.CharField(choices=[('low', 'Low'), ('normal', 'Normal'), ('high', 'High'), ('urgent', 'Urgent')], default='normal', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='school',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_batches', to='schools.school'),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='skipped_count',
+            field=models.PositiveIntegerField(default=0, help_text='Recipients whose preferences filtered it out'),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='target_role',
+            field=models.CharField(choices=[('student', 'Students'), ('parent', 'Parents'), ('teacher', 'Teachers'), ('all', 'Everyone')], default='all', max_length=20),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_batch_targeting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='deliver_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Held back until this time (quiet hours); cleared once delivered', null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='time_zone',
+            field=models.CharField(default='UTC', help_text='IANA time zone for quiet hours', max_length=64),
+        ),
+    ]
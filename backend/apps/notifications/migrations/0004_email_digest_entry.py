@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0003_notification_deferred_delivery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDigestEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('frequency', models.CharField(choices=[('instant', 'Instant'), ('daily', 'Daily Digest'), ('weekly', 'Weekly Digest')], max_length=20)),
+                ('notification', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='email_digest_entry', to='notifications.notification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_digest_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Email Digest Entry',
+                'verbose_name_plural': 'Email Digest Entries',
+                'indexes': [models.Index(fields=['frequency', 'user', 'created_at'], name='notificatio_frequen_dd8d9e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_email_digest_entry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emaildigestentry',
+            name='notification',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='email_digest_entry', to='notifications.notification'),
+        ),
+    ]
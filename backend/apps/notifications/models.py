@@ -6,6 +6,7 @@ from django.db import models
 from django.utils import timezone
 from apps.core.models import TimeStampedModel
 from apps.accounts.models import User
+from apps.schools.models import Classroom, School
 
 
 class Notification(TimeStampedModel):
@@ -75,6 +76,10 @@ class Notification(TimeStampedModel):
     
     # Delivery
     sent_at = models.DateTimeField(auto_now_add=True)
+    deliver_at = models.DateTimeField(
+        null=True, blank=True, db_index=True,
+        help_text='Held back until this time (quiet hours); cleared once delivered'
+    )
     
     # Additional data (JSON)
     metadata = models.JSONField(default=dict, blank=True)
@@ -134,6 +139,7 @@ class NotificationPreference(TimeStampedModel):
     enable_quiet_hours = models.BooleanField(default=False)
     quiet_hours_start = models.TimeField(null=True, blank=True, help_text='e.g., 22:00')
     quiet_hours_end = models.TimeField(null=True, blank=True, help_text='e.g., 07:00')
+    time_zone = models.CharField(max_length=64, default='UTC', help_text='IANA time zone for quiet hours')
     
     class Meta:
         verbose_name = 'Notification Preference'
@@ -171,16 +177,40 @@ class NotificationTemplate(TimeStampedModel):
 
 class NotificationBatch(TimeStampedModel):
     """Batch notifications for bulk sending"""
+    TARGET_ROLE_CHOICES = [
+        ('student', 'Students'),
+        ('parent', 'Parents'),
+        ('teacher', 'Teachers'),
+        ('all', 'Everyone'),
+    ]
+    
     name = models.CharField(max_length=255)
     notification_type = models.CharField(max_length=30, choices=Notification.NOTIFICATION_TYPE_CHOICES)
+    priority = models.CharField(max_length=20, choices=Notification.PRIORITY_CHOICES, default='normal')
     
     # Content
     title = models.CharField(max_length=255)
     message = models.TextField()
+    action_url = models.CharField(max_length=500, blank=True)
+    
+    # Targeting (no classroom or school means every user with the role)
+    target_role = models.CharField(max_length=20, choices=TARGET_ROLE_CHOICES, default='all')
+    classroom = models.ForeignKey(
+        Classroom, on_delete=models.CASCADE, null=True, blank=True, related_name='notification_batches'
+    )
+    school = models.ForeignKey(
+        School, on_delete=models.CASCADE, null=True, blank=True, related_name='notification_batches'
+    )
     
     # Recipients
     recipient_count = models.PositiveIntegerField(default=0)
     sent_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0, help_text='Recipients whose preferences filtered it out')
+    last_recipient_id = models.CharField(
+        max_length=64, blank=True,
+        help_text='Last recipient processed; a retried send resumes after it'
+    )
+    error_message = models.TextField(blank=True)
     
     # Status
     status = models.CharField(
@@ -196,6 +226,7 @@ class NotificationBatch(TimeStampedModel):
     
     # Scheduling
     scheduled_for = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
     sent_at = models.DateTimeField(null=True, blank=True)
     
     # Creator
@@ -208,3 +239,31 @@ class NotificationBatch(TimeStampedModel):
     
     def __str__(self):
         return f"{self.name} ({self.status})"
+
+
+class EmailDigestEntry(TimeStampedModel):
+    """A notification waiting to go out in the recipient's next email digest"""
+    FREQUENCY_CHOICES = [
+        ('instant', 'Instant'),
+        ('daily', 'Daily Digest'),
+        ('weekly', 'Weekly Digest'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='email_digest_entries')
+    # No database-level constraint: a foreign key cannot reference the
+    # partitioned notifications table (see services/partition_service.py)
+    notification = models.OneToOneField(
+        Notification, on_delete=models.CASCADE, related_name='email_digest_entry',
+        db_constraint=False
+    )
+    frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES)
+    
+    class Meta:
+        verbose_name = 'Email Digest Entry'
+        verbose_name_plural = 'Email Digest Entries'
+        indexes = [
+            models.Index(fields=['frequency', 'user', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.frequency} - {self.notification_id}"
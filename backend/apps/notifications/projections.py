@@ -0,0 +1,34 @@
+"""
+Read-only projections for notifications app
+"""
+
+from django.utils import timezone
+
+from apps.core.projections import Projection, full_name
+from apps.core.utils import time_ago
+from .models import Notification
+
+
+class NotificationProjection(Projection):
+    """Notification list rows, as NotificationSerializer renders them"""
+    model = Notification
+    related = ('recipient__first_name', 'recipient__last_name')
+    method_fields = ('recipient_name', 'notification_type_display', 'priority_display', 'time_ago')
+
+    TYPE_LABELS = dict(Notification.NOTIFICATION_TYPE_CHOICES)
+    PRIORITY_LABELS = dict(Notification.PRIORITY_CHOICES)
+
+    def prepare(self, rows):
+        self.now = timezone.now()
+
+    def get_recipient_name(self, row):
+        return full_name(row['recipient__first_name'], row['recipient__last_name'])
+
+    def get_notification_type_display(self, row):
+        return self.TYPE_LABELS.get(row['notification_type'], row['notification_type'])
+
+    def get_priority_display(self, row):
+        return self.PRIORITY_LABELS.get(row['priority'], row['priority'])
+
+    def get_time_ago(self, row):
+        return time_ago(row['sent_at'], self.now)
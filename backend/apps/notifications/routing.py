@@ -0,0 +1,11 @@
+"""
+WebSocket URL routing for notifications app
+"""
+
+from django.urls import path
+
+from .consumers import NotificationConsumer
+
+websocket_urlpatterns = [
+    path('ws/notifications/', NotificationConsumer.as_asgi()),
+]
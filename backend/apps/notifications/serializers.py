@@ -2,7 +2,10 @@
 Serializers for notifications app
 """
 
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from rest_framework import serializers
+from apps.core.utils import time_ago
 from .models import Notification, NotificationPreference, NotificationTemplate, NotificationBatch
 
 
@@ -20,25 +23,7 @@ class NotificationSerializer(serializers.ModelSerializer):
     
     def get_time_ago(self, obj):
         """Return human-readable time ago"""
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        now = timezone.now()
-        diff = now - obj.sent_at
-        
-        if diff < timedelta(minutes=1):
-            return 'Just now'
-        elif diff < timedelta(hours=1):
-            minutes = int(diff.total_seconds() / 60)
-            return f'{minutes} minute{"s" if minutes != 1 else ""} ago'
-        elif diff < timedelta(days=1):
-            hours = int(diff.total_seconds() / 3600)
-            return f'{hours} hour{"s" if hours != 1 else ""} ago'
-        elif diff < timedelta(days=7):
-            days = diff.days
-            return f'{days} day{"s" if days != 1 else ""} ago'
-        else:
-            return obj.sent_at.strftime('%b %d, %Y')
+        return time_ago(obj.sent_at)
 
 
 class NotificationPreferenceSerializer(serializers.ModelSerializer):
@@ -49,6 +34,14 @@ class NotificationPreferenceSerializer(serializers.ModelSerializer):
         model = NotificationPreference
         fields = '__all__'
         read_only_fields = ['id', 'created_at', 'updated_at', 'user']
+    
+    def validate_time_zone(self, value):
+        """Quiet hours are evaluated in this zone, so it must be a known IANA name"""
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f'Unknown time zone: {value}')
+        return value
 
 
 class NotificationTemplateSerializer(serializers.ModelSerializer):
@@ -71,10 +64,23 @@ class NotificationBatchSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = [
             'id', 'created_at', 'updated_at', 'created_by',
-            'recipient_count', 'sent_count', 'status', 'sent_at'
+            'recipient_count', 'sent_count', 'skipped_count', 'last_recipient_id',
+            'error_message', 'status', 'started_at', 'sent_at'
         ]
     
     def get_completion_percentage(self, obj):
         if obj.recipient_count == 0:
             return 0
-        return round((obj.sent_count / obj.recipient_count) * 100, 2)
+        processed = obj.sent_count + obj.skipped_count
+        return round((processed / obj.recipient_count) * 100, 2)
+    
+    def validate(self, data):
+        """Teachers can only target classrooms they teach"""
+        request = self.context.get('request')
+        if request and request.user.role == 'teacher':
+            classroom = data.get('classroom', getattr(self.instance, 'classroom', None))
+            if classroom is None or classroom.teacher_id != request.user.pk:
+                raise serializers.ValidationError({
+                    'classroom': 'Teachers must target one of their own classrooms'
+                })
+        return data
@@ -0,0 +1,95 @@
+"""
+Notification Bulk Service
+
+Mark-all-read and clear operations for one user's notifications, run from
+Celery in chunks of CHUNK_SIZE rows with a transaction per chunk, so a
+user with a large backlog never holds row locks over the whole set. Each
+operation only touches notifications sent up to the moment it was
+requested; anything arriving while it runs is left alone.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.versioning import VersionStamps
+from ..models import Notification
+from .push_service import NotificationPushService
+
+
+class NotificationBulkService:
+    """Service for chunked bulk changes to a user's notifications"""
+
+    CHUNK_SIZE = 1000
+
+    @staticmethod
+    def _delivered(user_id, before: datetime):
+        return Notification.objects.filter(
+            recipient_id=user_id,
+            deliver_at__isnull=True,
+            sent_at__lte=before
+        )
+
+    @classmethod
+    def _run_chunks(cls, user_id, queryset, apply) -> int:
+        """Call apply() on the rows of queryset a chunk at a time"""
+        done = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(queryset.values_list('pk', flat=True)[:cls.CHUNK_SIZE])
+                if not chunk:
+                    break
+                apply(Notification.objects.filter(pk__in=chunk))
+                # update() and queryset deletes send no save signals
+                VersionStamps.bump_on_commit([
+                    VersionStamps.collection_key('notifications:recipient', user_id)
+                ])
+            done += len(chunk)
+            if len(chunk) < cls.CHUNK_SIZE:
+                break
+        return done
+
+    @classmethod
+    def mark_all_read(cls, user_id, before: Optional[datetime] = None) -> int:
+        """
+        Mark a user's unread notifications as read
+
+        Returns:
+            int: number of notifications marked
+        """
+        now = timezone.now()
+        unread = cls._delivered(user_id, before or now).filter(is_read=False)
+        updated = cls._run_chunks(
+            user_id,
+            unread,
+            lambda chunk: chunk.update(is_read=True, read_at=now, updated_at=now)
+        )
+        if updated:
+            cls._push_unread(user_id)
+        return updated
+
+    @classmethod
+    def clear(cls, user_id, before: Optional[datetime] = None, read_only: bool = False) -> int:
+        """
+        Delete a user's notifications, or only the read ones
+
+        Returns:
+            int: number of notifications deleted
+        """
+        notifications = cls._delivered(user_id, before or timezone.now())
+        if read_only:
+            notifications = notifications.filter(is_read=True)
+        deleted = cls._run_chunks(user_id, notifications, lambda chunk: chunk.delete())
+        if deleted and not read_only:
+            cls._push_unread(user_id)
+        return deleted
+
+    @staticmethod
+    def _push_unread(user_id) -> None:
+        """Push the new unread total; notifications may have arrived while the operation ran"""
+        unread = Notification.objects.filter(
+            recipient_id=user_id, deliver_at__isnull=True, is_read=False
+        ).count()
+        NotificationPushService.unread_changed(user_id, count=unread)
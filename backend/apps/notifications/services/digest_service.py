@@ -0,0 +1,243 @@
+"""
+Email Digest Service
+
+Notifications that should also reach a user by email are queued as
+EmailDigestEntry rows, bucketed by the user's email_frequency. Scheduled
+jobs drain one frequency at a time: users with due entries are paged by
+keyset, each page's entries are read with a window function capped at
+MAX_ITEMS per user, one email per user is rendered from the
+NotificationTemplate email templates, and every email in the run goes out
+over one reused mail connection. Memory stays bounded by
+USER_PAGE_SIZE * MAX_ITEMS rows however large the backlog is.
+"""
+
+import logging
+from itertools import groupby
+from operator import itemgetter
+from smtplib import SMTPServerDisconnected
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apps.core.projections import full_name
+from ..models import EmailDigestEntry, Notification, NotificationTemplate
+from .preference_service import CompiledPreference, NotificationPreferenceService
+
+logger = logging.getLogger(__name__)
+
+DIGEST_FREQUENCIES = tuple(value for value, _ in EmailDigestEntry.FREQUENCY_CHOICES)
+
+
+class _Placeholders(dict):
+    """format_map() mapping that leaves unknown {placeholders} as written"""
+
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+class EmailDigestService:
+    """Service for queueing and sending email digests"""
+
+    USER_PAGE_SIZE = 500
+    MAX_ITEMS = 20  # per email; the rest are summarised as a count
+    LOCK_TIMEOUT = 60 * 30
+
+    DIGEST_SUBJECTS = {
+        'instant': 'You have {count} new notifications',
+        'daily': 'Your daily digest: {count} new notifications',
+        'weekly': 'Your weekly digest: {count} new notifications',
+    }
+
+    ROW_FIELDS = (
+        'user_id', 'total', 'user__email', 'user__first_name', 'user__last_name',
+        'notification__notification_type', 'notification__title', 'notification__message',
+        'notification__action_url', 'notification__sent_at',
+    )
+
+    @classmethod
+    def queue(
+        cls,
+        notifications: Iterable[Notification],
+        preferences: Mapping[object, CompiledPreference]
+    ) -> int:
+        """
+        Queue notifications whose recipients want them by email
+
+        Args:
+            notifications: saved notifications
+            preferences: compiled preferences by recipient_id; missing
+                recipients get the defaults
+
+        Returns:
+            int: number of entries queued
+        """
+        entries = []
+        for notification in notifications:
+            frequency = preferences.get(notification.recipient_id, NotificationPreferenceService.DEFAULT).email_frequency
+            if frequency in DIGEST_FREQUENCIES:
+                entries.append(EmailDigestEntry(
+                    user_id=notification.recipient_id,
+                    notification=notification,
+                    frequency=frequency
+                ))
+        EmailDigestEntry.objects.bulk_create(entries, batch_size=5000)
+        return len(entries)
+
+    @classmethod
+    def send_due(cls, frequency: str, connection=None) -> Dict[str, int]:
+        """
+        Send one email per user for every entry queued under frequency
+
+        Entries of notifications still deferred by quiet hours wait for
+        the next run.
+
+        Returns:
+            dict: users, notifications and emails counts
+        """
+        lock_key = f'email_digest:lock:{frequency}'
+        if not cache.add(lock_key, timezone.now().isoformat(), cls.LOCK_TIMEOUT):
+            logger.info(f"[DIGEST] {frequency} digests are already being sent")
+            return {'users': 0, 'notifications': 0, 'emails': 0}
+
+        connection = connection or get_connection()
+        try:
+            connection.open()
+            return cls._send_all(frequency, connection)
+        finally:
+            connection.close()
+            cache.delete(lock_key)
+
+    @classmethod
+    def _send_all(cls, frequency: str, connection) -> Dict[str, int]:
+        due = EmailDigestEntry.objects.filter(
+            frequency=frequency,
+            created_at__lte=timezone.now(),
+            notification__deliver_at__isnull=True
+        )
+        templates = cls._email_templates()
+        stats = {'users': 0, 'notifications': 0, 'emails': 0}
+
+        last_user_id = None
+        while True:
+            users = due.order_by('user_id').values_list('user_id', flat=True).distinct()
+            if last_user_id is not None:
+                users = users.filter(user_id__gt=last_user_id)
+            page = list(users[:cls.USER_PAGE_SIZE])
+            if not page:
+                break
+            last_user_id = page[-1]
+
+            messages = []
+            for _, items in groupby(cls._page_rows(due, page), key=itemgetter('user_id')):
+                items = list(items)
+                stats['notifications'] += items[0]['total']
+                message = cls.render(items, frequency, templates)
+                if message is not None:
+                    messages.append(message)
+
+            stats['emails'] += cls._send_messages(connection, messages)
+            stats['users'] += len(page)
+            # Everything shown or counted in this page's emails is done
+            due.filter(user_id__in=page).delete()
+
+        logger.info(
+            f"[DIGEST] Sent {stats['emails']} {frequency} emails covering "
+            f"{stats['notifications']} notifications for {stats['users']} users"
+        )
+        return stats
+
+    @classmethod
+    def _page_rows(cls, due, user_ids: List) -> Iterable[Dict]:
+        """Newest MAX_ITEMS entries of each user, with each user's total"""
+        return (
+            due.filter(user_id__in=user_ids)
+            .annotate(
+                position=Window(
+                    RowNumber(),
+                    partition_by=[F('user_id')],
+                    order_by=F('created_at').desc()
+                ),
+                total=Window(Count('id'), partition_by=[F('user_id')]),
+            )
+            .filter(position__lte=cls.MAX_ITEMS)
+            .order_by('user_id', 'position')
+            .values(*cls.ROW_FIELDS)
+        )
+
+    @classmethod
+    def render(cls, items: List[Dict], frequency: str, templates: Dict) -> Optional[EmailMessage]:
+        """One email for one user's entries, or None if the user has no address"""
+        first = items[0]
+        if not first['user__email']:
+            return None
+
+        name = full_name(first['user__first_name'], first['user__last_name'])
+        rendered = [cls._render_item(item, name, templates) for item in items]
+        total = first['total']
+
+        if total == 1:
+            subject, body = rendered[0]
+        else:
+            subject = cls.DIGEST_SUBJECTS[frequency].format(count=total)
+            lines = [f'Hi {name},' if name else 'Hi,', '']
+            for item_subject, item_body in rendered:
+                lines += [item_subject, item_body, '']
+            if total > len(items):
+                lines.append(f'...and {total - len(items)} more in the app.')
+            body = '\n'.join(lines)
+
+        return EmailMessage(subject=subject, body=body, to=[first['user__email']])
+
+    @classmethod
+    def _render_item(cls, item: Dict, name: str, templates: Dict):
+        context = _Placeholders(
+            recipient_name=name,
+            title=item['notification__title'],
+            message=item['notification__message'],
+            action_url=item['notification__action_url'],
+            notification_type=item['notification__notification_type'],
+            sent_at=item['notification__sent_at'],
+        )
+        body = context['message']
+        if context['action_url']:
+            body = f"{body}\n{context['action_url']}"
+
+        template = templates.get(context['notification_type'])
+        if template is None:
+            return context['title'], body
+        return (
+            cls._format(template.email_subject_template, context) or context['title'],
+            cls._format(template.email_body_template, context) or body,
+        )
+
+    @staticmethod
+    def _format(template: str, context: Mapping) -> str:
+        try:
+            return template.format_map(context)
+        except (ValueError, IndexError, AttributeError, KeyError):
+            logger.warning(f"[DIGEST] Could not render email template: {template[:80]!r}")
+            return ''
+
+    @staticmethod
+    def _email_templates() -> Dict[str, NotificationTemplate]:
+        """Active template per notification type (first by name)"""
+        templates = {}
+        for template in NotificationTemplate.objects.filter(is_active=True).order_by('name'):
+            templates.setdefault(template.notification_type, template)
+        return templates
+
+    @staticmethod
+    def _send_messages(connection, messages: List[EmailMessage]) -> int:
+        if not messages:
+            return 0
+        try:
+            return connection.send_messages(messages) or 0
+        except SMTPServerDisconnected:
+            # Servers drop long-lived connections; reconnect once
+            connection.close()
+            connection.open()
+            return connection.send_messages(messages) or 0
@@ -0,0 +1,216 @@
+"""
+Notification Fan-out Service
+
+Sends a NotificationBatch to every user it targets. Recipients are resolved
+with one set-based query and their preferences loaded with one more; the
+preference checks then run in memory and notifications are written with
+bulk_create in chunks (deferred for recipients in quiet hours), queued
+for email digests and pushed to recipients who are online. Each chunk
+commits together with the batch's progress counters and resume point, so a
+retried send continues where the last one stopped without notifying anyone
+twice.
+
+A batch left in processing by a worker that died can be claimed again once
+its updated_at is older than STALE_AFTER. Each chunk only commits if the
+resume point is still the one its send last wrote, so if the old worker
+was merely slow, whichever send falls behind stops instead of notifying
+the same recipients again.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from apps.accounts.models import ParentStudentRelationship, User
+from apps.core.versioning import VersionStamps
+from apps.schools.models import Classroom, ClassroomEnrollment
+from ..models import Notification, NotificationBatch
+from .digest_service import EmailDigestService
+from .preference_service import CompiledPreference, NotificationPreferenceService
+from .push_service import NotificationPushService
+
+logger = logging.getLogger(__name__)
+
+
+class _Superseded(Exception):
+    """Another send of the batch moved its resume point"""
+
+
+class NotificationFanoutService:
+    """Service for sending notification batches"""
+
+    CHUNK_SIZE = 5000
+    # Every chunk touches updated_at, so a live send never looks this old
+    STALE_AFTER = timedelta(minutes=10)
+
+    @classmethod
+    def claim(cls, batch_id, now: Optional[datetime] = None) -> bool:
+        """
+        Mark a batch processing so concurrent calls cannot queue it twice
+
+        Pending and failed batches can be claimed, and so can processing
+        batches whose send stopped making progress.
+
+        Returns:
+            bool: whether the caller claimed the batch
+        """
+        now = now or timezone.now()
+        return bool(NotificationBatch.objects.filter(
+            Q(status__in=['pending', 'failed'])
+            | Q(status='processing', updated_at__lt=now - cls.STALE_AFTER),
+            pk=batch_id
+        ).update(status='processing', updated_at=now))
+
+    @classmethod
+    def recipients(cls, batch: NotificationBatch) -> QuerySet:
+        """Active users targeted by a batch, as a single query"""
+        roles = ['student', 'parent', 'teacher'] if batch.target_role == 'all' else [batch.target_role]
+        users = User.objects.filter(is_active=True, role__in=roles)
+        if batch.classroom_id is None and batch.school_id is None:
+            return users
+
+        classrooms = Classroom.objects.filter(is_deleted=False)
+        if batch.classroom_id:
+            classrooms = classrooms.filter(pk=batch.classroom_id)
+        if batch.school_id:
+            classrooms = classrooms.filter(school_id=batch.school_id)
+
+        enrolled = ClassroomEnrollment.objects.filter(
+            classroom__in=classrooms,
+            is_active=True
+        ).values('student_id')
+        parents = ParentStudentRelationship.objects.filter(
+            student_id__in=enrolled
+        ).values('parent_id')
+
+        return users.filter(
+            Q(role='student', pk__in=enrolled)
+            | Q(role='parent', pk__in=parents)
+            | Q(role='teacher', pk__in=classrooms.values('teacher_id'))
+        )
+
+    @classmethod
+    def preferences(cls, recipients: QuerySet) -> Dict[object, CompiledPreference]:
+        """Compiled preferences of all recipients, with one query"""
+        return NotificationPreferenceService.load(user__in=recipients)
+
+    @classmethod
+    def send(cls, batch_id) -> NotificationBatch:
+        """
+        Send a batch, or resume a batch whose earlier send failed
+
+        Returns:
+            NotificationBatch: the batch, refreshed
+        """
+        batch = NotificationBatch.objects.get(pk=batch_id)
+        if batch.status == 'completed':
+            return batch
+
+        try:
+            cls._fan_out(batch)
+        except _Superseded:
+            logger.warning(f"[NOTIFICATIONS] Batch {batch.pk} was taken over by another send; stopping")
+            batch.refresh_from_db()
+            return batch
+        except Exception as exc:
+            NotificationBatch.objects.filter(pk=batch.pk).update(
+                status='failed',
+                error_message=str(exc)[:2000],
+                updated_at=timezone.now()
+            )
+            logger.exception(f"[NOTIFICATIONS] Batch {batch.pk} failed after {batch.sent_count} sent")
+            raise
+
+        batch.refresh_from_db()
+        logger.info(
+            f"[NOTIFICATIONS] Batch {batch.pk} sent to {batch.sent_count} users "
+            f"({batch.skipped_count} skipped by preferences)"
+        )
+        return batch
+
+    @classmethod
+    def _fan_out(cls, batch: NotificationBatch) -> None:
+        recipients = cls.recipients(batch)
+        NotificationBatch.objects.filter(pk=batch.pk).update(
+            status='processing',
+            recipient_count=recipients.count(),
+            started_at=batch.started_at or timezone.now(),
+            error_message='',
+            updated_at=timezone.now()
+        )
+
+        preferences = cls.preferences(recipients)
+        now = timezone.now()
+
+        resume_point = batch.last_recipient_id
+        ids = recipients.order_by('pk').values_list('pk', flat=True)
+        if resume_point:
+            ids = ids.filter(pk__gt=resume_point)
+
+        sent, skipped = batch.sent_count, batch.skipped_count
+        for chunk in cls._chunks(ids.iterator(chunk_size=cls.CHUNK_SIZE), cls.CHUNK_SIZE):
+            notifications = []
+            for user_id in chunk:
+                allowed, deliver_at = NotificationPreferenceService.evaluate(
+                    preferences.get(user_id), batch.notification_type, now
+                )
+                if allowed:
+                    notifications.append(cls._build(batch, user_id, deliver_at))
+            sent += len(notifications)
+            skipped += len(chunk) - len(notifications)
+
+            with transaction.atomic():
+                # Written first, so the row lock orders concurrent sends
+                progressed = NotificationBatch.objects.filter(
+                    pk=batch.pk, last_recipient_id=resume_point
+                ).update(
+                    sent_count=sent,
+                    skipped_count=skipped,
+                    last_recipient_id=str(chunk[-1]),
+                    updated_at=timezone.now()
+                )
+                if not progressed:
+                    raise _Superseded()
+                Notification.objects.bulk_create(notifications, batch_size=cls.CHUNK_SIZE)
+                EmailDigestService.queue(notifications, preferences)
+                NotificationPushService.created(notifications)
+                # bulk_create sends no save signals
+                VersionStamps.bump_on_commit(
+                    VersionStamps.collection_key('notifications:recipient', notification.recipient_id)
+                    for notification in notifications if notification.deliver_at is None
+                )
+            resume_point = str(chunk[-1])
+
+        NotificationBatch.objects.filter(pk=batch.pk).update(
+            status='completed',
+            sent_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def _build(batch: NotificationBatch, user_id, deliver_at: Optional[datetime]) -> Notification:
+        return Notification(
+            recipient_id=user_id,
+            notification_type=batch.notification_type,
+            priority=batch.priority,
+            title=batch.title,
+            message=batch.message,
+            reference_type='notification_batch',
+            reference_id=str(batch.pk),
+            action_url=batch.action_url,
+            deliver_at=deliver_at,
+        )
+
+    @staticmethod
+    def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+        iterator = iter(iterable)
+        while True:
+            chunk = list(islice(iterator, size))
+            if not chunk:
+                return
+            yield chunk
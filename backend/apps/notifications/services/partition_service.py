@@ -0,0 +1,203 @@
+"""
+Notification Partition Service
+
+On PostgreSQL the notifications table is range partitioned by month on
+sent_at (see the partition_notifications command for converting an
+existing table). Each month is its own table, so retention drops whole
+partitions instead of deleting rows, and queries bounded by sent_at only
+touch the months they need.
+
+    notifications_notification               partitioned parent
+    notifications_notification_p2026_10      [2026-10-01, 2026-11-01)
+    notifications_notification_pdefault      anything outside the above
+
+Partitions are created NOTIFICATION_PARTITIONS_AHEAD months in advance by
+the daily maintenance task; the default partition only catches rows if
+that task stops running. On other databases, or before the table is
+converted, retention falls back to deleting expired rows in chunks.
+"""
+
+import logging
+import re
+from datetime import date, datetime, time
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.versioning import VersionStamps
+from ..models import EmailDigestEntry, Notification
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(value: date, offset: int = 0) -> date:
+    """First day of the month of value, moved offset months"""
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class NotificationPartitionService:
+    """Service for managing the monthly notification partitions"""
+
+    TABLE = Notification._meta.db_table
+    PARTITION_KEY = 'sent_at'
+    DELETE_CHUNK_SIZE = 5000
+
+    @classmethod
+    def partition_name(cls, month: date) -> str:
+        return f'{cls.TABLE}_p{month.year}_{month.month:02d}'
+
+    @classmethod
+    def default_partition_name(cls) -> str:
+        return f'{cls.TABLE}_pdefault'
+
+    @staticmethod
+    def _bound(month: date) -> datetime:
+        return datetime.combine(month, time.min, tzinfo=timezone.utc)
+
+    @classmethod
+    def is_partitioned(cls, parent: Optional[str] = None) -> bool:
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+                [parent or cls.TABLE]
+            )
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def partitions(cls, parent: Optional[str] = None) -> List[Tuple[str, date]]:
+        """(name, month) of each monthly partition, oldest first; the default partition is left out"""
+        pattern = re.compile(rf'^{re.escape(cls.TABLE)}_p(\d{{4}})_(\d{{2}})$')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass(%s)",
+                [parent or cls.TABLE]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        found = []
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                found.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(found, key=lambda partition: partition[1])
+
+    @classmethod
+    def create_partitions(cls, first: date, last: date, parent: Optional[str] = None) -> List[str]:
+        """
+        Create the missing monthly partitions from first to last (inclusive)
+        and the default partition
+
+        Partitions are named after the notifications table even when parent
+        is another table, so they keep their names once it is renamed.
+
+        Returns:
+            list: names of the partitions created
+        """
+        table = parent or cls.TABLE
+        quote = connection.ops.quote_name
+        existing = {month for _, month in cls.partitions(table)}
+        created = []
+
+        with connection.cursor() as cursor:
+            month = month_start(first)
+            while month <= last:
+                if month not in existing:
+                    name = cls.partition_name(month)
+                    cursor.execute(
+                        f"CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF {quote(table)} "
+                        f"FOR VALUES FROM (%s) TO (%s)",
+                        [cls._bound(month), cls._bound(month_start(month, 1))]
+                    )
+                    created.append(name)
+                month = month_start(month, 1)
+
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(cls.default_partition_name())} "
+                f"PARTITION OF {quote(table)} DEFAULT"
+            )
+
+        if created:
+            logger.info(f"[NOTIFICATIONS] Created partitions {', '.join(created)}")
+        return created
+
+    @classmethod
+    def ensure_future_partitions(cls, months_ahead: Optional[int] = None) -> List[str]:
+        """Create partitions for this month and the next months_ahead months"""
+        if months_ahead is None:
+            months_ahead = settings.NOTIFICATION_PARTITIONS_AHEAD
+        today = timezone.now().date()
+        return cls.create_partitions(month_start(today), month_start(today, months_ahead))
+
+    @classmethod
+    def drop_expired(cls, retention_months: Optional[int] = None) -> int:
+        """
+        Remove notifications sent before the retention window
+
+        Whole months older than the window are dropped as partitions; on an
+        unpartitioned table expired rows are deleted in chunks instead.
+
+        Returns:
+            int: partitions dropped, or rows deleted on an unpartitioned table
+        """
+        if retention_months is None:
+            retention_months = settings.NOTIFICATION_RETENTION_MONTHS
+        cutoff = month_start(timezone.now().date(), -retention_months)
+
+        if not cls.is_partitioned():
+            return cls._delete_before(cls._bound(cutoff))
+
+        quote = connection.ops.quote_name
+        dropped = 0
+        for name, month in cls.partitions():
+            if month_start(month, 1) > cutoff:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                # Dropping sends no delete signals; bump the recipients' lists ourselves
+                cursor.execute(f"SELECT DISTINCT recipient_id FROM {quote(name)}")
+                VersionStamps.bump_on_commit([
+                    VersionStamps.collection_key('notifications:recipient', recipient_id)
+                    for recipient_id, in cursor.fetchall()
+                ])
+                # Digest entries have no database-level FK to the partitioned table
+                cursor.execute(
+                    f"DELETE FROM {quote(EmailDigestEntry._meta.db_table)} "
+                    f"WHERE notification_id IN (SELECT id FROM {quote(name)})"
+                )
+                cursor.execute(f"ALTER TABLE {quote(cls.TABLE)} DETACH PARTITION {quote(name)}")
+                cursor.execute(f"DROP TABLE {quote(name)}")
+            logger.info(f"[NOTIFICATIONS] Dropped expired partition {name}")
+            dropped += 1
+        return dropped
+
+    @classmethod
+    def _delete_before(cls, cutoff: datetime) -> int:
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    Notification.objects.filter(sent_at__lt=cutoff)
+                    .values_list('pk', flat=True)[:cls.DELETE_CHUNK_SIZE]
+                )
+                if not chunk:
+                    break
+                Notification.objects.filter(pk__in=chunk).delete()
+            deleted += len(chunk)
+            if len(chunk) < cls.DELETE_CHUNK_SIZE:
+                break
+
+        if deleted:
+            logger.info(f"[NOTIFICATIONS] Deleted {deleted} notifications sent before {cutoff:%Y-%m-%d}")
+        return deleted
+
+    @classmethod
+    def maintain(cls) -> dict:
+        """Create upcoming partitions and apply the retention policy"""
+        created = cls.ensure_future_partitions() if cls.is_partitioned() else []
+        return {'created': len(created), 'expired': cls.drop_expired()}
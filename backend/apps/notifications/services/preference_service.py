@@ -0,0 +1,186 @@
+"""
+Notification Preference Service
+
+Compiles a NotificationPreference row into a small record (a bitmask of
+the enabled flags, the quiet window in local minutes and its time zone,
+and the email frequency) and caches it per user. The cache entry is dropped whenever the
+row is saved or deleted (see signals.py).
+
+Quiet hours defer a notification rather than drop it: evaluate() returns
+the moment the window ends, and release_deferred_notifications delivers
+it then.
+"""
+
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..models import NotificationPreference
+
+# Preference flag gating each notification type; other types always pass
+PREFERENCE_FIELD_BY_TYPE = {
+    'assignment_created': 'notify_assignments',
+    'assignment_graded': 'notify_assignments',
+    'quiz_created': 'notify_quizzes',
+    'quiz_graded': 'notify_quizzes',
+    'new_message': 'notify_messages',
+    'new_announcement': 'notify_announcements',
+    'attendance_marked': 'notify_attendance',
+    'behavior_incident': 'notify_behavior',
+    'grade_updated': 'notify_grades',
+    'xp_earned': 'notify_gamification',
+    'resource_shared': 'notify_resources',
+}
+
+FLAG_FIELDS = (
+    'enable_in_app',
+    'notify_assignments', 'notify_quizzes', 'notify_messages', 'notify_announcements',
+    'notify_attendance', 'notify_behavior', 'notify_grades', 'notify_gamification',
+    'notify_resources',
+)
+FLAG_BITS = {field: 1 << index for index, field in enumerate(FLAG_FIELDS)}
+
+# Bits a notification type needs set to be delivered
+REQUIRED_BITS_BY_TYPE = {
+    notification_type: FLAG_BITS['enable_in_app'] | FLAG_BITS[field]
+    for notification_type, field in PREFERENCE_FIELD_BY_TYPE.items()
+}
+
+
+class CompiledPreference(NamedTuple):
+    """A user's preferences reduced to what delivery decisions need"""
+    mask: int
+    quiet_start: Optional[int]  # minutes after local midnight
+    quiet_end: Optional[int]
+    time_zone: str
+    email_frequency: str  # instant, daily or weekly; never when email is off
+    stored: bool  # False for users without a NotificationPreference row
+
+
+def _minutes(value: Optional[time]) -> Optional[int]:
+    return None if value is None else value.hour * 60 + value.minute
+
+
+class NotificationPreferenceService:
+    """Service for cached notification preference checks"""
+
+    CACHE_PREFIX = 'notification_prefs:v2:'
+    CACHE_TIMEOUT = 60 * 60 * 24
+    ROW_FIELDS = (
+        'user_id', *FLAG_FIELDS,
+        'enable_quiet_hours', 'quiet_hours_start', 'quiet_hours_end', 'time_zone',
+        'enable_email', 'email_frequency',
+    )
+
+    DEFAULT = CompiledPreference(
+        mask=sum(
+            FLAG_BITS[field] for field in FLAG_FIELDS
+            if NotificationPreference._meta.get_field(field).default
+        ),
+        quiet_start=None,
+        quiet_end=None,
+        time_zone='UTC',
+        email_frequency=NotificationPreference._meta.get_field('email_frequency').default,
+        stored=False,
+    )
+
+    @classmethod
+    def compile(cls, row: Dict) -> CompiledPreference:
+        """Compile a NotificationPreference values() row"""
+        mask = 0
+        for field in FLAG_FIELDS:
+            if row[field]:
+                mask |= FLAG_BITS[field]
+
+        start, end = _minutes(row['quiet_hours_start']), _minutes(row['quiet_hours_end'])
+        if not row['enable_quiet_hours'] or start is None or end is None or start == end:
+            start = end = None
+
+        email_frequency = row['email_frequency'] if row['enable_email'] else 'never'
+        return CompiledPreference(mask, start, end, row['time_zone'] or 'UTC', email_frequency, True)
+
+    @classmethod
+    def load(cls, **filters) -> Dict[object, CompiledPreference]:
+        """Compile the preference rows matching filters with one query, keyed by user_id"""
+        rows = NotificationPreference.objects.filter(**filters).values(*cls.ROW_FIELDS)
+        return {row['user_id']: cls.compile(row) for row in rows.iterator(chunk_size=5000)}
+
+    @classmethod
+    def for_users(cls, user_ids: Iterable) -> Dict[object, CompiledPreference]:
+        """Compiled preferences of several users, from the cache where possible"""
+        keys = {cls._cache_key(user_id): user_id for user_id in user_ids}
+        cached = cache.get_many(list(keys))
+        found = {keys[key]: value for key, value in cached.items()}
+
+        missing = [user_id for key, user_id in keys.items() if key not in cached]
+        if missing:
+            loaded = cls.load(user_id__in=missing)
+            compiled = {user_id: loaded.get(user_id, cls.DEFAULT) for user_id in missing}
+            cache.set_many(
+                {cls._cache_key(user_id): value for user_id, value in compiled.items()},
+                cls.CACHE_TIMEOUT
+            )
+            found.update(compiled)
+
+        return found
+
+    @classmethod
+    def for_user(cls, user_id) -> CompiledPreference:
+        return cls.for_users([user_id])[user_id]
+
+    @classmethod
+    def invalidate(cls, user_id) -> None:
+        cache.delete(cls._cache_key(user_id))
+
+    @classmethod
+    def evaluate(
+        cls,
+        preference: Optional[CompiledPreference],
+        notification_type: str,
+        now: Optional[datetime] = None
+    ) -> Tuple[bool, Optional[datetime]]:
+        """
+        Decide whether and when to deliver a notification
+
+        Returns:
+            tuple: (allowed, deliver_at) where deliver_at is None for
+            immediate delivery or the end of the current quiet window
+        """
+        preference = preference or cls.DEFAULT
+        required = REQUIRED_BITS_BY_TYPE.get(notification_type, FLAG_BITS['enable_in_app'])
+        if preference.mask & required != required:
+            return False, None
+        return True, cls.quiet_window_end(preference, now or timezone.now())
+
+    @staticmethod
+    def quiet_window_end(preference: CompiledPreference, now: datetime) -> Optional[datetime]:
+        """End of the quiet window containing now, or None outside quiet hours"""
+        start, end = preference.quiet_start, preference.quiet_end
+        if start is None:
+            return None
+
+        try:
+            zone = ZoneInfo(preference.time_zone)
+        except (ZoneInfoNotFoundError, ValueError):
+            zone = ZoneInfo('UTC')
+        local = now.astimezone(zone)
+        minute = local.hour * 60 + local.minute
+
+        if start < end:
+            quiet = start <= minute < end
+        else:
+            # Window wraps past midnight, e.g. 22:00-07:00
+            quiet = minute >= start or minute < end
+        if not quiet:
+            return None
+
+        end_date = local.date() if minute < end else local.date() + timedelta(days=1)
+        window_end = datetime.combine(end_date, time(end // 60, end % 60), tzinfo=zone)
+        return window_end.astimezone(ZoneInfo('UTC'))
+
+    @classmethod
+    def _cache_key(cls, user_id) -> str:
+        return f'{cls.CACHE_PREFIX}{user_id}'
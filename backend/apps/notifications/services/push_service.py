@@ -0,0 +1,57 @@
+"""
+Notification Push Service
+
+Turns notification changes into WebSocket events for the recipients'
+open sockets (see apps.core.realtime). Events are sent after commit.
+
+    {"type": "notification.created", "notification": {...}, "unread_delta": 1}
+    {"type": "notifications.unread", "unread_delta": -1}
+    {"type": "notifications.unread", "unread_count": 0}
+"""
+
+from typing import Dict, Iterable, Optional
+
+from apps.core.realtime import RealtimeService
+from ..models import Notification
+
+
+class NotificationPushService:
+    """Service for pushing notification events"""
+
+    @staticmethod
+    def created_event(notification: Notification) -> Dict:
+        return {
+            'type': 'notification.created',
+            'notification': {
+                'id': str(notification.pk),
+                'notification_type': notification.notification_type,
+                'priority': notification.priority,
+                'title': notification.title,
+                'message': notification.message,
+                'action_url': notification.action_url,
+                'sent_at': notification.sent_at.isoformat() if notification.sent_at else None,
+                'is_read': notification.is_read,
+            },
+            'unread_delta': 0 if notification.is_read else 1,
+        }
+
+    @classmethod
+    def created(cls, notifications: Iterable[Notification]) -> None:
+        """Push delivered (not deferred) notifications to their recipients"""
+        RealtimeService.send_on_commit(
+            (str(notification.recipient_id), cls.created_event(notification))
+            for notification in notifications
+            if notification.deliver_at is None
+        )
+
+    @classmethod
+    def unread_changed(cls, user_id, delta: Optional[int] = None, count: Optional[int] = None) -> None:
+        """Push a change of a user's unread notification count, as a delta or a new total"""
+        if delta == 0:
+            return
+        event = {'type': 'notifications.unread'}
+        if count is not None:
+            event['unread_count'] = count
+        else:
+            event['unread_delta'] = delta
+        RealtimeService.send_on_commit([(str(user_id), event)])
@@ -0,0 +1,55 @@
+"""
+Signals for notifications app
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from apps.core.versioning import VersionStamps
+from .models import Notification, NotificationPreference
+from .services.digest_service import EmailDigestService
+from .services.preference_service import NotificationPreferenceService
+from .services.push_service import NotificationPushService
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def bump_notification_versions(sender, instance, **kwargs):
+    """
+    A notification was created, read or removed
+    """
+    VersionStamps.bump_on_commit([
+        VersionStamps.collection_key('notifications:recipient', instance.recipient_id),
+    ])
+
+
+@receiver(post_save, sender=Notification)
+def queue_email_digest(sender, instance, created, raw=False, **kwargs):
+    """
+    Queue a new notification for its recipient's email digest
+    """
+    if created and not raw:
+        EmailDigestService.queue(
+            [instance],
+            NotificationPreferenceService.for_users([instance.recipient_id])
+        )
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, raw=False, **kwargs):
+    """
+    Push a new notification to the recipient's open sockets
+    """
+    if created and not raw:
+        NotificationPushService.created([instance])
+
+
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def invalidate_compiled_preferences(sender, instance, **kwargs):
+    """
+    Preferences changed; drop the compiled copy once the change is visible
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: NotificationPreferenceService.invalidate(user_id))
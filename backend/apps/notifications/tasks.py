@@ -0,0 +1,82 @@
+"""
+Celery tasks for notifications app
+"""
+
+from celery import shared_task
+from django.db import OperationalError
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def send_notification_batch(self, batch_id):
+    """
+    Fan a NotificationBatch out to its recipients
+
+    Database errors are retried; each retry resumes after the last
+    recipient that was committed.
+    """
+    from .services.fanout_service import NotificationFanoutService
+
+    try:
+        batch = NotificationFanoutService.send(batch_id)
+    except OperationalError as exc:
+        raise self.retry(exc=exc)
+
+    return {
+        'batch_id': str(batch.pk),
+        'sent': batch.sent_count,
+        'skipped': batch.skipped_count,
+    }
+
+
+@shared_task(ignore_result=True)
+def release_deferred_notifications():
+    """
+    Deliver notifications held back by quiet hours
+
+    Scheduled every minute by CELERY_BEAT_SCHEDULE
+    """
+    from .services.delivery_service import DeferredDeliveryService
+
+    return DeferredDeliveryService.release_due()
+
+
+@shared_task(ignore_result=True)
+def send_email_digests(frequency):
+    """
+    Email every user their queued notifications for one frequency
+
+    Scheduled per frequency (instant, daily, weekly) by CELERY_BEAT_SCHEDULE
+    """
+    from .services.digest_service import EmailDigestService
+
+    return EmailDigestService.send_due(frequency)
+
+
+@shared_task(ignore_result=True)
+def mark_all_notifications_read(user_id, before):
+    """Mark a user's notifications sent up to before (ISO timestamp) as read, in chunks"""
+    from django.utils.dateparse import parse_datetime
+    from .services.bulk_service import NotificationBulkService
+
+    return NotificationBulkService.mark_all_read(user_id, parse_datetime(before))
+
+
+@shared_task(ignore_result=True)
+def clear_notifications(user_id, before, read_only=False):
+    """Delete a user's (read) notifications sent up to before (ISO timestamp), in chunks"""
+    from django.utils.dateparse import parse_datetime
+    from .services.bulk_service import NotificationBulkService
+
+    return NotificationBulkService.clear(user_id, parse_datetime(before), read_only=read_only)
+
+
+@shared_task(ignore_result=True)
+def maintain_notification_partitions():
+    """
+    Create upcoming monthly partitions and drop expired ones
+
+    Scheduled daily by CELERY_BEAT_SCHEDULE
+    """
+    from .services.partition_service import NotificationPartitionService
+
+    return NotificationPartitionService.maintain()
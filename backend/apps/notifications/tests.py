@@ -0,0 +1,474 @@
+import json
+import uuid
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import ParentStudentRelationship
+from apps.communication.models import Conversation, ConversationReadState
+from apps.core.realtime import PresenceRegistry
+from apps.core.renderers import FastJSONRenderer
+from apps.core.versioning import VersionStamps
+from apps.core.websocket_auth import JWTAuthMiddleware
+from apps.notifications.models import EmailDigestEntry, Notification, NotificationBatch, NotificationPreference
+from apps.notifications.projections import NotificationProjection
+from apps.notifications.routing import websocket_urlpatterns
+from apps.notifications.serializers import NotificationSerializer
+from apps.notifications.services.bulk_service import NotificationBulkService
+from apps.notifications.services.delivery_service import DeferredDeliveryService
+from apps.notifications.services.digest_service import EmailDigestService
+from apps.notifications.services.fanout_service import NotificationFanoutService
+from apps.notifications.services.partition_service import NotificationPartitionService
+from apps.notifications.services.push_service import NotificationPushService
+from apps.notifications.views import create_notification
+from apps.schools.models import AcademicYear, Classroom, ClassroomEnrollment, School, Subject
+
+User = get_user_model()
+
+
+class NotificationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='parent@example.com', password='password', role='parent',
+            first_name='Asha', last_name='Rao'
+        )
+
+    def notify(self, title='New assignment', **fields):
+        fields.setdefault('notification_type', 'assignment_created')
+        return Notification.objects.create(recipient=self.user, title=title, message=f'{title}.', **fields)
+
+
+class NotificationProjectionTests(NotificationTestCase):
+    def test_matches_serializer(self):
+        self.notify(metadata={'assignment_id': 7})
+        self.notify('Quiz graded', notification_type='quiz_graded', priority='high', is_read=True)
+
+        request = Request(APIRequestFactory().get('/api/v1/notifications/'))
+        request.user = self.user
+        context = {'request': request}
+        queryset = Notification.objects.order_by('title')
+
+        projection = NotificationProjection(context)
+        projected = projection.to_representation(projection.queryset(queryset))
+        serialized = NotificationSerializer(queryset, many=True, context=context).data
+        renderer = FastJSONRenderer()
+        self.assertEqual(json.loads(renderer.render(projected)), json.loads(renderer.render(serialized)))
+
+
+class QuietHoursTests(NotificationTestCase):
+    # 23:30 in Kolkata, inside a 22:00-07:00 quiet window
+    NIGHT = datetime(2026, 3, 10, 18, 0, tzinfo=dt_timezone.utc)
+    # 07:00 the next morning in Kolkata
+    MORNING = datetime(2026, 3, 11, 1, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.preference = NotificationPreference.objects.create(
+                user=self.user, enable_quiet_hours=True,
+                quiet_hours_start=time(22, 0), quiet_hours_end=time(7, 0), time_zone='Asia/Kolkata'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, at, notification_type='assignment_created'):
+        with mock.patch('django.utils.timezone.now', return_value=at):
+            return create_notification(
+                recipient=self.user, notification_type=notification_type,
+                title='New assignment', message='Math homework has been assigned'
+            )
+
+    def feed(self):
+        response = self.client.get('/api/v1/notifications/notifications/')
+        self.assertEqual(response.status_code, 200)
+        return [str(item['id']) for item in response.data['results']]
+
+    def test_deferred_until_window_ends(self):
+        notification = self.create(self.NIGHT)
+        self.assertEqual(notification.deliver_at, self.MORNING)
+        self.assertEqual(self.feed(), [])
+
+        self.assertEqual(DeferredDeliveryService.release_due(self.MORNING - timedelta(minutes=1)), 0)
+        self.assertEqual(DeferredDeliveryService.release_due(self.MORNING), 1)
+
+        notification.refresh_from_db()
+        self.assertIsNone(notification.deliver_at)
+        self.assertEqual(notification.sent_at, self.MORNING)
+        self.assertEqual(self.feed(), [str(notification.pk)])
+        self.assertEqual(DeferredDeliveryService.release_due(self.MORNING), 0)
+
+    def test_delivered_now_outside_quiet_hours(self):
+        notification = self.create(self.NIGHT - timedelta(hours=8))
+        self.assertIsNone(notification.deliver_at)
+        self.assertEqual(self.feed(), [str(notification.pk)])
+
+    def test_preference_changes_apply_at_once(self):
+        self.preference.notify_quizzes = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.preference.save()
+        self.assertIsNone(self.create(self.MORNING, 'quiz_graded'))
+
+        self.preference.notify_quizzes = True
+        self.preference.enable_quiet_hours = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.preference.save()
+        notification = self.create(self.NIGHT, 'quiz_graded')
+        self.assertIsNone(notification.deliver_at)
+
+
+class EmailDigestTests(NotificationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(email='other@example.com', password='password', role='parent')
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationPreference.objects.create(user=self.user, email_frequency='daily')
+            NotificationPreference.objects.create(user=self.other, email_frequency='daily')
+
+    def test_drains_each_user_into_one_email(self):
+        for index in range(3):
+            self.notify(f'Assignment {index}')
+        Notification.objects.create(
+            recipient=self.other, notification_type='quiz_graded', title='Quiz graded', message='Well done.'
+        )
+        # Still deferred by quiet hours: waits for a later run
+        deferred = self.notify('Late assignment', deliver_at=timezone.now() + timedelta(hours=1))
+
+        with mock.patch.object(EmailDigestService, 'MAX_ITEMS', 2), \
+                mock.patch.object(EmailDigestService, 'USER_PAGE_SIZE', 1):
+            stats = EmailDigestService.send_due('daily')
+
+        self.assertEqual(stats, {'users': 2, 'notifications': 4, 'emails': 2})
+        emails = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(emails['parent@example.com'].subject, 'Your daily digest: 3 new notifications')
+        self.assertIn('...and 1 more in the app.', emails['parent@example.com'].body)
+        self.assertEqual(emails['other@example.com'].subject, 'Quiz graded')
+        self.assertEqual(list(EmailDigestEntry.objects.values_list('notification_id', flat=True)), [deferred.pk])
+
+        # A second run finds nothing new
+        self.assertEqual(EmailDigestService.send_due('daily')['emails'], 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+        DeferredDeliveryService.release_due(timezone.now() + timedelta(hours=2))
+        self.assertEqual(EmailDigestService.send_due('daily')['emails'], 1)
+        self.assertEqual(mail.outbox[-1].subject, 'Late assignment')
+        self.assertFalse(EmailDigestEntry.objects.exists())
+
+    def test_concurrent_run_is_skipped(self):
+        self.notify()
+        cache.add('email_digest:lock:daily', 'running', 60)
+        try:
+            self.assertEqual(EmailDigestService.send_due('daily')['emails'], 0)
+        finally:
+            cache.delete('email_digest:lock:daily')
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(EmailDigestEntry.objects.count(), 1)
+
+    def test_other_frequencies_are_left_alone(self):
+        self.notify()
+        self.assertEqual(EmailDigestService.send_due('weekly')['emails'], 0)
+        self.assertEqual(EmailDigestService.send_due('daily')['emails'], 1)
+
+
+class NotificationBulkTests(NotificationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.before = self.now - timedelta(minutes=30)
+        self.earlier = [self.notify(f'Assignment {index}') for index in range(5)]
+        # Arrived after the operation was requested
+        self.later = self.notify('Late assignment')
+        self.deferred = self.notify('Deferred assignment', deliver_at=self.now + timedelta(hours=1))
+        Notification.objects.filter(pk__in=[n.pk for n in self.earlier]).update(sent_at=self.now - timedelta(hours=1))
+        self.other = Notification.objects.create(
+            recipient=User.objects.create_user(email='other@example.com', password='password', role='parent'),
+            notification_type='quiz_graded', title='Quiz graded', message='Well done.'
+        )
+        Notification.objects.filter(pk=self.other.pk).update(sent_at=self.now - timedelta(hours=1))
+
+    def stamp(self):
+        return VersionStamps.get_many([VersionStamps.collection_key('notifications:recipient', self.user.pk)])[0]
+
+    def run_bulk(self, operation, chunk_size=1000, **kwargs):
+        """Run a bulk operation, returning its result and the size of each chunk it changed"""
+        run_chunks = NotificationBulkService._run_chunks
+        sizes = []
+
+        def counted(user_id, queryset, apply):
+            return run_chunks(user_id, queryset, lambda chunk: (sizes.append(chunk.count()), apply(chunk)))
+
+        with mock.patch.object(NotificationBulkService, 'CHUNK_SIZE', chunk_size), \
+                mock.patch.object(NotificationBulkService, '_run_chunks', side_effect=counted), \
+                self.captureOnCommitCallbacks(execute=True):
+            result = operation(self.user.pk, before=self.before, **kwargs)
+        return result, sizes
+
+    def unread_titles(self):
+        return set(Notification.objects.filter(is_read=False).values_list('title', flat=True))
+
+    def test_mark_all_read_in_chunks(self):
+        # An exact multiple of the chunk size ends on an empty chunk that changes nothing
+        for chunk_size, chunks in [(1, [1] * 5), (2, [2, 2, 1]), (5, [5]), (10, [5])]:
+            with self.subTest(chunk_size=chunk_size):
+                Notification.objects.update(is_read=False, read_at=None)
+                self.assertEqual(self.run_bulk(NotificationBulkService.mark_all_read, chunk_size), (5, chunks))
+                self.assertEqual(self.unread_titles(), {'Late assignment', 'Deferred assignment', 'Quiz graded'})
+
+    def test_mark_all_read_pushes_unread_and_bumps_stamp(self):
+        stamp = self.stamp()
+        with mock.patch.object(NotificationPushService, 'unread_changed') as push:
+            self.run_bulk(NotificationBulkService.mark_all_read, 2)
+        # The later notification is still unread; deferred ones are not counted yet
+        push.assert_called_once_with(self.user.pk, count=1)
+        self.assertNotEqual(self.stamp(), stamp)
+
+        stamp = self.stamp()
+        with mock.patch.object(NotificationPushService, 'unread_changed') as push:
+            self.assertEqual(self.run_bulk(NotificationBulkService.mark_all_read, 2), (0, []))
+        push.assert_not_called()
+        self.assertEqual(self.stamp(), stamp)
+
+    def test_clear(self):
+        Notification.objects.filter(pk__in=[n.pk for n in self.earlier[:2]]).update(is_read=True)
+        stamp = self.stamp()
+
+        with mock.patch.object(NotificationPushService, 'unread_changed') as push:
+            self.assertEqual(self.run_bulk(NotificationBulkService.clear, 1, read_only=True), (2, [1, 1]))
+        # Read notifications were not counted as unread
+        push.assert_not_called()
+        self.assertNotEqual(self.stamp(), stamp)
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 5)
+
+        with mock.patch.object(NotificationPushService, 'unread_changed') as push:
+            self.assertEqual(self.run_bulk(NotificationBulkService.clear, 2), (3, [2, 1]))
+        push.assert_called_once_with(self.user.pk, count=1)
+        self.assertCountEqual(
+            Notification.objects.values_list('pk', flat=True), [self.later.pk, self.deferred.pk, self.other.pk]
+        )
+
+    def test_unpartitioned_expiry_deletes_in_chunks(self):
+        # Six rows in chunks of two: the last full chunk is followed by an empty one
+        with mock.patch.object(NotificationPartitionService, 'DELETE_CHUNK_SIZE', 2):
+            self.assertEqual(NotificationPartitionService._delete_before(self.before), 6)
+            self.assertEqual(NotificationPartitionService._delete_before(self.before), 0)
+        self.assertCountEqual(Notification.objects.values_list('pk', flat=True), [self.later.pk, self.deferred.pk])
+
+
+class NotificationFanoutTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(email='teacher@example.com', password='password', role='teacher')
+        self.other_teacher = User.objects.create_user(email='other@example.com', password='password', role='teacher')
+        self.student = User.objects.create_user(email='student@example.com', password='password', role='student')
+        self.parent = User.objects.create_user(email='parent@example.com', password='password', role='parent')
+        self.away = User.objects.create_user(email='away@example.com', password='password', role='student')
+        User.objects.create_user(email='left@example.com', password='password', role='student', is_active=False)
+
+        self.school, self.other_school = [
+            School.objects.create(
+                name=f'{name} School', code=code,
+                city='Test City', state='Test State', pincode='123456',
+                email=f'{code.lower()}@test.com', principal_name='Principal', established_year=2000
+            )
+            for name, code in [('Test', 'TEST01'), ('Other', 'TEST02')]
+        ]
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        self.classroom, self.other_classroom = [
+            Classroom.objects.create(
+                school=school, subject=subject,
+                academic_year=AcademicYear.objects.create(
+                    school=school, name='2025-2026', start_date='2025-01-01', end_date='2026-01-01'
+                ),
+                grade=5, section='A', class_code=f'TESTCLASS0{index}', teacher=teacher
+            )
+            for index, (school, teacher) in enumerate(
+                [(self.school, self.teacher), (self.other_school, self.other_teacher)]
+            )
+        ]
+        ClassroomEnrollment.objects.create(classroom=self.classroom, student=self.student)
+        ClassroomEnrollment.objects.create(classroom=self.other_classroom, student=self.away)
+        ParentStudentRelationship.objects.create(parent=self.parent, student=self.student, relationship_type='father')
+
+    def batch(self, **fields):
+        fields.setdefault('notification_type', 'assignment_created')
+        return NotificationBatch.objects.create(
+            name='Homework', title='New assignment', message='Math homework has been assigned',
+            created_by=self.teacher, **fields
+        )
+
+    def recipients(self, **fields):
+        return set(NotificationFanoutService.recipients(self.batch(**fields)))
+
+    def notified(self, batch):
+        return sorted(Notification.objects.filter(reference_id=str(batch.pk)).values_list('recipient_id', flat=True))
+
+    def test_recipients(self):
+        self.assertEqual(self.recipients(target_role='student'), {self.student, self.away})
+        self.assertEqual(
+            self.recipients(target_role='all', classroom=self.classroom), {self.student, self.parent, self.teacher}
+        )
+        self.assertEqual(self.recipients(target_role='student', school=self.other_school), {self.away})
+        self.assertEqual(self.recipients(target_role='parent', school=self.school), {self.parent})
+        self.assertEqual(self.recipients(target_role='teacher', classroom=self.other_classroom), {self.other_teacher})
+
+    def test_preferences_skip_recipients(self):
+        NotificationPreference.objects.create(user=self.student, notify_assignments=False)
+        batch = self.batch(target_role='all', classroom=self.classroom)
+
+        batch = NotificationFanoutService.send(batch.pk)
+        self.assertEqual(batch.status, 'completed')
+        self.assertEqual((batch.recipient_count, batch.sent_count, batch.skipped_count), (3, 2, 1))
+        self.assertEqual(self.notified(batch), sorted([self.parent.pk, self.teacher.pk]))
+
+    def test_failed_send_resumes_after_last_recipient(self):
+        batch = self.batch(target_role='all', classroom=self.classroom)
+        queue = EmailDigestService.queue
+        calls = []
+
+        def fail_second_chunk(notifications, preferences):
+            calls.append(notifications)
+            if len(calls) == 2:
+                raise RuntimeError('mail queue unavailable')
+            return queue(notifications, preferences)
+
+        with mock.patch.object(NotificationFanoutService, 'CHUNK_SIZE', 1), \
+                mock.patch.object(EmailDigestService, 'queue', side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                NotificationFanoutService.send(batch.pk)
+        batch.refresh_from_db()
+        self.assertEqual((batch.status, batch.sent_count), ('failed', 1))
+        self.assertEqual(len(self.notified(batch)), 1)
+
+        with mock.patch.object(NotificationFanoutService, 'CHUNK_SIZE', 1):
+            batch = NotificationFanoutService.send(batch.pk)
+        self.assertEqual((batch.status, batch.sent_count), ('completed', 3))
+        self.assertEqual(self.notified(batch), sorted([self.student.pk, self.parent.pk, self.teacher.pk]))
+
+    def test_superseded_send_stops(self):
+        batch = self.batch(target_role='all', classroom=self.classroom)
+        queue = EmailDigestService.queue
+
+        def take_over(notifications, preferences):
+            # Another send claimed the batch and moved its resume point
+            NotificationBatch.objects.filter(pk=batch.pk).update(last_recipient_id='another send')
+            return queue(notifications, preferences)
+
+        with mock.patch.object(NotificationFanoutService, 'CHUNK_SIZE', 1), \
+                mock.patch.object(EmailDigestService, 'queue', side_effect=take_over):
+            batch = NotificationFanoutService.send(batch.pk)
+        self.assertEqual(batch.status, 'processing')
+        self.assertEqual(len(self.notified(batch)), 1)
+
+    def send_batch(self, batch):
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(f'/api/v1/notifications/batches/{batch.pk}/send_batch/')
+
+    def test_stale_processing_batch_can_be_sent_again(self):
+        batch = self.batch(target_role='all', classroom=self.classroom, status='processing')
+        self.assertEqual(self.send_batch(batch).status_code, 400)
+
+        NotificationBatch.objects.filter(pk=batch.pk).update(
+            updated_at=timezone.now() - NotificationFanoutService.STALE_AFTER - timedelta(minutes=1)
+        )
+        self.assertEqual(self.send_batch(batch).status_code, 200)
+        batch.refresh_from_db()
+        self.assertEqual((batch.status, batch.sent_count), ('completed', 3))
+        self.assertEqual(self.send_batch(batch).status_code, 400)
+
+    def test_teachers_target_their_own_classrooms(self):
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        payload = {
+            'name': 'Homework', 'notification_type': 'assignment_created',
+            'title': 'New assignment', 'message': 'Math homework has been assigned', 'target_role': 'student',
+        }
+        url = '/api/v1/notifications/batches/'
+        self.assertEqual(client.post(url, payload).status_code, 400)
+        response = client.post(url, {**payload, 'classroom': str(self.other_classroom.pk)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('classroom', response.data['field_errors'])
+        self.assertEqual(client.post(url, {**payload, 'classroom': str(self.classroom.pk)}).status_code, 201)
+
+
+class NotificationSocketTests(TransactionTestCase):
+    """The consumer over the in-memory channel layer, through the same auth stack as config.asgi"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='parent@example.com', password='password', role='parent')
+        self.application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def communicator(self, token=None):
+        path = '/ws/notifications/' + (f'?token={token}' if token else '')
+        return WebsocketCommunicator(self.application, path)
+
+    async def open(self):
+        communicator = self.communicator(AccessToken.for_user(self.user))
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator, await communicator.receive_json_from()
+
+    async def test_rejects_missing_or_invalid_token(self):
+        for token in (None, 'not-a-token'):
+            with self.subTest(token=token):
+                self.assertEqual(await self.communicator(token).connect(), (False, 4401))
+
+    async def test_hello_has_both_unread_counts(self):
+        def unread():
+            for title, fields in [('Unread', {}), ('Read', {'is_read': True}),
+                                  ('Deferred', {'deliver_at': timezone.now() + timedelta(hours=1)})]:
+                Notification.objects.create(
+                    recipient=self.user, notification_type='assignment_created', title=title, message='.', **fields
+                )
+            conversation = Conversation.objects.create(created_by=self.user)
+            conversation.participants.add(self.user)
+            ConversationReadState.objects.filter(user=self.user).update(unread_count=3)
+
+        await database_sync_to_async(unread)()
+        communicator, hello = await self.open()
+        self.assertEqual(hello, {'type': 'hello', 'unread_notifications': 1, 'unread_messages': 3})
+        await communicator.disconnect()
+
+    async def test_notification_pushed_after_commit(self):
+        def notify(title, roll_back=False):
+            with transaction.atomic():
+                Notification.objects.create(
+                    recipient=self.user, notification_type='assignment_created', title=title, message='.'
+                )
+                if roll_back:
+                    transaction.set_rollback(True)
+
+        communicator, _ = await self.open()
+        await database_sync_to_async(notify)('Rolled back', roll_back=True)
+        self.assertTrue(await communicator.receive_nothing())
+
+        await database_sync_to_async(notify)('New assignment')
+        event = await communicator.receive_json_from()
+        self.assertEqual((event['type'], event['unread_delta']), ('notification.created', 1))
+        self.assertEqual(event['notification']['title'], 'New assignment')
+        await communicator.disconnect()
+
+    async def test_presence_tracks_open_sockets(self):
+        user_id, offline_id = str(self.user.pk), str(uuid.uuid4())
+        online = sync_to_async(PresenceRegistry.online)
+
+        first, _ = await self.open()
+        second, _ = await self.open()
+        self.assertEqual(await online([user_id, offline_id]), {user_id})
+
+        await first.disconnect()
+        self.assertEqual(await online([user_id, offline_id]), {user_id})
+        await second.disconnect()
+        self.assertEqual(await online([user_id, offline_id]), set())
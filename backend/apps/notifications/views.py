@@ -9,32 +9,47 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
 
 from .models import Notification, NotificationPreference, NotificationTemplate, NotificationBatch
+from .projections import NotificationProjection
+from .services.fanout_service import NotificationFanoutService
+from .services.preference_service import NotificationPreferenceService
+from .services.push_service import NotificationPushService
 from .serializers import (
     NotificationSerializer, NotificationPreferenceSerializer,
     NotificationTemplateSerializer, NotificationBatchSerializer
 )
 from apps.core.permissions import IsTeacher
+from apps.core.pagination import FeedCursorPagination
+from apps.core.versioning import VersionStamps
+from apps.core.viewsets import ConditionalGetMixin, ProjectionListMixin
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, ProjectionListMixin, viewsets.ModelViewSet):
     """ViewSet for managing notifications"""
     serializer_class = NotificationSerializer
+    projection_class = NotificationProjection
+    pagination_class = FeedCursorPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['notification_type', 'priority', 'is_read']
+    ordering_fields = ['sent_at']
     ordering = ['-sent_at']
     
     def get_queryset(self):
-        """Users see only their own notifications"""
+        """Users see only their own delivered notifications"""
         user = self.request.user
         
         if not user.is_authenticated:
             return Notification.objects.none()
         
-        return Notification.objects.filter(recipient=user)
+        return Notification.objects.filter(recipient=user, deliver_at__isnull=True)
+    
+    def etag_keys(self):
+        """Every read endpoint depends only on the user's own notifications"""
+        return [VersionStamps.collection_key('notifications:recipient', self.request.user.pk)]
     
     @action(detail=False, methods=['get'])
     def unread(self, request):
@@ -58,49 +73,53 @@ class NotificationViewSet(viewsets.ModelViewSet):
             notification.is_read = True
             notification.read_at = timezone.now()
             notification.save()
+            NotificationPushService.unread_changed(request.user.pk, delta=-1)
         
         return Response(self.get_serializer(notification).data)
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        """Mark all notifications as read"""
-        updated = self.get_queryset().filter(is_read=False).update(
-            is_read=True,
-            read_at=timezone.now()
-        )
+        """Mark all notifications as read (in the background, in chunks)"""
+        from .tasks import mark_all_notifications_read
         
-        return Response({
-            'message': f'Marked {updated} notifications as read',
-            'count': updated
-        })
+        user_id, before = str(request.user.pk), timezone.now().isoformat()
+        transaction.on_commit(lambda: mark_all_notifications_read.delay(user_id, before))
+        
+        return Response(
+            {'message': 'Marking all notifications as read'},
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=True, methods=['delete'])
     def delete_notification(self, request, pk=None):
         """Delete a notification"""
         notification = self.get_object()
         notification.delete()
+        if not notification.is_read:
+            NotificationPushService.unread_changed(request.user.pk, delta=-1)
         
         return Response({'message': 'Notification deleted'}, status=status.HTTP_204_NO_CONTENT)
     
     @action(detail=False, methods=['delete'])
     def clear_all(self, request):
-        """Clear all notifications"""
-        deleted = self.get_queryset().delete()
-        
-        return Response({
-            'message': f'Cleared {deleted[0]} notifications',
-            'count': deleted[0]
-        })
+        """Clear all notifications (in the background, in chunks)"""
+        return self._clear(request, read_only=False)
     
     @action(detail=False, methods=['delete'])
     def clear_read(self, request):
-        """Clear all read notifications"""
-        deleted = self.get_queryset().filter(is_read=True).delete()
+        """Clear all read notifications (in the background, in chunks)"""
+        return self._clear(request, read_only=True)
+    
+    def _clear(self, request, read_only):
+        from .tasks import clear_notifications
         
-        return Response({
-            'message': f'Cleared {deleted[0]} read notifications',
-            'count': deleted[0]
-        })
+        user_id, before = str(request.user.pk), timezone.now().isoformat()
+        transaction.on_commit(lambda: clear_notifications.delay(user_id, before, read_only))
+        
+        return Response(
+            {'message': 'Clearing read notifications' if read_only else 'Clearing all notifications'},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class NotificationPreferenceViewSet(viewsets.ModelViewSet):
@@ -172,22 +191,24 @@ class NotificationBatchViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def send_batch(self, request, pk=None):
-        """Send batch notification"""
+        """
+        Queue a batch for sending
+        
+        Pending batches are sent; failed batches, and processing batches
+        whose send stopped making progress, resume after the last
+        recipient that was notified.
+        """
+        from .tasks import send_notification_batch
+        
         batch = self.get_object()
         
-        if batch.status != 'pending':
+        if not NotificationFanoutService.claim(batch.pk):
             return Response(
                 {'error': 'Batch already processed'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get recipients based on batch criteria
-        # TODO: Implement recipient selection logic
-        
-        batch.status = 'processing'
-        batch.save()
-        
-        # TODO: Implement async batch sending with Celery
+        transaction.on_commit(lambda: send_notification_batch.delay(str(batch.pk)))
         
         return Response({
             'message': 'Batch notification queued for sending',
@@ -224,42 +245,15 @@ def create_notification(
         action_url=f'/assignments/{assignment.id}/'
     )
     """
-    # Check user preferences
-    try:
-        prefs = recipient.notification_preferences
-        
-        # Check if notifications are enabled
-        if not prefs.enable_in_app:
-            return None
-        
-        # Check type-specific preferences
-        type_map = {
-            'assignment_created': prefs.notify_assignments,
-            'assignment_graded': prefs.notify_assignments,
-            'quiz_created': prefs.notify_quizzes,
-            'quiz_graded': prefs.notify_quizzes,
-            'new_message': prefs.notify_messages,
-            'new_announcement': prefs.notify_announcements,
-            'attendance_marked': prefs.notify_attendance,
-            'behavior_incident': prefs.notify_behavior,
-            'grade_updated': prefs.notify_grades,
-            'xp_earned': prefs.notify_gamification,
-            'resource_shared': prefs.notify_resources,
-        }
-        
-        if notification_type in type_map and not type_map[notification_type]:
-            return None
-        
-        # Check quiet hours
-        if prefs.enable_quiet_hours and prefs.quiet_hours_start and prefs.quiet_hours_end:
-            from datetime import datetime
-            current_time = datetime.now().time()
-            if prefs.quiet_hours_start <= current_time <= prefs.quiet_hours_end:
-                return None
+    # Check user preferences; quiet hours defer delivery to the end of the window
+    preferences = NotificationPreferenceService.for_user(recipient.pk)
+    allowed, deliver_at = NotificationPreferenceService.evaluate(preferences, notification_type)
+    if not allowed:
+        return None
     
-    except NotificationPreference.DoesNotExist:
+    if not preferences.stored:
         # Create default preferences
-        NotificationPreference.objects.create(user=recipient)
+        NotificationPreference.objects.get_or_create(user=recipient)
     
     # Create notification
     notification = Notification.objects.create(
@@ -271,10 +265,8 @@ def create_notification(
         reference_type=reference_type,
         reference_id=reference_id,
         action_url=action_url,
-        metadata=metadata or {}
+        metadata=metadata or {},
+        deliver_at=deliver_at
     )
     
-    # TODO: Send push notification if enabled
-    # TODO: Queue email notification if enabled
-    
     return notification
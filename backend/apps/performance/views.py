@@ -18,6 +18,7 @@ from .serializers import (
 )
 from apps.core.permissions import IsTeacher
 from apps.schools.models import ClassroomEnrollment
+from apps.schools.services.scope_service import UserScopeService
 
 
 class StudentGradeViewSet(viewsets.ModelViewSet):
@@ -45,7 +46,7 @@ class StudentGradeViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see their children's grades
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return StudentGrade.objects.filter(student_id__in=children)
         
         elif user.role == 'admin':
@@ -167,7 +168,7 @@ class SubjectPerformanceViewSet(viewsets.ModelViewSet):
             return SubjectPerformance.objects.filter(student=user)
         
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return SubjectPerformance.objects.filter(student_id__in=children)
         
         elif user.role == 'admin':
@@ -221,7 +222,7 @@ class ProgressReportViewSet(viewsets.ModelViewSet):
             return ProgressReport.objects.filter(student=user)
         
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return ProgressReport.objects.filter(student_id__in=children)
         
         elif user.role == 'admin':
@@ -279,7 +280,7 @@ class PerformanceMetricViewSet(viewsets.ModelViewSet):
             return PerformanceMetric.objects.filter(student=user)
         
         elif user.role == 'parent':
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return PerformanceMetric.objects.filter(student_id__in=children)
         
         return PerformanceMetric.objects.none()
@@ -96,10 +96,10 @@ class ReportScheduleAdmin(admin.ModelAdmin):
 @admin.register(DataExport)
 class DataExportAdmin(admin.ModelAdmin):
     list_display = [
-        'name', 'export_type', 'file_format',
+        'name', 'export_type', 'file_format', 'status',
         'row_count', 'exported_by', 'exported_at'
     ]
-    list_filter = ['export_type', 'file_format', 'exported_at']
+    list_filter = ['export_type', 'file_format', 'status', 'exported_at']
     search_fields = ['name']
     readonly_fields = ['exported_at', 'file_size', 'row_count']
     
@@ -111,7 +111,7 @@ class DataExportAdmin(admin.ModelAdmin):
             'fields': ('filters',)
         }),
         ('File', {
-            'fields': ('file', 'file_size', 'row_count')
+            'fields': ('file', 'file_size', 'row_count', 'status', 'error_message')
         }),
         ('Export Info', {
             'fields': ('exported_by', 'exported_at')
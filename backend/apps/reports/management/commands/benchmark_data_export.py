@@ -0,0 +1,150 @@
+"""
+Management command to benchmark a large attendance export
+"""
+
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+
+from apps.accounts.models import User
+from apps.attendance.models import AttendanceRecord, AttendanceSession
+from apps.reports.models import DataExport
+from apps.reports.services.export_service import DataExportService
+from apps.schools.models import AcademicYear, Classroom, School, Subject
+
+
+class Command(BaseCommand):
+    help = 'Export N attendance records of one classroom and report time and peak memory (nothing is kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000000)
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--format', choices=['csv', 'json', 'excel'], default='csv')
+
+    def handle(self, *args, **options):
+        # Everything is created inside a transaction that is rolled back
+        with transaction.atomic():
+            started = time.perf_counter()
+            classroom, teacher = self._create_attendance(options['rows'], options['students'])
+            self.stdout.write(
+                f"Created {options['rows']} attendance records in {time.perf_counter() - started:.1f}s"
+            )
+            reset_queries()
+            if connection.vendor == 'postgresql':
+                # Autovacuum never sees uncommitted rows; without statistics the
+                # planner would treat the tables as empty
+                tables = (AttendanceRecord, AttendanceSession, User)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE ' + ', '.join(
+                        connection.ops.quote_name(model._meta.db_table) for model in tables
+                    ))
+
+            export = DataExport.objects.create(
+                export_type='attendance',
+                name='Benchmark export',
+                file_format=options['format'],
+                filters={'classroom_id': str(classroom.pk)},
+                exported_by=teacher
+            )
+
+            samples = []
+            done = threading.Event()
+
+            def sample_memory():
+                # Traced memory every second, to show it stays flat
+                while not done.wait(1):
+                    samples.append(tracemalloc.get_traced_memory()[0])
+
+            tracemalloc.start()
+            sampler = threading.Thread(target=sample_memory, daemon=True)
+            sampler.start()
+            started = time.perf_counter()
+            try:
+                DataExportService.generate(export.pk)
+            finally:
+                elapsed = time.perf_counter() - started
+                done.set()
+                sampler.join()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            export.refresh_from_db()
+            self.stdout.write(
+                f'Exported {export.row_count} rows ({export.file_size / 1024 / 1024:.1f} MiB) '
+                f'in {elapsed:.1f}s ({export.row_count / max(elapsed, 1e-9):.0f} rows/s)'
+            )
+            if samples:
+                quarters = [samples[min(len(samples) - 1, len(samples) * q // 4)] for q in range(1, 5)]
+                self.stdout.write(
+                    'Python memory in use at 25/50/75/100%: '
+                    + ' / '.join(f'{value / 1024 / 1024:.1f}' for value in quarters) + ' MiB'
+                )
+            self.stdout.write(f'Peak Python memory while exporting: {peak / 1024 / 1024:.1f} MiB')
+
+            export.file.delete(save=False)
+            transaction.set_rollback(True)
+
+    def _create_attendance(self, total, student_count):
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        batch_size = 10000
+
+        teacher = User.objects.create(email=f'export-{tag}@example.com', role='teacher', password=password)
+        school = School.objects.create(
+            name='Benchmark School', code=f'B{tag}', city='-', state='-', pincode='0', phone='0',
+            principal_name='-', established_year=2000
+        )
+        classroom = Classroom.objects.create(
+            school=school,
+            academic_year=AcademicYear.objects.create(
+                school=school, name='2025-2026', start_date=date(2025, 6, 1), end_date=date(2026, 5, 31)
+            ),
+            subject=Subject.objects.create(name=f'Benchmark {tag}', code=tag, grade=1),
+            grade=1,
+            section='A',
+            teacher=teacher,
+            class_code=f'B{tag}'
+        )
+
+        students = [
+            User(email=f'export-{tag}-{i}@example.com', role='student', first_name='Student', last_name=str(i),
+                 password=password)
+            for i in range(student_count)
+        ]
+        User.objects.bulk_create(students, batch_size=batch_size)
+        student_ids = [student.pk for student in students]
+        del students
+
+        # One session per (date, session type), each with every student
+        session_count = -(-total // student_count)
+        session_types = ('morning', 'afternoon', 'full_day')
+        sessions = [
+            AttendanceSession(
+                classroom=classroom,
+                teacher=teacher,
+                date=date(2000, 1, 1) + timedelta(days=i // len(session_types)),
+                session_type=session_types[i % len(session_types)]
+            )
+            for i in range(session_count)
+        ]
+        AttendanceSession.objects.bulk_create(sessions, batch_size=batch_size)
+        session_ids = [session.pk for session in sessions]
+        del sessions
+
+        statuses = ('present', 'present', 'present', 'late', 'absent')
+        for start in range(0, total, batch_size):
+            AttendanceRecord.objects.bulk_create([
+                AttendanceRecord(
+                    session_id=session_ids[i // student_count],
+                    student_id=student_ids[i % student_count],
+                    status=statuses[i % len(statuses)]
+                )
+                for i in range(start, min(start + batch_size, total))
+            ])
+        return classroom, teacher
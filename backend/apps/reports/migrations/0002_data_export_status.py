@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataexport',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='dataexport',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='dataexport',
+            name='file_format',
+            field=models.CharField(choices=[('excel', 'Excel (.xlsx)'), ('csv', 'CSV'), ('json', 'JSON')], default='excel', max_length=10),
+        ),
+    ]
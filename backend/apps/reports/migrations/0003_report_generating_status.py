@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:23
+
+import logging
+
+from django.db import migrations, models, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def requeue_processing_reports(apps, schema_editor):
+    """Reports left 'processing' were never generated; make them pending again and queue them"""
+    Report = apps.get_model('reports', 'Report')
+    stale = Report.objects.filter(status='processing')
+    report_ids = [str(pk) for pk in stale.values_list('pk', flat=True)]
+    if not report_ids:
+        return
+    stale.update(status='pending')
+
+    def enqueue():
+        from apps.reports.tasks import generate_reports
+
+        try:
+            for start in range(0, len(report_ids), 100):
+                generate_reports.delay(report_ids[start:start + 100])
+        except Exception:
+            # The requeue_stale_reports beat sweep picks them up instead
+            logger.exception('Queueing %d reset reports failed', len(report_ids))
+
+    transaction.on_commit(enqueue, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_data_export_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('generating', 'Generating'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.RunPython(requeue_processing_reports, migrations.RunPython.noop),
+    ]
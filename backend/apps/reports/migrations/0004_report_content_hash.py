@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_report_generating_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash of type, scope, parameters and data version; reports with equal hashes share a file', max_length=64),
+        ),
+    ]
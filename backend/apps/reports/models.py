@@ -64,7 +64,7 @@ class Report(TimeStampedModel):
     
     STATUS_CHOICES = [
         ('pending', 'Pending'),
-        ('processing', 'Processing'),
+        ('generating', 'Generating'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
     ]
@@ -86,6 +86,12 @@ class Report(TimeStampedModel):
     file_format = models.CharField(max_length=10, choices=FILE_FORMAT_CHOICES, default='pdf')
     file = models.FileField(upload_to='reports/%Y/%m/', null=True, blank=True)
     file_size = models.PositiveIntegerField(default=0, help_text='File size in bytes')
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text='Hash of type, scope, parameters and data version; reports with equal hashes share a file'
+    )
     
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
@@ -176,6 +182,14 @@ class DataExport(TimeStampedModel):
     FILE_FORMAT_CHOICES = [
         ('excel', 'Excel (.xlsx)'),
         ('csv', 'CSV'),
+        ('json', 'JSON'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
     ]
     
     export_type = models.CharField(max_length=30, choices=EXPORT_TYPE_CHOICES, db_index=True)
@@ -195,6 +209,10 @@ class DataExport(TimeStampedModel):
     # Metadata
     row_count = models.PositiveIntegerField(default=0, help_text='Number of rows exported')
     
+    # Status
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    error_message = models.TextField(blank=True)
+    
     # Export info
     exported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='data_exports')
     exported_at = models.DateTimeField(auto_now_add=True)
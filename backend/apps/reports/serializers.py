@@ -3,6 +3,8 @@ Serializers for reports app
 """
 
 from rest_framework import serializers
+
+from apps.attendance.models import AttendanceRecord
 from .models import ReportTemplate, Report, ReportSchedule, DataExport
 
 
@@ -35,7 +37,7 @@ class ReportSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = [
             'id', 'created_at', 'updated_at', 'generated_by',
-            'generated_at', 'status', 'file', 'file_size', 'error_message'
+            'generated_at', 'status', 'file', 'file_size', 'content_hash', 'error_message'
         ]
     
     def get_download_url(self, obj):
@@ -64,6 +66,7 @@ class DataExportSerializer(serializers.ModelSerializer):
     exported_by_name = serializers.CharField(source='exported_by.get_full_name', read_only=True)
     export_type_display = serializers.CharField(source='get_export_type_display', read_only=True)
     file_format_display = serializers.CharField(source='get_file_format_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     download_url = serializers.SerializerMethodField()
     
@@ -72,7 +75,7 @@ class DataExportSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = [
             'id', 'created_at', 'updated_at', 'exported_by',
-            'exported_at', 'file', 'file_size', 'row_count'
+            'exported_at', 'file', 'file_size', 'row_count', 'status', 'error_message'
         ]
     
     def get_download_url(self, obj):
@@ -81,3 +84,27 @@ class DataExportSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.file.url)
         return None
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """Filters shared by every export type; unknown keys are dropped"""
+    classroom_id = serializers.UUIDField()
+    date_from = serializers.DateField(required=False, allow_null=True)
+    date_to = serializers.DateField(required=False, allow_null=True)
+    
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise serializers.ValidationError({'date_to': 'date_to must not be before date_from'})
+        return data
+
+
+class GradesExportFilterSerializer(ExportFilterSerializer):
+    """Filters of a grades export"""
+    assignment_id = serializers.UUIDField(required=False, allow_null=True)
+    published_only = serializers.BooleanField(required=False)
+
+
+class AttendanceExportFilterSerializer(ExportFilterSerializer):
+    """Filters of an attendance export"""
+    student_id = serializers.UUIDField(required=False, allow_null=True)
+    status = serializers.ChoiceField(choices=AttendanceRecord.STATUS_CHOICES, required=False, allow_blank=True)
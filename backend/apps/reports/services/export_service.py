@@ -0,0 +1,311 @@
+"""
+Data Export Service
+
+Streams DataExport rows from the database to CSV, JSON or XLSX without
+holding the result set in memory. Each export type declares its columns
+as values_list() lookups, so rows are read as tuples with
+.iterator(chunk_size=CHUNK_SIZE), never as model instances, and written
+out as they arrive:
+
+- CSV and JSON are produced by generators, which back both the
+  StreamingHttpResponse for ?stream exports and the file written by the
+  Celery task.
+- XLSX is written with an openpyxl write-only workbook, which flushes rows
+  to disk as they are appended, starting a new sheet every
+  XLSX_MAX_ROWS rows (Excel's limit).
+
+Files are spooled to a temporary file and handed to the storage backend,
+so memory stays flat however many rows an export has.
+"""
+
+import csv
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, NamedTuple, Tuple
+
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.assignments.models import AssignmentGrade
+from apps.attendance.models import AttendanceRecord
+from ..models import DataExport
+from ..serializers import AttendanceExportFilterSerializer, GradesExportFilterSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class ExportColumn(NamedTuple):
+    key: str  # JSON field name
+    header: str  # CSV/XLSX column heading
+    lookup: str  # values_list() lookup
+
+
+class ExportDefinition:
+    """The rows of one export type"""
+    columns: Tuple[ExportColumn, ...] = ()
+    # Validates the filters before an export is created
+    filter_serializer = None
+
+    @classmethod
+    def queryset(cls, filters: Dict) -> QuerySet:
+        raise NotImplementedError
+
+    @classmethod
+    def rows(cls, filters: Dict, chunk_size: int) -> Iterator[tuple]:
+        lookups = [column.lookup for column in cls.columns]
+        return cls.queryset(filters).values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+class GradesExport(ExportDefinition):
+    """Assignment grades of a classroom"""
+    columns = (
+        ExportColumn('assignment', 'Assignment', 'submission__assignment__title'),
+        ExportColumn('due_date', 'Due Date', 'submission__assignment__due_date'),
+        ExportColumn('student_email', 'Student Email', 'submission__student__email'),
+        ExportColumn('first_name', 'First Name', 'submission__student__first_name'),
+        ExportColumn('last_name', 'Last Name', 'submission__student__last_name'),
+        ExportColumn('score', 'Score', 'score'),
+        ExportColumn('max_score', 'Max Score', 'max_score'),
+        ExportColumn('percentage', 'Percentage', 'percentage'),
+        ExportColumn('is_late', 'Late', 'submission__is_late'),
+        ExportColumn('is_published', 'Published', 'is_published'),
+        ExportColumn('graded_at', 'Graded At', 'created_at'),
+    )
+    filter_serializer = GradesExportFilterSerializer
+
+    @classmethod
+    def queryset(cls, filters: Dict) -> QuerySet:
+        grades = AssignmentGrade.objects.filter(
+            submission__assignment__classroom_id=filters['classroom_id']
+        )
+        if filters.get('assignment_id'):
+            grades = grades.filter(submission__assignment_id=filters['assignment_id'])
+        if filters.get('published_only'):
+            grades = grades.filter(is_published=True)
+        if filters.get('date_from'):
+            grades = grades.filter(created_at__date__gte=filters['date_from'])
+        if filters.get('date_to'):
+            grades = grades.filter(created_at__date__lte=filters['date_to'])
+        return grades.order_by('submission__assignment__due_date', 'submission__assignment_id', 'pk')
+
+
+class AttendanceExport(ExportDefinition):
+    """Attendance records of a classroom"""
+    columns = (
+        ExportColumn('date', 'Date', 'session__date'),
+        ExportColumn('session_type', 'Session', 'session__session_type'),
+        ExportColumn('student_email', 'Student Email', 'student__email'),
+        ExportColumn('first_name', 'First Name', 'student__first_name'),
+        ExportColumn('last_name', 'Last Name', 'student__last_name'),
+        ExportColumn('status', 'Status', 'status'),
+        ExportColumn('arrival_time', 'Arrival Time', 'arrival_time'),
+        ExportColumn('notes', 'Notes', 'notes'),
+    )
+    filter_serializer = AttendanceExportFilterSerializer
+
+    @classmethod
+    def queryset(cls, filters: Dict) -> QuerySet:
+        records = AttendanceRecord.objects.filter(session__classroom_id=filters['classroom_id'])
+        if filters.get('student_id'):
+            records = records.filter(student_id=filters['student_id'])
+        if filters.get('status'):
+            records = records.filter(status=filters['status'])
+        if filters.get('date_from'):
+            records = records.filter(session__date__gte=filters['date_from'])
+        if filters.get('date_to'):
+            records = records.filter(session__date__lte=filters['date_to'])
+        return records.order_by('session__date', 'session_id', 'pk')
+
+
+EXPORT_DEFINITIONS = {
+    'grades': GradesExport,
+    'attendance': AttendanceExport,
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the written text back, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+class DataExportService:
+    """Service for running data exports"""
+
+    CHUNK_SIZE = 2000
+    LINES_PER_YIELD = 500
+    XLSX_MAX_ROWS = 1048576
+    SPOOL_SIZE = 1024 * 1024
+
+    CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'json': 'application/json',
+        'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+    EXTENSIONS = {'csv': 'csv', 'json': 'json', 'excel': 'xlsx'}
+    STREAMABLE_FORMATS = ('csv', 'json')
+
+    @staticmethod
+    def definition(export: DataExport) -> ExportDefinition:
+        try:
+            return EXPORT_DEFINITIONS[export.export_type]
+        except KeyError:
+            raise ValueError(f'Export type {export.export_type!r} is not supported')
+
+    @staticmethod
+    def filter_serializer(export_type: str, filters: Dict) -> serializers.Serializer:
+        """Serializer validating an export type's filters; its .data is what the export stores"""
+        return EXPORT_DEFINITIONS[export_type].filter_serializer(data=filters)
+
+    @classmethod
+    def filename(cls, export: DataExport) -> str:
+        return f'{export.export_type}-{export.created_at:%Y%m%d-%H%M%S}.{cls.EXTENSIONS[export.file_format]}'
+
+    # Encoders
+
+    @classmethod
+    def csv_chunks(cls, columns: Iterable[ExportColumn], rows: Iterable[tuple]) -> Iterator[str]:
+        writer = csv.writer(_Echo())
+        lines = [writer.writerow([column.header for column in columns])]
+        for row in rows:
+            lines.append(writer.writerow(row))
+            if len(lines) >= cls.LINES_PER_YIELD:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    @classmethod
+    def json_chunks(cls, columns: Iterable[ExportColumn], rows: Iterable[tuple]) -> Iterator[str]:
+        """A JSON array of objects, one per line"""
+        keys = [column.key for column in columns]
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        lines = ['[']
+        separator = '\n'
+        for row in rows:
+            lines.append(separator + encoder.encode(dict(zip(keys, row))))
+            separator = ',\n'
+            if len(lines) >= cls.LINES_PER_YIELD:
+                yield ''.join(lines)
+                lines = []
+        lines.append('\n]\n')
+        yield ''.join(lines)
+
+    @staticmethod
+    def _xlsx_cell(value):
+        # openpyxl rejects aware datetimes and has no UUID type
+        if isinstance(value, datetime) and timezone.is_aware(value):
+            return timezone.make_naive(value)
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+
+    @classmethod
+    def write_xlsx(cls, columns: Iterable[ExportColumn], rows: Iterable[tuple], fileobj) -> None:
+        from openpyxl import Workbook
+
+        headers = [column.header for column in columns]
+        workbook = Workbook(write_only=True)
+        sheet, sheet_rows = None, 0
+        for row in rows:
+            if sheet is None or sheet_rows >= cls.XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f'Sheet{len(workbook.worksheets) + 1}')
+                sheet.append(headers)
+                sheet_rows = 1
+            sheet.append([cls._xlsx_cell(value) for value in row])
+            sheet_rows += 1
+        if sheet is None:
+            workbook.create_sheet('Sheet1').append(headers)
+        workbook.save(fileobj)
+
+    # Runners
+
+    @classmethod
+    def _counted_rows(cls, export: DataExport, counter: Dict) -> Iterator[tuple]:
+        for row in cls.definition(export).rows(export.filters, cls.CHUNK_SIZE):
+            counter['rows'] += 1
+            yield row
+
+    @classmethod
+    def stream_response(cls, export: DataExport) -> StreamingHttpResponse:
+        """
+        Stream a CSV or JSON export straight to the client
+
+        row_count and file_size are recorded once the last row is sent.
+        """
+        if export.file_format not in cls.STREAMABLE_FORMATS:
+            raise ValueError(f'{export.file_format} exports cannot be streamed')
+
+        columns = cls.definition(export).columns
+        encode = cls.csv_chunks if export.file_format == 'csv' else cls.json_chunks
+
+        def body():
+            counter = {'rows': 0}
+            size = 0
+            try:
+                for chunk in encode(columns, cls._counted_rows(export, counter)):
+                    data = chunk.encode('utf-8')
+                    size += len(data)
+                    yield data
+            except (Exception, GeneratorExit) as exc:
+                # The status line is already sent; record why the body stopped
+                logger.warning(f"[EXPORT] Streamed export {export.pk} stopped after {counter['rows']} rows")
+                DataExport.objects.filter(pk=export.pk).update(
+                    status='failed', error_message=str(exc) or 'Client disconnected'
+                )
+                raise
+            cls._finish(export, counter['rows'], size)
+
+        DataExport.objects.filter(pk=export.pk).update(status='processing')
+        response = StreamingHttpResponse(body(), content_type=cls.CONTENT_TYPES[export.file_format])
+        response['Content-Disposition'] = f'attachment; filename="{cls.filename(export)}"'
+        return response
+
+    @classmethod
+    def generate(cls, export_id) -> DataExport:
+        """Write an export to the storage backend and record its size"""
+        export = DataExport.objects.get(pk=export_id)
+        DataExport.objects.filter(pk=export.pk).update(status='processing', error_message='')
+
+        columns = cls.definition(export).columns
+        counter = {'rows': 0}
+        try:
+            with tempfile.SpooledTemporaryFile(max_size=cls.SPOOL_SIZE) as spool:
+                rows = cls._counted_rows(export, counter)
+                if export.file_format == 'excel':
+                    cls.write_xlsx(columns, rows, spool)
+                else:
+                    encode = cls.csv_chunks if export.file_format == 'csv' else cls.json_chunks
+                    for chunk in encode(columns, rows):
+                        spool.write(chunk.encode('utf-8'))
+
+                size = spool.seek(0, os.SEEK_END)
+                spool.seek(0)
+                export.file.save(cls.filename(export), File(spool), save=False)
+        except Exception as exc:
+            logger.exception(f"[EXPORT] Export {export.pk} failed")
+            DataExport.objects.filter(pk=export.pk).update(status='failed', error_message=str(exc))
+            raise
+
+        DataExport.objects.filter(pk=export.pk).update(file=export.file.name)
+        cls._finish(export, counter['rows'], size)
+        logger.info(f"[EXPORT] Wrote {counter['rows']} rows ({size} bytes) to {export.file.name}")
+        return export
+
+    @staticmethod
+    def _finish(export: DataExport, row_count: int, file_size: int) -> None:
+        export.row_count, export.file_size, export.status = row_count, file_size, 'completed'
+        DataExport.objects.filter(pk=export.pk).update(
+            row_count=row_count,
+            file_size=file_size,
+            status='completed',
+            updated_at=timezone.now()
+        )
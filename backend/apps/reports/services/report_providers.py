@@ -0,0 +1,499 @@
+"""
+Report Data Providers
+
+Each provider loads one kind of report data (grades, attendance, overall
+progress, a classroom summary) for a whole ReportScope at once, with a
+fixed number of aggregate queries grouped by student. A batch of reports
+that differ only in their student therefore shares one load: generating
+report cards for a 40-student classroom runs the same queries as
+generating one.
+
+Providers turn their data into ReportSections: a few labelled facts and
+an optional table, which the renderers in report_service lay out as PDF,
+Excel or CSV.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.db.models import Avg, Count, Max, Min, Q, QuerySet
+
+from apps.assessments.models import Quiz, QuizAttempt
+from apps.assignments.models import Assignment, AssignmentGrade
+from apps.attendance.models import AttendanceRecord
+from apps.performance.models import StudentGrade, SubjectPerformance
+from apps.schools.models import ClassroomEnrollment
+
+
+class ReportScope(NamedTuple):
+    """The students and period a batch of reports covers"""
+    student_ids: Tuple
+    classroom_id: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    academic_year: Optional[str] = None
+    semester: Optional[str] = None
+
+
+class ReportSection(NamedTuple):
+    title: str
+    facts: Sequence[Tuple[str, object]] = ()
+    headers: Sequence[str] = ()
+    rows: Sequence[Sequence] = ()
+
+
+class Source(NamedTuple):
+    """A queryset a provider reads, and the lookup of its student (None for classroom-wide data)"""
+    queryset: QuerySet
+    student_lookup: Optional[str]
+
+
+class ProviderData(NamedTuple):
+    """What a provider loaded: per-student values and scope-wide totals"""
+    students: Dict
+    summary: Dict
+
+
+def _round(value, places=1):
+    return None if value is None else round(Decimal(value), places)
+
+
+def _mean(pairs) -> Optional[Decimal]:
+    """Average of (average, count) pairs, weighted by count"""
+    pairs = [(average, count) for average, count in pairs if average is not None]
+    total = sum(count for _, count in pairs)
+    if not total:
+        return None
+    return _round(sum(Decimal(average) * count for average, count in pairs) / total)
+
+
+class DataProvider:
+    """Loads one kind of report data for a ReportScope"""
+    key = ''
+    title = ''
+
+    @classmethod
+    def sources(cls, scope: ReportScope) -> List[Source]:
+        """The filtered querysets load() aggregates"""
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, scope: ReportScope) -> ProviderData:
+        raise NotImplementedError
+
+    @classmethod
+    def watermarks(cls, scope: ReportScope) -> Dict:
+        """
+        Data version of the provider's rows: [row count, latest updated_at]
+        per student, and under None for classroom-wide sources
+
+        Any insert, update or delete moves a watermark, so reports built
+        from equal watermarks hold the same data. One query per source.
+        """
+        marks = {}
+        for queryset, student_lookup in cls.sources(scope):
+            if student_lookup:
+                rows = queryset.order_by().values(student_lookup).annotate(
+                    count=Count('pk'), last=Max('updated_at')
+                ).values_list(student_lookup, 'count', 'last')
+            else:
+                row = queryset.order_by().aggregate(count=Count('pk'), last=Max('updated_at'))
+                rows = [(None, row['count'], row['last'])]
+            for key, count, last in rows:
+                previous_count, previous_last = marks.get(key, (0, None))
+                marks[key] = (
+                    previous_count + count,
+                    max(filter(None, [previous_last, last]), default=None)
+                )
+        return marks
+
+    @classmethod
+    def student_section(cls, data: ProviderData, student_id) -> ReportSection:
+        """The section of one student's report"""
+        raise NotImplementedError
+
+    @classmethod
+    def classroom_section(cls, data: ProviderData, names: Dict) -> ReportSection:
+        """The section of a classroom report; names maps student id to display name"""
+        raise NotImplementedError
+
+
+class GradesProvider(DataProvider):
+    """Published assignment grades and graded quizzes, per subject (2 queries)"""
+    key = 'grades'
+    title = 'Grades'
+
+    @classmethod
+    def sources(cls, scope: ReportScope) -> List[Source]:
+        grades = AssignmentGrade.objects.filter(
+            submission__student_id__in=scope.student_ids,
+            is_published=True
+        )
+        attempts = QuizAttempt.objects.filter(
+            student_id__in=scope.student_ids,
+            status='graded'
+        )
+        if scope.classroom_id:
+            grades = grades.filter(submission__assignment__classroom_id=scope.classroom_id)
+            attempts = attempts.filter(quiz__classroom_id=scope.classroom_id)
+        if scope.date_from:
+            grades = grades.filter(created_at__date__gte=scope.date_from)
+            attempts = attempts.filter(submitted_at__date__gte=scope.date_from)
+        if scope.date_to:
+            grades = grades.filter(created_at__date__lte=scope.date_to)
+            attempts = attempts.filter(submitted_at__date__lte=scope.date_to)
+        return [Source(grades, 'submission__student_id'), Source(attempts, 'student_id')]
+
+    @classmethod
+    def load(cls, scope: ReportScope) -> ProviderData:
+        (grades, _), (attempts, _) = cls.sources(scope)
+
+        subjects = defaultdict(dict)
+        for row in grades.values(
+            'submission__student_id', 'submission__assignment__classroom__subject__name'
+        ).annotate(
+            count=Count('id'), average=Avg('percentage'), best=Max('percentage'), lowest=Min('percentage')
+        ):
+            subject = subjects[row['submission__student_id']].setdefault(
+                row['submission__assignment__classroom__subject__name'], {}
+            )
+            subject.update(
+                assignments=row['count'], assignment_average=row['average'],
+                best=row['best'], lowest=row['lowest']
+            )
+        for row in attempts.values('student_id', 'quiz__classroom__subject__name').annotate(
+            count=Count('id'), average=Avg('percentage')
+        ):
+            subject = subjects[row['student_id']].setdefault(row['quiz__classroom__subject__name'], {})
+            subject.update(quizzes=row['count'], quiz_average=row['average'])
+
+        students = {}
+        for student_id, by_subject in subjects.items():
+            students[student_id] = {
+                'subjects': dict(sorted(by_subject.items())),
+                'assignment_average': _mean(
+                    (s.get('assignment_average'), s.get('assignments', 0)) for s in by_subject.values()
+                ),
+                'quiz_average': _mean((s.get('quiz_average'), s.get('quizzes', 0)) for s in by_subject.values()),
+                'assignments': sum(s.get('assignments', 0) for s in by_subject.values()),
+                'quizzes': sum(s.get('quizzes', 0) for s in by_subject.values()),
+            }
+        summary = {
+            'assignment_average': _mean(
+                (s['assignment_average'], s['assignments']) for s in students.values()
+            ),
+            'quiz_average': _mean((s['quiz_average'], s['quizzes']) for s in students.values()),
+        }
+        return ProviderData(students, summary)
+
+    @classmethod
+    def student_section(cls, data: ProviderData, student_id) -> ReportSection:
+        student = data.students.get(student_id)
+        if not student:
+            return ReportSection(cls.title, facts=[('Grades', 'No published grades in this period')])
+        return ReportSection(
+            cls.title,
+            facts=[
+                ('Assignment average', student['assignment_average']),
+                ('Quiz average', student['quiz_average']),
+            ],
+            headers=['Subject', 'Assignments', 'Assignment Avg', 'Best', 'Lowest', 'Quizzes', 'Quiz Avg'],
+            rows=[
+                [
+                    name,
+                    subject.get('assignments', 0),
+                    _round(subject.get('assignment_average')),
+                    _round(subject.get('best')),
+                    _round(subject.get('lowest')),
+                    subject.get('quizzes', 0),
+                    _round(subject.get('quiz_average')),
+                ]
+                for name, subject in student['subjects'].items()
+            ]
+        )
+
+    @classmethod
+    def classroom_section(cls, data: ProviderData, names: Dict) -> ReportSection:
+        return ReportSection(
+            cls.title,
+            facts=[
+                ('Class assignment average', data.summary['assignment_average']),
+                ('Class quiz average', data.summary['quiz_average']),
+            ],
+            headers=['Student', 'Assignments', 'Assignment Avg', 'Quizzes', 'Quiz Avg'],
+            rows=[
+                [
+                    name,
+                    data.students.get(student_id, {}).get('assignments', 0),
+                    data.students.get(student_id, {}).get('assignment_average'),
+                    data.students.get(student_id, {}).get('quizzes', 0),
+                    data.students.get(student_id, {}).get('quiz_average'),
+                ]
+                for student_id, name in names.items()
+            ]
+        )
+
+
+class AttendanceProvider(DataProvider):
+    """Attendance counts by status (1 query)"""
+    key = 'attendance'
+    title = 'Attendance'
+
+    STATUSES = [status for status, _ in AttendanceRecord.STATUS_CHOICES]
+
+    @staticmethod
+    def _rate(counts) -> Optional[Decimal]:
+        if not counts['total']:
+            return None
+        return _round(Decimal(counts['present'] + counts['late']) * 100 / counts['total'])
+
+    @classmethod
+    def sources(cls, scope: ReportScope) -> List[Source]:
+        records = AttendanceRecord.objects.filter(student_id__in=scope.student_ids)
+        if scope.classroom_id:
+            records = records.filter(session__classroom_id=scope.classroom_id)
+        if scope.date_from:
+            records = records.filter(session__date__gte=scope.date_from)
+        if scope.date_to:
+            records = records.filter(session__date__lte=scope.date_to)
+        return [Source(records, 'student_id')]
+
+    @classmethod
+    def load(cls, scope: ReportScope) -> ProviderData:
+        (records, _), = cls.sources(scope)
+
+        students = {}
+        for row in records.values('student_id').annotate(
+            total=Count('id'),
+            **{status: Count('id', filter=Q(status=status)) for status in cls.STATUSES}
+        ):
+            counts = {key: row[key] for key in ['total', *cls.STATUSES]}
+            students[row['student_id']] = {**counts, 'rate': cls._rate(counts)}
+
+        totals = {key: sum(s[key] for s in students.values()) for key in ['total', *cls.STATUSES]}
+        return ProviderData(students, {**totals, 'rate': cls._rate(totals)})
+
+    @classmethod
+    def student_section(cls, data: ProviderData, student_id) -> ReportSection:
+        counts = data.students.get(student_id)
+        if not counts:
+            return ReportSection(cls.title, facts=[('Attendance', 'No sessions recorded in this period')])
+        return ReportSection(
+            cls.title,
+            facts=[('Sessions', counts['total']), ('Attendance rate (%)', counts['rate'])]
+            + [(label, counts[status]) for status, label in AttendanceRecord.STATUS_CHOICES]
+        )
+
+    @classmethod
+    def classroom_section(cls, data: ProviderData, names: Dict) -> ReportSection:
+        empty = dict.fromkeys(['total', 'rate', *cls.STATUSES], 0)
+        return ReportSection(
+            cls.title,
+            facts=[('Sessions recorded', data.summary['total']), ('Attendance rate (%)', data.summary['rate'])],
+            headers=['Student', 'Sessions', 'Rate (%)'] + [label for _, label in AttendanceRecord.STATUS_CHOICES],
+            rows=[
+                [name, counts['total'], counts['rate']] + [counts[status] for status in cls.STATUSES]
+                for student_id, name in names.items()
+                for counts in [data.students.get(student_id, empty)]
+            ]
+        )
+
+
+class StudentProgressProvider(DataProvider):
+    """Overall grades, GPA and per-subject trends from the performance app (2 queries)"""
+    key = 'progress'
+    title = 'Progress'
+
+    @classmethod
+    def sources(cls, scope: ReportScope) -> List[Source]:
+        overall = StudentGrade.objects.filter(student_id__in=scope.student_ids)
+        subjects = SubjectPerformance.objects.filter(student_id__in=scope.student_ids)
+        if scope.classroom_id:
+            overall = overall.filter(classroom_id=scope.classroom_id)
+            subjects = subjects.filter(classroom_id=scope.classroom_id)
+        if scope.academic_year:
+            overall = overall.filter(academic_year=scope.academic_year)
+            subjects = subjects.filter(academic_year=scope.academic_year)
+        if scope.semester:
+            overall = overall.filter(semester=scope.semester)
+            subjects = subjects.filter(semester=scope.semester)
+        return [Source(overall, 'student_id'), Source(subjects, 'student_id')]
+
+    @classmethod
+    def load(cls, scope: ReportScope) -> ProviderData:
+        (overall, _), (subjects, _) = cls.sources(scope)
+
+        students = defaultdict(lambda: {'periods': [], 'subjects': []})
+        for row in overall.order_by('-academic_year', 'semester').values(
+            'student_id', 'academic_year', 'semester', 'overall_percentage', 'overall_grade',
+            'gpa', 'class_rank', 'total_students', 'behavior_score', 'is_honor_roll', 'teacher_comments'
+        ):
+            students[row['student_id']]['periods'].append(row)
+        for row in subjects.order_by('-academic_year', 'subject__name').values(
+            'student_id', 'academic_year', 'subject__name', 'overall_score',
+            'letter_grade', 'trend', 'strengths', 'areas_for_improvement'
+        ):
+            students[row['student_id']]['subjects'].append(row)
+
+        gpas = [s['periods'][0]['gpa'] for s in students.values() if s['periods']]
+        summary = {'average_gpa': _round(sum(gpas) / len(gpas), 2) if gpas else None}
+        return ProviderData(dict(students), summary)
+
+    @classmethod
+    def student_section(cls, data: ProviderData, student_id) -> ReportSection:
+        student = data.students.get(student_id)
+        if not student:
+            return ReportSection(cls.title, facts=[('Progress', 'No term results recorded yet')])
+
+        facts = []
+        if student['periods']:
+            latest = student['periods'][0]
+            rank = f"{latest['class_rank']} of {latest['total_students']}" if latest['class_rank'] else None
+            facts = [
+                ('Period', f"{latest['academic_year']} {latest['semester']}"),
+                ('Overall (%)', latest['overall_percentage']),
+                ('Grade', latest['overall_grade']),
+                ('GPA', latest['gpa']),
+                ('Class rank', rank),
+                ('Behavior score', latest['behavior_score']),
+                ('Honor roll', 'Yes' if latest['is_honor_roll'] else 'No'),
+                ("Teacher's comments", latest['teacher_comments']),
+            ]
+        return ReportSection(
+            cls.title,
+            facts=facts,
+            headers=['Year', 'Subject', 'Score', 'Grade', 'Trend', 'Strengths', 'To improve'],
+            rows=[
+                [
+                    row['academic_year'], row['subject__name'], row['overall_score'], row['letter_grade'],
+                    row['trend'], row['strengths'], row['areas_for_improvement'],
+                ]
+                for row in student['subjects']
+            ]
+        )
+
+    @classmethod
+    def classroom_section(cls, data: ProviderData, names: Dict) -> ReportSection:
+        rows = []
+        for student_id, name in names.items():
+            periods = data.students.get(student_id, {}).get('periods')
+            latest = periods[0] if periods else {}
+            rows.append([
+                name, latest.get('overall_percentage'), latest.get('overall_grade'),
+                latest.get('gpa'), latest.get('class_rank'),
+            ])
+        return ReportSection(
+            cls.title,
+            facts=[('Average GPA', data.summary['average_gpa'])],
+            headers=['Student', 'Overall (%)', 'Grade', 'GPA', 'Rank'],
+            rows=rows
+        )
+
+
+class ClassroomSummaryProvider(DataProvider):
+    """Enrollment and work set in the classroom, with each student's standing in it (4 queries)"""
+    key = 'classroom'
+    title = 'Class Summary'
+
+    @classmethod
+    def sources(cls, scope: ReportScope) -> List[Source]:
+        if not scope.classroom_id:
+            return []
+
+        enrollments = ClassroomEnrollment.objects.filter(classroom_id=scope.classroom_id, is_active=True)
+        assignments = Assignment.objects.filter(classroom_id=scope.classroom_id, is_published=True)
+        quizzes = Quiz.objects.filter(classroom_id=scope.classroom_id)
+        averages = AssignmentGrade.objects.filter(
+            submission__assignment__classroom_id=scope.classroom_id,
+            is_published=True
+        )
+        if scope.date_from:
+            assignments = assignments.filter(due_date__date__gte=scope.date_from)
+            averages = averages.filter(created_at__date__gte=scope.date_from)
+        if scope.date_to:
+            assignments = assignments.filter(due_date__date__lte=scope.date_to)
+            averages = averages.filter(created_at__date__lte=scope.date_to)
+        # Every student's standing depends on the whole class, so nothing here is per-student
+        return [Source(qs, None) for qs in (enrollments, assignments, quizzes, averages)]
+
+    @classmethod
+    def load(cls, scope: ReportScope) -> ProviderData:
+        if not scope.classroom_id:
+            return ProviderData({}, {})
+
+        (enrollments, _), (assignments, _), (quizzes, _), (averages, _) = cls.sources(scope)
+        by_student = {
+            row['submission__student_id']: row['average']
+            for row in averages.values('submission__student_id').annotate(average=Avg('percentage'))
+        }
+        ranks = {
+            student_id: position
+            for position, student_id in enumerate(sorted(by_student, key=by_student.get, reverse=True), 1)
+        }
+
+        students = {
+            student_id: {'average': _round(by_student[student_id]), 'rank': ranks[student_id]}
+            for student_id in scope.student_ids if student_id in by_student
+        }
+        values = list(by_student.values())
+        summary = {
+            'enrolled': enrollments.count(),
+            'assignments': assignments.count(),
+            'quizzes': quizzes.count(),
+            'class_average': _round(sum(values) / len(values)) if values else None,
+            'graded_students': len(values),
+        }
+        return ProviderData(students, summary)
+
+    @classmethod
+    def _facts(cls, summary: Dict) -> List[Tuple[str, object]]:
+        return [
+            ('Students enrolled', summary.get('enrolled')),
+            ('Assignments set', summary.get('assignments')),
+            ('Quizzes set', summary.get('quizzes')),
+            ('Class average (%)', summary.get('class_average')),
+        ]
+
+    @classmethod
+    def student_section(cls, data: ProviderData, student_id) -> ReportSection:
+        standing = data.students.get(student_id, {})
+        rank = f"{standing['rank']} of {data.summary['graded_students']}" if standing else None
+        return ReportSection(
+            cls.title,
+            facts=cls._facts(data.summary) + [('Student average (%)', standing.get('average')), ('Rank', rank)]
+        )
+
+    @classmethod
+    def classroom_section(cls, data: ProviderData, names: Dict) -> ReportSection:
+        return ReportSection(
+            cls.title,
+            facts=cls._facts(data.summary),
+            headers=['Rank', 'Student', 'Average (%)'],
+            rows=sorted(
+                (
+                    [data.students[student_id]['rank'], name, data.students[student_id]['average']]
+                    for student_id, name in names.items() if student_id in data.students
+                ),
+                key=lambda row: row[0]
+            )
+        )
+
+
+PROVIDERS = {
+    provider.key: provider
+    for provider in (StudentProgressProvider, ClassroomSummaryProvider, GradesProvider, AttendanceProvider)
+}
+
+# Sections of each report type, unless its template lists its own
+REPORT_SECTIONS = {
+    'student_report_card': ('progress', 'grades', 'attendance'),
+    'progress_report': ('progress', 'grades'),
+    'attendance_report': ('attendance',),
+    'behavior_report': ('attendance', 'progress'),
+    'transcript': ('progress', 'grades'),
+    'class_performance': ('classroom', 'grades', 'attendance'),
+    'parent_summary': ('progress', 'grades', 'attendance'),
+    'custom': (),
+}
@@ -0,0 +1,528 @@
+"""
+Report Service
+
+Generates Report files in Celery. Reports move from pending to
+generating while they are built, then to completed with a file or to
+failed with an error_message.
+
+Requests are handled in batches: reports with the same type, classroom,
+template and parameters differ only in their student, so the data
+providers of their sections (see report_providers) are loaded once for
+all of their students, and each report is then rendered from its share
+of that data as PDF, Excel or CSV.
+
+Files are content addressed. A report's content_hash covers its type,
+sections, format, student or classroom, normalized parameters and the
+data watermarks of its providers (row count and latest updated_at of each
+source). A report whose hash matches a completed one is given that
+report's file instead of being generated again.
+
+A beat sweep (requeue_stale) picks up reports whose task was lost: pending
+reports that nobody claimed, and generating reports whose worker died.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.text import slugify
+
+from apps.accounts.models import User
+from apps.schools.models import Classroom, ClassroomEnrollment
+from ..models import Report
+from .report_providers import PROVIDERS, REPORT_SECTIONS, ProviderData, ReportScope, ReportSection
+
+logger = logging.getLogger(__name__)
+
+
+class ReportDocument(NamedTuple):
+    title: str
+    facts: Sequence[Tuple[str, object]]
+    sections: Sequence[ReportSection]
+
+
+def _text(value) -> str:
+    if value is None or value == '':
+        return '-'
+    return str(value)
+
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """Paragraph styles, built once per process"""
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'ReportTitle', parent=styles['Heading1'], fontSize=20,
+            textColor='#1a1a1a', spaceAfter=12, fontName='Helvetica-Bold'
+        ),
+        'heading': ParagraphStyle(
+            'ReportHeading', parent=styles['Heading2'], fontSize=14,
+            textColor='#2c3e50', spaceBefore=14, spaceAfter=6, fontName='Helvetica-Bold'
+        ),
+        'cell': ParagraphStyle('ReportCell', parent=styles['BodyText'], fontSize=8, leading=10),
+        'header_cell': ParagraphStyle(
+            'ReportHeaderCell', parent=styles['BodyText'], fontSize=8, leading=10,
+            textColor='#ffffff', fontName='Helvetica-Bold'
+        ),
+    }
+
+
+class ReportService:
+    """Service for generating report files"""
+
+    CONTENT_TYPES = {
+        'pdf': 'application/pdf',
+        'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'csv': 'text/csv',
+    }
+    EXTENSIONS = {'pdf': 'pdf', 'excel': 'xlsx', 'csv': 'csv'}
+
+    # Pending reports are normally queued on commit; only older ones are swept
+    PENDING_GRACE = timedelta(minutes=5)
+    # A worker that has not finished a report in this time is assumed dead
+    GENERATING_TIMEOUT = timedelta(minutes=30)
+    # Reports still unfinished this long after creation are failed, not retried
+    MAX_AGE = timedelta(days=1)
+    SWEEP_LIMIT = 1000
+    SWEEP_BATCH_SIZE = 100
+
+    # Batching
+
+    @staticmethod
+    def sections_for(report: Report) -> Tuple[str, ...]:
+        """Provider keys of a report's sections: its template's list, or its type's default"""
+        configured = report.template.sections if report.template_id else None
+        if isinstance(configured, dict):
+            configured = [key for key, enabled in configured.items() if enabled]
+        if configured:
+            keys = tuple(key for key in configured if key in PROVIDERS)
+        else:
+            keys = REPORT_SECTIONS.get(report.report_type, ())
+        if not keys:
+            raise ValueError(f'No report sections configured for {report.get_report_type_display()}')
+        return keys
+
+    @staticmethod
+    def batch_key(report: Report) -> Tuple:
+        """Reports with the same key can share one provider load"""
+        return (
+            report.report_type,
+            str(report.classroom_id),
+            str(report.template_id),
+            json.dumps(report.parameters, sort_keys=True, default=str),
+        )
+
+    @staticmethod
+    def _date(parameters: Dict, key: str) -> Optional[date]:
+        value = parameters.get(key)
+        if not value:
+            return None
+        parsed = parse_date(str(value))
+        if parsed is None:
+            raise ValueError(f'{key} must be a date (YYYY-MM-DD), got {value!r}')
+        return parsed
+
+    @classmethod
+    def scope_for(cls, report: Report, student_ids: Iterable) -> ReportScope:
+        parameters = report.parameters or {}
+        return ReportScope(
+            student_ids=tuple(student_ids),
+            classroom_id=report.classroom_id,
+            date_from=cls._date(parameters, 'date_from'),
+            date_to=cls._date(parameters, 'date_to'),
+            academic_year=parameters.get('academic_year') or None,
+            semester=parameters.get('semester') or None,
+        )
+
+    # Result cache
+
+    @staticmethod
+    def watermarks(keys: Sequence[str], scope: ReportScope) -> Dict[str, Dict]:
+        return {key: PROVIDERS[key].watermarks(scope) for key in keys}
+
+    @staticmethod
+    def content_hash(report: Report, keys: Sequence[str], scope: ReportScope, marks: Dict[str, Dict]) -> str:
+        if report.student_id:
+            watermark = {key: [marks[key].get(report.student_id), marks[key].get(None)] for key in keys}
+        else:
+            watermark = {key: sorted(marks[key].items(), key=lambda item: str(item[0])) for key in keys}
+        payload = {
+            'report_type': report.report_type,
+            'sections': list(keys),
+            'file_format': report.file_format,
+            'student': report.student_id,
+            'classroom': report.classroom_id,
+            # Normalized: only what generation reads, dates parsed
+            'parameters': {
+                'date_from': scope.date_from,
+                'date_to': scope.date_to,
+                'academic_year': scope.academic_year,
+                'semester': scope.semester,
+            },
+            'students': None if report.student_id else sorted(map(str, scope.student_ids)),
+            'watermark': watermark,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _reuse_cached(reports: List[Report]) -> List[Report]:
+        """
+        Give reports the file of a completed report with the same content_hash
+
+        Returns:
+            list: the reports that still have to be generated
+        """
+        cached = {}
+        for content_hash, name, size in Report.objects.filter(
+            content_hash__in={report.content_hash for report in reports},
+            status='completed'
+        ).exclude(file='').order_by('generated_at').values_list('content_hash', 'file', 'file_size'):
+            cached[content_hash] = (name, size)
+
+        missing = []
+        now = timezone.now()
+        for report in reports:
+            if report.content_hash not in cached:
+                missing.append(report)
+                continue
+            name, size = cached[report.content_hash]
+            report.file.name, report.file_size, report.status, report.generated_at = name, size, 'completed', now
+            Report.objects.filter(pk=report.pk).update(
+                file=name,
+                file_size=size,
+                content_hash=report.content_hash,
+                status='completed',
+                error_message='',
+                generated_at=now,
+                updated_at=now
+            )
+        return missing
+
+    @classmethod
+    def reuse_cached(cls, report: Report) -> bool:
+        """Complete a pending report from an identical earlier one whose data has not changed since"""
+        try:
+            keys = cls.sections_for(report)
+            scope = cls.scope_for(report, cls._student_names([report]))
+        except ValueError:
+            return False  # generation records the error
+        report.content_hash = cls.content_hash(report, keys, scope, cls.watermarks(keys, scope))
+        return not cls._reuse_cached([report])
+
+    @staticmethod
+    def claim(report_ids: Iterable) -> List[Report]:
+        """Move pending reports to generating; reports another worker claimed are skipped"""
+        with transaction.atomic():
+            claimed = list(
+                Report.objects.select_for_update(skip_locked=True)
+                .filter(pk__in=list(report_ids), status='pending')
+                .values_list('pk', flat=True)
+            )
+            Report.objects.filter(pk__in=claimed).update(
+                status='generating', error_message='', updated_at=timezone.now()
+            )
+        return list(Report.objects.filter(pk__in=claimed).select_related('template', 'student'))
+
+    @classmethod
+    def requeue_stale(cls, now: Optional[datetime] = None) -> int:
+        """
+        Queue reports whose generation was lost
+
+        Generating reports past GENERATING_TIMEOUT go back to pending, and
+        pending reports past PENDING_GRACE are queued again; scheduled ones
+        through deliver_scheduled_report, so they are still emailed to their
+        schedule's recipients. Reports older than MAX_AGE are failed instead.
+
+        Returns:
+            int: number of reports queued
+        """
+        from ..tasks import deliver_scheduled_report, generate_reports
+
+        now = now or timezone.now()
+        unfinished = Report.objects.filter(status__in=['pending', 'generating'])
+
+        unfinished.filter(created_at__lt=now - cls.MAX_AGE).update(
+            status='failed', error_message='Report generation did not finish', updated_at=now
+        )
+        # Dated back by the grace period, so the pass below queues them now
+        unfinished.filter(status='generating', updated_at__lt=now - cls.GENERATING_TIMEOUT).update(
+            status='pending', updated_at=now - cls.PENDING_GRACE
+        )
+
+        with transaction.atomic():
+            stale = list(
+                Report.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', updated_at__lte=now - cls.PENDING_GRACE)
+                .order_by('updated_at')
+                .values_list('pk', 'is_scheduled', 'schedule_id')[:cls.SWEEP_LIMIT]
+            )
+            # Not due again until this attempt has had its time
+            Report.objects.filter(pk__in=[pk for pk, _, _ in stale]).update(updated_at=now)
+
+            report_ids = [str(pk) for pk, is_scheduled, schedule_id in stale if not (is_scheduled and schedule_id)]
+            deliveries = [(str(pk), [str(schedule_id)]) for pk, is_scheduled, schedule_id in stale
+                          if is_scheduled and schedule_id]
+
+            def enqueue():
+                for start in range(0, len(report_ids), cls.SWEEP_BATCH_SIZE):
+                    generate_reports.delay(report_ids[start:start + cls.SWEEP_BATCH_SIZE])
+                for report_id, schedule_ids in deliveries:
+                    deliver_scheduled_report.delay(report_id, schedule_ids)
+
+            transaction.on_commit(enqueue)
+
+        if stale:
+            logger.warning(f"[REPORTS] Re-queued {len(stale)} stale reports")
+        return len(stale)
+
+    # Runners
+
+    @classmethod
+    def generate(cls, report_id) -> Optional[Report]:
+        reports = cls.generate_many([report_id])
+        return reports[0] if reports else None
+
+    @classmethod
+    def generate_many(cls, report_ids: Iterable) -> List[Report]:
+        """Generate pending reports, loading report data once per batch"""
+        reports = cls.claim(report_ids)
+        batches = defaultdict(list)
+        for report in reports:
+            batches[cls.batch_key(report)].append(report)
+        for batch in batches.values():
+            cls._generate_batch(batch)
+        return reports
+
+    @classmethod
+    def _generate_batch(cls, reports: List[Report]) -> None:
+        first = reports[0]
+        try:
+            keys = cls.sections_for(first)
+            classroom = None
+            if first.classroom_id:
+                classroom = Classroom.objects.select_related('subject').get(pk=first.classroom_id)
+            names = cls._student_names(reports)
+            scope = cls.scope_for(first, names)
+
+            # Watermarks are read before the data, so a file is never newer than its hash claims
+            marks = cls.watermarks(keys, scope)
+            for report in reports:
+                report.content_hash = cls.content_hash(report, keys, scope, marks)
+            reports = cls._reuse_cached(reports)
+            if not reports:
+                return
+
+            data = {key: PROVIDERS[key].load(scope) for key in keys}
+        except Exception as exc:
+            logger.exception(f"[REPORTS] Loading data for {len(reports)} reports failed")
+            for report in reports:
+                cls._fail(report, exc)
+            return
+
+        # Identical requests in one batch are rendered once
+        unique, duplicates = {}, []
+        for report in reports:
+            if report.content_hash in unique:
+                duplicates.append(report)
+            else:
+                unique[report.content_hash] = report
+
+        for report in unique.values():
+            try:
+                document = cls.build_document(report, keys, data, names, classroom)
+                content = cls.render(document, report.file_format)
+                cls._finish(report, content, cls.filename(report, classroom))
+            except Exception as exc:
+                logger.exception(f"[REPORTS] Report {report.pk} failed")
+                cls._fail(report, exc)
+        for report in cls._reuse_cached(duplicates):
+            cls._fail(report, ValueError('The identical report generated alongside it failed'))
+
+        logger.info(f"[REPORTS] Generated {len(reports)} {first.report_type} reports for {len(names)} students")
+
+    @staticmethod
+    def _student_names(reports: List[Report]) -> Dict:
+        """Display names of the batch's students, and of the roster when a report covers a classroom"""
+        student_ids = {report.student_id for report in reports if report.student_id}
+        classroom_ids = {report.classroom_id for report in reports if not report.student_id}
+        if None in classroom_ids:
+            raise ValueError('A report needs a student or a classroom')
+
+        students = User.objects.filter(pk__in=student_ids)
+        if classroom_ids:
+            students = students | User.objects.filter(pk__in=ClassroomEnrollment.objects.filter(
+                classroom_id__in=classroom_ids, is_active=True
+            ).values('student_id'))
+        return {
+            row['pk']: f"{row['first_name']} {row['last_name']}".strip() or row['email']
+            for row in students.order_by('last_name', 'first_name').values('pk', 'first_name', 'last_name', 'email')
+        }
+
+    @classmethod
+    def build_document(cls, report: Report, keys: Sequence[str], data: Dict[str, ProviderData],
+                       names: Dict, classroom: Optional[Classroom]) -> ReportDocument:
+        parameters = report.parameters or {}
+        period = ' '.join(filter(None, [parameters.get('academic_year'), parameters.get('semester')]))
+        if parameters.get('date_from') or parameters.get('date_to'):
+            period = f"{parameters.get('date_from') or '...'} to {parameters.get('date_to') or '...'}"
+
+        facts = []
+        if report.student_id:
+            facts.append(('Student', names.get(report.student_id)))
+        if classroom:
+            facts.append(('Classroom', str(classroom)))
+        facts += [('Period', period or 'All time'), ('Generated', timezone.now().strftime('%Y-%m-%d %H:%M'))]
+
+        if report.student_id:
+            sections = [PROVIDERS[key].student_section(data[key], report.student_id) for key in keys]
+        else:
+            sections = [PROVIDERS[key].classroom_section(data[key], names) for key in keys]
+
+        return ReportDocument(report.get_report_type_display(), facts, sections)
+
+    @classmethod
+    def filename(cls, report: Report, classroom: Optional[Classroom] = None) -> str:
+        target = report.student.get_full_name() if report.student_id else str(classroom or '')
+        return (
+            f'{report.report_type}-{slugify(target) or "report"}-'
+            f'{report.created_at:%Y%m%d-%H%M%S}.{cls.EXTENSIONS[report.file_format]}'
+        )
+
+    @staticmethod
+    def _finish(report: Report, content: bytes, filename: str) -> None:
+        now = timezone.now()
+        report.file.save(filename, ContentFile(content), save=False)
+        report.file_size, report.status, report.generated_at = len(content), 'completed', now
+        Report.objects.filter(pk=report.pk).update(
+            file=report.file.name,
+            file_size=len(content),
+            content_hash=report.content_hash,
+            status='completed',
+            generated_at=now,
+            updated_at=now
+        )
+
+    @staticmethod
+    def _fail(report: Report, exc: Exception) -> None:
+        report.status, report.error_message = 'failed', str(exc)
+        Report.objects.filter(pk=report.pk).update(
+            status='failed', error_message=str(exc), updated_at=timezone.now()
+        )
+
+    # Renderers
+
+    @classmethod
+    def render(cls, document: ReportDocument, file_format: str) -> bytes:
+        if file_format == 'pdf':
+            return cls.render_pdf(document)
+        if file_format == 'excel':
+            return cls.render_xlsx(document)
+        if file_format == 'csv':
+            return cls.render_csv(document)
+        raise ValueError(f'Unsupported file_format: {file_format}')
+
+    @staticmethod
+    def _lines(document: ReportDocument) -> Iterator[list]:
+        """The document as spreadsheet rows: facts, then each section's facts and table"""
+        yield [document.title]
+        for label, value in document.facts:
+            yield [label, value]
+        for section in document.sections:
+            yield []
+            yield [section.title]
+            for label, value in section.facts:
+                yield [label, value]
+            if section.headers and section.rows:
+                yield list(section.headers)
+                for row in section.rows:
+                    yield list(row)
+
+    @classmethod
+    def render_csv(cls, document: ReportDocument) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for line in cls._lines(document):
+            writer.writerow(['' if value is None else value for value in line])
+        return buffer.getvalue().encode('utf-8')
+
+    @classmethod
+    def render_xlsx(cls, document: ReportDocument) -> bytes:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Report')
+        for line in cls._lines(document):
+            sheet.append(line)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def render_pdf(document: ReportDocument) -> bytes:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+        from xml.sax.saxutils import escape
+
+        styles = _pdf_styles()
+        margin = 48
+        width = A4[0] - 2 * margin
+
+        def cell(value, style='cell'):
+            return Paragraph(escape(_text(value)), styles[style])
+
+        def facts_table(facts):
+            table = Table(
+                [[cell(label), cell(value)] for label, value in facts],
+                colWidths=[140, width - 140],
+                hAlign='LEFT'
+            )
+            table.setStyle(TableStyle([
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ]))
+            return table
+
+        story = [Paragraph(escape(document.title), styles['title']), facts_table(document.facts)]
+        for section in document.sections:
+            story.append(Paragraph(escape(section.title), styles['heading']))
+            if section.facts:
+                story.append(facts_table(section.facts))
+            if section.headers and section.rows:
+                story.append(Spacer(1, 6))
+                table = Table(
+                    [[cell(header, 'header_cell') for header in section.headers]]
+                    + [[cell(value) for value in row] for row in section.rows],
+                    colWidths=[width / len(section.headers)] * len(section.headers),
+                    repeatRows=1,
+                    hAlign='LEFT'
+                )
+                table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f4f6f8')]),
+                    ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#c8ced3')),
+                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ]))
+                story.append(table)
+
+        buffer = io.BytesIO()
+        SimpleDocTemplate(
+            buffer, pagesize=A4, title=document.title,
+            rightMargin=margin, leftMargin=margin, topMargin=margin, bottomMargin=36
+        ).build(story)
+        return buffer.getvalue()
@@ -0,0 +1,215 @@
+"""
+Report Schedule Service
+
+A beat task scans for active schedules whose next_run_date has passed.
+Due schedules are claimed with SELECT ... FOR UPDATE SKIP LOCKED, their
+next_run_date is moved past now, and the Reports for the run are created,
+all in one transaction. A second scanner running at the same time skips
+the locked rows, and once the transaction commits they are no longer
+due, so every run is generated exactly once however many workers scan.
+
+Schedules due together for the same template, classroom and reporting
+period are coalesced into one Report, generated once and emailed to the
+recipients of all of them.
+"""
+
+import calendar
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Report, ReportSchedule
+from .report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """value moved by whole months, clamping the day to the end of shorter months"""
+    index = value.year * 12 + value.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+class ReportScheduleService:
+    """Service for running report schedules"""
+
+    BATCH_SIZE = 100
+    MAX_ATTACHMENT_SIZE = 10 * 1024 * 1024
+
+    MONTHS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+    DAYS = {'daily': 1, 'weekly': 7}
+
+    @classmethod
+    def shift(cls, value: datetime, frequency: str, steps: int = 1) -> datetime:
+        """value moved by steps periods of frequency"""
+        if frequency in cls.DAYS:
+            return value + timedelta(days=cls.DAYS[frequency] * steps)
+        if frequency in cls.MONTHS:
+            return add_months(value, cls.MONTHS[frequency] * steps)
+        raise ValueError(f'Unknown schedule frequency: {frequency}')
+
+    @classmethod
+    def next_run(cls, schedule: ReportSchedule, now: datetime) -> datetime:
+        """The first run after now; runs missed while the scanner was down are skipped, not replayed"""
+        next_run = cls.shift(schedule.next_run_date, schedule.frequency)
+        while next_run <= now:
+            next_run = cls.shift(next_run, schedule.frequency)
+        return next_run
+
+    @classmethod
+    def period(cls, frequency: str, now: datetime) -> Dict:
+        """Report parameters covering the period since the previous run"""
+        return {
+            'date_from': cls.shift(now, frequency, -1).date().isoformat(),
+            'date_to': now.date().isoformat(),
+        }
+
+    @staticmethod
+    def file_format(schedule: ReportSchedule) -> str:
+        file_format = (schedule.template.layout_config or {}).get('file_format')
+        return file_format if file_format in dict(Report.FILE_FORMAT_CHOICES) else 'pdf'
+
+    # Scanning
+
+    @classmethod
+    def run_due(cls, now: Optional[datetime] = None) -> int:
+        """
+        Claim due schedules a batch at a time and queue their reports
+
+        Returns:
+            int: number of schedules run
+        """
+        now = now or timezone.now()
+        total = 0
+        while True:
+            claimed, more = cls._claim_batch(now)
+            total += claimed
+            if not more:
+                break
+        if total:
+            logger.info(f"[REPORTS] Ran {total} due report schedules")
+        return total
+
+    @staticmethod
+    def _group_key(schedule: ReportSchedule):
+        return schedule.template_id, schedule.classroom_id, schedule.frequency
+
+    @classmethod
+    def _claim_batch(cls, now: datetime):
+        """
+        Claim and run one batch of due schedules
+
+        Returns:
+            tuple: (schedules run, whether more may be due)
+        """
+        with transaction.atomic():
+            schedules = list(
+                ReportSchedule.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('template')
+                .filter(is_active=True, next_run_date__lte=now)
+                # Keep schedules that can be coalesced in the same batch
+                .order_by('template_id', 'classroom_id', 'frequency', 'next_run_date')[:cls.BATCH_SIZE]
+            )
+            more = len(schedules) == cls.BATCH_SIZE
+            if more:
+                # The last group may go on past the batch; leave it whole for the next
+                # one, unless it is all the batch holds
+                last = cls._group_key(schedules[-1])
+                schedules = [
+                    schedule for schedule in schedules if cls._group_key(schedule) != last
+                ] or schedules
+
+            for schedule in schedules:
+                schedule.last_run_date = schedule.updated_at = now
+                schedule.next_run_date = cls.next_run(schedule, now)
+            ReportSchedule.objects.bulk_update(schedules, ['last_run_date', 'next_run_date', 'updated_at'])
+
+            groups = defaultdict(list)
+            for schedule in schedules:
+                groups[cls._group_key(schedule)].append(schedule)
+            for group in groups.values():
+                cls._queue_run(group, now)
+        return len(schedules), more
+
+    @classmethod
+    def _queue_run(cls, schedules: List[ReportSchedule], now: datetime) -> Report:
+        """One Report for schedules sharing a template, classroom and period; delivered after commit"""
+        from ..tasks import deliver_scheduled_report
+
+        first = schedules[0]
+        report = Report.objects.create(
+            report_type=first.template.report_type,
+            template=first.template,
+            classroom_id=first.classroom_id,
+            file_format=cls.file_format(first),
+            parameters=cls.period(first.frequency, now),
+            generated_by=first.created_by,
+            is_scheduled=True,
+            schedule=first,
+            status='pending'
+        )
+        schedule_ids = [str(schedule.pk) for schedule in schedules]
+        transaction.on_commit(lambda: deliver_scheduled_report.delay(str(report.pk), schedule_ids))
+        return report
+
+    @classmethod
+    def run_now(cls, schedule: ReportSchedule) -> Report:
+        """Queue a run of one schedule outside its timetable; next_run_date is left as it is"""
+        with transaction.atomic():
+            return cls._queue_run([schedule], timezone.now())
+
+    # Delivery
+
+    @classmethod
+    def deliver(cls, report_id, schedule_ids: Iterable) -> int:
+        """
+        Generate a scheduled report and email it to its schedules' recipients
+
+        Returns:
+            int: number of emails sent
+        """
+        report = ReportService.generate(report_id) or Report.objects.get(pk=report_id)
+        if report.status != 'completed':
+            logger.warning(f"[REPORTS] Scheduled report {report.pk} is {report.status}: {report.error_message}")
+            return 0
+
+        schedules = list(ReportSchedule.objects.filter(pk__in=list(schedule_ids)).order_by('name'))
+        recipients = []
+        for schedule in schedules:
+            for address in schedule.recipients or []:
+                if isinstance(address, str) and '@' in address and address not in recipients:
+                    recipients.append(address)
+        if not recipients:
+            return 0
+
+        filename = report.file.name.rsplit('/', 1)[-1]
+        subject = f"{', '.join(schedule.name for schedule in schedules)}: {report.get_report_type_display()}"
+        body = (
+            f"Your scheduled {report.get_report_type_display().lower()} for "
+            f"{report.parameters.get('date_from')} to {report.parameters.get('date_to')} is ready."
+        )
+        content = None
+        if report.file_size <= cls.MAX_ATTACHMENT_SIZE:
+            with report.file.open('rb') as handle:
+                content = handle.read()
+        else:
+            body += ' It is too large to attach; download it from Reports.'
+
+        # One message per address, so recipients of different schedules never see each other
+        messages = []
+        for address in recipients:
+            message = EmailMessage(subject=subject, body=body, to=[address])
+            if content is not None:
+                message.attach(filename, content, ReportService.CONTENT_TYPES[report.file_format])
+            messages.append(message)
+
+        with get_connection() as connection:
+            sent = connection.send_messages(messages) or 0
+        logger.info(f"[REPORTS] Emailed scheduled report {report.pk} to {sent} recipients")
+        return sent
@@ -0,0 +1,61 @@
+"""
+Celery tasks for reports app
+"""
+
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def run_data_export(export_id):
+    """Write a DataExport file to storage; the record tracks status, rows and size"""
+    from .services.export_service import DataExportService
+
+    DataExportService.generate(export_id)
+
+
+@shared_task(ignore_result=True)
+def generate_report(report_id):
+    """Build a pending Report's file"""
+    from .services.report_service import ReportService
+
+    ReportService.generate(report_id)
+
+
+@shared_task(ignore_result=True)
+def generate_reports(report_ids):
+    """Build a batch of pending Reports, sharing data loads between reports that differ only in their student"""
+    from .services.report_service import ReportService
+
+    ReportService.generate_many(report_ids)
+
+
+@shared_task(ignore_result=True)
+def requeue_stale_reports():
+    """
+    Queue pending reports nobody claimed and generating reports whose worker died
+
+    Scheduled every minute by CELERY_BEAT_SCHEDULE
+    """
+    from .services.report_service import ReportService
+
+    return ReportService.requeue_stale()
+
+
+@shared_task(ignore_result=True)
+def run_due_report_schedules():
+    """
+    Queue the reports of schedules whose next_run_date has passed
+
+    Scheduled every minute by CELERY_BEAT_SCHEDULE
+    """
+    from .services.schedule_service import ReportScheduleService
+
+    return ReportScheduleService.run_due()
+
+
+@shared_task(ignore_result=True)
+def deliver_scheduled_report(report_id, schedule_ids):
+    """Generate a scheduled report and email it to the recipients of its schedules"""
+    from .services.schedule_service import ReportScheduleService
+
+    return ReportScheduleService.deliver(report_id, schedule_ids)
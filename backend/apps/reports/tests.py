@@ -0,0 +1,481 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.assessments.models import Quiz, QuizAttempt
+from apps.assignments.models import Assignment, AssignmentGrade, AssignmentSubmission
+from apps.attendance.models import AttendanceRecord, AttendanceSession
+from apps.performance.models import StudentGrade, SubjectPerformance
+from apps.reports.models import DataExport, Report, ReportSchedule, ReportTemplate
+from apps.reports.services.export_service import DataExportService
+from apps.reports.services.report_providers import (
+    AttendanceProvider, ClassroomSummaryProvider, GradesProvider, ReportScope, StudentProgressProvider
+)
+from apps.reports.services.report_service import ReportService
+from apps.reports.services.schedule_service import ReportScheduleService
+from apps.schools.models import AcademicYear, Classroom, ClassroomEnrollment, School, Subject
+
+User = get_user_model()
+
+
+class ReportTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com', password='password', role='teacher'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='password', role='student',
+            first_name='Asha', last_name='Rao'
+        )
+        school = School.objects.create(
+            name='Test School', code='TEST01',
+            city='Test City', state='Test State', pincode='123456',
+            email='school@test.com', principal_name='Principal', established_year=2000
+        )
+        academic_year = AcademicYear.objects.create(
+            school=school, name='2025-2026',
+            start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        self.classroom = Classroom.objects.create(
+            school=school, academic_year=academic_year, subject=subject,
+            grade=5, section='A', class_code='TESTCLASS01', teacher=self.teacher
+        )
+
+    def report(self, **fields):
+        fields.setdefault('report_type', 'attendance_report')
+        fields.setdefault('student', self.student)
+        fields.setdefault('file_format', 'csv')
+        fields.setdefault('generated_by', self.teacher)
+        return Report.objects.create(**fields)
+
+    def age(self, report, **fields):
+        Report.objects.filter(pk=report.pk).update(**fields)
+
+    def use_temporary_media(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ScheduleTestMixin:
+    def make_template(self):
+        self.template = ReportTemplate.objects.create(
+            name='Class performance', report_type='class_performance', layout_config={'file_format': 'csv'}
+        )
+
+    def schedule(self, name, frequency='weekly', due_by=timedelta(minutes=5), **fields):
+        fields.setdefault('classroom', self.classroom)
+        fields.setdefault('recipients', [f'{name.lower()}@example.com'])
+        return ReportSchedule.objects.create(
+            name=name, template=self.template, frequency=frequency,
+            next_run_date=self.now - due_by, created_by=self.teacher, **fields
+        )
+
+
+class ReportRequeueTests(ReportTestCase):
+    def test_requeue_stale(self):
+        now = timezone.now()
+        fresh_pending = self.report()
+        lost_pending = self.report()
+        self.age(lost_pending, updated_at=now - timedelta(minutes=10))
+        dead_worker = self.report(status='generating')
+        self.age(dead_worker, updated_at=now - timedelta(hours=1))
+        busy_worker = self.report(status='generating')
+        abandoned = self.report()
+        self.age(abandoned, created_at=now - timedelta(days=2), updated_at=now - timedelta(days=2))
+
+        with mock.patch('apps.reports.tasks.generate_reports.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(ReportService.requeue_stale(now), 2)
+        queued = [report_id for call in delay.call_args_list for report_id in call.args[0]]
+        self.assertCountEqual(queued, [str(lost_pending.pk), str(dead_worker.pk)])
+
+        statuses = dict(Report.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[fresh_pending.pk], 'pending')
+        self.assertEqual(statuses[dead_worker.pk], 'pending')
+        self.assertEqual(statuses[busy_worker.pk], 'generating')
+        self.assertEqual(statuses[abandoned.pk], 'failed')
+
+        # Queued reports get their time before the next sweep
+        with mock.patch('apps.reports.tasks.generate_reports.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(ReportService.requeue_stale(now + timedelta(minutes=1)), 0)
+        delay.assert_not_called()
+
+
+class ReportReuseTests(ReportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temporary_media()
+        session = AttendanceSession.objects.create(
+            classroom=self.classroom, teacher=self.teacher, date='2025-06-02'
+        )
+        self.record = AttendanceRecord.objects.create(session=session, student=self.student, status='present')
+
+        patcher = mock.patch.object(ReportService, 'render', wraps=ReportService.render)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self, **fields):
+        fields.setdefault('classroom', self.classroom)
+        report = ReportService.generate(self.report(**fields).pk)
+        self.assertEqual(report.status, 'completed', report.error_message)
+        return report
+
+    def test_unchanged_data_reuses_file(self):
+        first = self.generate()
+        # A parameter generation never reads does not change the hash
+        second = self.generate(parameters={'requested_from': 'dashboard'})
+        self.assertEqual(second.content_hash, first.content_hash)
+        self.assertEqual(Report.objects.get(pk=second.pk).file.name, first.file.name)
+        self.assertEqual(self.render.call_count, 1)
+
+        self.assertTrue(ReportService.reuse_cached(self.report(classroom=self.classroom)))
+        self.assertEqual(self.render.call_count, 1)
+
+    def test_changes_invalidate(self):
+        first = self.generate()
+
+        other_format = self.generate(file_format='excel')
+        self.assertNotEqual(other_format.content_hash, first.content_hash)
+
+        self.record.status = 'absent'
+        self.record.save()
+        self.assertFalse(ReportService.reuse_cached(self.report(classroom=self.classroom)))
+        changed = self.generate()
+        self.assertNotIn(changed.content_hash, {first.content_hash, other_format.content_hash})
+
+        self.record.delete()
+        deleted = self.generate()
+        self.assertNotEqual(deleted.content_hash, changed.content_hash)
+        self.assertEqual(self.render.call_count, 4)
+
+
+class ReportProviderTests(ReportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temporary_media()
+        self.other = User.objects.create_user(
+            email='other@example.com', password='password', role='student',
+            first_name='Ben', last_name='Iyer'
+        )
+        self.names = {self.student.pk: 'Asha Rao', self.other.pk: 'Ben Iyer'}
+        for student in (self.student, self.other):
+            ClassroomEnrollment.objects.create(classroom=self.classroom, student=student)
+
+        for day, statuses in [('2025-06-02', ('present', 'absent')), ('2025-06-03', ('late', 'present'))]:
+            session = AttendanceSession.objects.create(classroom=self.classroom, teacher=self.teacher, date=day)
+            for student, status in zip((self.student, self.other), statuses):
+                AttendanceRecord.objects.create(session=session, student=student, status=status)
+
+        assignment = Assignment.objects.create(
+            title='Fractions', created_by=self.teacher, classroom=self.classroom,
+            due_date=timezone.now(), is_published=True
+        )
+        for student, score, published in [(self.student, 8, True), (self.other, 6, True)]:
+            submission = AssignmentSubmission.objects.create(assignment=assignment, student=student, status='graded')
+            AssignmentGrade.objects.create(submission=submission, score=score, max_score=10, is_published=published)
+        quiz = Quiz.objects.create(classroom=self.classroom, teacher=self.teacher, title='Decimals')
+        QuizAttempt.objects.create(quiz=quiz, student=self.student, status='graded', percentage=90)
+        # Not graded yet, so left out
+        QuizAttempt.objects.create(quiz=quiz, student=self.other, status='in_progress', percentage=10)
+
+        StudentGrade.objects.create(
+            student=self.student, classroom=self.classroom, academic_year='2025-2026',
+            overall_percentage=85, overall_grade='A', gpa='3.60', class_rank=1, total_students=2,
+            is_honor_roll=True, teacher_comments='Steady work'
+        )
+        SubjectPerformance.objects.create(
+            student=self.student, subject=self.classroom.subject, classroom=self.classroom,
+            academic_year='2025-2026', overall_score=85, letter_grade='A', trend='improving'
+        )
+
+        self.scope = ReportScope((self.student.pk, self.other.pk), self.classroom.pk)
+
+    def test_grades_sections(self):
+        data = GradesProvider.load(self.scope)
+
+        section = GradesProvider.student_section(data, self.student.pk)
+        self.assertEqual(section.facts, [('Assignment average', 80), ('Quiz average', 90)])
+        self.assertEqual(section.rows, [['Test Subject', 1, 80, 80, 80, 1, 90]])
+        self.assertEqual(
+            GradesProvider.student_section(data, self.other.pk).rows, [['Test Subject', 1, 60, 60, 60, 0, None]]
+        )
+        self.assertEqual(
+            GradesProvider.student_section(data, self.teacher.pk).facts,
+            [('Grades', 'No published grades in this period')]
+        )
+
+        section = GradesProvider.classroom_section(data, self.names)
+        self.assertEqual(section.facts, [('Class assignment average', 70), ('Class quiz average', 90)])
+        self.assertEqual(section.rows, [['Asha Rao', 1, 80, 1, 90], ['Ben Iyer', 1, 60, 0, None]])
+
+    def test_attendance_sections(self):
+        data = AttendanceProvider.load(self.scope)
+
+        section = AttendanceProvider.student_section(data, self.student.pk)
+        self.assertEqual(
+            section.facts,
+            [('Sessions', 2), ('Attendance rate (%)', 100),
+             ('Present', 1), ('Absent', 0), ('Late', 1), ('Excused', 0), ('Sick', 0)]
+        )
+        self.assertEqual(
+            AttendanceProvider.student_section(data, self.teacher.pk).facts,
+            [('Attendance', 'No sessions recorded in this period')]
+        )
+
+        section = AttendanceProvider.classroom_section(data, self.names)
+        self.assertEqual(section.facts, [('Sessions recorded', 4), ('Attendance rate (%)', 75)])
+        self.assertEqual(section.rows, [['Asha Rao', 2, 100, 1, 0, 1, 0, 0], ['Ben Iyer', 2, 50, 1, 1, 0, 0, 0]])
+
+    def test_progress_sections(self):
+        data = StudentProgressProvider.load(self.scope)
+
+        section = StudentProgressProvider.student_section(data, self.student.pk)
+        self.assertEqual(dict(section.facts)['Period'], '2025-2026 full_year')
+        self.assertEqual(dict(section.facts)['Class rank'], '1 of 2')
+        self.assertEqual(dict(section.facts)['Honor roll'], 'Yes')
+        self.assertEqual(section.rows, [['2025-2026', 'Test Subject', 85, 'A', 'improving', '', '']])
+        self.assertEqual(
+            StudentProgressProvider.student_section(data, self.other.pk).facts,
+            [('Progress', 'No term results recorded yet')]
+        )
+
+        section = StudentProgressProvider.classroom_section(data, self.names)
+        self.assertEqual(section.facts, [('Average GPA', Decimal('3.60'))])
+        self.assertEqual(section.rows, [['Asha Rao', 85, 'A', Decimal('3.60'), 1], ['Ben Iyer', None, None, None, None]])
+
+    def test_classroom_sections(self):
+        data = ClassroomSummaryProvider.load(self.scope)
+
+        facts = [('Students enrolled', 2), ('Assignments set', 1), ('Quizzes set', 1), ('Class average (%)', 70)]
+        section = ClassroomSummaryProvider.student_section(data, self.other.pk)
+        self.assertEqual(section.facts, facts + [('Student average (%)', 60), ('Rank', '2 of 2')])
+
+        section = ClassroomSummaryProvider.classroom_section(data, self.names)
+        self.assertEqual(section.facts, facts)
+        self.assertEqual(section.rows, [[1, 'Asha Rao', 80], [2, 'Ben Iyer', 60]])
+
+    def provider_queries(self, reports):
+        """Queries generate_many ran against provider tables, for the watermarks and the data load"""
+        tables = {
+            model._meta.db_table
+            for model in (AssignmentGrade, QuizAttempt, AttendanceRecord, StudentGrade, SubjectPerformance)
+        }
+        with CaptureQueriesContext(connection) as queries:
+            generated = ReportService.generate_many([report.pk for report in reports])
+        self.assertEqual({report.status for report in generated}, {'completed'})
+        return [query['sql'] for query in queries if any(f'"{table}"' in query['sql'] for table in tables)]
+
+    def test_batch_shares_one_provider_load(self):
+        def report_card(student, file_format):
+            return self.report(
+                report_type='student_report_card', student=student, classroom=self.classroom,
+                file_format=file_format, parameters={'academic_year': '2025-2026'}
+            )
+
+        one = self.provider_queries([report_card(self.student, 'csv')])
+        # Another format, so the batch cannot reuse the first file
+        batch = self.provider_queries([report_card(self.student, 'excel'), report_card(self.other, 'excel')])
+        self.assertTrue(one)
+        self.assertEqual(len(batch), len(one))
+
+
+class DataExportTests(ReportTestCase):
+    HEADER = ['Date', 'Session', 'Student Email', 'First Name', 'Last Name', 'Status', 'Arrival Time', 'Notes']
+
+    def setUp(self):
+        super().setUp()
+        self.use_temporary_media()
+        for day, status, notes in [('2025-06-02', 'present', 'Came in, "early"'), ('2025-06-03', 'absent', '')]:
+            session = AttendanceSession.objects.create(classroom=self.classroom, teacher=self.teacher, date=day)
+            AttendanceRecord.objects.create(session=session, student=self.student, status=status, notes=notes)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def generate(self, file_format):
+        export = DataExport.objects.create(
+            export_type='attendance', name='Attendance Export', file_format=file_format,
+            filters={'classroom_id': str(self.classroom.pk)}, exported_by=self.teacher
+        )
+        DataExportService.generate(export.pk)
+        export.refresh_from_db()
+        self.assertEqual((export.status, export.row_count), ('completed', 2))
+        with export.file.open('rb') as handle:
+            content = handle.read()
+        self.assertEqual(export.file_size, len(content))
+        return content
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.generate('csv').decode('utf-8'))))
+        self.assertEqual(rows[0], self.HEADER)
+        self.assertEqual(
+            rows[1], ['2025-06-02', 'full_day', 'student@example.com', 'Asha', 'Rao', 'present', '', 'Came in, "early"']
+        )
+        self.assertEqual(len(rows), 3)
+
+    def test_json(self):
+        rows = json.loads(self.generate('json'))
+        self.assertEqual([row['status'] for row in rows], ['present', 'absent'])
+        self.assertEqual(rows[0]['date'], '2025-06-02')
+
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        with mock.patch.object(DataExportService, 'XLSX_MAX_ROWS', 2):
+            content = self.generate('excel')
+        workbook = load_workbook(io.BytesIO(content), read_only=True)
+        # Each sheet repeats the header and holds one row under the patched limit
+        self.assertEqual(len(workbook.worksheets), 2)
+        rows = [row for sheet in workbook.worksheets for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(list(rows[0]), self.HEADER)
+        self.assertEqual([row[5] for row in rows], ['Status', 'present', 'Status', 'absent'])
+
+    def export(self, path='export_attendance', **payload):
+        return self.client.post(
+            f'/api/v1/reports/exports/{path}/', {'classroom_id': str(self.classroom.pk), **payload}, format='json'
+        )
+
+    def test_streamed_export_records_counts(self):
+        with mock.patch.object(DataExportService, 'LINES_PER_YIELD', 1):
+            response = self.export(file_format='json', stream=True, filters={'date_from': '2025-06-03'})
+            self.assertEqual(response.status_code, 200)
+            body = b''.join(response.streaming_content)
+        self.assertEqual([row['status'] for row in json.loads(body)], ['absent'])
+
+        export = DataExport.objects.get()
+        self.assertEqual((export.status, export.row_count, export.file_size), ('completed', 1, len(body)))
+        self.assertEqual(export.filters, {'classroom_id': str(self.classroom.pk), 'date_from': '2025-06-03'})
+
+    def test_failed_stream_is_recorded(self):
+        with mock.patch.object(DataExportService, '_counted_rows', side_effect=RuntimeError('connection lost')):
+            response = self.export(file_format='csv', stream=True)
+            with self.assertRaises(RuntimeError):
+                b''.join(response.streaming_content)
+        self.assertEqual(
+            DataExport.objects.values_list('status', 'error_message').get(), ('failed', 'connection lost')
+        )
+
+    def test_invalid_filters_are_rejected_before_the_export_starts(self):
+        response = self.export(file_format='csv', stream=True, filters={'date_from': 'last week'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_from', response.data['filters'])
+
+        response = self.export('export_grades', file_format='csv', stream=True, filters={'assignment_id': '42'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assignment_id', response.data['filters'])
+
+        self.assertEqual(self.export(file_format='csv', filters={'status': 'asleep'}).status_code, 400)
+        self.assertEqual(self.export(file_format='csv', classroom_id='abc').status_code, 400)
+        self.assertFalse(DataExport.objects.exists())
+
+
+class ReportScheduleTests(ScheduleTestMixin, ReportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.make_template()
+
+    def run_due(self, now):
+        with mock.patch('apps.reports.tasks.deliver_scheduled_report.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                count = ReportScheduleService.run_due(now)
+        return count, {report_id: sorted(ids) for report_id, ids in (call.args for call in delay.call_args_list)}
+
+    def test_due_schedules_coalesce_and_run_once(self):
+        head = self.schedule('Head')
+        office = self.schedule('Office')
+        # Missed three weeks while the scanner was down
+        late = self.schedule('Late', due_by=timedelta(weeks=3, minutes=5))
+        monthly = self.schedule('Monthly', frequency='monthly')
+        future = self.schedule('Future', due_by=-timedelta(days=1))
+        paused = self.schedule('Paused', is_active=False)
+
+        with mock.patch.object(ReportScheduleService, 'BATCH_SIZE', 3):
+            count, queued = self.run_due(self.now)
+        self.assertEqual(count, 4)
+
+        reports = {report.schedule_id: report for report in Report.objects.filter(is_scheduled=True)}
+        self.assertEqual(len(reports), 2)
+        weekly = [schedule_ids for schedule_ids in queued.values() if len(schedule_ids) > 1]
+        self.assertEqual(weekly, [sorted(str(schedule.pk) for schedule in (head, office, late))])
+        self.assertIn([str(monthly.pk)], queued.values())
+
+        for schedule in (head, office, late, monthly):
+            schedule.refresh_from_db()
+            self.assertEqual(schedule.last_run_date, self.now)
+            self.assertGreater(schedule.next_run_date, self.now)
+            self.assertLessEqual(schedule.next_run_date, self.now + timedelta(days=31))
+        for schedule in (future, paused):
+            self.assertEqual(ReportSchedule.objects.get(pk=schedule.pk).next_run_date, schedule.next_run_date)
+
+        # Claimed schedules are no longer due
+        self.assertEqual(self.run_due(self.now), (0, {}))
+
+    def test_coalesced_run_emails_every_recipient_once(self):
+        self.use_temporary_media()
+        self.schedule('Head', recipients=['head@example.com', 'office@example.com'])
+        self.schedule('Office', recipients=['office@example.com', 'not an address'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(ReportScheduleService.run_due(self.now), 2)
+
+        report = Report.objects.get(is_scheduled=True)
+        self.assertEqual(report.status, 'completed')
+        self.assertCountEqual([message.to for message in mail.outbox], [['head@example.com'], ['office@example.com']])
+        self.assertTrue(all(message.attachments for message in mail.outbox))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'SKIP LOCKED needs PostgreSQL')
+class ReportScheduleClaimTests(ScheduleTestMixin, TransactionTestCase):
+    def setUp(self):
+        ReportTestCase.setUp(self)
+        self.now = timezone.now()
+        self.make_template()
+
+    def test_locked_schedules_are_skipped(self):
+        locked = self.schedule('Locked', classroom=None)
+        free = self.schedule('Free')
+        holding, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    ReportSchedule.objects.select_for_update().get(pk=locked.pk)
+                    holding.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(holding.wait(10))
+            with mock.patch('apps.reports.tasks.deliver_scheduled_report.delay'):
+                self.assertEqual(ReportScheduleService.run_due(self.now), 1)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(list(Report.objects.values_list('schedule_id', flat=True)), [free.pk])
+        with mock.patch('apps.reports.tasks.deliver_scheduled_report.delay'):
+            self.assertEqual(ReportScheduleService.run_due(self.now), 1)
+        self.assertEqual(Report.objects.count(), 2)
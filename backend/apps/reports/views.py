@@ -9,6 +9,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django.utils import timezone
+from django.db import transaction
 from django.http import FileResponse
 import os
 
@@ -18,6 +19,7 @@ from .serializers import (
     ReportScheduleSerializer, DataExportSerializer
 )
 from apps.core.permissions import IsTeacher
+from apps.schools.services.scope_service import UserScopeService
 
 
 class ReportTemplateViewSet(viewsets.ModelViewSet):
@@ -59,7 +61,7 @@ class ReportViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see their children's reports
-            children = user.children_relationships.values_list('student_id', flat=True)
+            children = UserScopeService.for_request(self.request).children_ids
             return Report.objects.filter(student_id__in=children)
         
         elif user.role == 'admin':
@@ -81,60 +83,193 @@ class ReportViewSet(viewsets.ModelViewSet):
         {
             "report_type": "student_report_card",
             "student_id": "uuid",
+            "classroom_id": "uuid",
             "template_id": "uuid" (optional),
             "file_format": "pdf",
             "parameters": {
                 "academic_year": "2025-2026",
-                "semester": "semester1"
+                "semester": "semester1",
+                "date_from": "2025-09-01",
+                "date_to": "2026-01-31"
             }
         }
+        
+        Without student_id the report covers the whole classroom. The report is built in the background; poll it until its status is
+        completed (or failed, with error_message), then download it.
         """
+        from .services.report_service import ReportService
+        from .tasks import generate_report
+        
         report_type = request.data.get('report_type')
         student_id = request.data.get('student_id')
         classroom_id = request.data.get('classroom_id')
-        template_id = request.data.get('template_id')
-        file_format = request.data.get('file_format', 'pdf')
-        parameters = request.data.get('parameters', {})
         
-        if not report_type:
+        error = self._validate_request(request, report_type)
+        if error:
+            return error
+        
+        if not student_id and not classroom_id:
             return Response(
-                {'error': 'report_type is required'},
+                {'error': 'student_id or classroom_id is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get template
-        template = None
-        if template_id:
-            try:
-                template = ReportTemplate.objects.get(id=template_id)
-            except ReportTemplate.DoesNotExist:
-                pass
+        if not self._can_report_on(request, student_id, classroom_id):
+            return Response(
+                {'error': 'You cannot generate reports for this student or classroom'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        # Create report record
         report = Report.objects.create(
             report_type=report_type,
-            template=template,
+            template=self._template(request),
             student_id=student_id,
             classroom_id=classroom_id,
-            file_format=file_format,
-            parameters=parameters,
+            file_format=request.data.get('file_format', 'pdf'),
+            parameters=request.data.get('parameters', {}),
             generated_by=request.user,
             status='pending'
         )
         
-        # TODO: Trigger async report generation with Celery
-        # generate_report_task.delay(report.id)
+        if ReportService.reuse_cached(report):
+            return Response({
+                'message': 'Report is ready',
+                'report_id': str(report.id),
+                'status': report.status
+            })
         
-        # For now, mark as processing
-        report.status = 'processing'
-        report.save()
+        transaction.on_commit(lambda: generate_report.delay(str(report.pk)))
         
         return Response({
             'message': 'Report generation started',
             'report_id': str(report.id),
-            'status': 'processing'
+            'status': report.status
         }, status=status.HTTP_202_ACCEPTED)
     
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsTeacher])
+    def generate_classroom(self, request):
+        """
+        Generate a report for every student enrolled in a classroom
+        
+        Takes the same payload as generate, with classroom_id instead of
+        student_id. The reports are built together, so the classroom's data
+        is read once rather than once per student.
+        """
+        from apps.schools.models import ClassroomEnrollment
+        from .tasks import generate_reports
+        
+        report_type = request.data.get('report_type')
+        classroom_id = request.data.get('classroom_id')
+        
+        error = self._validate_request(request, report_type)
+        if error:
+            return error
+        
+        if not classroom_id:
+            return Response(
+                {'error': 'classroom_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not self._can_report_on(request, None, classroom_id):
+            return Response(
+                {'error': 'You can only generate reports for your own classrooms'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        template = self._template(request)
+        student_ids = ClassroomEnrollment.objects.filter(
+            classroom_id=classroom_id,
+            is_active=True
+        ).values_list('student_id', flat=True)
+        reports = Report.objects.bulk_create([
+            Report(
+                report_type=report_type,
+                template=template,
+                student_id=student_id,
+                classroom_id=classroom_id,
+                file_format=request.data.get('file_format', 'pdf'),
+                parameters=request.data.get('parameters', {}),
+                generated_by=request.user,
+                status='pending'
+            )
+            for student_id in student_ids
+        ])
+        report_ids = [str(report.pk) for report in reports]
+        
+        if report_ids:
+            transaction.on_commit(lambda: generate_reports.delay(report_ids))
+        
+        return Response({
+            'message': f'Generating {len(report_ids)} reports',
+            'report_ids': report_ids
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    def _validate_request(self, request, report_type):
+        """400 response for an invalid generate payload, or None"""
+        if not report_type:
+            return Response(
+                {'error': 'report_type is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if report_type not in dict(Report.REPORT_TYPE_CHOICES):
+            return Response(
+                {'error': f'Unknown report_type: {report_type}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.data.get('file_format', 'pdf')
+        if file_format not in dict(Report.FILE_FORMAT_CHOICES):
+            return Response(
+                {'error': f'Unsupported file_format: {file_format}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not isinstance(request.data.get('parameters', {}), dict):
+            return Response(
+                {'error': 'parameters must be an object'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
+    
+    def _template(self, request):
+        template_id = request.data.get('template_id')
+        if not template_id:
+            return None
+        return ReportTemplate.objects.filter(id=template_id).first()
+    
+    def _can_report_on(self, request, student_id, classroom_id):
+        """Whether the user may see a report on this student and/or classroom"""
+        user = request.user
+        if user.role == 'admin':
+            return True
+        
+        scope = UserScopeService.for_request(request)
+        
+        if user.role == 'teacher':
+            # Teachers see reports through their classrooms
+            if not classroom_id or str(classroom_id) not in {str(pk) for pk in scope.taught_classroom_ids}:
+                return False
+            if student_id:
+                from apps.schools.models import ClassroomEnrollment
+                return ClassroomEnrollment.objects.filter(
+                    classroom_id=classroom_id,
+                    student_id=student_id
+                ).exists()
+            return True
+        
+        if user.role == 'student':
+            allowed_students = {str(user.id)}
+        elif user.role == 'parent':
+            allowed_students = {str(pk) for pk in scope.children_ids}
+        else:
+            return False
+        
+        if str(student_id) not in allowed_students:
+            return False
+        return not classroom_id or str(classroom_id) in {str(pk) for pk in scope.classroom_ids}
+    
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """Download generated report"""
@@ -203,16 +338,17 @@ class ReportScheduleViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def run_now(self, request, pk=None):
-        """Run scheduled report immediately"""
-        schedule = self.get_object()
+        """Run scheduled report immediately; the schedule's next run is unchanged"""
+        from .services.schedule_service import ReportScheduleService
         
-        # TODO: Trigger report generation
-        # run_scheduled_report.delay(schedule.id)
+        schedule = self.get_object()
+        report = ReportScheduleService.run_now(schedule)
         
         return Response({
             'message': 'Report generation triggered',
-            'schedule_id': str(schedule.id)
-        })
+            'schedule_id': str(schedule.id),
+            'report_id': str(report.id)
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 class DataExportViewSet(viewsets.ModelViewSet):
@@ -236,18 +372,35 @@ class DataExportViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def export_grades(self, request):
         """
-        Export grades to Excel/CSV
+        Export grades to Excel/CSV/JSON
         
         Payload:
         {
             "classroom_id": "uuid",
             "file_format": "excel",
+            "stream": false,
             "filters": {
-                "academic_year": "2025-2026",
-                "semester": "semester1"
+                "assignment_id": "uuid",
+                "date_from": "2025-09-01",
+                "date_to": "2026-06-30"
             }
         }
+        
+        The file is written in the background; poll the export until its
+        status is completed. CSV and JSON exports with "stream": true are
+        streamed back in the response instead.
         """
+        return self._start_export(request, 'grades', 'Grades Export')
+    
+    @action(detail=False, methods=['post'])
+    def export_attendance(self, request):
+        """Export attendance data (same payload as export_grades; filters: student_id, status, date_from, date_to)"""
+        return self._start_export(request, 'attendance', 'Attendance Export')
+    
+    def _start_export(self, request, export_type, label):
+        from .services.export_service import DataExportService
+        from .tasks import run_data_export
+        
         classroom_id = request.data.get('classroom_id')
         file_format = request.data.get('file_format', 'excel')
         filters = request.data.get('filters', {})
@@ -258,45 +411,53 @@ class DataExportViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create export record
-        export = DataExport.objects.create(
-            export_type='grades',
-            name=f'Grades Export - {timezone.now().strftime("%Y-%m-%d")}',
-            file_format=file_format,
-            filters=filters,
-            exported_by=request.user
-        )
-        
-        # TODO: Implement actual export logic with pandas/openpyxl
-        # export_grades_to_file.delay(export.id)
+        if not isinstance(filters, dict):
+            return Response(
+                {'error': 'filters must be an object'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response({
-            'message': 'Export started',
-            'export_id': str(export.id)
-        }, status=status.HTTP_202_ACCEPTED)
-    
-    @action(detail=False, methods=['post'])
-    def export_attendance(self, request):
-        """Export attendance data"""
-        classroom_id = request.data.get('classroom_id')
-        file_format = request.data.get('file_format', 'excel')
-        filters = request.data.get('filters', {})
+        if file_format not in dict(DataExport.FILE_FORMAT_CHOICES):
+            return Response(
+                {'error': f'Unsupported file_format: {file_format}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if not classroom_id:
+        # Checked here: a bad filter inside a streamed body would fail after the 200 was sent
+        filter_serializer = DataExportService.filter_serializer(
+            export_type, {**filters, 'classroom_id': classroom_id}
+        )
+        if not filter_serializer.is_valid():
             return Response(
-                {'error': 'classroom_id required'},
+                {'error': 'Invalid filters', 'filters': filter_serializer.errors},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        # Parsed and normalized, keeping only the filters that were given
+        filters = {
+            key: value for key, value in filter_serializer.data.items()
+            if key in filter_serializer.validated_data
+        }
+        
+        if request.user.role != 'admin':
+            taught = UserScopeService.for_request(request).taught_classroom_ids
+            if filters['classroom_id'] not in {str(pk) for pk in taught}:
+                return Response(
+                    {'error': 'You can only export your own classrooms'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
         
         export = DataExport.objects.create(
-            export_type='attendance',
-            name=f'Attendance Export - {timezone.now().strftime("%Y-%m-%d")}',
+            export_type=export_type,
+            name=f'{label} - {timezone.now().strftime("%Y-%m-%d")}',
             file_format=file_format,
             filters=filters,
             exported_by=request.user
         )
         
-        # TODO: Implement export
+        if request.data.get('stream') and file_format in DataExportService.STREAMABLE_FORMATS:
+            return DataExportService.stream_response(export)
+        
+        transaction.on_commit(lambda: run_data_export.delay(str(export.pk)))
         
         return Response({
             'message': 'Export started',
@@ -310,7 +471,7 @@ class DataExportViewSet(viewsets.ModelViewSet):
         
         if not export.file:
             return Response(
-                {'error': 'Export file not found'},
+                {'error': f'Export file not found (export is {export.status})'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
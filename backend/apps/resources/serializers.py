@@ -3,6 +3,7 @@ Serializers for resources app
 """
 
 from rest_framework import serializers
+from apps.schools.services.scope_service import UserScopeService
 from .models import Resource, ResourceCategory, ResourceDownload
 
 
@@ -80,17 +81,10 @@ class ResourceSerializer(serializers.ModelSerializer):
             return True
         
         # Classroom-specific
-        if obj.access_level == 'classroom_only' and obj.classroom:
-            from apps.schools.models import ClassroomEnrollment
-            if user.role == 'student':
-                return ClassroomEnrollment.objects.filter(
-                    classroom=obj.classroom, student=user, is_active=True
-                ).exists()
-            elif user.role == 'parent':
-                children = user.children_relationships.values_list('student_id', flat=True)
-                return ClassroomEnrollment.objects.filter(
-                    classroom=obj.classroom, student_id__in=children, is_active=True
-                ).exists()
+        if obj.access_level == 'classroom_only' and obj.classroom_id:
+            if user.role in ('student', 'parent'):
+                scope = UserScopeService.for_request(request)
+                return obj.classroom_id in scope.classroom_ids
         
         return False
     
@@ -18,8 +18,10 @@ from .serializers import (
     ResourceSerializer, ResourceListSerializer, ResourceCategorySerializer,
     ResourceDownloadSerializer
 )
+from apps.core.counters import DeferredCounter
 from apps.core.permissions import IsTeacher
-from apps.schools.models import ClassroomEnrollment
+from apps.core.pagination import FeedCursorPagination
+from apps.schools.services.scope_service import UserScopeService
 
 
 class ResourceCategoryViewSet(viewsets.ModelViewSet):
@@ -78,9 +80,7 @@ class ResourceViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'student':
             # Students see public + classroom resources they're enrolled in
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student=user, is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return Resource.objects.filter(
                 Q(access_level='public') |
@@ -90,10 +90,7 @@ class ResourceViewSet(viewsets.ModelViewSet):
         
         elif user.role == 'parent':
             # Parents see public + classroom resources their children can access
-            children = user.children_relationships.values_list('student_id', flat=True)
-            enrolled_classrooms = ClassroomEnrollment.objects.filter(
-                student_id__in=children, is_active=True
-            ).values_list('classroom_id', flat=True)
+            enrolled_classrooms = UserScopeService.for_request(self.request).classroom_ids
             
             return Resource.objects.filter(
                 Q(access_level='public') |
@@ -143,8 +140,7 @@ class ResourceViewSet(viewsets.ModelViewSet):
         )
         
         # Increment download count
-        resource.download_count += 1
-        resource.save(update_fields=['download_count'])
+        DeferredCounter.incr(Resource, resource.pk, 'download_count')
         
         # Return file
         return FileResponse(resource.file.open('rb'), as_attachment=True, filename=os.path.basename(resource.file.name))
@@ -216,9 +212,11 @@ class ResourceViewSet(viewsets.ModelViewSet):
 class ResourceDownloadViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing download history"""
     serializer_class = ResourceDownloadSerializer
+    pagination_class = FeedCursorPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['resource', 'user']
+    ordering_fields = ['downloaded_at']
     ordering = ['-downloaded_at']
     
     def get_queryset(self):
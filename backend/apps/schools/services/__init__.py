@@ -0,0 +1,3 @@
+"""
+Services package for schools app
+"""
@@ -0,0 +1,137 @@
+"""
+Scope Service
+
+Resolves the classrooms and children a user can see, which nearly every
+role-based queryset filters on. A user's scope is computed at most once per
+request and cached under a per-user version stamp; enrollment, parent-student
+and classroom-teacher changes replace the stamp, so a stale scope is never
+read back.
+"""
+
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, Tuple
+
+from django.core.cache import cache
+
+from apps.accounts.models import ParentStudentRelationship
+from ..models import Classroom, ClassroomEnrollment
+
+
+@dataclass(frozen=True)
+class UserScope:
+    """What a user can see, as id tuples ready for __in lookups"""
+    role: str
+    enrolled_classroom_ids: Tuple = ()
+    children_ids: Tuple = ()
+    children_classroom_ids: Tuple = ()
+    taught_classroom_ids: Tuple = ()
+
+    @property
+    def classroom_ids(self) -> Tuple:
+        """Classrooms visible to the user's role"""
+        if self.role == 'student':
+            return self.enrolled_classroom_ids
+        if self.role == 'parent':
+            return self.children_classroom_ids
+        if self.role == 'teacher':
+            return self.taught_classroom_ids
+        return ()
+
+
+class UserScopeService:
+    """Service for resolving and invalidating cached user scopes"""
+
+    CACHE_TIMEOUT = 60 * 60
+    VERSION_TIMEOUT = 60 * 60 * 24 * 7
+    REQUEST_ATTRIBUTE = '_user_scope'
+
+    @classmethod
+    def for_request(cls, request) -> UserScope:
+        """Scope of the request's user, resolved once per request"""
+        # DRF wraps the Django request; memoize on the underlying one so
+        # views, serializers and permissions share a single resolution
+        http_request = getattr(request, '_request', request)
+        scope = getattr(http_request, cls.REQUEST_ATTRIBUTE, None)
+        if scope is None:
+            scope = cls.for_user(request.user)
+            setattr(http_request, cls.REQUEST_ATTRIBUTE, scope)
+        return scope
+
+    @classmethod
+    def for_user(cls, user) -> UserScope:
+        """Scope of a user, from the cache when their stamp is current"""
+        key = f'user_scope:{user.pk}:{user.role}:{cls.version(user.pk)}'
+        scope = cache.get(key)
+        if scope is None:
+            scope = cls.compute(user)
+            cache.set(key, scope, cls.CACHE_TIMEOUT)
+        return scope
+
+    @classmethod
+    def compute(cls, user) -> UserScope:
+        """Build a user's scope from the database"""
+        if user.role == 'student':
+            return UserScope(
+                role=user.role,
+                enrolled_classroom_ids=tuple(ClassroomEnrollment.objects.filter(
+                    student=user,
+                    is_active=True
+                ).values_list('classroom_id', flat=True))
+            )
+
+        if user.role == 'parent':
+            children_ids = tuple(ParentStudentRelationship.objects.filter(
+                parent=user
+            ).values_list('student_id', flat=True))
+            children_classroom_ids = tuple(ClassroomEnrollment.objects.filter(
+                student_id__in=children_ids,
+                is_active=True
+            ).values_list('classroom_id', flat=True).distinct()) if children_ids else ()
+            return UserScope(
+                role=user.role,
+                children_ids=children_ids,
+                children_classroom_ids=children_classroom_ids
+            )
+
+        if user.role == 'teacher':
+            return UserScope(
+                role=user.role,
+                taught_classroom_ids=tuple(Classroom.objects.filter(
+                    teacher=user
+                ).values_list('id', flat=True))
+            )
+
+        return UserScope(role=user.role)
+
+    @classmethod
+    def invalidate(cls, user_ids: Iterable) -> None:
+        """Give users a fresh stamp so their cached scopes are no longer read"""
+        cache.set_many(
+            {cls._version_key(user_id): uuid.uuid4().hex for user_id in set(user_ids) if user_id},
+            cls.VERSION_TIMEOUT
+        )
+
+    @classmethod
+    def invalidate_student(cls, student_id) -> None:
+        """A student's enrollments changed: their scope and their parents' are stale"""
+        parent_ids = list(ParentStudentRelationship.objects.filter(
+            student_id=student_id
+        ).values_list('parent_id', flat=True))
+        cls.invalidate([student_id, *parent_ids])
+
+    @classmethod
+    def version(cls, user_id) -> str:
+        """Current scope stamp of a user; changes whenever their scope does"""
+        key = cls._version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            # Random rather than counted, so an evicted stamp can never be
+            # re-issued and revive scopes cached under it
+            cache.add(key, uuid.uuid4().hex, cls.VERSION_TIMEOUT)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def _version_key(user_id) -> str:
+        return f'user_scope:version:{user_id}'
@@ -0,0 +1,61 @@
+"""
+Signals for schools app
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.accounts.models import ParentStudentRelationship
+from .models import Classroom, ClassroomEnrollment
+from .services.scope_service import UserScopeService
+
+
+@receiver(post_save, sender=ClassroomEnrollment)
+@receiver(post_delete, sender=ClassroomEnrollment)
+def invalidate_enrollment_scope(sender, instance, **kwargs):
+    """
+    Enrollments changed: refresh the student's and their parents' scopes
+    once the change is committed
+    """
+    transaction.on_commit(lambda: UserScopeService.invalidate_student(instance.student_id))
+
+
+@receiver(post_save, sender=ParentStudentRelationship)
+@receiver(post_delete, sender=ParentStudentRelationship)
+def invalidate_relationship_scope(sender, instance, **kwargs):
+    """
+    A parent gained or lost a child: refresh the parent's scope
+    """
+    transaction.on_commit(lambda: UserScopeService.invalidate([instance.parent_id]))
+
+
+@receiver(pre_save, sender=Classroom)
+def remember_previous_teacher(sender, instance, **kwargs):
+    """
+    Note who taught the classroom before this save
+    """
+    instance._previous_teacher_id = None
+    if not instance._state.adding:
+        instance._previous_teacher_id = Classroom.objects.filter(
+            pk=instance.pk
+        ).values_list('teacher_id', flat=True).first()
+
+
+@receiver(post_save, sender=Classroom)
+def invalidate_classroom_scope(sender, instance, created, **kwargs):
+    """
+    A classroom was created or reassigned: refresh the teachers' scopes
+    """
+    previous_teacher_id = getattr(instance, '_previous_teacher_id', None)
+    if created or previous_teacher_id != instance.teacher_id:
+        teacher_ids = [instance.teacher_id, previous_teacher_id]
+        transaction.on_commit(lambda: UserScopeService.invalidate(teacher_ids))
+
+
+@receiver(post_delete, sender=Classroom)
+def invalidate_deleted_classroom_scope(sender, instance, **kwargs):
+    """
+    A classroom was removed: refresh its teacher's scope
+    """
+    transaction.on_commit(lambda: UserScopeService.invalidate([instance.teacher_id]))
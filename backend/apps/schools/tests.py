@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.accounts.models import ParentStudentRelationship
+from apps.schools.models import AcademicYear, Classroom, ClassroomEnrollment, School, Subject
+from apps.schools.services.scope_service import UserScopeService
+
+User = get_user_model()
+
+
+class UserScopeTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(email='teacher@example.com', password='password', role='teacher')
+        self.other_teacher = User.objects.create_user(email='other@example.com', password='password', role='teacher')
+        self.student = User.objects.create_user(email='student@example.com', password='password', role='student')
+        self.sibling = User.objects.create_user(email='sibling@example.com', password='password', role='student')
+        self.parent = User.objects.create_user(email='parent@example.com', password='password', role='parent')
+        school = School.objects.create(
+            name='Test School', code='TEST01',
+            city='Test City', state='Test State', pincode='123456',
+            email='school@test.com', principal_name='Principal', established_year=2000
+        )
+        academic_year = AcademicYear.objects.create(
+            school=school, name='2025-2026',
+            start_date='2025-01-01', end_date='2026-01-01'
+        )
+        subject = Subject.objects.create(name='Test Subject', code='SUBJ001', grade=5)
+        self.classrooms = [
+            Classroom.objects.create(
+                school=school, academic_year=academic_year, subject=subject,
+                grade=5, section=section, class_code=f'TESTCLASS0{index}', teacher=teacher
+            )
+            for index, (section, teacher) in enumerate(
+                [('A', self.teacher), ('B', self.teacher), ('C', self.other_teacher)]
+            )
+        ]
+        first, second, third = self.classrooms
+        ClassroomEnrollment.objects.create(classroom=first, student=self.student)
+        ClassroomEnrollment.objects.create(classroom=second, student=self.sibling)
+        ClassroomEnrollment.objects.create(classroom=third, student=self.sibling, is_active=False)
+        ParentStudentRelationship.objects.create(parent=self.parent, student=self.student, relationship_type='mother')
+
+    def ids(self, *classrooms):
+        return {classroom.pk for classroom in classrooms}
+
+    def test_scope_by_role(self):
+        first, second, third = self.classrooms
+
+        student = UserScopeService.for_user(self.student)
+        self.assertEqual(set(student.classroom_ids), self.ids(first))
+        self.assertEqual(set(UserScopeService.for_user(self.sibling).classroom_ids), self.ids(second))
+
+        parent = UserScopeService.for_user(self.parent)
+        self.assertEqual(parent.children_ids, (self.student.pk,))
+        self.assertEqual(set(parent.classroom_ids), self.ids(first))
+
+        self.assertEqual(set(UserScopeService.for_user(self.teacher).classroom_ids), self.ids(first, second))
+        self.assertEqual(set(UserScopeService.for_user(self.other_teacher).classroom_ids), self.ids(third))
+
+        admin = User.objects.create_user(email='admin@example.com', password='password', role='admin')
+        self.assertEqual(UserScopeService.for_user(admin).classroom_ids, ())
+
+    def test_resolved_once_per_request(self):
+        request = Request(APIRequestFactory().get('/api/v1/lectures/lectures/'))
+        request.user = self.student
+        with self.assertNumQueries(1):
+            scope = UserScopeService.for_request(request)
+            self.assertIs(UserScopeService.for_request(request), scope)
+            # Views and serializers may hold the underlying Django request
+            self.assertIs(UserScopeService.for_request(request._request), scope)
+
+        # Later requests read the cached scope
+        request = Request(APIRequestFactory().get('/api/v1/lectures/lectures/'))
+        request.user = self.student
+        with self.assertNumQueries(0):
+            self.assertEqual(UserScopeService.for_request(request), scope)
+
+    def test_enrollment_changes_apply_at_once(self):
+        second = self.classrooms[1]
+        # Cached before the change
+        for user in (self.student, self.parent):
+            UserScopeService.for_user(user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment = ClassroomEnrollment.objects.create(classroom=second, student=self.student)
+        self.assertIn(second.pk, UserScopeService.for_user(self.student).classroom_ids)
+        self.assertIn(second.pk, UserScopeService.for_user(self.parent).classroom_ids)
+
+        enrollment.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.save()
+        self.assertNotIn(second.pk, UserScopeService.for_user(self.student).classroom_ids)
+        self.assertNotIn(second.pk, UserScopeService.for_user(self.parent).classroom_ids)
+
+    def test_relationship_changes_apply_at_once(self):
+        self.assertEqual(UserScopeService.for_user(self.parent).children_ids, (self.student.pk,))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            relationship = ParentStudentRelationship.objects.create(
+                parent=self.parent, student=self.sibling, relationship_type='mother'
+            )
+        scope = UserScopeService.for_user(self.parent)
+        self.assertEqual(set(scope.children_ids), {self.student.pk, self.sibling.pk})
+        self.assertEqual(set(scope.classroom_ids), self.ids(*self.classrooms[:2]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            relationship.delete()
+        self.assertEqual(UserScopeService.for_user(self.parent).children_ids, (self.student.pk,))
+
+    def test_teacher_reassignment_applies_at_once(self):
+        third = self.classrooms[2]
+        for user in (self.teacher, self.other_teacher):
+            UserScopeService.for_user(user)
+
+        third.teacher = self.teacher
+        with self.captureOnCommitCallbacks(execute=True):
+            third.save()
+        self.assertIn(third.pk, UserScopeService.for_user(self.teacher).classroom_ids)
+        self.assertEqual(UserScopeService.for_user(self.other_teacher).classroom_ids, ())
+
+    def test_new_classroom_reads_no_previous_row(self):
+        first = self.classrooms[0]
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                classroom = Classroom.objects.create(
+                    school=first.school, academic_year=first.academic_year, subject=first.subject,
+                    grade=5, section='D', class_code='TESTCLASS09', teacher=self.other_teacher
+                )
+        selects = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith('SELECT') and '"schools_classroom"' in q['sql']]
+        self.assertEqual(selects, [])
+        self.assertIn(classroom.pk, UserScopeService.for_user(self.other_teacher).classroom_ids)
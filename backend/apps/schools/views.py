@@ -16,6 +16,7 @@ from .serializers import (
 )
 from apps.core.permissions import IsTeacher, IsAdmin
 from apps.core.utils import generate_unique_code
+from .services.scope_service import UserScopeService
 
 
 class SchoolViewSet(viewsets.ModelViewSet):
@@ -104,11 +105,8 @@ class ClassroomViewSet(viewsets.ModelViewSet):
         
         if user.role == 'teacher':
             return queryset.filter(teacher=user)
-        elif user.role == 'student':
-            return queryset.filter(enrollments__student=user, enrollments__is_active=True)
-        elif user.role == 'parent':
-            student_ids = user.children_relationships.values_list('student_id', flat=True)
-            return queryset.filter(enrollments__student_id__in=student_ids, enrollments__is_active=True)
+        elif user.role in ('student', 'parent'):
+            return queryset.filter(pk__in=UserScopeService.for_request(self.request).classroom_ids)
         
         return queryset
     
@@ -180,7 +178,7 @@ class ClassroomEnrollmentViewSet(viewsets.ModelViewSet):
         elif user.role == 'teacher':
             return queryset.filter(classroom__teacher=user)
         elif user.role == 'parent':
-            student_ids = user.children_relationships.values_list('student_id', flat=True)
+            student_ids = UserScopeService.for_request(self.request).children_ids
             return queryset.filter(student_id__in=student_ids)
         
         return queryset
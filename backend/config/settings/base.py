@@ -6,6 +6,7 @@ Base settings shared across all environments.
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -16,6 +17,7 @@ SECRET_KEY = config('SECRET_KEY', default='django-insecure-change-this-in-produc
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver, so WebSockets work in development
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -85,6 +87,14 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 ASGI_APPLICATION = 'config.asgi.application'
 
+# Real-time push (apps.core.realtime). The in-memory layer only reaches
+# sockets served by the same process; production uses Redis.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
 # Database
 DATABASES = {
     'default': {
@@ -156,7 +166,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'apps.core.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -204,6 +214,67 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_RESULT_BACKEND = 'django-db'
 CELERY_CACHE_BACKEND = 'django-cache'
+CELERY_BEAT_SCHEDULE = {
+    # Buffered view/download/play counts (apps.core.counters)
+    'flush-deferred-counters': {
+        'task': 'apps.core.tasks.flush_counters',
+        'schedule': 10.0,
+    },
+    # Notifications deferred by quiet hours (apps.notifications)
+    'release-deferred-notifications': {
+        'task': 'apps.notifications.tasks.release_deferred_notifications',
+        'schedule': 60.0,
+    },
+    # Email digests by NotificationPreference.email_frequency
+    'send-instant-email-digests': {
+        'task': 'apps.notifications.tasks.send_email_digests',
+        'schedule': 60.0,
+        'args': ('instant',),
+    },
+    'send-daily-email-digests': {
+        'task': 'apps.notifications.tasks.send_email_digests',
+        'schedule': crontab(hour=7, minute=0),
+        'args': ('daily',),
+    },
+    'send-weekly-email-digests': {
+        'task': 'apps.notifications.tasks.send_email_digests',
+        'schedule': crontab(hour=7, minute=0, day_of_week='mon'),
+        'args': ('weekly',),
+    },
+    # ReportSchedule runs (apps.reports.services.schedule_service)
+    'run-due-report-schedules': {
+        'task': 'apps.reports.tasks.run_due_report_schedules',
+        'schedule': 60.0,
+    },
+    # Reports whose generation task was lost (apps.reports.services.report_service)
+    'requeue-stale-reports': {
+        'task': 'apps.reports.tasks.requeue_stale_reports',
+        'schedule': 60.0,
+    },
+    # Monthly notification partitions: create ahead, drop past retention
+    'maintain-notification-partitions': {
+        'task': 'apps.notifications.tasks.maintain_notification_partitions',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
+# Notification storage (apps.notifications.services.partition_service)
+NOTIFICATION_RETENTION_MONTHS = config('NOTIFICATION_RETENTION_MONTHS', default=12, cast=int)
+NOTIFICATION_PARTITIONS_AHEAD = 3
+
+# Cache Configuration (production points the default cache at Redis)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'premium-edu',
+    }
+}
+
+# Published content cache (apps.core.content_cache): a per-process LRU of
+# this many entries in front of the shared cache alias
+CONTENT_CACHE_ALIAS = 'default'
+CONTENT_CACHE_LOCAL_ENTRIES = config('CONTENT_CACHE_LOCAL_ENTRIES', default=2048, cast=int)
+CONTENT_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
 
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
@@ -213,6 +284,15 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@premiumedu.com')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+# Used by django.core.mail.backends.filebased.EmailBackend for offline testing
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'logs' / 'emails'))
+
+# Stored files served by the web server instead of Django (apps.notes.services.pdf_service):
+# 'X-Sendfile' (Apache, lighttpd) or 'X-Accel-Redirect' (nginx, with an internal location
+# at SENDFILE_URL_PREFIX aliased to MEDIA_ROOT); empty streams them from Django
+SENDFILE_HEADER = config('SENDFILE_HEADER', default='')
+SENDFILE_URL_PREFIX = config('SENDFILE_URL_PREFIX', default='/protected-media/')
 
 # File Upload Settings
 MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # 100 MB
@@ -53,7 +53,7 @@ INTERNAL_IPS = [
 
 # Allow browsable API in development
 REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
-    'rest_framework.renderers.JSONRenderer',
+    'apps.core.renderers.FastJSONRenderer',
     'rest_framework.renderers.BrowsableAPIRenderer',
 ]
 
@@ -90,6 +90,18 @@ CACHES = {
     }
 }
 
+# Channel layer shared by every ASGI worker (apps.core.realtime)
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [config('CHANNEL_REDIS_URL', default='redis://localhost:6379/2')],
+            'capacity': 1000,
+            'expiry': 30,
+        },
+    }
+}
+
 # Session Configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
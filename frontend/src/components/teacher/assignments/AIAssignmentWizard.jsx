@@ -293,7 +293,7 @@ function StepSelectLecture({ lectures, formData, setFormData, onNext }) {
             ) : (
                 <div className="grid grid-cols-1 gap-3 max-h-96 overflow-y-auto scrollbar-custom">
                     {lectures.map((lecture) => {
-                        const hasTranscript = !!lecture.transcript;
+                        const hasTranscript = lecture.transcript_length > 0;
                         return (
                             <motion.div
                                 key={lecture.id}
@@ -326,7 +326,7 @@ function StepSelectLecture({ lectures, formData, setFormData, onNext }) {
                                                 {lecture.subject?.name || 'General'}
                                             </Badge>
                                             <span className="text-xs text-[#9CA3AF]">
-                                                {lecture.transcript?.length || 0} chars
+                                                {lecture.transcript_length || 0} chars
                                             </span>
                                         </div>
                                     </div>
@@ -11,6 +11,7 @@ import {
     Loader2
 } from 'lucide-react';
 import communicationService from '../../services/communication.service';
+import realtimeService from '../../services/realtime.service';
 import { useAuthStore } from '../../store/authStore';
 
 export function ParentMessagesPage() {
@@ -25,11 +26,23 @@ export function ParentMessagesPage() {
     const [sending, setSending] = useState(false);
     const messagesEndRef = useRef(null);
 
-    // Poll for new messages
+    // New messages are pushed over the realtime socket; poll only while it is down
     useEffect(() => {
         fetchConversations();
-        const interval = setInterval(fetchConversations, 30000);
-        return () => clearInterval(interval);
+        const unsubscribe = realtimeService.subscribe((event) => {
+            if (event.type === 'message.created') {
+                fetchConversations();
+            }
+        });
+        const interval = setInterval(() => {
+            if (!realtimeService.isConnected()) {
+                fetchConversations();
+            }
+        }, 30000);
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     useEffect(() => {
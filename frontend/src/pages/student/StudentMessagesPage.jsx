@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import { Search, Send, MoreVertical, Plus } from 'lucide-react';
 import { Button } from '../../components/ui/button';
 import communicationService from '../../services/communication.service';
+import realtimeService from '../../services/realtime.service';
 import { useAuthStore } from '../../store/authStore';
 
 export function StudentMessagesPage() {
@@ -22,11 +23,23 @@ export function StudentMessagesPage() {
     const [teacherSearch, setTeacherSearch] = useState('');
     const [startingChat, setStartingChat] = useState(false);
 
-    // Poll for new messages every 30 seconds
+    // New messages are pushed over the realtime socket; poll only while it is down
     useEffect(() => {
         fetchConversations();
-        const interval = setInterval(fetchConversations, 30000);
-        return () => clearInterval(interval);
+        const unsubscribe = realtimeService.subscribe((event) => {
+            if (event.type === 'message.created') {
+                fetchConversations();
+            }
+        });
+        const interval = setInterval(() => {
+            if (!realtimeService.isConnected()) {
+                fetchConversations();
+            }
+        }, 30000);
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     useEffect(() => {
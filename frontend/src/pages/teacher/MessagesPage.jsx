@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import { Search, Send, MoreVertical, Plus, GraduationCap, Users, User } from 'lucide-react';
 import { Button } from '../../components/ui/button';
 import communicationService from '../../services/communication.service';
+import realtimeService from '../../services/realtime.service';
 import { useAuthStore } from '../../store/authStore';
 
 export function MessagesPage() {
@@ -16,11 +17,23 @@ export function MessagesPage() {
     const [initialLoading, setInitialLoading] = useState(true);
     const messagesEndRef = useRef(null);
 
-    // Poll for new messages every 30 seconds
+    // New messages are pushed over the realtime socket; poll only while it is down
     useEffect(() => {
         fetchConversations();
-        const interval = setInterval(fetchConversations, 30000);
-        return () => clearInterval(interval);
+        const unsubscribe = realtimeService.subscribe((event) => {
+            if (event.type === 'message.created') {
+                fetchConversations();
+            }
+        });
+        const interval = setInterval(() => {
+            if (!realtimeService.isConnected()) {
+                fetchConversations();
+            }
+        }, 30000);
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     useEffect(() => {
@@ -0,0 +1,65 @@
+const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1';
+
+// ws://host/ws/notifications/ next to the REST API
+const SOCKET_URL = `${API_BASE_URL.replace(/^http/, 'ws').replace(/\/api\/v1\/?$/, '')}/ws/notifications/`;
+const PING_INTERVAL = 30000;
+const MAX_RETRY_DELAY = 30000;
+
+let socket = null;
+let pingTimer = null;
+let retryTimer = null;
+let retryDelay = 1000;
+const listeners = new Set();
+
+const connect = () => {
+    const token = localStorage.getItem('access_token');
+    if (!token || socket) return;
+
+    socket = new WebSocket(`${SOCKET_URL}?token=${encodeURIComponent(token)}`);
+
+    socket.onopen = () => {
+        retryDelay = 1000;
+        pingTimer = setInterval(() => socket?.send(JSON.stringify({ type: 'ping' })), PING_INTERVAL);
+    };
+
+    socket.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        listeners.forEach((listener) => listener(event));
+    };
+
+    socket.onclose = () => {
+        clearInterval(pingTimer);
+        socket = null;
+        // Reconnect with backoff while anything is listening
+        if (listeners.size > 0) {
+            retryTimer = setTimeout(connect, retryDelay);
+            retryDelay = Math.min(retryDelay * 2, MAX_RETRY_DELAY);
+        }
+    };
+};
+
+const disconnect = () => {
+    clearTimeout(retryTimer);
+    clearInterval(pingTimer);
+    if (socket) {
+        socket.onclose = null;
+        socket.close();
+        socket = null;
+    }
+};
+
+const realtimeService = {
+    // Listen for pushed events ({ type: 'message.created', ... }); returns an unsubscribe function
+    subscribe: (listener) => {
+        listeners.add(listener);
+        connect();
+        return () => {
+            listeners.delete(listener);
+            if (listeners.size === 0) disconnect();
+        };
+    },
+
+    isConnected: () => socket?.readyState === WebSocket.OPEN,
+};
+
+export default realtimeService;